@@ -0,0 +1,164 @@
+"""
+API Authentication
+Verifies Keycloak bearer tokens (realm opsconductor) for API routes
+
+Tokens are RS256 JWTs checked against the realm's JWKS, which is fetched
+once and re-fetched when a token names a key it does not contain (key
+rotation). Signature, expiry and issuer are always verified, the audience
+only when KEYCLOAK_AUDIENCE is set. The actor ID is the token's numeric
+`actor_id` claim, mapped from the user attribute of the same name by the
+realm's opsconductor-frontend client.
+
+Configuration:
+    KEYCLOAK_URL       Keycloak base URL (default http://keycloak:8080)
+    KEYCLOAK_REALM     Realm name (default opsconductor)
+    KEYCLOAK_ISSUER    Expected `iss` (default <KEYCLOAK_URL>/realms/<realm>)
+    KEYCLOAK_AUDIENCE  Expected `aud` (optional)
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+import httpx
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+logger = logging.getLogger(__name__)
+
+KEYCLOAK_URL = os.getenv("KEYCLOAK_URL", "http://keycloak:8080").rstrip("/")
+KEYCLOAK_REALM = os.getenv("KEYCLOAK_REALM", "opsconductor")
+KEYCLOAK_ISSUER = os.getenv("KEYCLOAK_ISSUER", f"{KEYCLOAK_URL}/realms/{KEYCLOAK_REALM}")
+KEYCLOAK_AUDIENCE = os.getenv("KEYCLOAK_AUDIENCE") or None
+
+# Minimum seconds between JWKS fetches triggered by unknown key IDs
+JWKS_REFETCH_INTERVAL = 30.0
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Verified caller"""
+
+    subject: str
+    username: str
+    actor_id: int
+    roles: FrozenSet[str]
+
+
+# ============================================================================
+# TOKEN VERIFICATION
+# ============================================================================
+
+class JWKSCache:
+    """Realm signing keys by key ID, re-fetched on an unknown key ID"""
+
+    def __init__(self, jwks_url: str):
+        self.jwks_url = jwks_url
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> Dict[str, Any]:
+        response = httpx.get(self.jwks_url, timeout=5.0)
+        response.raise_for_status()
+        return response.json()
+
+    def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Signing key for a key ID (None if the realm does not have it)"""
+        with self._lock:
+            stale = self._fetched_at is None or time.monotonic() - self._fetched_at >= JWKS_REFETCH_INTERVAL
+            if kid not in self._keys and stale:
+                try:
+                    self._keys = {key.get("kid"): key for key in self._fetch().get("keys", [])}
+                    self._fetched_at = time.monotonic()
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.error(f"Failed to fetch Keycloak JWKS from {self.jwks_url}: {e}")
+            return self._keys.get(kid)
+
+
+_jwks = JWKSCache(f"{KEYCLOAK_URL}/realms/{KEYCLOAK_REALM}/protocol/openid-connect/certs")
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a bearer token and return its claims
+
+    Raises:
+        JWTError: Malformed, unsigned by the realm, expired or wrong issuer/audience
+    """
+    header = jwt.get_unverified_header(token)
+    key = _jwks.get_key(header.get("kid"))
+    if key is None:
+        raise JWTError("Token signed with an unknown key")
+    return jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=KEYCLOAK_AUDIENCE,
+        issuer=KEYCLOAK_ISSUER,
+        options={"verify_aud": KEYCLOAK_AUDIENCE is not None},
+    )
+
+
+# ============================================================================
+# DEPENDENCIES
+# ============================================================================
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Principal:
+    """
+    Caller identified by a verified Keycloak bearer token
+
+    Raises:
+        HTTPException: 401 without a valid token, 403 if it has no actor_id
+    """
+    if credentials is None:
+        raise _unauthorized("Bearer token required")
+    try:
+        claims = verify_token(credentials.credentials)
+    except JWTError as e:
+        raise _unauthorized(f"Invalid token: {e}")
+
+    actor_id = claims.get("actor_id")
+    if isinstance(actor_id, str) and actor_id.isdigit():
+        actor_id = int(actor_id)
+    if not isinstance(actor_id, int) or isinstance(actor_id, bool):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token carries no actor_id")
+
+    return Principal(
+        subject=claims.get("sub", ""),
+        username=claims.get("preferred_username", ""),
+        actor_id=actor_id,
+        roles=frozenset(claims.get("realm_access", {}).get("roles", [])),
+    )
+
+
+def require_roles(*roles: str) -> Callable[..., Principal]:
+    """Dependency: verified caller holding at least one of `roles`"""
+    allowed = frozenset(roles)
+
+    def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if not principal.roles & allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Requires one of roles: {', '.join(sorted(allowed))}",
+            )
+        return principal
+
+    return dependency
@@ -246,16 +246,25 @@ def _register_profile_loader_handler():
     def profile_loader_reload_handler(event):
         """Handler to reload ProfileLoader on tool updates"""
         try:
-            loader = get_loader(use_database=True)
+            # The shared loader (passing use_database would replace it with a new one)
+            loader = get_loader()
             loader.reload(tool_name=event.tool_name)
             logger.info(f"ProfileLoader reloaded for tool: {event.tool_name or 'all'}")
         except Exception as e:
             logger.error(f"ProfileLoader reload failed: {e}")
             raise
     
+    def semantic_cache_reload_handler(event):
+        """Cached Stage AB selections may name changed or removed tools"""
+        from pipeline.cache.semantic_cache import get_semantic_cache
+        cache = get_semantic_cache()
+        if cache is not None:
+            cache.clear()
+    
     reload_service = get_reload_service()
     reload_service.register_reload_handler(profile_loader_reload_handler)
-    logger.info("ProfileLoader reload handler registered")
+    reload_service.register_reload_handler(semantic_cache_reload_handler)
+    logger.info("ProfileLoader and semantic cache reload handlers registered")
 
 def trigger_tool_reload(tool_name: Optional[str] = None, triggered_by: str = "api"):
     """
@@ -119,19 +119,20 @@ async def record_ai_query(
 )
 async def audit_health() -> JSONResponse:
     """Check audit subsystem health."""
-    from audit.sinks import _audit_queue, _audit_worker_task
+    from audit.sinks import get_audit_statistics
     
-    queue_size = _audit_queue.qsize() if _audit_queue else None
-    worker_running = _audit_worker_task and not _audit_worker_task.done()
+    stats = get_audit_statistics()
+    worker_running = bool(stats and stats["worker_running"])
     
-    healthy = _audit_queue is not None and worker_running
+    healthy = stats is not None and worker_running
     
     return JSONResponse(
         status_code=200 if healthy else 503,
         content={
             "status": "healthy" if healthy else "unhealthy",
-            "queue_initialized": _audit_queue is not None,
+            "queue_initialized": stats is not None,
             "worker_running": worker_running,
-            "queue_size": queue_size,
+            "queue_size": stats["queue_size"] if stats else None,
+            "sink": stats,
         }
-    )
\ No newline at end of file
+    )
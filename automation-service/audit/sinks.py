@@ -1,11 +1,22 @@
-"""Audit sinks for persisting AI query records to various backends."""
+"""Audit sinks for persisting AI query records to various backends.
+
+Records flow through an AuditPipeline: a bounded in-memory queue drained
+by one worker that writes batches (flushed by size or time) with a single
+sink call each - COPY for Postgres, one push for Loki. When the queue is
+full, or a batch cannot be written, records go to an append-only local
+spool file instead of being dropped; the worker replays the spool once the
+sink accepts writes again, including after a restart. Delivery is
+at-least-once: a crash between a batch write and its spool checkpoint
+replays that batch.
+"""
 
 import os
 import json
+import time
 import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
 
 import httpx
@@ -14,6 +25,9 @@ from audit.models import AIQueryAuditRecord
 
 logger = logging.getLogger(__name__)
 
+# Spool directory when AUDIT_SPOOL_PATH is unset; mount a persistent volume here
+DEFAULT_SPOOL_DIR = "/var/lib/automation-service/audit"
+
 
 class AuditSink(ABC):
     """Abstract base class for audit sinks."""
@@ -29,6 +43,27 @@ class AuditSink(ABC):
             True if write succeeded, False otherwise
         """
         pass
+    
+    async def write_batch(self, records: Sequence[AIQueryAuditRecord]) -> bool:
+        """Write a batch of audit records (all or nothing where the backend allows).
+        
+        Sinks with a bulk path override this; the default writes one by one.
+        
+        Args:
+            records: The audit records to persist
+            
+        Returns:
+            True if every record was written, False otherwise
+        """
+        ok = True
+        for record in records:
+            ok = await self.write(record) and ok
+        return ok
+    
+    @property
+    def name(self) -> str:
+        """Sink label for metrics."""
+        return type(self).__name__
 
 
 class StdoutSink(AuditSink):
@@ -36,16 +71,20 @@ class StdoutSink(AuditSink):
     
     async def write(self, record: AIQueryAuditRecord) -> bool:
         """Write audit record to stdout."""
+        return await self.write_batch([record])
+    
+    async def write_batch(self, records: Sequence[AIQueryAuditRecord]) -> bool:
+        """Write audit records to stdout, one JSON line each, in one print."""
         try:
-            log_entry = {
-                "audit_type": "ai_query",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                **record.model_dump(mode='json')
-            }
-            print(json.dumps(log_entry), flush=True)
+            timestamp = datetime.now(timezone.utc).isoformat()
+            lines = [
+                json.dumps({"audit_type": "ai_query", "timestamp": timestamp, **record.model_dump(mode='json')})
+                for record in records
+            ]
+            print("\n".join(lines), flush=True)
             return True
         except Exception as e:
-            logger.error(f"Failed to write audit record to stdout: {e}")
+            logger.error(f"Failed to write {len(records)} audit records to stdout: {e}")
             return False
 
 
@@ -67,28 +106,30 @@ class LokiSink(AuditSink):
     
     async def write(self, record: AIQueryAuditRecord) -> bool:
         """Write audit record to Loki with retry logic."""
-        # Convert record to Loki format
+        return await self.write_batch([record])
+    
+    async def write_batch(self, records: Sequence[AIQueryAuditRecord]) -> bool:
+        """Push a batch of audit records to Loki in one request, with retry logic."""
+        # Convert records to Loki format, one stream per label set
         # Loki expects: {"streams": [{"stream": {...labels...}, "values": [[timestamp_ns, line]]}]}
-        timestamp_ns = str(int(record.created_at.timestamp() * 1_000_000_000))
-        
-        labels = {
-            "job": "audit",
-            "type": "ai_query",
-            "user_id": record.user_id,
-            "trace_id": record.trace_id,
-        }
-        
-        # Serialize the full record as the log line
-        log_line = json.dumps(record.model_dump(mode='json'))
-        
-        payload = {
-            "streams": [
-                {
-                    "stream": labels,
-                    "values": [[timestamp_ns, log_line]]
+        streams: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for record in records:
+            timestamp_ns = str(int(record.created_at.timestamp() * 1_000_000_000))
+            stream = streams.get((record.user_id, record.trace_id))
+            if stream is None:
+                stream = streams[(record.user_id, record.trace_id)] = {
+                    "stream": {
+                        "job": "audit",
+                        "type": "ai_query",
+                        "user_id": record.user_id,
+                        "trace_id": record.trace_id,
+                    },
+                    "values": []
                 }
-            ]
-        }
+            # Serialize the full record as the log line
+            stream["values"].append([timestamp_ns, json.dumps(record.model_dump(mode='json'))])
+        
+        payload = {"streams": list(streams.values())}
         
         # Retry logic with exponential backoff
         for attempt in range(self.max_retries):
@@ -100,7 +141,7 @@ class LokiSink(AuditSink):
                 )
                 
                 if response.status_code < 300:
-                    logger.debug(f"Successfully wrote audit record to Loki: {record.trace_id}")
+                    logger.debug(f"Successfully wrote {len(records)} audit records to Loki")
                     return True
                 elif response.status_code >= 500:
                     # Server error - retry
@@ -126,7 +167,7 @@ class LokiSink(AuditSink):
                 )
                 await asyncio.sleep(delay)
         
-        logger.error(f"Failed to write audit record to Loki after {self.max_retries} attempts")
+        logger.error(f"Failed to write {len(records)} audit records to Loki after {self.max_retries} attempts")
         return False
     
     async def close(self):
@@ -137,6 +178,8 @@ class LokiSink(AuditSink):
 class PostgresSink(AuditSink):
     """Writes audit records to PostgreSQL."""
     
+    COLUMNS = ["trace_id", "user_id", "input", "output", "tools", "duration_ms", "created_at"]
+    
     def __init__(self, dsn: str):
         """Initialize Postgres sink.
         
@@ -154,33 +197,39 @@ class PostgresSink(AuditSink):
     
     async def write(self, record: AIQueryAuditRecord) -> bool:
         """Write audit record to PostgreSQL."""
+        return await self.write_batch([record])
+    
+    async def write_batch(self, records: Sequence[AIQueryAuditRecord]) -> bool:
+        """Write audit records to PostgreSQL with one COPY (atomic per batch)."""
         try:
             await self._ensure_pool()
             
-            # Serialize tools as JSONB
-            tools_json = json.dumps([tool.model_dump() for tool in record.tools])
-            
-            async with self._pool.acquire() as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO audit_ai_queries 
-                    (trace_id, user_id, input, output, tools, duration_ms, created_at)
-                    VALUES ($1, $2, $3, $4, $5::jsonb, $6, $7)
-                    """,
+            rows = [
+                (
                     record.trace_id,
                     record.user_id,
                     record.input,
                     record.output,
-                    tools_json,
+                    # Serialize tools as JSONB
+                    json.dumps([tool.model_dump() for tool in record.tools]),
                     record.duration_ms,
                     record.created_at
                 )
+                for record in records
+            ]
+            
+            async with self._pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    "audit_ai_queries",
+                    records=rows,
+                    columns=self.COLUMNS
+                )
             
-            logger.debug(f"Successfully wrote audit record to Postgres: {record.trace_id}")
+            logger.debug(f"Successfully wrote {len(rows)} audit records to Postgres")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to write audit record to Postgres: {e}")
+            logger.error(f"Failed to write {len(records)} audit records to Postgres: {e}")
             return False
     
     async def close(self):
@@ -223,53 +272,377 @@ class AuditSinkFactory:
             return StdoutSink()
 
 
-# Global sink instance and queue for non-blocking writes
-_audit_queue: Optional[asyncio.Queue] = None
-_audit_worker_task: Optional[asyncio.Task] = None
-_audit_sink: Optional[AuditSink] = None
+# ============================================================================
+# SPOOL
+# ============================================================================
+
+class AuditSpool:
+    """Append-only JSONL spool for audit records that could not be queued or written.
+    
+    Records are appended at the end and consumed from a checkpointed offset
+    (stored next to the file as <path>.offset), so a restart resumes where
+    replay stopped. The file is truncated once everything has been replayed.
+    """
+    
+    def __init__(self, path: str):
+        """Initialize the spool.
+        
+        Args:
+            path: Spool file path (created on first append)
+        """
+        self.path = path
+        self.offset_path = path + ".offset"
+        self._file = None
+        self.offset = 0
+        self.corrupt = 0
+        
+        if os.path.exists(self.offset_path):
+            try:
+                with open(self.offset_path) as f:
+                    self.offset = int(f.read().strip() or 0)
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable audit spool offset {self.offset_path}, replaying from start: {e}")
+    
+    @property
+    def size(self) -> int:
+        """Bytes in the spool file."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+    
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes not yet replayed."""
+        return max(0, self.size - self.offset)
+    
+    def append(self, records: Sequence[AIQueryAuditRecord]) -> None:
+        """Append records (raises OSError if the disk write fails)."""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "ab")
+        self._file.write(b"".join(record.model_dump_json().encode("utf-8") + b"\n" for record in records))
+        self._file.flush()
+    
+    def read(self, max_records: int) -> Tuple[List[AIQueryAuditRecord], int]:
+        """Read up to max_records unreplayed records.
+        
+        Returns:
+            (records, offset after them) - pass the offset to commit() once written
+        """
+        records: List[AIQueryAuditRecord] = []
+        offset = self.offset
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                while len(records) < max_records:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break  # EOF or a record still being written
+                    offset += len(line)
+                    try:
+                        records.append(AIQueryAuditRecord.model_validate_json(line))
+                    except ValueError as e:
+                        self.corrupt += 1
+                        logger.error(f"Skipping corrupt audit spool line at byte {offset - len(line)}: {e}")
+        except FileNotFoundError:
+            pass
+        return records, offset
+    
+    def commit(self, offset: int) -> None:
+        """Mark everything before offset as replayed."""
+        self.offset = offset
+        if offset >= self.size:
+            # Fully replayed: start a fresh file
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, "wb"):
+                pass
+            self.offset = 0
+            if os.path.exists(self.offset_path):
+                os.remove(self.offset_path)
+            return
+        tmp = self.offset_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.offset_path)
+    
+    def close(self) -> None:
+        """Close the append handle."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 
+# ============================================================================
+# PIPELINE
+# ============================================================================
 
-async def _audit_worker():
-    """Background worker that processes audit records from the queue."""
-    global _audit_sink
+class AuditPipeline:
+    """Bounded queue + batching worker + disk spool in front of one sink."""
+    
+    def __init__(
+        self,
+        sink: AuditSink,
+        max_queue: int = 1000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        spool_path: Optional[str] = None,
+        replay_backoff_max: float = 30.0
+    ):
+        """Initialize the pipeline.
+        
+        Args:
+            sink: Destination sink
+            max_queue: In-memory queue bound; overflow goes to the spool
+            batch_size: Maximum records per sink write
+            flush_interval: Maximum seconds a record waits for its batch to fill
+            spool_path: Spool file (default: audit-spool-<sink>.jsonl in DEFAULT_SPOOL_DIR)
+            replay_backoff_max: Cap on the retry delay while the sink keeps failing
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_backoff_max = replay_backoff_max
+        self.spool = AuditSpool(
+            spool_path or os.path.join(DEFAULT_SPOOL_DIR, f"audit-spool-{sink.name.lower()}.jsonl")
+        )
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.worker_task: Optional[asyncio.Task] = None
+        
+        self._replay_backoff = 0.0
+        self._next_replay = 0.0
+        
+        # Statistics
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.last_write_at: Optional[float] = None
+    
+    # ------------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------------
     
-    while True:
+    def enqueue(self, record: AIQueryAuditRecord) -> bool:
+        """Queue a record; spill it to the spool if the queue is full.
+        
+        Returns:
+            False only if the record was lost (queue full and spool write failed)
+        """
+        self.enqueued += 1
         try:
-            record = await _audit_queue.get()
-            if record is None:  # Shutdown signal
-                break
-            
-            # Write to sink (non-blocking from caller's perspective)
-            await _audit_sink.write(record)
-            
+            self.queue.put_nowait((record, time.monotonic()))
+            return True
+        except asyncio.QueueFull:
+            return self._spool([record], "queue full")
+    
+    def _spool(self, records: Sequence[AIQueryAuditRecord], reason: str) -> bool:
+        try:
+            self.spool.append(records)
+        except OSError as e:
+            self.dropped += len(records)
+            logger.error(f"Audit spool write failed ({reason}), dropping {len(records)} records: {e}")
+            return False
+        if self.spooled == 0 or reason != "queue full":
+            logger.warning(f"Spooling {len(records)} audit records to {self.spool.path} ({reason})")
+        self.spooled += len(records)
+        return True
+    
+    # ------------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------------
+    
+    def start(self) -> None:
+        """Start the worker in the running event loop."""
+        if self.worker_task is None or self.worker_task.done():
+            self.worker_task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _collect(self) -> Tuple[List[Tuple[AIQueryAuditRecord, float]], bool]:
+        """Next batch: until batch_size records or flush_interval after the first.
+        
+        Returns:
+            (items, stop) - stop is True once the shutdown sentinel was seen
+        """
+        items: List[Tuple[AIQueryAuditRecord, float]] = []
+        # Idle with spooled records pending: wake up to replay them
+        first_wait = self.flush_interval if self.spool.pending_bytes else None
+        try:
+            item = await asyncio.wait_for(self.queue.get(), first_wait)
+        except asyncio.TimeoutError:
+            return items, False
+        if item is None:
+            return items, True
+        items.append(item)
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(items) < self.batch_size:
+            if self.queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+    
+    async def _write(self, records: Sequence[AIQueryAuditRecord]) -> bool:
+        try:
+            ok = await self.sink.write_batch(records)
         except Exception as e:
-            logger.error(f"Audit worker error: {e}")
-        finally:
-            _audit_queue.task_done()
+            logger.error(f"Audit sink {self.sink.name} batch write raised: {e}")
+            ok = False
+        if ok:
+            self.batches += 1
+            self.written += len(records)
+            self.last_write_at = time.time()
+            self._replay_backoff = 0.0
+        else:
+            self.failed_batches += 1
+            # Back off replays while the sink is failing
+            self._replay_backoff = min(self.replay_backoff_max, max(0.05, self._replay_backoff * 2))
+            self._next_replay = time.monotonic() + self._replay_backoff
+        return ok
+    
+    async def _write_items(self, items: List[Tuple[AIQueryAuditRecord, float]]) -> None:
+        records = [record for record, _ in items]
+        if await self._write(records):
+            lag = time.monotonic() - items[0][1]
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        else:
+            self._spool(records, "sink write failed")
+    
+    async def _replay(self) -> None:
+        """Write one batch from the spool; checkpoint it on success."""
+        if not self.spool.pending_bytes or time.monotonic() < self._next_replay:
+            return
+        records, offset = self.spool.read(self.batch_size)
+        if records and not await self._write(records):
+            return
+        self.spool.commit(offset)
+        self.replayed += len(records)
+    
+    async def _run(self) -> None:
+        """Worker: write queued batches, replay the spool between them."""
+        stop = False
+        while not stop:
+            try:
+                items, stop = await self._collect()
+                if items:
+                    await self._write_items(items)
+                if not stop:
+                    await self._replay()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audit worker error: {e}")
+    
+    async def close(self) -> None:
+        """Flush queued records and stop the worker (spooled records stay on disk)."""
+        if self.worker_task is not None and not self.worker_task.done():
+            await self.queue.put(None)
+            await self.worker_task
+        else:
+            # No worker: keep what is queued for the next start
+            items = []
+            while not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is not None:
+                    items.append(item[0])
+            if items:
+                self._spool(items, "shutdown without worker")
+        self.worker_task = None
+        self.spool.close()
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Per-sink delivery metrics."""
+        return {
+            "sink": self.sink.name,
+            "worker_running": self.worker_task is not None and not self.worker_task.done(),
+            "queue_size": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "spool_pending_bytes": self.spool.pending_bytes,
+            "spool_corrupt": self.spool.corrupt,
+            "dropped": self.dropped,
+            "lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "seconds_since_write": round(time.time() - self.last_write_at, 1) if self.last_write_at else None,
+        }
+
+
+# ============================================================================
+# MODULE API
+# ============================================================================
+
+# Global pipeline for non-blocking writes
+_audit_pipeline: Optional[AuditPipeline] = None
 
 
 def init_audit_queue(sink: Optional[AuditSink] = None):
-    """Initialize the audit queue and background worker.
+    """Initialize the audit pipeline and background worker.
     
     Args:
         sink: Optional sink instance. If None, creates one from environment config.
     
     Note:
-        This function must be called from within an async context (e.g., startup event)
-        to properly create the background worker task.
+        The worker starts here if an event loop is running, otherwise via
+        start_audit_worker() from the startup event. The spool only survives
+        a restart on a persistent volume: for the Loki and Postgres sinks a
+        warning is logged when AUDIT_SPOOL_PATH is unset, and an error when
+        the spool directory is not writable.
     """
-    global _audit_queue, _audit_worker_task, _audit_sink
+    global _audit_pipeline
     
-    if _audit_queue is not None:
+    if _audit_pipeline is not None:
         logger.warning("Audit queue already initialized")
         return
     
-    _audit_sink = sink or AuditSinkFactory.create_sink()
-    _audit_queue = asyncio.Queue(maxsize=1000)  # Bounded queue to prevent memory issues
+    sink = sink or AuditSinkFactory.create_sink()
+    spool_path = os.getenv("AUDIT_SPOOL_PATH") or None
+    _audit_pipeline = AuditPipeline(
+        sink,
+        max_queue=int(os.getenv("AUDIT_QUEUE_MAX", "1000")),
+        batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("AUDIT_FLUSH_MS", "200")) / 1000,
+        spool_path=spool_path
+    )
+    
+    if not isinstance(sink, StdoutSink):
+        spool_dir = os.path.dirname(_audit_pipeline.spool.path) or "."
+        if spool_path is None:
+            logger.warning(
+                f"AUDIT_SPOOL_PATH not set, spooling to {_audit_pipeline.spool.path}; "
+                f"mount a persistent volume at {spool_dir} or spooled audit records are lost on restart"
+            )
+        try:
+            os.makedirs(spool_dir, exist_ok=True)
+        except OSError:
+            pass
+        if not os.access(spool_dir, os.W_OK):
+            logger.error(f"Audit spool directory {spool_dir} is not writable; records will be dropped during sink outages")
     
     # Try to create worker task if event loop is running
     try:
-        _audit_worker_task = asyncio.create_task(_audit_worker())
+        _audit_pipeline.start()
         logger.info("Audit queue and worker initialized")
     except RuntimeError as e:
         # No event loop running yet - will be started later via start_audit_worker()
@@ -282,18 +655,16 @@ def start_audit_worker():
     This should be called from an async startup event to ensure the worker
     task is created within a running event loop.
     """
-    global _audit_worker_task, _audit_queue, _audit_sink
-    
-    if _audit_worker_task is not None and not _audit_worker_task.done():
-        logger.warning("Audit worker already running")
+    if _audit_pipeline is None:
+        logger.error("Audit queue not initialized, call init_audit_queue() first")
         return
     
-    if _audit_queue is None or _audit_sink is None:
-        logger.error("Audit queue not initialized, call init_audit_queue() first")
+    if _audit_pipeline.worker_task is not None and not _audit_pipeline.worker_task.done():
+        logger.warning("Audit worker already running")
         return
     
     try:
-        _audit_worker_task = asyncio.create_task(_audit_worker())
+        _audit_pipeline.start()
         logger.info("Audit worker started")
     except Exception as e:
         logger.error(f"Failed to start audit worker: {e}")
@@ -306,42 +677,35 @@ async def enqueue_audit_record(record: AIQueryAuditRecord) -> bool:
         record: The audit record to persist
         
     Returns:
-        True if enqueued successfully, False if queue is full
+        True if queued or spooled, False if the record was lost
     """
-    global _audit_queue
-    
-    if _audit_queue is None:
+    if _audit_pipeline is None:
         logger.error("Audit queue not initialized")
         return False
     
-    try:
-        _audit_queue.put_nowait(record)
-        return True
-    except asyncio.QueueFull:
-        logger.error("Audit queue is full, dropping record")
-        return False
+    return _audit_pipeline.enqueue(record)
+
+
+def get_audit_statistics() -> Optional[Dict[str, Any]]:
+    """Delivery metrics of the audit pipeline (None if not initialized)."""
+    return _audit_pipeline.get_statistics() if _audit_pipeline else None
 
 
 async def shutdown_audit_queue():
     """Shutdown the audit queue and worker gracefully."""
-    global _audit_queue, _audit_worker_task, _audit_sink
+    global _audit_pipeline
     
-    if _audit_queue is None:
+    if _audit_pipeline is None:
         return
     
-    # Send shutdown signal
-    await _audit_queue.put(None)
-    
-    # Wait for worker to finish
-    if _audit_worker_task:
-        await _audit_worker_task
+    # Flush queued records and stop the worker
+    await _audit_pipeline.close()
     
     # Close sink if it has a close method
-    if _audit_sink and hasattr(_audit_sink, 'close'):
-        await _audit_sink.close()
+    sink = _audit_pipeline.sink
+    if hasattr(sink, 'close'):
+        await sink.close()
     
-    _audit_queue = None
-    _audit_worker_task = None
-    _audit_sink = None
+    _audit_pipeline = None
     
-    logger.info("Audit queue shutdown complete")
\ No newline at end of file
+    logger.info("Audit queue shutdown complete")
@@ -1261,11 +1261,25 @@ async def _create_pool_once(_app):
         pool = await asyncpg.create_pool(dsn, min_size=1, max_size=max_size)
         setattr(state, "db_pool", pool)
         print("[db] asyncpg pool established")
+        await _load_selector_index(pool)
         return pool
     except Exception as e:
         print("[db] failed to create pool:", e)
         return None
 
+async def _load_selector_index(pool):
+    # Selector searches use the in-process index once loaded (pgvector until then)
+    try:
+        from shared.vector_index import get_selector_vector_index
+        index = get_selector_vector_index()
+        if index is None:
+            return
+        async with pool.acquire() as conn:
+            matrix = await index.load(conn)
+        print(f"[db] selector vector index loaded: {len(matrix)} tools, {matrix.nbytes} bytes")
+    except Exception as e:
+        print("[db] selector vector index not loaded (using pgvector):", e)
+
 async def _create_pool_with_retry(_app):
     total = int(os.getenv("DB_WAIT_MAX_SECONDS", "60"))
     start = time.time()
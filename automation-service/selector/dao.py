@@ -32,6 +32,7 @@ for path in parent_paths:
 
 import asyncpg
 from shared.embeddings import embed_128, to_vec_literal
+from shared.vector_index import get_selector_vector_index
 
 # OpenTelemetry tracing (optional)
 try:
@@ -42,6 +43,14 @@ except ImportError:
     _tracer = None
 
 
+async def _search_index(conn, vec, plat, k) -> Optional[List[Dict[str, Any]]]:
+    """Top-k from the in-process vector index, or None to use pgvector"""
+    index = get_selector_vector_index()
+    if index is None or not index.loaded:
+        return None
+    return await index.search(conn, vec, plat, k)
+
+
 async def select_topk(
     conn: asyncpg.Connection,
     query_text: str,
@@ -52,7 +61,8 @@ async def select_topk(
     Select top-k tools most similar to query text using vector similarity.
     
     Uses cosine distance (<=> operator) to find tools with embeddings closest
-    to the query embedding. Results are ordered by:
+    to the query embedding. Searches the in-process vector index when it is
+    loaded and falls back to pgvector otherwise. Results are ordered by:
     1. Vector similarity (primary)
     2. Usage count (secondary, for ties)
     3. Updated timestamp (tertiary, for freshness)
@@ -88,25 +98,31 @@ async def select_topk(
             
             # Generate embedding for query
             vec = embed_128(query_text)
-            vec_lit = to_vec_literal(vec)
             
             # Convert platform to list (empty list means no filter)
             plat = list(platform) if platform else []
             
-            # Execute vector similarity search
-            # Note: $2::text[] = '{}'::text[] checks if platform filter is empty
-            #       platform && $2::text[] checks if tool's platform overlaps with filter
-            rows = await conn.fetch(
-                """
-                WITH q AS (SELECT CAST($1 AS vector(128)) AS v)
-                SELECT key, name, LEFT(short_desc,160) AS short_desc, platform, tags
-                FROM tool, q
-                WHERE ($2::text[] = '{}'::text[] OR platform && $2::text[])
-                ORDER BY embedding <=> q.v NULLS LAST, usage_count DESC, updated_at DESC
-                LIMIT $3;
-                """,
-                vec_lit, plat, k
-            )
+            # In-process index first (None = not loaded or failed: use pgvector)
+            rows = await _search_index(conn, vec, plat, k)
+            source = "index"
+            if rows is None:
+                source = "pgvector"
+                vec_lit = to_vec_literal(vec)
+                
+                # Execute vector similarity search
+                # Note: $2::text[] = '{}'::text[] checks if platform filter is empty
+                #       platform && $2::text[] checks if tool's platform overlaps with filter
+                rows = await conn.fetch(
+                    """
+                    WITH q AS (SELECT CAST($1 AS vector(128)) AS v)
+                    SELECT key, name, LEFT(short_desc,160) AS short_desc, platform, tags
+                    FROM tool, q
+                    WHERE ($2::text[] = '{}'::text[] OR platform && $2::text[])
+                    ORDER BY embedding <=> q.v NULLS LAST, usage_count DESC, updated_at DESC
+                    LIMIT $3;
+                    """,
+                    vec_lit, plat, k
+                )
             
             elapsed_ms = (time.time() - t0) * 1000
             
@@ -116,6 +132,7 @@ async def select_topk(
             span.set_attribute("db.elapsed_ms", round(elapsed_ms, 2))
             span.set_attribute("selector.k", k)
             span.set_attribute("selector.platforms", str(plat))
+            span.set_attribute("selector.source", source)
             
             # Convert asyncpg.Record objects to dicts
             return [dict(r) for r in rows]
@@ -123,11 +140,15 @@ async def select_topk(
         # No tracing available, execute without span
         # Generate embedding for query
         vec = embed_128(query_text)
-        vec_lit = to_vec_literal(vec)
         
         # Convert platform to list (empty list means no filter)
         plat = list(platform) if platform else []
         
+        rows = await _search_index(conn, vec, plat, k)
+        if rows is not None:
+            return rows
+        vec_lit = to_vec_literal(vec)
+        
         # Execute vector similarity search
         rows = await conn.fetch(
             """
@@ -2,7 +2,7 @@
 Selector v3 - Production-grade tool selection with caching, metrics, and resilience.
 
 Features:
-- LRU+TTL cache with size cap and concurrency safety
+- Sharded LRU+TTL cache with stale-while-revalidate and request coalescing
 - Prometheus metrics at /metrics
 - Degraded mode: serves Last-Known-Good (LKG) during DB outages
 - Input validation and parameter guardrails
@@ -16,7 +16,7 @@ import sys
 import time
 from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 # Add parent directory to path so 'shared' module can be imported
 # Try both /app (Docker) and relative path (local dev)
@@ -56,6 +56,9 @@ except ImportError:
 
 SELECTOR_CACHE_TTL_SEC = int(os.getenv("SELECTOR_CACHE_TTL_SEC", "600"))
 SELECTOR_CACHE_MAX_ENTRIES = int(os.getenv("SELECTOR_CACHE_MAX_ENTRIES", "1000"))
+SELECTOR_CACHE_SHARDS = int(os.getenv("SELECTOR_CACHE_SHARDS", "16"))
+# How long past its TTL an entry is still served (and refreshed in the background)
+SELECTOR_CACHE_STALE_SEC = int(os.getenv("SELECTOR_CACHE_STALE_SEC", "3600"))
 SELECTOR_DEGRADED_ENABLE = os.getenv("SELECTOR_DEGRADED_ENABLE", "true").lower() in ("true", "1", "yes")
 
 # Build info
@@ -176,6 +179,24 @@ class SelectorMetrics:
         lines.append("# TYPE selector_cache_ttl_seconds gauge")
         lines.append(f"selector_cache_ttl_seconds {self.cache_ttl_seconds}")
         
+        # Per-shard cache lookups
+        shard_stats = _cache.get_statistics()
+        lines.append("# HELP selector_cache_lookups_total Cache lookups by shard and result")
+        lines.append("# TYPE selector_cache_lookups_total counter")
+        for stats in shard_stats:
+            for result, field in (("hit", "hits"), ("miss", "misses"), ("stale", "stale")):
+                lines.append(
+                    f'selector_cache_lookups_total{{shard="{stats["shard"]}",result="{result}"}} {stats[field]}'
+                )
+        lines.append("# HELP selector_cache_coalesced_total Misses that joined an in-flight DB query")
+        lines.append("# TYPE selector_cache_coalesced_total counter")
+        for stats in shard_stats:
+            lines.append(f'selector_cache_coalesced_total{{shard="{stats["shard"]}"}} {stats["coalesced"]}')
+        lines.append("# HELP selector_cache_refreshes_total Background stale-while-revalidate refreshes")
+        lines.append("# TYPE selector_cache_refreshes_total counter")
+        for stats in shard_stats:
+            lines.append(f'selector_cache_refreshes_total{{shard="{stats["shard"]}"}} {stats["refreshes"]}')
+        
         return "\n".join(lines) + "\n"
 
 
@@ -251,11 +272,200 @@ class LRUTTLCache:
             self._cache.clear()
 
 
+class _CacheShard:
+    """One shard of ShardedTTLCache: its own LRU, lock, in-flight loads and counters."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Tuple, Tuple[float, Dict]] = OrderedDict()
+        self.inflight: Dict[Tuple, asyncio.Task] = {}
+        self.lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+
+class ShardedTTLCache:
+    """
+    LRU+TTL cache sharded by key hash, with stale-while-revalidate and
+    request coalescing.
+    
+    - Each shard has its own LRU order, lock and counters, so requests for
+      different keys never wait on each other
+    - An entry past its TTL but within stale_sec is still served
+      (lookup() reports it as stale) while refresh() reloads it in the
+      background; it also serves as Last-Known-Good during DB outages
+    - Concurrent load() calls for the same missing key share one loader
+      call (one DB query)
+    """
+    
+    def __init__(self, max_entries: int, ttl_sec: int, shards: int = 16, stale_sec: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.stale_sec = stale_sec
+        shards = max(1, min(shards, max_entries))
+        per_shard = -(-max_entries // shards)  # ceil
+        self._shards = [_CacheShard(per_shard) for _ in range(shards)]
+        self._logger = logging.getLogger("selector.cache")
+    
+    def _shard(self, key: Tuple) -> _CacheShard:
+        return self._shards[hash(key) % len(self._shards)]
+    
+    async def lookup(self, key: Tuple) -> Tuple[Optional[Dict], bool]:
+        """
+        Get a value, fresh or stale.
+        
+        Returns: (value, is_stale); (None, False) on a miss
+        """
+        shard = self._shard(key)
+        async with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
+                return None, False
+            
+            expires_at, value = entry
+            now = time.monotonic()
+            if now > expires_at + self.stale_sec:
+                # Too old even to serve stale
+                del shard.entries[key]
+                shard.misses += 1
+                return None, False
+            
+            shard.entries.move_to_end(key)
+            if now > expires_at:
+                shard.stale += 1
+                return value, True
+            shard.hits += 1
+            return value, False
+    
+    async def get(self, key: Tuple) -> Optional[Dict]:
+        """Get value from cache if not expired."""
+        value, stale = await self.lookup(key)
+        return None if stale else value
+    
+    async def get_stale(self, key: Tuple) -> Optional[Dict]:
+        """Last-Known-Good value (fresh or stale), without touching counters or LRU order."""
+        shard = self._shard(key)
+        async with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None or time.monotonic() > entry[0] + self.stale_sec:
+                return None
+            return entry[1]
+    
+    async def put(self, key: Tuple, value: Dict):
+        """Put value in cache with TTL."""
+        shard = self._shard(key)
+        async with shard.lock:
+            expires_at = time.monotonic() + self.ttl_sec
+            if key in shard.entries:
+                shard.entries[key] = (expires_at, value)
+                shard.entries.move_to_end(key)
+                return
+            
+            if len(shard.entries) >= shard.max_entries:
+                evicted_key, _ = shard.entries.popitem(last=False)
+                shard.evictions += 1
+                _metrics.cache_evictions_total += 1
+                self._logger.debug(f"Evicted cache key: {evicted_key}")
+            
+            shard.entries[key] = (expires_at, value)
+    
+    def _start_load(self, shard: _CacheShard, key: Tuple, loader: Callable[[], Awaitable[Dict]]) -> asyncio.Task:
+        """Single-flight: the task loading `key`, started if none is in flight."""
+        task = shard.inflight.get(key)
+        if task is None:
+            async def run() -> Dict:
+                try:
+                    value = await loader()
+                    await self.put(key, value)
+                    return value
+                finally:
+                    shard.inflight.pop(key, None)
+            
+            task = asyncio.get_running_loop().create_task(run())
+            shard.inflight[key] = task
+        return task
+    
+    async def load(self, key: Tuple, loader: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, bool]:
+        """
+        Load a missing key, sharing the loader call with concurrent callers.
+        
+        Returns: (value, coalesced) - coalesced is True if another caller's load was joined
+        
+        Raises: whatever the loader raised (for every caller sharing it)
+        """
+        shard = self._shard(key)
+        coalesced = key in shard.inflight
+        if coalesced:
+            shard.coalesced += 1
+        task = self._start_load(shard, key, loader)
+        # Shield: a cancelled caller must not cancel the load others are waiting on
+        return await asyncio.shield(task), coalesced
+    
+    def refresh(self, key: Tuple, loader: Callable[[], Awaitable[Dict]]) -> bool:
+        """
+        Reload a stale key in the background (no-op if a load is already in flight).
+        
+        Returns: True if a refresh was started
+        """
+        shard = self._shard(key)
+        if key in shard.inflight:
+            return False
+        shard.refreshes += 1
+        task = self._start_load(shard, key, loader)
+        
+        def done(t: asyncio.Task):
+            if not t.cancelled() and t.exception() is not None:
+                shard.refresh_errors += 1
+                self._logger.warning(f"Background refresh failed for {key}: {t.exception()}")
+        
+        task.add_done_callback(done)
+        return True
+    
+    async def size(self) -> int:
+        """Get current cache size."""
+        return sum(len(shard.entries) for shard in self._shards)
+    
+    async def clear(self):
+        """Clear all cache entries (for testing)."""
+        for shard in self._shards:
+            async with shard.lock:
+                shard.entries.clear()
+    
+    def get_statistics(self) -> List[Dict[str, int]]:
+        """Per-shard counters."""
+        return [
+            {
+                "shard": i,
+                "entries": len(shard.entries),
+                "hits": shard.hits,
+                "misses": shard.misses,
+                "stale": shard.stale,
+                "coalesced": shard.coalesced,
+                "refreshes": shard.refreshes,
+                "refresh_errors": shard.refresh_errors,
+                "evictions": shard.evictions,
+                "inflight": len(shard.inflight),
+            }
+            for i, shard in enumerate(self._shards)
+        ]
+
+
 # Global cache instance
-_cache = LRUTTLCache(max_entries=SELECTOR_CACHE_MAX_ENTRIES, ttl_sec=SELECTOR_CACHE_TTL_SEC)
+_cache = ShardedTTLCache(
+    max_entries=SELECTOR_CACHE_MAX_ENTRIES,
+    ttl_sec=SELECTOR_CACHE_TTL_SEC,
+    shards=SELECTOR_CACHE_SHARDS,
+    stale_sec=SELECTOR_CACHE_STALE_SEC
+)
 
 
-def get_cache() -> LRUTTLCache:
+def get_cache() -> ShardedTTLCache:
     """Get the global cache instance (for testing)."""
     return _cache
 
@@ -380,7 +590,9 @@ async def selector_search(
     Search for tools matching the query.
     
     Returns top-k tools based on semantic similarity to the query.
-    Results may be served from cache or database.
+    Results may be served from cache or database. Expired entries are
+    served stale while one background query refreshes them, and
+    concurrent misses for the same key share a single DB query.
     
     During database outages, warm cache keys return 200 with from_cache=true,
     while cold keys return 503 with Retry-After header.
@@ -417,9 +629,43 @@ async def selector_search(
     # Normalize cache key
     cache_key = normalize_cache_key(query, k, platforms)
     
-    # Try cache first
-    cached_value = await _cache.get(cache_key)
+    # Get DB pool
+    pool = getattr(getattr(request.app, "state", None), "db_pool", None)
+    if pool is None:
+        pool = getattr(request.app, "db_pool", None)
+    
+    async def load_from_db() -> Dict:
+        """One DB query for this key (shared by coalesced and background loads)."""
+        # Import here to allow test mocking of selector.dao.select_topk
+        from selector.dao import select_topk
+        
+        started = time.time()
+        async with pool.acquire() as conn:
+            rows = await select_topk(conn, query, platforms, k)
+        
+        # Build response
+        results = [
+            ToolResult(
+                name=row.get("name", ""),
+                short_desc=row.get("short_desc", "")
+            )
+            for row in rows
+        ]
+        return {
+            "query": query,
+            "platforms": platforms,
+            "k": k,
+            "results": [r.model_dump() for r in results],
+            "from_cache": False,
+            "duration_ms": round((time.time() - started) * 1000, 1)
+        }
+    
+    # Try cache first (stale entries are served and refreshed in the background)
+    cached_value, stale = await _cache.lookup(cache_key)
     if cached_value:
+        if stale and pool is not None:
+            _cache.refresh(cache_key, load_from_db)
+        
         duration_sec = time.time() - t0
         _metrics.inc_request("ok", "cache")
         _metrics.observe_duration(duration_sec)
@@ -443,6 +689,7 @@ async def selector_search(
                 "platforms": platforms,
                 "from_cache": True,
                 "source": "cache",
+                "stale": stale,
                 "duration_ms": round(duration_sec * 1000, 1),
                 "status": 200
             }
@@ -455,16 +702,11 @@ async def selector_search(
         
         return SelectorResponse(**cached_response)
     
-    # Get DB pool
-    pool = getattr(getattr(request.app, "state", None), "db_pool", None)
-    if pool is None:
-        pool = getattr(request.app, "db_pool", None)
-    
     if pool is None:
         # DB not available - check degraded mode
         if SELECTOR_DEGRADED_ENABLE:
             # Try to serve from cache (LKG)
-            cached_value = await _cache.get(cache_key)
+            cached_value = await _cache.get_stale(cache_key)
             if cached_value:
                 duration_sec = time.time() - t0
                 _metrics.inc_request("ok", "degraded")
@@ -525,71 +767,48 @@ async def selector_search(
             headers={"Retry-After": "30", "Content-Type": "application/json"}
         )
     
-    # Query database
+    # Query database (concurrent misses for this key wait on the same query)
     try:
-        # Import here to allow test mocking of selector.dao.select_topk
-        from selector.dao import select_topk
+        response_data, coalesced = await _cache.load(cache_key, load_from_db)
         
-        async with pool.acquire() as conn:
-            rows = await select_topk(conn, query, platforms, k)
-            
-            # Build response
-            results = [
-                ToolResult(
-                    name=row.get("name", ""),
-                    short_desc=row.get("short_desc", "")
-                )
-                for row in rows
-            ]
-            
-            duration_sec = time.time() - t0
-            
-            response_data = {
-                "query": query,
-                "platforms": platforms,
+        duration_sec = time.time() - t0
+        response_data = dict(response_data, duration_ms=round(duration_sec * 1000, 1))
+        
+        # Update metrics
+        _metrics.inc_request("ok", "fresh")
+        _metrics.observe_duration(duration_sec)
+        _metrics.cache_entries = await _cache.size()
+        
+        # Add span attributes
+        if add_span_attributes:
+            add_span_attributes(
+                from_cache=False,
+                status="ok"
+            )
+        
+        # Log request
+        logger.info(
+            "Selector request (fresh)",
+            extra={
+                "event": "selector_request",
+                "trace_id": trace_id,
+                "query": query[:120],
                 "k": k,
-                "results": [r.model_dump() for r in results],
+                "platforms": platforms,
                 "from_cache": False,
-                "duration_ms": round(duration_sec * 1000, 1)
+                "source": "fresh",
+                "coalesced": coalesced,
+                "duration_ms": round(duration_sec * 1000, 1),
+                "status": 200
             }
-            
-            # Store in cache
-            await _cache.put(cache_key, response_data)
-            
-            # Update metrics
-            _metrics.inc_request("ok", "fresh")
-            _metrics.observe_duration(duration_sec)
-            _metrics.cache_entries = await _cache.size()
-            
-            # Add span attributes
-            if add_span_attributes:
-                add_span_attributes(
-                    from_cache=False,
-                    status="ok"
-                )
-            
-            # Log request
-            logger.info(
-                "Selector request (fresh)",
-                extra={
-                    "event": "selector_request",
-                    "trace_id": trace_id,
-                    "query": query[:120],
-                    "k": k,
-                    "platforms": platforms,
-                    "from_cache": False,
-                    "source": "fresh",
-                    "duration_ms": round(duration_sec * 1000, 1),
-                    "status": 200
-                }
-            )
-            
-            return SelectorResponse(**response_data)
+        )
+        
+        return SelectorResponse(**response_data)
     
     except Exception as e:
         # Database error - try degraded mode
         if SELECTOR_DEGRADED_ENABLE:
-            cached_value = await _cache.get(cache_key)
+            cached_value = await _cache.get_stale(cache_key)
             if cached_value:
                 duration_sec = time.time() - t0
                 _metrics.inc_request("ok", "degraded")
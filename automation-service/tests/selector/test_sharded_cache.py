@@ -0,0 +1,291 @@
+"""
+Tests for the sharded selector cache.
+
+Covers per-shard LRU and metrics, stale-while-revalidate, request coalescing,
+and a contention benchmark of 500 concurrent selector_search calls against
+the previous single-LRU cache (no stale serving, one DB query per miss).
+"""
+
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add automation-service to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import selector.dao
+from selector import v3
+from selector.v3 import LRUTTLCache, ShardedTTLCache, selector_search
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class FakePool:
+    """asyncpg-style pool: `size` connections, each select_topk takes query_ms."""
+
+    def __init__(self, size: int = 10, query_ms: float = 5.0):
+        self.size = size
+        self.query_ms = query_ms
+        self.queries = 0
+        self._slots = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            yield self
+
+
+class LegacyCache(LRUTTLCache):
+    """The previous behaviour: one lock, expired = miss, every miss queries the DB."""
+
+    async def lookup(self, key):
+        return await self.get(key), False
+
+    async def get_stale(self, key):
+        return await self.get(key)
+
+    async def load(self, key, loader):
+        value = await loader()
+        await self.put(key, value)
+        return value, False
+
+    def refresh(self, key, loader):
+        return False
+
+    def get_statistics(self):
+        return []
+
+
+def _expire_all(cache):
+    """Move every entry just past its TTL."""
+    if isinstance(cache, ShardedTTLCache):
+        for shard in cache._shards:
+            for key, (_, value) in list(shard.entries.items()):
+                shard.entries[key] = (time.monotonic() - 1, value)
+    else:
+        for key, (_, value) in list(cache._cache.items()):
+            cache._cache[key] = (time.time() - 1, value)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    pool = FakePool()
+
+    async def fake_select_topk(conn, query, platforms, k):
+        conn.queries += 1
+        await asyncio.sleep(conn.query_ms / 1000)
+        return [{"name": f"{query}-tool-{i}", "short_desc": ""} for i in range(k)]
+
+    monkeypatch.setattr(selector.dao, "select_topk", fake_select_topk)
+    return pool
+
+
+def _request(pool):
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(db_pool=pool)), headers={})
+
+
+async def _search(pool, query, k=3):
+    return await selector_search(_request(pool), query=query, platform=[], k=k)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+@pytest.mark.asyncio
+class TestShardedTTLCache:
+    """Sharding, stale-while-revalidate and coalescing."""
+
+    async def test_keys_spread_over_shards_with_own_lru(self):
+        cache = ShardedTTLCache(max_entries=64, ttl_sec=60, shards=8)
+        for i in range(64):
+            await cache.put((f"q{i}", 3, ()), {"id": i})
+
+        stats = cache.get_statistics()
+        assert len(stats) == 8
+        assert sum(s["entries"] for s in stats) + sum(s["evictions"] for s in stats) == 64
+        assert sum(1 for s in stats if s["entries"]) >= 6
+        assert all(s["entries"] <= 8 for s in stats)
+
+        await cache.get(("q1", 3, ()))
+        await cache.get(("missing", 3, ()))
+        stats = cache.get_statistics()
+        assert sum(s["hits"] for s in stats) + sum(s["misses"] for s in stats) == 2
+
+    async def test_stale_entry_served_and_refreshed_once(self):
+        cache = ShardedTTLCache(max_entries=10, ttl_sec=60, shards=2, stale_sec=60)
+        key = ("disk usage", 3, ())
+        await cache.put(key, {"version": 1})
+        _expire_all(cache)
+
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"version": 2}
+
+        assert await cache.lookup(key) == ({"version": 1}, True)
+        assert await cache.get(key) is None  # fresh-only view
+        assert cache.refresh(key, loader) is True
+        assert cache.refresh(key, loader) is False  # already in flight
+
+        await asyncio.sleep(0.03)
+        assert calls == [1]
+        assert await cache.lookup(key) == ({"version": 2}, False)
+
+        stats = cache.get_statistics()[cache._shards.index(cache._shard(key))]
+        assert (stats["stale"], stats["refreshes"], stats["inflight"]) == (2, 1, 0)
+
+    async def test_entry_past_stale_window_is_a_miss(self):
+        cache = ShardedTTLCache(max_entries=10, ttl_sec=60, stale_sec=0)
+        key = ("q", 3, ())
+        await cache.put(key, {"id": 1})
+        _expire_all(cache)
+        assert await cache.lookup(key) == (None, False)
+        assert await cache.get_stale(key) is None
+
+    async def test_failed_refresh_keeps_last_known_good(self):
+        cache = ShardedTTLCache(max_entries=10, ttl_sec=60, stale_sec=60)
+        key = ("q", 3, ())
+        await cache.put(key, {"id": 1})
+        _expire_all(cache)
+
+        async def broken():
+            raise ConnectionError("db down")
+
+        cache.refresh(key, broken)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert await cache.get_stale(key) == {"id": 1}
+        assert sum(s["refresh_errors"] for s in cache.get_statistics()) == 1
+
+    async def test_concurrent_misses_share_one_load(self):
+        cache = ShardedTTLCache(max_entries=10, ttl_sec=60)
+        key = ("q", 3, ())
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": len(calls)}
+
+        results = await asyncio.gather(*(cache.load(key, loader) for _ in range(50)))
+        assert calls == [1]
+        assert all(value == {"id": 1} for value, _ in results)
+        assert sum(coalesced for _, coalesced in results) == 49
+        assert await cache.get(key) == {"id": 1}
+
+    async def test_failed_load_reaches_every_waiter_and_is_retried(self):
+        cache = ShardedTTLCache(max_entries=10, ttl_sec=60)
+        key = ("q", 3, ())
+
+        async def broken():
+            await asyncio.sleep(0.005)
+            raise ConnectionError("db down")
+
+        results = await asyncio.gather(*(cache.load(key, broken) for _ in range(5)), return_exceptions=True)
+        assert all(isinstance(r, ConnectionError) for r in results)
+
+        async def ok():
+            return {"id": 1}
+
+        assert await cache.load(key, ok) == ({"id": 1}, False)
+
+
+# ============================================================================
+# ROUTE
+# ============================================================================
+
+@pytest.mark.asyncio
+class TestSelectorSearchCaching:
+    """selector_search on top of the sharded cache."""
+
+    async def test_expired_key_served_stale_with_one_background_query(self, db):
+        await _search(db, "restart nginx")
+        assert db.queries == 1
+        _expire_all(v3.get_cache())
+
+        responses = await asyncio.gather(*(_search(db, "restart nginx") for _ in range(20)))
+        assert all(r.from_cache for r in responses)
+        await asyncio.sleep(0.02)
+        assert db.queries == 2
+
+        cached, stale = await v3.get_cache().lookup(("restart nginx", 3, ()))
+        assert cached is not None and not stale
+
+    async def test_shard_metrics_exported(self, db):
+        await _search(db, "check disk")
+        await _search(db, "check disk")
+
+        text = v3._metrics.to_prometheus_text()
+        assert "# TYPE selector_cache_lookups_total counter" in text
+        assert 'result="hit"' in text and 'result="miss"' in text and 'result="stale"' in text
+        assert "selector_cache_coalesced_total{shard=" in text
+        assert "selector_cache_refreshes_total{shard=" in text
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_contention_at_500_concurrent_searches(db, monkeypatch):
+    """500 concurrent searches over 25 hot queries: cold cache, then all expired."""
+    queries = [f"hot query {i % 25}" for i in range(500)]
+
+    async def burst():
+        latencies = []
+
+        async def one(query):
+            started = time.perf_counter()
+            await _search(db, query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        return (time.perf_counter() - started) * 1000, np.percentile(latencies, [50, 99])
+
+    lines = []
+    results = {}
+    for name, cache in (
+        ("single LRU", LegacyCache(max_entries=1000, ttl_sec=600)),
+        ("sharded+SWR", ShardedTTLCache(max_entries=1000, ttl_sec=600, shards=16, stale_sec=3600)),
+    ):
+        monkeypatch.setattr(v3, "_cache", cache)
+
+        async def scenario():
+            db.queries = 0
+            cold = await burst()
+            cold_queries = db.queries
+            _expire_all(cache)
+            db.queries = 0
+            expired = await burst()
+            await asyncio.sleep(0.05)  # let background refreshes land
+            return cold, cold_queries, expired, db.queries
+
+        db._slots = None
+        cold, cold_queries, expired, expired_queries = asyncio.run(scenario())
+        results[name] = (cold, cold_queries, expired, expired_queries)
+        lines.append(
+            f"{name:12s} cold: {cold[0]:6.1f}ms wall, p50 {cold[1][0]:6.1f} p99 {cold[1][1]:6.1f}ms, "
+            f"{cold_queries} DB queries | expired: {expired[0]:6.1f}ms wall, "
+            f"p50 {expired[1][0]:6.1f} p99 {expired[1][1]:6.1f}ms, {expired_queries} DB queries"
+        )
+
+    print("\n500 concurrent searches, 25 distinct keys, 10 connections x 5ms:\n  " + "\n  ".join(lines))
+
+    legacy, sharded = results["single LRU"], results["sharded+SWR"]
+    assert legacy[1] == 500 and sharded[1] == 25
+    assert legacy[3] == 500 and sharded[3] == 25
+    assert sharded[0][1][1] < legacy[0][1][1] / 3
+    assert sharded[2][1][1] < legacy[2][1][1] / 3
@@ -0,0 +1,302 @@
+"""
+Tests for the batched audit pipeline.
+
+Covers batched Postgres (COPY) and Loki (one push) writes, queue overflow to
+the disk spool, spool replay after a sink outage and after a restart, the
+module-level API, and a 100k-record burst through a stub sink with zero loss.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add automation-service to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audit import sinks
+from audit.models import AIQueryAuditRecord, ToolExecution
+from audit.sinks import AuditPipeline, AuditSink, LokiSink, PostgresSink
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+CREATED_AT = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _record(i: int, user: str = "user-1") -> AIQueryAuditRecord:
+    return AIQueryAuditRecord(
+        trace_id=f"{i:032x}",
+        user_id=user,
+        input=f"check disk on web{i % 10:02d}",
+        output="ok",
+        tools=[ToolExecution(name="df", latency_ms=i % 100, ok=True)],
+        duration_ms=i % 1000,
+        created_at=CREATED_AT,
+    )
+
+
+class StubSink(AuditSink):
+    """Records what it receives; each call costs one modelled round trip."""
+
+    def __init__(self, rtt_ms: float = 1.0):
+        self.rtt_ms = rtt_ms
+        self.records = []
+        self.calls = 0
+        self.down = False
+
+    async def write(self, record):
+        return await self.write_batch([record])
+
+    async def write_batch(self, records):
+        self.calls += 1
+        await asyncio.sleep(self.rtt_ms / 1000)
+        if self.down:
+            return False
+        self.records.extend(records)
+        return True
+
+
+async def _wait_for(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+# ============================================================================
+# BATCHED SINKS
+# ============================================================================
+
+async def test_postgres_sink_copies_a_batch_in_one_call():
+    class FakeConn:
+        def __init__(self):
+            self.copies = []
+
+        async def copy_records_to_table(self, table, records, columns):
+            self.copies.append((table, list(records), columns))
+
+    class FakePool:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def acquire(self):
+            pool = self
+
+            class Ctx:
+                async def __aenter__(self):
+                    return pool.conn
+
+                async def __aexit__(self, *exc):
+                    return None
+
+            return Ctx()
+
+    sink = PostgresSink("postgresql://unused")
+    conn = FakeConn()
+    sink._pool = FakePool(conn)
+
+    assert await sink.write_batch([_record(i) for i in range(300)]) is True
+    assert len(conn.copies) == 1
+    table, rows, columns = conn.copies[0]
+    assert table == "audit_ai_queries" and len(rows) == 300
+    assert columns == ["trace_id", "user_id", "input", "output", "tools", "duration_ms", "created_at"]
+    assert json.loads(rows[7][4]) == [{"name": "df", "latency_ms": 7, "ok": True}]
+
+    async def broken(*args, **kwargs):
+        raise ConnectionError("db down")
+
+    conn.copy_records_to_table = broken
+    assert await sink.write_batch([_record(1)]) is False
+
+
+async def test_loki_sink_pushes_a_batch_in_one_request():
+    requests = []
+    statuses = [503, 204]
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(statuses[len(requests) - 1])
+
+    sink = LokiSink("http://loki/api/v1/push", retry_delay=0)
+    sink.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    records = [_record(1), _record(2, user="user-2"), _record(1)]
+    assert await sink.write_batch(records) is True
+    assert len(requests) == 2  # one retry after the 503
+    streams = requests[-1]["streams"]
+    assert len(streams) == 2
+    assert sum(len(s["values"]) for s in streams) == 3
+    await sink.close()
+
+
+# ============================================================================
+# SPOOL
+# ============================================================================
+
+async def test_outage_spools_and_replays_in_order_of_arrival(tmp_path):
+    sink = StubSink()
+    pipeline = AuditPipeline(sink, max_queue=100, batch_size=50, flush_interval=0.01,
+                             spool_path=str(tmp_path / "spool.jsonl"))
+    pipeline.start()
+
+    sink.down = True
+    for i in range(300):
+        assert pipeline.enqueue(_record(i))
+        await asyncio.sleep(0)
+    await _wait_for(lambda: pipeline.queue.empty() and pipeline.failed_batches > 0)
+    assert sink.records == []
+
+    sink.down = False
+    await _wait_for(lambda: pipeline.spool.pending_bytes == 0 and len(sink.records) == 300)
+    await pipeline.close()
+
+    assert sorted(r.trace_id for r in sink.records) == [f"{i:032x}" for i in range(300)]
+    stats = pipeline.get_statistics()
+    assert stats["dropped"] == 0 and stats["spooled"] >= 300 - 100
+    assert stats["written"] == 300 and stats["spool_pending_bytes"] == 0
+    assert (tmp_path / "spool.jsonl").stat().st_size == 0
+
+
+async def test_restart_resumes_from_spool_checkpoint(tmp_path):
+    path = str(tmp_path / "spool.jsonl")
+
+    # No worker (e.g. the process dies before startup finishes): queued and
+    # overflowing records all end up in the spool
+    first = AuditPipeline(StubSink(), max_queue=1000, spool_path=path)
+    for i in range(3000):
+        first.enqueue(_record(i))
+    await first.close()
+    assert first.get_statistics()["spooled"] == 3000
+
+    # Second run replays one batch, then the sink fails and the process stops
+    sink = StubSink()
+    second = AuditPipeline(sink, batch_size=1000, flush_interval=0.01, spool_path=path)
+    second.start()
+    await _wait_for(lambda: len(sink.records) == 1000)
+    sink.down = True
+    await second.close()
+    assert (tmp_path / "spool.jsonl.offset").exists()
+
+    # Third run picks up after the checkpoint: no duplicates
+    third_sink = StubSink()
+    third = AuditPipeline(third_sink, batch_size=1000, flush_interval=0.01, spool_path=path)
+    third.start()
+    await _wait_for(lambda: len(third_sink.records) == 2000)
+    await third.close()
+
+    delivered = [r.trace_id for r in sink.records + third_sink.records]
+    assert sorted(delivered) == [f"{i:032x}" for i in range(3000)]
+    assert not (tmp_path / "spool.jsonl.offset").exists()
+
+
+async def test_partial_spool_line_is_left_for_later(tmp_path):
+    path = tmp_path / "spool.jsonl"
+    spool = sinks.AuditSpool(str(path))
+    spool.append([_record(1)])
+    with open(path, "ab") as f:
+        f.write(b'{"trace_id": "trunc')  # crash mid-append
+
+    records, offset = spool.read(10)
+    assert [r.trace_id for r in records] == [f"{1:032x}"]
+    spool.commit(offset)
+    assert spool.pending_bytes > 0
+
+
+async def test_module_api_and_health_metrics(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUDIT_SPOOL_PATH", str(tmp_path / "spool.jsonl"))
+    monkeypatch.setenv("AUDIT_FLUSH_MS", "10")
+    sink = StubSink()
+    sinks.init_audit_queue(sink)
+    try:
+        for i in range(20):
+            assert await sinks.enqueue_audit_record(_record(i))
+        await _wait_for(lambda: len(sink.records) == 20)
+
+        from audit.routes import audit_health
+        body = json.loads((await audit_health()).body)
+        assert body["status"] == "healthy"
+        assert body["sink"]["sink"] == "StubSink"
+        assert body["sink"]["written"] == 20 and body["sink"]["dropped"] == 0
+        assert 0 <= body["sink"]["lag_seconds"] < 1
+    finally:
+        await sinks.shutdown_audit_queue()
+    assert sinks.get_audit_statistics() is None
+
+
+def test_durable_sink_warns_without_a_spool_path(tmp_path, monkeypatch, caplog):
+    monkeypatch.delenv("AUDIT_SPOOL_PATH", raising=False)
+    monkeypatch.setattr(sinks, "DEFAULT_SPOOL_DIR", str(tmp_path / "audit"))
+    for sink, warned in ((sinks.StdoutSink(), False), (LokiSink("http://loki"), True)):
+        caplog.clear()
+        sinks.init_audit_queue(sink)
+        try:
+            assert sinks._audit_pipeline.spool.path == str(tmp_path / "audit" / f"audit-spool-{sink.name.lower()}.jsonl")
+            assert ("AUDIT_SPOOL_PATH not set" in caplog.text) is warned
+        finally:
+            sinks._audit_pipeline = None
+
+    read_only = tmp_path / "read-only"
+    read_only.mkdir()
+    monkeypatch.setenv("AUDIT_SPOOL_PATH", str(read_only / "spool.jsonl"))
+    monkeypatch.setattr(sinks.os, "access", lambda path, mode: path != str(read_only))
+    caplog.clear()
+    sinks.init_audit_queue(LokiSink("http://loki"))
+    sinks._audit_pipeline = None
+    assert "AUDIT_SPOOL_PATH not set" not in caplog.text
+    assert f"Audit spool directory {read_only} is not writable" in caplog.text
+
+
+# ============================================================================
+# BURST
+# ============================================================================
+
+async def test_100k_burst_with_outage_loses_nothing(tmp_path):
+    """100k records in bursts, sink down for a stretch, queue bound 1000."""
+    records = [_record(i) for i in range(100_000)]
+    sink = StubSink(rtt_ms=1.0)
+    pipeline = AuditPipeline(sink, max_queue=1000, batch_size=500, flush_interval=0.01,
+                             spool_path=str(tmp_path / "spool.jsonl"))
+    pipeline.start()
+
+    started = time.perf_counter()
+    for offset in range(0, len(records), 5000):
+        sink.down = 20_000 <= offset < 40_000
+        for record in records[offset:offset + 5000]:
+            assert pipeline.enqueue(record)
+        await asyncio.sleep(0.002)
+    sink.down = False
+    await _wait_for(lambda: len(sink.records) >= 100_000 and pipeline.spool.pending_bytes == 0, timeout=15)
+    await pipeline.close()
+    elapsed = time.perf_counter() - started
+
+    stats = pipeline.get_statistics()
+    trace_ids = {r.trace_id for r in sink.records}
+    assert len(sink.records) == 100_000 and len(trace_ids) == 100_000
+    assert stats["dropped"] == 0 and stats["failed_batches"] > 0
+
+    # Previous design on a 10k burst: queue of 1000, no spool, one write per record
+    legacy_queue = asyncio.Queue(maxsize=1000)
+    legacy_dropped = 0
+    for record in records[:10_000]:
+        try:
+            legacy_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            legacy_dropped += 1
+
+    print(
+        f"\n100k records in {elapsed:.2f}s: {stats['batches']} sink writes "
+        f"({stats['failed_batches']} failed during outage), {stats['spooled']} spooled, "
+        f"{stats['replayed']} replayed, 0 lost, max lag {stats['max_lag_seconds']:.3f}s"
+        f"\nprevious design, 10k burst: {legacy_dropped} dropped, "
+        f"{10_000 - legacy_dropped} sink round trips for the rest"
+    )
+    assert legacy_dropped == 9000
+    assert stats["batches"] < 1000
@@ -22,12 +22,28 @@ import json
 import yaml
 import asyncio
 import logging
-from typing import Dict, List, Set, Optional, Tuple, Any
+import threading
+from typing import Dict, Iterable, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import aiofiles
+
+# Only the audit/migration CLI reads and writes files; the registry and alias
+# table are imported by the pipeline, which does not ship aiofiles
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
+
+
+def _require_aiofiles() -> None:
+    """Raise a clear ImportError on the file paths when aiofiles is missing"""
+    if aiofiles is None:
+        raise ImportError(
+            "aiofiles is required for the capability audit and migration CLI "
+            "(pip install aiofiles)"
+        )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -53,6 +69,176 @@ class CapabilityAuditResult:
     orphaned_capabilities: Dict[str, List[str]]  # source -> [orphaned_capabilities]
     recommendations: List[str]
 
+# ============================================================================
+# ALIAS TABLE
+# ============================================================================
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_SEPARATOR_RUN = re.compile(r'[^a-z0-9]+')
+_VARIANT_SEPARATORS = ('_', '-', ' ', '.', '')
+
+
+# Tokens ending in "s" that are not plurals (acronyms, product names)
+_NON_PLURAL_TOKENS = frozenset({
+    'alias', 'aws', 'bias', 'cors', 'ddos', 'dns', 'https', 'iaas', 'iis', 'ios',
+    'jenkins', 'kubernetes', 'macos', 'news', 'nfs', 'paas', 'postgres', 'saas',
+    'series', 'tls', 'windows',
+})
+
+
+def _singular(token: str) -> str:
+    """
+    Fold a plural token: policies → policy, processes → process, assets → asset
+    
+    Tokens of three characters or fewer (acronyms such as "vms", "ips") and
+    the non-plurals in _NON_PLURAL_TOKENS are left as they are.
+    """
+    if len(token) <= 3 or token in _NON_PLURAL_TOKENS:
+        return token
+    if token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('sses', 'xes', 'zzes')):
+        return token[:-2]
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def capability_lookup_key(name: str) -> str:
+    """
+    Fold case, separators, camelCase and plurals into one lookup key
+    
+    "File-Reads", "fileRead" and "FILE READ" all become "file_read".
+    """
+    name = _CAMEL_BOUNDARY.sub('_', name.strip()).lower()
+    tokens = [t for t in _SEPARATOR_RUN.split(name) if t]
+    return '_'.join(_singular(t) for t in tokens)
+
+
+def capability_variants(name: str) -> Set[str]:
+    """
+    Spellings of a capability name seen in practice: case, separator,
+    camelCase and plural forms
+    """
+    tokens = [t for t in _SEPARATOR_RUN.split(_CAMEL_BOUNDARY.sub('_', name).lower()) if t]
+    if not tokens:
+        return {name}
+    
+    token_forms = [tokens]
+    last = tokens[-1]
+    plural = last[:-1] + 'ies' if last.endswith('y') else (last + 'es' if last.endswith(('s', 'x')) else last + 's')
+    token_forms.append(tokens[:-1] + [plural])
+    
+    variants = {name}
+    for forms in token_forms:
+        for separator in _VARIANT_SEPARATORS:
+            joined = separator.join(forms)
+            variants.update((joined, joined.upper(), separator.join(t.capitalize() for t in forms)))
+        variants.add(forms[0] + ''.join(t.capitalize() for t in forms[1:]))
+    return variants
+
+
+class CapabilityAliasTable:
+    """
+    Compiled variant → canonical capability map
+    
+    Every known spelling of every registry capability (canonical names and
+    aliases) and of every catalog capability is precomputed, so the common
+    case is one dict lookup. Other strings fall back to the folded lookup
+    key; those results go into a bounded memo.
+    """
+    
+    def __init__(self, variants: Dict[str, str], catalog_capabilities: Iterable[str] = (),
+                 memo_size: int = 4096):
+        """
+        Args:
+            variants: Spelling → canonical name
+            catalog_capabilities: Catalog names the table was built with
+            memo_size: Maximum number of memoized unseen strings
+        """
+        self._variants = variants
+        self._by_key: Dict[str, str] = {}
+        for variant, canonical in variants.items():
+            self._by_key.setdefault(capability_lookup_key(variant), canonical)
+        self.catalog_capabilities = frozenset(catalog_capabilities)
+        self.memo_size = memo_size
+        self._memo: Dict[str, Optional[str]] = {}
+        self._memo_lock = threading.Lock()
+    
+    @classmethod
+    def build(cls, registry: 'CapabilityRegistry', catalog_capabilities: Iterable[str] = (),
+              memo_size: int = 4096) -> 'CapabilityAliasTable':
+        """
+        Compile the table from the registry and the catalog's capability names
+        
+        Registry names win; catalog capabilities the registry doesn't know
+        are canonical as spelled in the catalog.
+        
+        Args:
+            registry: Canonical capability registry
+            catalog_capabilities: Capability names found in the tool catalog
+            memo_size: Maximum number of memoized unseen strings
+        """
+        catalog_capabilities = frozenset(catalog_capabilities)
+        variants: Dict[str, str] = {}
+        
+        # Exact registry names and aliases first, then their spellings
+        for name, cap in registry.capabilities.items():
+            variants[name] = getattr(cap, '_canonical_name', name)
+        for name, canonical in list(variants.items()):
+            for variant in capability_variants(name):
+                variants.setdefault(variant, canonical)
+        
+        registry_keys = {capability_lookup_key(v) for v in variants}
+        for name in sorted(catalog_capabilities):
+            if name in variants or capability_lookup_key(name) in registry_keys:
+                continue
+            for variant in capability_variants(name):
+                variants.setdefault(variant, name)
+            variants[name] = name
+        
+        return cls(variants, catalog_capabilities, memo_size)
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Canonical name for any known spelling
+        
+        Args:
+            name: Capability name as written by Stage A, a tool or a user
+            
+        Returns:
+            Canonical name, or None if unknown
+        """
+        canonical = self._variants.get(name)
+        if canonical is not None:
+            return canonical
+        
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        
+        canonical = self._by_key.get(capability_lookup_key(name))
+        with self._memo_lock:
+            if len(self._memo) >= self.memo_size:
+                self._memo.pop(next(iter(self._memo)))
+            self._memo[name] = canonical
+        return canonical
+    
+    def canonicalize(self, name: str) -> str:
+        """Canonical name, or the name unchanged if unknown"""
+        canonical = self.resolve(name)
+        return name if canonical is None else canonical
+    
+    def canonicalize_all(self, names: Iterable[str]) -> List[str]:
+        """canonicalize() over a list, inlining the exact-spelling lookup"""
+        variants = self._variants
+        return [variants[n] if n in variants else self.canonicalize(n) for n in names]
+    
+    def __len__(self) -> int:
+        return len(self._variants)
+
+
 class CapabilityRegistry:
     """
     Canonical capability registry - Single Source of Truth
@@ -170,16 +356,24 @@ class CapabilityRegistry:
                     )
                     alias_def._canonical_name = cap.name
                     self.capabilities[alias] = alias_def
+        
+        self.alias_table = CapabilityAliasTable.build(self)
+    
+    def build_alias_table(self, catalog_capabilities: Iterable[str] = ()) -> CapabilityAliasTable:
+        """Alias table covering the registry plus the catalog's capability names"""
+        return CapabilityAliasTable.build(self, catalog_capabilities)
     
     def get_canonical_name(self, capability_name: str) -> str:
-        """Get the canonical name for a capability (resolves aliases)"""
-        if capability_name in self.capabilities:
-            cap = self.capabilities[capability_name]
-            return getattr(cap, '_canonical_name', capability_name)
-        return capability_name
+        """
+        Get the canonical name for a capability (resolves aliases and spelling variants)
+        
+        Spelling variants are matched loosely, so for a name that is not
+        valid (see is_valid_capability) the result is only a suggestion.
+        """
+        return self.alias_table.canonicalize(capability_name)
     
     def is_valid_capability(self, capability_name: str) -> bool:
-        """Check if a capability name is valid (canonical or alias)"""
+        """Check if a capability name is valid (exactly a canonical name or a registered alias)"""
         return capability_name in self.capabilities
     
     def get_all_canonical_capabilities(self) -> List[str]:
@@ -318,6 +512,7 @@ class CapabilityAuditor:
     
     async def _audit_optimization_profiles(self) -> Set[str]:
         """Extract capabilities from tool_optimization_profiles.yaml"""
+        _require_aiofiles()
         capabilities = set()
         
         try:
@@ -343,6 +538,7 @@ class CapabilityAuditor:
     
     async def _audit_stage_a_capabilities(self) -> Set[str]:
         """Extract capabilities that Stage A might generate"""
+        _require_aiofiles()
         capabilities = set()
         
         try:
@@ -481,6 +677,7 @@ class CapabilityMigrator:
     
     async def _migrate_optimization_profiles(self, dry_run: bool) -> int:
         """Migrate optimization profiles to use canonical capability names"""
+        _require_aiofiles()
         migration_count = 0
         
         try:
@@ -566,6 +763,7 @@ class CapabilityMigrator:
         
         # Write training data
         training_file = "/home/opsconductor/opsconductor-ng/pipeline/stages/stage_a/capability_training_data.yaml"
+        _require_aiofiles()
         
         try:
             async with aiofiles.open(training_file, 'w') as f:
@@ -5,8 +5,9 @@ Ensures capability consistency during tool operations
 """
 import asyncio
 import logging
-from typing import Dict, Any, List, Tuple
-from capability_management_system import CapabilityRegistry, CapabilityValidator
+import threading
+from typing import Dict, Any, Iterable, List, Tuple
+from capability_management_system import CapabilityAliasTable, CapabilityRegistry, CapabilityValidator
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,31 @@ class CapabilityValidationHook:
     def __init__(self, db_connection_string: str):
         self.registry = CapabilityRegistry()
         self.validator = CapabilityValidator(self.registry, db_connection_string)
+        self.alias_table: CapabilityAliasTable = self.registry.alias_table
+        self._refresh_lock = threading.Lock()
+    
+    def refresh_alias_table(self, catalog_capabilities: Iterable[str]) -> CapabilityAliasTable:
+        """
+        Rebuild the alias table for the catalog's current capability names
+        
+        Called on every catalog (profile) reload; the table is only
+        recompiled when the set of capability names actually changed.
+        
+        Args:
+            catalog_capabilities: Capability names in the loaded catalog
+            
+        Returns:
+            The current alias table
+        """
+        catalog_capabilities = frozenset(catalog_capabilities)
+        with self._refresh_lock:
+            if catalog_capabilities != self.alias_table.catalog_capabilities:
+                self.alias_table = self.registry.build_alias_table(catalog_capabilities)
+                logger.info(
+                    f"Capability alias table rebuilt: {len(self.alias_table)} spellings, "
+                    f"{len(catalog_capabilities)} catalog capabilities"
+                )
+            return self.alias_table
     
     def validate_tool_capabilities(self, capabilities: List[str]) -> Tuple[bool, List[str]]:
         """
@@ -31,11 +57,12 @@ class CapabilityValidationHook:
         """
         normalized = []
         warnings = []
+        alias_table = self.alias_table
         
         for cap in capabilities:
-            canonical = self.registry.get_canonical_name(cap)
+            canonical = alias_table.resolve(cap)
             
-            if not self.registry.is_valid_capability(cap):
+            if canonical is None:
                 warnings.append(f"Unknown capability '{cap}' - using as-is")
                 normalized.append(cap)
             elif cap != canonical:
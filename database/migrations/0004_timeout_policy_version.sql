@@ -0,0 +1,47 @@
+-- ============================================================================
+-- 0004: Versioned timeout policies
+-- Every write to execution.timeout_policies bumps a monotonically increasing
+-- catalog version and emits NOTIFY timeout_policies_changed, so in-process
+-- policy caches only reload when the matrix actually changes.
+-- ============================================================================
+
+CREATE SEQUENCE IF NOT EXISTS execution.timeout_policies_version_seq;
+
+ALTER TABLE execution.timeout_policies
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('execution.timeout_policies_version_seq');
+
+-- Stamp each inserted/updated row with a fresh version
+CREATE OR REPLACE FUNCTION execution.stamp_timeout_policy_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version := nextval('execution.timeout_policies_version_seq');
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_timeout_policies_version ON execution.timeout_policies;
+CREATE TRIGGER trigger_timeout_policies_version
+    BEFORE INSERT OR UPDATE ON execution.timeout_policies
+    FOR EACH ROW
+    EXECUTE FUNCTION execution.stamp_timeout_policy_version();
+
+-- Bump once per statement (covers DELETE) and notify listeners
+CREATE OR REPLACE FUNCTION execution.notify_timeout_policies_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify(
+        'timeout_policies_changed',
+        nextval('execution.timeout_policies_version_seq')::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_timeout_policies_notify ON execution.timeout_policies;
+CREATE TRIGGER trigger_timeout_policies_notify
+    AFTER INSERT OR UPDATE OR DELETE ON execution.timeout_policies
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION execution.notify_timeout_policies_changed();
+
+COMMENT ON COLUMN execution.timeout_policies.version IS 'Monotonic version; the policy matrix version is execution.timeout_policies_version_seq.last_value';
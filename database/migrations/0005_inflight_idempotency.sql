@@ -0,0 +1,24 @@
+-- ============================================================================
+-- 0005: In-flight execution idempotency
+-- A plan may be re-run once the previous run finished, but only one
+-- non-terminal execution (and one pending/processing queue entry) may exist
+-- per (tenant_id, idempotency_key).
+-- ============================================================================
+
+-- Replace the all-time uniqueness with uniqueness over in-flight executions
+ALTER TABLE execution.executions
+    DROP CONSTRAINT IF EXISTS unique_idempotency_per_tenant;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_executions_inflight_idempotency
+    ON execution.executions(tenant_id, idempotency_key)
+    WHERE status IN ('pending_approval', 'approved', 'queued', 'running');
+
+-- Queue entries carry the key so duplicates cannot be enqueued twice
+ALTER TABLE execution.execution_queue
+    ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_execution_queue_active_idempotency
+    ON execution.execution_queue(idempotency_key)
+    WHERE status IN ('pending', 'processing') AND idempotency_key IS NOT NULL;
+
+COMMENT ON COLUMN execution.execution_queue.idempotency_key IS 'Copied from executions.idempotency_key; unique while pending/processing';
@@ -0,0 +1,49 @@
+-- ============================================================================
+-- 0006: Per-tenant weighted fair queuing for execution.execution_queue
+-- Start-time fair queuing: each entry gets a virtual start/finish tag at
+-- enqueue time (finish = start + cost / tenant weight) and workers dequeue by
+-- virtual finish within a priority band, skipping tenants at their
+-- concurrency ceiling.
+-- ============================================================================
+
+-- Per-tenant scheduling knobs (missing row = weight 1, default ceiling)
+CREATE TABLE IF NOT EXISTS execution.tenant_scheduling (
+    tenant_id VARCHAR(255) PRIMARY KEY,
+    weight DOUBLE PRECISION NOT NULL DEFAULT 1.0 CHECK (weight > 0),
+    max_concurrency INTEGER CHECK (max_concurrency IS NULL OR max_concurrency > 0),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- System virtual time (start tag of the most recently dequeued entry)
+CREATE TABLE IF NOT EXISTS execution.scheduler_clock (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    virtual_time DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO execution.scheduler_clock (id, virtual_time) VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
+
+-- Queue entries carry tenant and fair-queuing tags
+ALTER TABLE execution.execution_queue
+    ADD COLUMN IF NOT EXISTS tenant_id VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION NOT NULL DEFAULT 1.0,
+    ADD COLUMN IF NOT EXISTS virtual_start DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS virtual_finish DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+UPDATE execution.execution_queue q
+SET tenant_id = e.tenant_id
+FROM execution.executions e
+WHERE q.execution_id = e.execution_id AND q.tenant_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_execution_queue_fair_order
+    ON execution.execution_queue(priority, virtual_finish, enqueued_at)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_execution_queue_tenant_status
+    ON execution.execution_queue(tenant_id, status);
+
+COMMENT ON TABLE execution.tenant_scheduling IS 'Per-tenant fair-queuing weight and concurrency ceiling';
+COMMENT ON TABLE execution.scheduler_clock IS 'Single-row system virtual time for start-time fair queuing';
+COMMENT ON COLUMN execution.execution_queue.virtual_finish IS 'virtual_start + cost / tenant weight; dequeue order within a priority band';
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- 0007: Deadline-aware (EDF) queue scheduling
+-- Each queue entry gets an absolute deadline at enqueue time (the
+-- execution's SLA timeout). Within a priority band workers dequeue the
+-- earliest deadline first; entries that can no longer finish in time are
+-- either expired ('reject') or sorted below every band ('downgrade').
+-- ============================================================================
+
+ALTER TABLE execution.execution_queue
+    ADD COLUMN IF NOT EXISTS deadline_at TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS on_deadline_miss VARCHAR(20) NOT NULL DEFAULT 'downgrade'
+        CHECK (on_deadline_miss IN ('reject', 'downgrade'));
+
+UPDATE execution.execution_queue q
+SET deadline_at = e.timeout_at
+FROM execution.executions e
+WHERE q.execution_id = e.execution_id AND q.deadline_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_execution_queue_edf_order
+    ON execution.execution_queue(priority, deadline_at, virtual_finish)
+    WHERE status = 'pending';
+
+-- Dequeue expires infeasible 'reject' entries in small batches, most overdue first
+CREATE INDEX IF NOT EXISTS idx_execution_queue_reject_deadline
+    ON execution.execution_queue(deadline_at)
+    WHERE status = 'pending' AND on_deadline_miss = 'reject';
+
+CREATE INDEX IF NOT EXISTS idx_execution_queue_completed_sla
+    ON execution.execution_queue(sla_class, completed_at)
+    WHERE status IN ('completed', 'expired');
+
+COMMENT ON COLUMN execution.execution_queue.deadline_at IS 'Absolute SLA deadline (executions.timeout_at) used for EDF ordering';
+COMMENT ON COLUMN execution.execution_queue.on_deadline_miss IS 'reject = expire when infeasible, downgrade = run best-effort after feasible work';
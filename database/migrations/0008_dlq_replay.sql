@@ -0,0 +1,20 @@
+-- ============================================================================
+-- 0008: Bulk DLQ inspection and throttled replay
+-- error_class is derived from last_error (leading "...Error"/"...Exception"
+-- name, else failure_reason) so bulk replay can filter on it with an index.
+-- execution.dlq.classify_error applies the same rule in Python.
+-- ============================================================================
+
+ALTER TABLE execution.execution_dlq
+    ADD COLUMN IF NOT EXISTS error_class VARCHAR(255) GENERATED ALWAYS AS (
+        COALESCE(
+            substring(last_error FROM '^([A-Za-z_][A-Za-z0-9_.]*(?:Error|Exception))'),
+            failure_reason
+        )
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_execution_dlq_replay_filter
+    ON execution.execution_dlq(error_class, failed_at)
+    WHERE requeued = false;
+
+COMMENT ON COLUMN execution.execution_dlq.error_class IS 'Exception name from last_error, else failure_reason; bulk replay filter';
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- 0009: Versioned tool catalog
+-- Every write to tool_catalog.tools, tool_capabilities or tool_patterns
+-- bumps a monotonically increasing catalog version. In-process catalog
+-- snapshots (pipeline/services/catalog_snapshot.py) poll it and rebuild
+-- only when it moves.
+-- ============================================================================
+
+CREATE SEQUENCE IF NOT EXISTS tool_catalog.catalog_version_seq;
+
+-- Bump once per statement (covers bulk writes and DELETE)
+CREATE OR REPLACE FUNCTION tool_catalog.bump_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM nextval('tool_catalog.catalog_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_tools_catalog_version ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tool_catalog.tools
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.bump_catalog_version();
+
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_version ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tool_catalog.tool_capabilities
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.bump_catalog_version();
+
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_version ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tool_catalog.tool_patterns
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.bump_catalog_version();
+
+GRANT USAGE, SELECT ON SEQUENCE tool_catalog.catalog_version_seq TO opsconductor;
+
+COMMENT ON SEQUENCE tool_catalog.catalog_version_seq IS 'Catalog version; last_value moves on every tool/capability/pattern write';
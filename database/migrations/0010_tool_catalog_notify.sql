@@ -0,0 +1,207 @@
+-- ============================================================================
+-- 0010: Cross-replica catalog change notifications
+-- Every statement writing tool_catalog.tools, tool_capabilities or
+-- tool_patterns bumps the catalog version once and emits one NOTIFY
+-- tool_catalog_changed listing the affected tools, so each replica's listener
+-- (pipeline/services/catalog_listener.py) invalidates exactly those tools
+-- instead of waiting for a TTL or a full reload. Statement-level triggers
+-- with transition tables keep a bulk write to one sequence bump and one
+-- notification, rather than one of each per row.
+--
+-- Payload (JSON):
+--   {"changes": [{"tool_name": "...", "tool_id": 1, "capability_name": "..." | null}, ...],
+--    "version": 42, "table": "tool_patterns", "op": "UPDATE"}
+-- changes is null for TRUNCATE and for statements touching too many tools
+-- to fit a NOTIFY payload (listeners fall back to a full refresh).
+-- Notifications are delivered on commit; rolled-back writes never notify.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION tool_catalog.notify_catalog_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_rows JSONB[];
+    v_changes JSONB;
+    v_version BIGINT;
+    v_payload TEXT;
+BEGIN
+    -- Rows written by the statement (both images for UPDATE, so a rename
+    -- also invalidates the old name)
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(to_jsonb(r)) INTO v_rows FROM new_rows r;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(to_jsonb(r)) INTO v_rows FROM old_rows r;
+    ELSE
+        SELECT array_agg(to_jsonb(r)) INTO v_rows
+        FROM (SELECT * FROM old_rows UNION ALL SELECT * FROM new_rows) r;
+    END IF;
+
+    -- Child rows removed by a cascading tool delete no longer join to a
+    -- tool: the tool statement's own notification already covers them
+    IF TG_TABLE_NAME = 'tools' THEN
+        SELECT jsonb_agg(DISTINCT jsonb_build_object(
+            'tool_name', r->>'tool_name',
+            'tool_id', (r->>'id')::INTEGER,
+            'capability_name', NULL
+        ))
+        INTO v_changes
+        FROM unnest(v_rows) r;
+    ELSIF TG_TABLE_NAME = 'tool_capabilities' THEN
+        SELECT jsonb_agg(DISTINCT jsonb_build_object(
+            'tool_name', t.tool_name,
+            'tool_id', t.id,
+            'capability_name', r->>'capability_name'
+        ))
+        INTO v_changes
+        FROM unnest(v_rows) r
+        JOIN tool_catalog.tools t ON t.id = (r->>'tool_id')::INTEGER;
+    ELSE
+        SELECT jsonb_agg(DISTINCT jsonb_build_object(
+            'tool_name', t.tool_name,
+            'tool_id', t.id,
+            'capability_name', c.capability_name
+        ))
+        INTO v_changes
+        FROM unnest(v_rows) r
+        JOIN tool_catalog.tool_capabilities c ON c.id = (r->>'capability_id')::INTEGER
+        JOIN tool_catalog.tools t ON t.id = c.tool_id;
+    END IF;
+
+    IF v_changes IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    v_version := nextval('tool_catalog.catalog_version_seq');
+    v_payload := json_build_object(
+        'changes', v_changes,
+        'version', v_version,
+        'table', TG_TABLE_NAME,
+        'op', TG_OP
+    )::text;
+
+    -- NOTIFY payloads are limited to 8000 bytes; a statement touching more
+    -- tools than fit is sent unlisted and listeners refresh everything
+    IF octet_length(v_payload) > 7900 THEN
+        v_payload := json_build_object(
+            'changes', NULL,
+            'version', v_version,
+            'table', TG_TABLE_NAME,
+            'op', TG_OP
+        )::text;
+    END IF;
+
+    PERFORM pg_notify('tool_catalog_changed', v_payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tool_catalog.notify_catalog_truncate()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('tool_catalog_changed', json_build_object(
+        'changes', NULL,
+        'version', nextval('tool_catalog.catalog_version_seq'),
+        'table', TG_TABLE_NAME,
+        'op', TG_OP
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level notifications replace the version bumps from 0009.
+-- Transition tables allow a single event per trigger, hence one trigger per
+-- INSERT/UPDATE/DELETE, all running the same function.
+DROP TRIGGER IF EXISTS trigger_tools_catalog_version ON tool_catalog.tools;
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_version ON tool_catalog.tool_capabilities;
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_version ON tool_catalog.tool_patterns;
+
+-- tools
+DROP TRIGGER IF EXISTS trigger_tools_catalog_notify ON tool_catalog.tools;
+
+DROP TRIGGER IF EXISTS trigger_tools_catalog_notify_insert ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_catalog_notify_insert
+    AFTER INSERT ON tool_catalog.tools
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_tools_catalog_notify_update ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_catalog_notify_update
+    AFTER UPDATE ON tool_catalog.tools
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_tools_catalog_notify_delete ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_catalog_notify_delete
+    AFTER DELETE ON tool_catalog.tools
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+-- tool_capabilities
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_notify ON tool_catalog.tool_capabilities;
+
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_notify_insert ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_catalog_notify_insert
+    AFTER INSERT ON tool_catalog.tool_capabilities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_notify_update ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_catalog_notify_update
+    AFTER UPDATE ON tool_catalog.tool_capabilities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_notify_delete ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_catalog_notify_delete
+    AFTER DELETE ON tool_catalog.tool_capabilities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+-- tool_patterns
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_notify ON tool_catalog.tool_patterns;
+
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_notify_insert ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_catalog_notify_insert
+    AFTER INSERT ON tool_catalog.tool_patterns
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_notify_update ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_catalog_notify_update
+    AFTER UPDATE ON tool_catalog.tool_patterns
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_notify_delete ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_catalog_notify_delete
+    AFTER DELETE ON tool_catalog.tool_patterns
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_change();
+
+DROP TRIGGER IF EXISTS trigger_tools_catalog_truncate ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_catalog_truncate
+    AFTER TRUNCATE ON tool_catalog.tools
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_truncate();
+
+DROP TRIGGER IF EXISTS trigger_capabilities_catalog_truncate ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_catalog_truncate
+    AFTER TRUNCATE ON tool_catalog.tool_capabilities
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_truncate();
+
+DROP TRIGGER IF EXISTS trigger_patterns_catalog_truncate ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_catalog_truncate
+    AFTER TRUNCATE ON tool_catalog.tool_patterns
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tool_catalog.notify_catalog_truncate();
+
+COMMENT ON FUNCTION tool_catalog.notify_catalog_change() IS 'Bump catalog version and NOTIFY tool_catalog_changed once per statement for the affected tools';
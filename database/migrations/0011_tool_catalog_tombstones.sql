@@ -0,0 +1,86 @@
+-- ============================================================================
+-- 0011: Change tracking for incremental profile reloads
+-- ProfileLoader reloads only tools touched since its last reload: rows with
+-- updated_at past its watermark, plus tombstones for deletes (which leave
+-- no row behind). Tool, capability and pattern timestamps are indexed so
+-- the delta query stays cheap on large catalogs.
+-- ============================================================================
+
+-- tool_capabilities had no updated_at; tools and tool_patterns already do
+ALTER TABLE tool_catalog.tool_capabilities
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+DROP TRIGGER IF EXISTS trigger_capabilities_updated_at ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_updated_at
+    BEFORE UPDATE ON tool_catalog.tool_capabilities
+    FOR EACH ROW
+    EXECUTE FUNCTION tool_catalog.update_tools_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_tools_updated_at ON tool_catalog.tools(updated_at);
+CREATE INDEX IF NOT EXISTS idx_capabilities_updated_at ON tool_catalog.tool_capabilities(updated_at);
+CREATE INDEX IF NOT EXISTS idx_patterns_updated_at ON tool_catalog.tool_patterns(updated_at);
+
+-- One row per tool name that lost a tool, capability or pattern row (or
+-- was renamed away); readers reload the name and drop it if it's gone
+CREATE TABLE IF NOT EXISTS tool_catalog.tool_tombstones (
+    tool_name VARCHAR(100) PRIMARY KEY,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_tool_tombstones_deleted_at ON tool_catalog.tool_tombstones(deleted_at);
+
+CREATE OR REPLACE FUNCTION tool_catalog.record_tool_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_tool_name TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'tools' THEN
+        IF TG_OP = 'UPDATE' AND OLD.tool_name IS NOT DISTINCT FROM NEW.tool_name THEN
+            RETURN NULL;
+        END IF;
+        v_tool_name := OLD.tool_name;
+    ELSIF TG_TABLE_NAME = 'tool_capabilities' THEN
+        SELECT tool_name INTO v_tool_name
+        FROM tool_catalog.tools WHERE id = OLD.tool_id;
+    ELSE
+        SELECT t.tool_name INTO v_tool_name
+        FROM tool_catalog.tool_capabilities c
+        JOIN tool_catalog.tools t ON t.id = c.tool_id
+        WHERE c.id = OLD.capability_id;
+    END IF;
+
+    -- Child rows removed by a cascading tool delete: the tool row's own
+    -- tombstone already covers them
+    IF v_tool_name IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO tool_catalog.tool_tombstones (tool_name, deleted_at)
+    VALUES (v_tool_name, CURRENT_TIMESTAMP)
+    ON CONFLICT (tool_name) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_tools_tombstone ON tool_catalog.tools;
+CREATE TRIGGER trigger_tools_tombstone
+    AFTER DELETE OR UPDATE OF tool_name ON tool_catalog.tools
+    FOR EACH ROW
+    EXECUTE FUNCTION tool_catalog.record_tool_tombstone();
+
+DROP TRIGGER IF EXISTS trigger_capabilities_tombstone ON tool_catalog.tool_capabilities;
+CREATE TRIGGER trigger_capabilities_tombstone
+    AFTER DELETE ON tool_catalog.tool_capabilities
+    FOR EACH ROW
+    EXECUTE FUNCTION tool_catalog.record_tool_tombstone();
+
+DROP TRIGGER IF EXISTS trigger_patterns_tombstone ON tool_catalog.tool_patterns;
+CREATE TRIGGER trigger_patterns_tombstone
+    AFTER DELETE ON tool_catalog.tool_patterns
+    FOR EACH ROW
+    EXECUTE FUNCTION tool_catalog.record_tool_tombstone();
+
+GRANT SELECT, INSERT, UPDATE ON tool_catalog.tool_tombstones TO opsconductor;
+
+COMMENT ON TABLE tool_catalog.tool_tombstones IS 'Tool names that lost catalog rows; read by incremental profile reloads';
@@ -0,0 +1,39 @@
+-- ============================================================================
+-- 0012: Full-text search column for hybrid tool_index retrieval
+-- Stage AB keyword matching used ILIKE '%word%' over name/desc_short, which
+-- no index can serve. A weighted tsvector (name A, tags B, description C)
+-- with a GIN index replaces it; ToolIndexService fuses its ts_rank_cd
+-- ranking with the pgvector HNSW ranking by reciprocal rank fusion.
+-- ============================================================================
+
+-- IMMUTABLE wrapper: array_to_string is only STABLE, which a generated
+-- column does not accept (safe here: tags are plain text)
+CREATE OR REPLACE FUNCTION tool_catalog.tool_index_tsv(
+    p_id TEXT, p_name TEXT, p_tags TEXT[], p_desc_short TEXT
+)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT
+        setweight(to_tsvector('english', translate(p_id || ' ' || p_name, '-_', '  ')), 'A') ||
+        setweight(to_tsvector('english', translate(array_to_string(p_tags, ' '), '-_', '  ')), 'B') ||
+        setweight(to_tsvector('english', p_desc_short), 'C')
+$$;
+
+ALTER TABLE tool_catalog.tool_index
+    ADD COLUMN IF NOT EXISTS tsv tsvector
+    GENERATED ALWAYS AS (tool_catalog.tool_index_tsv(id, name, tags, desc_short)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_tool_index_tsv
+    ON tool_catalog.tool_index USING GIN (tsv);
+
+-- 001 creates the HNSW index inside an exception block; make sure it exists
+DO $$
+BEGIN
+    CREATE INDEX IF NOT EXISTS tool_index_emb_hnsw
+        ON tool_catalog.tool_index USING hnsw (emb vector_cosine_ops);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE NOTICE 'HNSW not available; vector ranking falls back to a sequential scan';
+END $$;
+
+ANALYZE tool_catalog.tool_index;
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- 0013: Checkpoints for the streaming tool_index backfill
+-- ToolIndexBackfill re-embeds the catalog into tool_index_staging with COPY
+-- and swaps it in. Each COPY batch commits together with its checkpoint
+-- row here, so an interrupted run resumes after the last committed tool
+-- instead of starting over.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS tool_catalog.tool_index_backfill_state (
+    run_id TEXT PRIMARY KEY,              -- e.g. "BAAI/bge-base-en-v1.5@768"
+    status TEXT NOT NULL DEFAULT 'loading',
+    last_id TEXT,                          -- last tool_name written to staging
+    rows_written BIGINT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CHECK (status IN ('loading', 'loaded', 'swapped'))
+);
+
+-- Keyset reads of the source (tool_name > last_id ORDER BY tool_name)
+CREATE INDEX IF NOT EXISTS idx_tools_latest_name
+    ON tool_catalog.tools(tool_name)
+    WHERE is_latest = true AND enabled = true;
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- 0014: Versioned selector tool table
+-- Every write to public.tool bumps tool_version_seq. The selector's
+-- in-process vector index (shared/vector_index.py) polls it and reloads
+-- its embedding matrix only when it moves.
+-- ============================================================================
+
+CREATE SEQUENCE IF NOT EXISTS tool_version_seq;
+
+-- Bump once per statement (covers bulk writes and DELETE)
+CREATE OR REPLACE FUNCTION bump_tool_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM nextval('tool_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_tool_version ON tool;
+CREATE TRIGGER trigger_tool_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tool
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_tool_version();
+
+COMMENT ON SEQUENCE tool_version_seq IS 'Selector tool version; last_value moves on every write to tool';
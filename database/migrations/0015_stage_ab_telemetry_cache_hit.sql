@@ -0,0 +1,11 @@
+-- ============================================================================
+-- 0015: Mark Stage AB telemetry rows served by the semantic selection cache
+-- Cache hits skip retrieval and the LLM call; without a marker they would
+-- read as zero-candidate requests and skew budget and recall metrics.
+-- ============================================================================
+
+ALTER TABLE tool_catalog.stage_ab_telemetry
+    ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN tool_catalog.stage_ab_telemetry.cache_hit IS
+    'Selection reused from the semantic cache (no retrieval or LLM call)';
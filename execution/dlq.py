@@ -0,0 +1,336 @@
+"""
+Phase 7: Stage E DLQ Replay
+Bulk DLQ inspection (grouped by failure signature) and throttled replay
+
+Replaying thousands of dead-lettered executions at once recreates the load
+spike that put them there. DLQReplayService re-enqueues matching rows in
+batches, paced by a token bucket and held under a ceiling of replayed
+entries still pending/processing in the live queue. DLQReplayJobs runs
+replays as background jobs for the API, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Set
+from uuid import UUID, uuid4
+
+from execution.dtos import (
+    DLQFilter, DLQReplayJob, DLQReplayRequest, DLQReplayResponse, DLQSignatureGroup,
+)
+from execution.models import ExecutionDLQModel
+
+logger = logging.getLogger(__name__)
+
+
+# Same rule as the generated execution_dlq.error_class column (migration 0008)
+_ERROR_CLASS_PATTERN = re.compile(r"^([A-Za-z_][A-Za-z0-9_.]*(?:Error|Exception))")
+
+# Volatile fragments stripped from error messages before signing
+_SIGNATURE_SUBSTITUTIONS = [
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b"), "<hex>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+SIGNATURE_MESSAGE_LENGTH = 200
+
+
+def classify_error(entry: ExecutionDLQModel) -> str:
+    """Exception name at the start of last_error, else failure_reason"""
+    if entry.error_class:
+        return entry.error_class
+    match = _ERROR_CLASS_PATTERN.match(entry.last_error or "")
+    return match.group(1) if match else entry.failure_reason
+
+
+def normalize_error_message(message: str) -> str:
+    """Strip IDs, addresses, numbers and quoted values from an error message"""
+    for pattern, replacement in _SIGNATURE_SUBSTITUTIONS:
+        message = pattern.sub(replacement, message)
+    return message.strip()[:SIGNATURE_MESSAGE_LENGTH]
+
+
+def failure_signature(entry: ExecutionDLQModel) -> str:
+    """Stable short hash of error class + normalized message"""
+    message = normalize_error_message(entry.last_error or entry.failure_reason)
+    digest = hashlib.sha1(f"{classify_error(entry)}|{message}".encode()).hexdigest()
+    return digest[:12]
+
+
+class TokenBucket:
+    """Token bucket rate limiter (rate tokens/second, up to `capacity` banked)"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float) -> None:
+        """Wait until `tokens` are available, then take them"""
+        tokens = min(tokens, self.capacity)
+        self._refill()
+        # Tolerance: float refill can leave a sub-nanosecond shortfall
+        while self._tokens < tokens - 1e-9:
+            await self._sleep((tokens - self._tokens) / self.rate)
+            self._refill()
+        self._tokens = max(0.0, self._tokens - tokens)
+
+
+class DLQReplayService:
+    """
+    Bulk DLQ inspection and throttled replay
+
+    Repository contract: list_dlq_entries, requeue_dlq_entries and
+    get_in_flight_queue_entries (see ExecutionRepository).
+    """
+
+    def __init__(
+        self,
+        repository,
+        page_size: int = 500,
+        poll_interval_seconds: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        """
+        Initialize DLQ replay service
+
+        Args:
+            repository: ExecutionRepository (or compatible)
+            page_size: Rows fetched per DLQ page
+            poll_interval_seconds: Wait between in-flight checks at the ceiling
+            clock: Monotonic clock (injectable for simulation)
+            sleep: Async sleep (injectable for simulation)
+        """
+        self.repository = repository
+        self.page_size = page_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self._clock = clock
+        self._sleep = sleep
+
+    def iter_entries(self, dlq_filter: DLQFilter) -> Iterator[ExecutionDLQModel]:
+        """Yield DLQ entries matching the filter, up to max_rows"""
+        after_id = 0
+        yielded = 0
+        while True:
+            # The signature filter runs here, after the page is fetched, so
+            # pages are always full-size and only a short page ends the scan
+            page = self.repository.list_dlq_entries(
+                dlq_filter, after_id=after_id, limit=self.page_size
+            )
+            for entry in page:
+                if dlq_filter.signature and failure_signature(entry) != dlq_filter.signature:
+                    continue
+                yield entry
+                yielded += 1
+                if yielded >= dlq_filter.max_rows:
+                    return
+            if len(page) < self.page_size:
+                return
+            after_id = page[-1].id
+
+    def inspect(self, dlq_filter: DLQFilter, sample_size: int = 5) -> List[DLQSignatureGroup]:
+        """Group matching DLQ entries by failure signature (largest first)"""
+        groups: Dict[str, Dict] = {}
+        for entry in self.iter_entries(dlq_filter):
+            signature = failure_signature(entry)
+            group = groups.get(signature)
+            if group is None:
+                group = groups[signature] = {
+                    "signature": signature,
+                    "error_class": classify_error(entry),
+                    "sample_error": normalize_error_message(entry.last_error or entry.failure_reason),
+                    "count": 0,
+                    "tenants": Counter(),
+                    "sla_classes": Counter(),
+                    "first_failed_at": entry.failed_at,
+                    "last_failed_at": entry.failed_at,
+                    "sample_execution_ids": [],
+                }
+            group["count"] += 1
+            group["tenants"][entry.tenant_id or "unknown"] += 1
+            group["sla_classes"][entry.sla_class.value] += 1
+            group["first_failed_at"] = min(group["first_failed_at"], entry.failed_at)
+            group["last_failed_at"] = max(group["last_failed_at"], entry.failed_at)
+            if len(group["sample_execution_ids"]) < sample_size:
+                group["sample_execution_ids"].append(entry.execution_id)
+
+        return sorted(
+            (DLQSignatureGroup(**g) for g in groups.values()),
+            key=lambda g: (-g.count, g.signature)
+        )
+
+    async def replay(self, request: DLQReplayRequest) -> DLQReplayResponse:
+        """
+        Replay (or dry-run) DLQ entries matching the request filter
+
+        Batches of `batch_size` are paced at `rate_per_second` and only
+        sent while fewer than `max_in_flight` replayed entries are still
+        pending/processing, so the live queue never sees the whole backlog
+        at once.
+        """
+        if request.dry_run:
+            groups = self.inspect(request.filter)
+            return DLQReplayResponse(
+                dry_run=True,
+                matched=sum(g.count for g in groups),
+                groups=groups,
+            )
+
+        bucket = None
+        if request.rate_per_second:
+            bucket = TokenBucket(
+                request.rate_per_second,
+                capacity=max(request.batch_size, request.rate_per_second),
+                clock=self._clock,
+                sleep=self._sleep,
+            )
+
+        started = self._clock()
+        in_flight: List[UUID] = []
+        response = DLQReplayResponse(dry_run=False, matched=0)
+        batch: List[ExecutionDLQModel] = []
+
+        async def flush() -> None:
+            pending = batch[:]
+            batch.clear()
+            while pending:
+                size = len(pending)
+                if request.max_in_flight:
+                    size = min(size, await self._wait_for_capacity(in_flight, request.max_in_flight))
+                if bucket:
+                    await bucket.acquire(size)
+
+                chunk, pending = pending[:size], pending[size:]
+                requeued = self.repository.requeue_dlq_entries(
+                    [entry.dlq_id for entry in chunk],
+                    actor_id=request.actor_id,
+                    reset_retry_count=request.reset_retry_count,
+                    new_priority=request.new_priority,
+                )
+                in_flight.extend(requeued)
+                response.replayed += len(requeued)
+                response.skipped += len(chunk) - len(requeued)
+                response.batches += 1
+
+        for entry in self.iter_entries(request.filter):
+            response.matched += 1
+            batch.append(entry)
+            if len(batch) >= request.batch_size:
+                await flush()
+        await flush()
+
+        response.duration_seconds = self._clock() - started
+        if response.duration_seconds > 0:
+            response.replayed_per_second = response.replayed / response.duration_seconds
+
+        logger.info(
+            f"DLQ replay: matched={response.matched}, replayed={response.replayed}, "
+            f"skipped={response.skipped}, batches={response.batches}, "
+            f"rate={response.replayed_per_second:.1f}/s"
+        )
+        return response
+
+    async def _wait_for_capacity(self, in_flight: List[UUID], ceiling: int) -> int:
+        """Wait until replayed entries in flight drop below the ceiling; return headroom"""
+        while True:
+            # Prune finished entries so the check stays proportional to the ceiling
+            in_flight[:] = self.repository.get_in_flight_queue_entries(in_flight) if in_flight else []
+            if len(in_flight) < ceiling:
+                return ceiling - len(in_flight)
+            await self._sleep(self.poll_interval_seconds)
+
+
+class DLQReplayJobs:
+    """
+    Background DLQ replay jobs, polled by job ID
+
+    A throttled replay can run for minutes and the repository is blocking
+    (psycopg2), so each job runs DLQReplayService.replay on its own event
+    loop in a worker thread. Only one non-dry-run replay runs at a time;
+    the most recent `max_finished` finished jobs are kept for polling.
+    """
+
+    def __init__(self, service: DLQReplayService, max_finished: int = 100):
+        self.service = service
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[UUID, DLQReplayJob]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, request: DLQReplayRequest, actor_id: int) -> DLQReplayJob:
+        """
+        Start a replay job (call from the event loop)
+
+        Args:
+            request: Replay request (its actor_id is replaced by `actor_id`)
+            actor_id: Authenticated caller
+
+        Returns:
+            The running job
+
+        Raises:
+            ValueError: Another non-dry-run replay is still running
+        """
+        if not request.dry_run:
+            running = next(
+                (j for j in self._jobs.values() if j.status == "running" and not j.dry_run), None
+            )
+            if running is not None:
+                raise ValueError(f"DLQ replay {running.job_id} is still running")
+
+        request = request.model_copy(update={"actor_id": actor_id})
+        job = DLQReplayJob(
+            job_id=uuid4(),
+            status="running",
+            actor_id=actor_id,
+            dry_run=request.dry_run,
+            submitted_at=datetime.utcnow(),
+        )
+        self._jobs[job.job_id] = job
+
+        task = asyncio.get_running_loop().create_task(self._run(job, request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: UUID) -> Optional[DLQReplayJob]:
+        """Get a job by ID (None if unknown or evicted)"""
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: DLQReplayJob, request: DLQReplayRequest) -> None:
+        try:
+            job.result = await asyncio.to_thread(asyncio.run, self.service.replay(request))
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"DLQ replay job {job.job_id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = datetime.utcnow()
+        self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status != "running"]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -72,6 +72,52 @@ class RequeueRequest(BaseModel):
     actor_id: int
 
 
+class DLQFilter(BaseModel):
+    """Filter for DLQ inspection and bulk replay"""
+    
+    # Failure Filters
+    error_class: Optional[str] = None
+    signature: Optional[str] = None  # From a dry-run group
+    
+    # Tenant Filter
+    tenant_id: Optional[str] = None
+    
+    # SLA Filter
+    sla_class: Optional[SLAClass] = None
+    
+    # Date Range
+    failed_after: Optional[datetime] = None
+    failed_before: Optional[datetime] = None
+    
+    # Include rows already requeued
+    include_requeued: bool = False
+    
+    # Upper bound on rows considered
+    max_rows: int = Field(default=10000, ge=1, le=100000)
+
+
+class DLQReplayRequest(BaseModel):
+    """Request to bulk-replay DLQ executions matching a filter"""
+    
+    # Selection
+    filter: DLQFilter = Field(default_factory=DLQFilter)
+    
+    # Dry run: only group matching rows by failure signature
+    dry_run: bool = True
+    
+    # Throttling
+    rate_per_second: Optional[float] = Field(10.0, gt=0)  # None = unthrottled
+    batch_size: int = Field(default=50, ge=1, le=1000)
+    max_in_flight: Optional[int] = Field(100, ge=1)  # Replayed entries pending/processing
+    
+    # Requeue Options
+    reset_retry_count: bool = True
+    new_priority: Optional[int] = Field(None, ge=1, le=10)
+    
+    # Actor (set by the API from the authenticated caller, never from the body)
+    actor_id: Optional[int] = None
+
+
 # ============================================================================
 # RESPONSE DTOs
 # ============================================================================
@@ -109,6 +155,9 @@ class ExecutionResponse(BaseModel):
     trace_id: Optional[UUID] = None
     tags: List[str] = Field(default_factory=list)
     
+    # Idempotency
+    deduplicated: bool = False  # True if attached to an existing in-flight execution
+    
     class Config:
         from_attributes = True
 
@@ -318,6 +367,52 @@ class HealthCheckResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+class DLQSignatureGroup(BaseModel):
+    """DLQ entries sharing a failure signature"""
+    
+    signature: str
+    error_class: str
+    sample_error: str
+    count: int
+    tenants: Dict[str, int]
+    sla_classes: Dict[str, int]
+    first_failed_at: datetime
+    last_failed_at: datetime
+    sample_execution_ids: List[UUID]
+
+
+class DLQReplayResponse(BaseModel):
+    """Response for a bulk DLQ replay (or dry run)"""
+    
+    dry_run: bool
+    matched: int
+    groups: List[DLQSignatureGroup] = Field(default_factory=list)
+    
+    # Replay Results
+    replayed: int = 0
+    skipped: int = 0  # Already requeued, or a duplicate is in flight
+    batches: int = 0
+    
+    # Throughput
+    duration_seconds: float = 0.0
+    replayed_per_second: float = 0.0
+
+
+class DLQReplayJob(BaseModel):
+    """Background DLQ replay (poll until status is completed or failed)"""
+    
+    job_id: UUID
+    status: str  # running, completed, failed
+    actor_id: int
+    dry_run: bool
+    submitted_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    # Outcome
+    result: Optional[DLQReplayResponse] = None
+    error: Optional[str] = None
+
+
 # ============================================================================
 # FILTER DTOs
 # ============================================================================
@@ -479,4 +574,4 @@ class StepExecutionResult(BaseModel):
     duration_ms: int
     
     # Logs
-    logs: Optional[str] = None  # Masked logs
\ No newline at end of file
+    logs: Optional[str] = None  # Masked logs
@@ -50,6 +50,12 @@ class ApprovalState(str, Enum):
     EXPIRED = "expired"
 
 
+class DeadlineMissPolicy(str, Enum):
+    """What to do with queued work that can no longer meet its deadline"""
+    REJECT = "reject"        # Expire it (execution -> timeout)
+    DOWNGRADE = "downgrade"  # Run best-effort after all feasible work
+
+
 class ActionClass(str, Enum):
     """Action class for timeout policies"""
     READ = "read"
@@ -106,6 +112,11 @@ class ExecutionFSM:
     def is_terminal_state(cls, status: ExecutionStatus) -> bool:
         """Check if a status is a terminal state"""
         return len(cls.LEGAL_TRANSITIONS.get(status, [])) == 0
+    
+    @classmethod
+    def in_flight_states(cls) -> List[ExecutionStatus]:
+        """Non-terminal states (an execution in these may still run)"""
+        return [s for s in cls.LEGAL_TRANSITIONS if not cls.is_terminal_state(s)]
 
 
 # ============================================================================
@@ -308,6 +319,17 @@ class ExecutionQueueModel(BaseModel):
     # Queue Metadata
     priority: int = Field(default=5, ge=1, le=10)
     sla_class: SLAClass
+    idempotency_key: Optional[str] = None  # Unique among pending/processing entries
+    
+    # Fair Queuing
+    tenant_id: Optional[str] = None
+    cost: float = Field(default=1.0, gt=0)  # Estimated work (seconds)
+    virtual_start: float = 0.0
+    virtual_finish: float = 0.0  # virtual_start + cost / tenant weight
+    
+    # Deadline (EDF)
+    deadline_at: Optional[datetime] = None  # Absolute SLA deadline
+    on_deadline_miss: DeadlineMissPolicy = DeadlineMissPolicy.DOWNGRADE
     
     # Lease Management
     lease_token: Optional[UUID] = None
@@ -325,7 +347,7 @@ class ExecutionQueueModel(BaseModel):
     completed_at: Optional[datetime] = None
     
     # Status
-    status: str = "pending"  # 'pending', 'processing', 'completed', 'failed'
+    status: str = "pending"  # 'pending', 'processing', 'completed', 'failed', 'expired'
     
     # Audit
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -350,10 +372,12 @@ class ExecutionDLQModel(BaseModel):
     failure_details: Optional[Dict[str, Any]] = None
     attempt_count: int
     last_error: Optional[str] = None
+    error_class: Optional[str] = None  # Generated: exception name or failure_reason
     
     # Original Queue Entry
     original_queue_id: Optional[UUID] = None
     sla_class: SLAClass
+    tenant_id: Optional[str] = None  # Joined from executions (bulk replay)
     
     # Timing
     failed_at: datetime = Field(default_factory=datetime.utcnow)
@@ -370,6 +394,24 @@ class ExecutionDLQModel(BaseModel):
         from_attributes = True
 
 
+class TenantSchedulingModel(BaseModel):
+    """Per-tenant fair-queuing weight and concurrency ceiling"""
+    
+    # Primary Key
+    tenant_id: str
+    
+    # Scheduling
+    weight: float = Field(default=1.0, gt=0)
+    max_concurrency: Optional[int] = Field(default=None, gt=0)  # None = default ceiling
+    
+    # Audit
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Config:
+        from_attributes = True
+
+
 class ExecutionLockModel(BaseModel):
     """Per-asset mutex lock"""
     
@@ -422,6 +464,7 @@ class TimeoutPolicyModel(BaseModel):
     
     # Metadata
     description: Optional[str] = None
+    version: Optional[int] = None  # Bumped by trigger on every write
     
     # Audit
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -435,6 +478,76 @@ class TimeoutPolicyModel(BaseModel):
 # HELPER FUNCTIONS
 # ============================================================================
 
+# Plan fields that change between otherwise identical submissions
+VOLATILE_PLAN_KEYS = frozenset({
+    "timestamp",
+    "processing_time_ms",
+    "created_at",
+    "updated_at",
+    "trace_id",
+    "request_id",
+    "plan_id",
+})
+
+# Bookkeeping sub-dicts of a plan or step whose volatile keys are dropped too
+PLAN_METADATA_KEYS = frozenset({"metadata", "execution_metadata"})
+
+
+def normalize_plan_for_idempotency(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a plan so re-submissions of the same work hash identically
+    
+    - Drops volatile keys (timestamps, trace/request IDs) from the plan,
+      each step and their metadata dicts; step inputs and parameters are
+      kept as they are, since a tool argument named "timestamp" is work
+    - Replaces generated step IDs with their position and remaps references
+    - Sorts targets deterministically
+    
+    The input plan is not modified.
+    """
+    import copy
+    import json
+    
+    def strip(value: Dict[str, Any]) -> Dict[str, Any]:
+        stripped = {k: v for k, v in value.items() if k not in VOLATILE_PLAN_KEYS}
+        for key in PLAN_METADATA_KEYS & stripped.keys():
+            if isinstance(stripped[key], dict):
+                stripped[key] = {k: v for k, v in stripped[key].items() if k not in VOLATILE_PLAN_KEYS}
+        return stripped
+    
+    normalized = strip(copy.deepcopy(plan))
+    
+    # Step IDs are generated per planning run (uuid prefix) - use positions
+    steps = normalized.get("steps")
+    if isinstance(steps, list):
+        steps = normalized["steps"] = [strip(step) if isinstance(step, dict) else step for step in steps]
+        step_ids = {
+            step["id"]: f"step_{index}"
+            for index, step in enumerate(steps)
+            if isinstance(step, dict) and "id" in step
+        }
+        for step in steps:
+            if not isinstance(step, dict):
+                continue
+            if "id" in step:
+                step["id"] = step_ids[step["id"]]
+            if isinstance(step.get("depends_on"), list):
+                step["depends_on"] = [step_ids.get(d, d) for d in step["depends_on"]]
+        for rollback in normalized.get("rollback_plan") or []:
+            if isinstance(rollback, dict) and "step_id" in rollback:
+                rollback["step_id"] = step_ids.get(rollback["step_id"], rollback["step_id"])
+    
+    # Ensure deterministic target ordering
+    if isinstance(normalized.get("targets"), list):
+        normalized["targets"] = sorted(
+            normalized["targets"],
+            key=lambda t: json.dumps(t, sort_keys=True, default=str)
+            if isinstance(t, dict) else str(t)
+        )
+    
+    return normalized
+
+
 def calculate_idempotency_key(
     plan: Dict[str, Any],
     tenant_id: str,
@@ -442,17 +555,18 @@ def calculate_idempotency_key(
 ) -> str:
     """
     Calculate idempotency key for execution
-    Formula: sha256(canonical_json(plan) + tenant_id + actor_id)
+    Formula: sha256(canonical_json(normalized_plan) + tenant_id + actor_id)
     """
     import hashlib
     import json
     
-    # Ensure deterministic target ordering
-    if "targets" in plan:
-        plan["targets"] = sorted(plan["targets"], key=lambda t: t.get("id", 0))
-    
     # Create canonical JSON
-    canonical_json = json.dumps(plan, sort_keys=True, separators=(',', ':'))
+    canonical_json = json.dumps(
+        normalize_plan_for_idempotency(plan),
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str
+    )
     
     # Combine with tenant_id and actor_id
     combined = f"{canonical_json}:{tenant_id}:{actor_id}"
@@ -5,27 +5,34 @@ Database access layer with production-hardened queries
 
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from execution.dtos import DLQFilter
 from execution.models import (
     ApprovalModel,
     ExecutionDLQModel,
     ExecutionEventModel,
+    ExecutionFSM,
     ExecutionLockModel,
     ExecutionModel,
     ExecutionQueueModel,
     ExecutionStatus,
     ExecutionStepModel,
     SLAClass,
+    TenantSchedulingModel,
     TimeoutPolicyModel,
 )
+from execution.scheduling import AT_RISK_SLACK_SECONDS, get_queue_metrics
 
 logger = logging.getLogger(__name__)
 
+# Infeasible 'reject' entries expired per dequeue (see _expire_infeasible_entries)
+EXPIRE_BATCH_SIZE = 100
+
 
 class ExecutionRepository:
     """Repository for execution data access"""
@@ -105,6 +112,99 @@ class ExecutionRepository:
                 row = cur.fetchone()
                 return ExecutionModel(**dict(row)) if row else None
     
+    def get_inflight_execution_by_idempotency_key(
+        self,
+        tenant_id: str,
+        idempotency_key: str
+    ) -> Optional[ExecutionModel]:
+        """Get the non-terminal execution for an idempotency key, if any"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM execution.executions
+                    WHERE tenant_id = %s AND idempotency_key = %s
+                    AND status = ANY(%s::execution.execution_status[])
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """, (
+                    tenant_id,
+                    idempotency_key,
+                    [s.value for s in ExecutionFSM.in_flight_states()],
+                ))
+                row = cur.fetchone()
+                return ExecutionModel(**dict(row)) if row else None
+    
+    def create_execution_if_absent(
+        self,
+        execution: ExecutionModel
+    ) -> Tuple[ExecutionModel, bool]:
+        """
+        Create an execution unless an in-flight one has the same idempotency key
+        
+        Relies on the partial unique index over non-terminal executions, so
+        concurrent duplicate submissions resolve to a single row.
+        
+        Returns:
+            (execution, created) - the new execution, or the existing in-flight one
+        """
+        in_flight = [s.value for s in ExecutionFSM.in_flight_states()]
+        
+        for _ in range(2):
+            with self._get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute("""
+                        INSERT INTO execution.executions (
+                            execution_id, tenant_id, actor_id, idempotency_key,
+                            plan_snapshot, execution_mode, sla_class, approval_level,
+                            status, timeout_at, trace_id, parent_execution_id,
+                            tags, metadata
+                        ) VALUES (
+                            %(execution_id)s, %(tenant_id)s, %(actor_id)s, %(idempotency_key)s,
+                            %(plan_snapshot)s, %(execution_mode)s, %(sla_class)s, %(approval_level)s,
+                            %(status)s, %(timeout_at)s, %(trace_id)s, %(parent_execution_id)s,
+                            %(tags)s, %(metadata)s
+                        )
+                        ON CONFLICT (tenant_id, idempotency_key)
+                            WHERE status IN ('pending_approval', 'approved', 'queued', 'running')
+                        DO NOTHING
+                        RETURNING *
+                    """, {
+                        "execution_id": str(execution.execution_id),
+                        "tenant_id": execution.tenant_id,
+                        "actor_id": execution.actor_id,
+                        "idempotency_key": execution.idempotency_key,
+                        "plan_snapshot": psycopg2.extras.Json(execution.plan_snapshot),
+                        "execution_mode": execution.execution_mode.value,
+                        "sla_class": execution.sla_class.value,
+                        "approval_level": execution.approval_level,
+                        "status": execution.status.value,
+                        "timeout_at": execution.timeout_at,
+                        "trace_id": str(execution.trace_id) if execution.trace_id else None,
+                        "parent_execution_id": str(execution.parent_execution_id) if execution.parent_execution_id else None,
+                        "tags": psycopg2.extras.Json(execution.tags),
+                        "metadata": psycopg2.extras.Json(execution.metadata),
+                    })
+                    row = cur.fetchone()
+                    if row:
+                        conn.commit()
+                        return ExecutionModel(**dict(row)), True
+                    
+                    cur.execute("""
+                        SELECT * FROM execution.executions
+                        WHERE tenant_id = %s AND idempotency_key = %s
+                        AND status = ANY(%s::execution.execution_status[])
+                        LIMIT 1
+                    """, (execution.tenant_id, execution.idempotency_key, in_flight))
+                    row = cur.fetchone()
+                    conn.commit()
+                    if row:
+                        return ExecutionModel(**dict(row)), False
+            # The conflicting execution finished in between - retry the insert
+        
+        raise RuntimeError(
+            f"Could not create or attach to execution for idempotency_key={execution.idempotency_key}"
+        )
+    
     def update_execution_status(
         self,
         execution_id: UUID,
@@ -373,17 +473,48 @@ class ExecutionRepository:
     # ========================================================================
     
     def enqueue_execution(self, queue_entry: ExecutionQueueModel) -> ExecutionQueueModel:
-        """Enqueue an execution for background processing"""
+        """
+        Enqueue an execution for background processing
+        
+        Tags the entry for weighted fair queuing in the same statement:
+        virtual_start = max(system virtual time, tenant's last pending finish)
+        virtual_finish = virtual_start + cost / tenant weight
+        
+        deadline_at (the execution's SLA timeout) drives EDF ordering.
+        """
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
+                    WITH tenant AS (
+                        SELECT COALESCE(
+                            (SELECT weight FROM execution.tenant_scheduling
+                             WHERE tenant_id = %(tenant_id)s),
+                            1.0
+                        ) AS weight
+                    ),
+                    tags AS (
+                        SELECT GREATEST(
+                            COALESCE((SELECT virtual_time FROM execution.scheduler_clock WHERE id = 1), 0),
+                            COALESCE((
+                                SELECT MAX(virtual_finish) FROM execution.execution_queue
+                                WHERE tenant_id = %(tenant_id)s AND status = 'pending'
+                            ), 0)
+                        ) AS virtual_start
+                    )
                     INSERT INTO execution.execution_queue (
                         queue_id, execution_id, priority, sla_class,
-                        visibility_timeout_seconds, max_attempts
-                    ) VALUES (
-                        %(queue_id)s, %(execution_id)s, %(priority)s, %(sla_class)s,
-                        %(visibility_timeout_seconds)s, %(max_attempts)s
+                        visibility_timeout_seconds, max_attempts, idempotency_key,
+                        tenant_id, cost, virtual_start, virtual_finish,
+                        deadline_at, on_deadline_miss
                     )
+                    SELECT
+                        %(queue_id)s, %(execution_id)s, %(priority)s, %(sla_class)s,
+                        %(visibility_timeout_seconds)s, %(max_attempts)s, %(idempotency_key)s,
+                        %(tenant_id)s, %(cost)s, tags.virtual_start,
+                        tags.virtual_start + %(cost)s / tenant.weight,
+                        %(deadline_at)s, %(on_deadline_miss)s
+                    FROM tags, tenant
+                    ON CONFLICT DO NOTHING
                     RETURNING *
                 """, {
                     "queue_id": str(queue_entry.queue_id),
@@ -392,17 +523,95 @@ class ExecutionRepository:
                     "sla_class": queue_entry.sla_class.value,
                     "visibility_timeout_seconds": queue_entry.visibility_timeout_seconds,
                     "max_attempts": queue_entry.max_attempts,
+                    "idempotency_key": queue_entry.idempotency_key,
+                    "tenant_id": queue_entry.tenant_id,
+                    "cost": queue_entry.cost,
+                    "deadline_at": queue_entry.deadline_at,
+                    "on_deadline_miss": queue_entry.on_deadline_miss.value,
                 })
                 row = cur.fetchone()
+                if row is None:
+                    # Already queued (same execution or same in-flight idempotency key)
+                    cur.execute("""
+                        SELECT * FROM execution.execution_queue
+                        WHERE execution_id = %s
+                        OR (idempotency_key = %s AND status IN ('pending', 'processing'))
+                        ORDER BY enqueued_at ASC
+                        LIMIT 1
+                    """, (str(queue_entry.execution_id), queue_entry.idempotency_key))
+                    row = cur.fetchone()
                 conn.commit()
                 return ExecutionQueueModel(**dict(row))
     
-    def dequeue_execution(self, worker_id: str) -> Optional[ExecutionQueueModel]:
-        """Dequeue an execution for processing (with lease)"""
+    def dequeue_execution(
+        self,
+        worker_id: str,
+        default_max_concurrency: Optional[int] = None,
+        at_risk_slack_seconds: float = AT_RISK_SLACK_SECONDS
+    ) -> Optional[ExecutionQueueModel]:
+        """
+        Dequeue an execution for processing (with lease)
+        
+        Order: priority band, then fair-queuing virtual finish tag, then
+        arrival. Entries at risk of missing their deadline (deadline_at <
+        now + cost + at_risk_slack_seconds) go ahead of their band's fair
+        order, earliest deadline first. Tenants already at their
+        concurrency ceiling are skipped (the ceiling is best-effort under
+        concurrent workers).
+        
+        Entries that can no longer finish by their deadline (deadline_at <
+        now + cost seconds) are expired first if their policy is 'reject',
+        or sorted below every priority band if it is 'downgrade'.
+        
+        Args:
+            worker_id: Worker identifier
+            default_max_concurrency: Ceiling for tenants without a
+                tenant_scheduling row (None = unlimited)
+            at_risk_slack_seconds: Slack at or below which an entry is promoted
+        """
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                self._expire_infeasible_entries(cur)
+                
                 # Use SELECT FOR UPDATE SKIP LOCKED for concurrent workers
                 cur.execute("""
+                    WITH running AS (
+                        SELECT tenant_id, COUNT(*) AS n
+                        FROM execution.execution_queue
+                        WHERE status = 'processing'
+                        AND lease_expires_at > CURRENT_TIMESTAMP
+                        GROUP BY tenant_id
+                    ),
+                    picked AS (
+                        SELECT q.queue_id, q.virtual_start
+                        FROM execution.execution_queue q
+                        LEFT JOIN execution.tenant_scheduling ts ON ts.tenant_id = q.tenant_id
+                        LEFT JOIN running r ON r.tenant_id IS NOT DISTINCT FROM q.tenant_id
+                        WHERE q.status = 'pending'
+                        AND (q.lease_expires_at IS NULL OR q.lease_expires_at < CURRENT_TIMESTAMP)
+                        AND (
+                            COALESCE(ts.max_concurrency, %(default_max_concurrency)s::INTEGER) IS NULL
+                            OR COALESCE(r.n, 0) < COALESCE(ts.max_concurrency, %(default_max_concurrency)s::INTEGER)
+                        )
+                        ORDER BY
+                            (q.deadline_at IS NOT NULL
+                             AND q.deadline_at < CURRENT_TIMESTAMP + q.cost * INTERVAL '1 second') ASC,
+                            q.priority ASC,
+                            CASE WHEN q.deadline_at < CURRENT_TIMESTAMP
+                                      + (q.cost + %(at_risk_slack)s) * INTERVAL '1 second'
+                                 THEN q.deadline_at END ASC NULLS LAST,
+                            q.virtual_finish ASC,
+                            q.enqueued_at ASC
+                        LIMIT 1
+                        FOR UPDATE OF q SKIP LOCKED
+                    ),
+                    clock AS (
+                        UPDATE execution.scheduler_clock
+                        SET virtual_time = GREATEST(virtual_time, picked.virtual_start),
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM picked
+                        WHERE id = 1
+                    )
                     UPDATE execution.execution_queue
                     SET status = 'processing',
                         lease_token = gen_random_uuid(),
@@ -410,32 +619,234 @@ class ExecutionRepository:
                         dequeued_at = CURRENT_TIMESTAMP,
                         attempt_count = attempt_count + 1,
                         updated_at = CURRENT_TIMESTAMP
-                    WHERE queue_id = (
-                        SELECT queue_id FROM execution.execution_queue
-                        WHERE status = 'pending'
-                        AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
-                        ORDER BY priority ASC, enqueued_at ASC
-                        LIMIT 1
-                        FOR UPDATE SKIP LOCKED
-                    )
+                    WHERE queue_id = (SELECT queue_id FROM picked)
                     RETURNING *
+                """, {
+                    "default_max_concurrency": default_max_concurrency,
+                    "at_risk_slack": at_risk_slack_seconds,
+                })
+                row = cur.fetchone()
+                conn.commit()
+                if not row:
+                    return None
+                
+                entry = ExecutionQueueModel(**dict(row))
+                if entry.dequeued_at and entry.enqueued_at:
+                    get_queue_metrics().record_dequeue(
+                        entry.tenant_id,
+                        (entry.dequeued_at - entry.enqueued_at).total_seconds() * 1000
+                    )
+                return entry
+    
+    def _expire_infeasible_entries(self, cur, limit: int = EXPIRE_BATCH_SIZE) -> int:
+        """
+        Expire pending 'reject' entries that can no longer meet their deadline
+        
+        Runs on every dequeue, so it is bounded: at most `limit` rows (the
+        most overdue first), and rows another worker has locked are skipped
+        rather than waited on. Anything left over is picked up by the next
+        dequeue.
+        """
+        cur.execute("""
+            WITH infeasible AS (
+                SELECT queue_id
+                FROM execution.execution_queue
+                WHERE status = 'pending'
+                AND on_deadline_miss = 'reject'
+                AND deadline_at < CURRENT_TIMESTAMP + cost * INTERVAL '1 second'
+                ORDER BY deadline_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ),
+            expired AS (
+                UPDATE execution.execution_queue
+                SET status = 'expired',
+                    last_error = 'Deadline unreachable at dequeue',
+                    completed_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE queue_id IN (SELECT queue_id FROM infeasible)
+                RETURNING execution_id, sla_class
+            ),
+            timed_out AS (
+                UPDATE execution.executions
+                SET previous_status = status,
+                    status = %s,
+                    status_changed_at = CURRENT_TIMESTAMP,
+                    error_message = 'Rejected: SLA deadline unreachable before start',
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE execution_id IN (SELECT execution_id FROM expired)
+            )
+            SELECT sla_class FROM expired
+        """, (limit, ExecutionStatus.TIMEOUT.value))
+        rows = cur.fetchall()
+        
+        metrics = get_queue_metrics()
+        for row in rows:
+            metrics.record_rejection(row["sla_class"])
+        if rows:
+            logger.warning(f"Expired {len(rows)} queue entries past their feasible deadline")
+        return len(rows)
+    
+    def get_queue_stats_by_tenant(self) -> List[Dict[str, Any]]:
+        """Get per-tenant queue depth, running count and current wait"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT
+                        COALESCE(tenant_id, 'unknown') AS tenant_id,
+                        COUNT(*) FILTER (WHERE status = 'pending') AS queue_depth,
+                        COUNT(*) FILTER (WHERE status = 'processing') AS running,
+                        COALESCE(EXTRACT(EPOCH FROM (
+                            CURRENT_TIMESTAMP - MIN(enqueued_at) FILTER (WHERE status = 'pending')
+                        )) * 1000, 0) AS oldest_wait_ms
+                    FROM execution.execution_queue
+                    WHERE status IN ('pending', 'processing')
+                    GROUP BY 1
+                    ORDER BY 1
                 """)
+                rows = [dict(row) for row in cur.fetchall()]
+        
+        get_queue_metrics().update_depths(
+            {r["tenant_id"]: r["queue_depth"] for r in rows},
+            {r["tenant_id"]: r["running"] for r in rows},
+        )
+        return rows
+    
+    def get_tenant_scheduling(self, tenant_id: str) -> Optional[TenantSchedulingModel]:
+        """Get fair-queuing settings for a tenant"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM execution.tenant_scheduling
+                    WHERE tenant_id = %s
+                """, (tenant_id,))
+                row = cur.fetchone()
+                return TenantSchedulingModel(**dict(row)) if row else None
+    
+    def upsert_tenant_scheduling(self, settings: TenantSchedulingModel) -> TenantSchedulingModel:
+        """Create or update fair-queuing settings for a tenant"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    INSERT INTO execution.tenant_scheduling (tenant_id, weight, max_concurrency)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (tenant_id) DO UPDATE
+                    SET weight = EXCLUDED.weight,
+                        max_concurrency = EXCLUDED.max_concurrency,
+                        updated_at = CURRENT_TIMESTAMP
+                    RETURNING *
+                """, (settings.tenant_id, settings.weight, settings.max_concurrency))
                 row = cur.fetchone()
                 conn.commit()
-                return ExecutionQueueModel(**dict(row)) if row else None
+                return TenantSchedulingModel(**dict(row))
     
     def complete_queue_entry(self, queue_id: UUID) -> None:
-        """Mark queue entry as completed"""
+        """Mark queue entry as completed and record its deadline outcome"""
         with self._get_connection() as conn:
-            with conn.cursor() as cur:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     UPDATE execution.execution_queue
                     SET status = 'completed',
                         completed_at = CURRENT_TIMESTAMP,
                         updated_at = CURRENT_TIMESTAMP
                     WHERE queue_id = %s
+                    RETURNING sla_class,
+                        (deadline_at IS NULL OR completed_at <= deadline_at) AS on_time
                 """, (str(queue_id),))
+                row = cur.fetchone()
                 conn.commit()
+        
+        if row:
+            get_queue_metrics().record_completion(row["sla_class"], row["on_time"])
+    
+    def get_deadline_report(self, since: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get on-time completion per SLA class
+        
+        Args:
+            since: Only count entries finished after this time (default: 24h ago)
+        
+        Returns:
+            Dict of sla_class -> {on_time, missed, rejected, on_time_ratio}
+        """
+        since = since or datetime.utcnow() - timedelta(hours=24)
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT
+                        sla_class,
+                        COUNT(*) FILTER (
+                            WHERE status = 'completed'
+                            AND (deadline_at IS NULL OR completed_at <= deadline_at)
+                        ) AS on_time,
+                        COUNT(*) FILTER (
+                            WHERE status = 'completed' AND completed_at > deadline_at
+                        ) AS missed,
+                        COUNT(*) FILTER (WHERE status = 'expired') AS rejected
+                    FROM execution.execution_queue
+                    WHERE status IN ('completed', 'expired')
+                    AND completed_at >= %s
+                    GROUP BY sla_class
+                    ORDER BY sla_class
+                """, (since,))
+                rows = cur.fetchall()
+        
+        report = {}
+        for row in rows:
+            total = row["on_time"] + row["missed"] + row["rejected"]
+            report[row["sla_class"]] = {
+                "on_time": row["on_time"],
+                "missed": row["missed"],
+                "rejected": row["rejected"],
+                "on_time_ratio": row["on_time"] / total if total else 1.0,
+            }
+        return report
+    
+    def export_arrival_trace(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Export queue arrivals as a trace for execution.simulation
+        
+        Times are seconds relative to the first arrival; service_time is
+        the observed run time when the entry has finished.
+        """
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT enqueued_at, dequeued_at, completed_at, tenant_id,
+                        sla_class, priority, cost, deadline_at, on_deadline_miss
+                    FROM execution.execution_queue
+                    WHERE enqueued_at >= %s
+                    AND (%s::TIMESTAMPTZ IS NULL OR enqueued_at < %s)
+                    ORDER BY enqueued_at ASC
+                """, (since, until, until))
+                rows = cur.fetchall()
+        
+        if not rows:
+            return []
+        
+        origin = rows[0]["enqueued_at"]
+        trace = []
+        for row in rows:
+            record = {
+                "arrival": (row["enqueued_at"] - origin).total_seconds(),
+                "tenant_id": row["tenant_id"] or "unknown",
+                "sla_class": row["sla_class"],
+                "priority": row["priority"],
+                "cost": row["cost"],
+                "deadline": (
+                    (row["deadline_at"] - origin).total_seconds()
+                    if row["deadline_at"] else None
+                ),
+                "on_deadline_miss": row["on_deadline_miss"],
+            }
+            if row["dequeued_at"] and row["completed_at"]:
+                record["service_time"] = (row["completed_at"] - row["dequeued_at"]).total_seconds()
+            trace.append(record)
+        return trace
     
     def fail_queue_entry(self, queue_id: UUID, error_message: str) -> None:
         """Mark queue entry as failed"""
@@ -450,6 +861,179 @@ class ExecutionRepository:
                 """, (error_message, str(queue_id)))
                 conn.commit()
     
+    # ========================================================================
+    # DEAD LETTER QUEUE
+    # ========================================================================
+    
+    def list_dlq_entries(
+        self,
+        dlq_filter: DLQFilter,
+        after_id: int = 0,
+        limit: int = 500
+    ) -> List[ExecutionDLQModel]:
+        """
+        List DLQ entries matching a filter (keyset-paginated by id)
+        
+        Args:
+            dlq_filter: Error class / tenant / SLA / time range filter
+            after_id: Return rows with id > after_id
+            limit: Page size
+        """
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT d.*, e.tenant_id
+                    FROM execution.execution_dlq d
+                    JOIN execution.executions e ON e.execution_id = d.execution_id
+                    WHERE d.id > %(after_id)s
+                    AND (%(include_requeued)s OR d.requeued = false)
+                    AND (%(error_class)s::TEXT IS NULL OR d.error_class = %(error_class)s)
+                    AND (%(tenant_id)s::TEXT IS NULL OR e.tenant_id = %(tenant_id)s)
+                    AND (%(sla_class)s::TEXT IS NULL OR d.sla_class::TEXT = %(sla_class)s)
+                    AND (%(failed_after)s::TIMESTAMPTZ IS NULL OR d.failed_at >= %(failed_after)s)
+                    AND (%(failed_before)s::TIMESTAMPTZ IS NULL OR d.failed_at < %(failed_before)s)
+                    ORDER BY d.id ASC
+                    LIMIT %(limit)s
+                """, {
+                    "after_id": after_id,
+                    "include_requeued": dlq_filter.include_requeued,
+                    "error_class": dlq_filter.error_class,
+                    "tenant_id": dlq_filter.tenant_id,
+                    "sla_class": dlq_filter.sla_class.value if dlq_filter.sla_class else None,
+                    "failed_after": dlq_filter.failed_after,
+                    "failed_before": dlq_filter.failed_before,
+                    "limit": limit,
+                })
+                return [ExecutionDLQModel(**dict(row)) for row in cur.fetchall()]
+    
+    def requeue_dlq_entries(
+        self,
+        dlq_ids: List[UUID],
+        actor_id: int,
+        reset_retry_count: bool = True,
+        new_priority: Optional[int] = None
+    ) -> List[UUID]:
+        """
+        Re-enqueue a batch of DLQ entries in one statement
+        
+        The original queue row is reset to pending with fresh fair-queuing
+        tags and the same deadline budget; the execution goes back to
+        queued and a 'dlq_replay' event is recorded. Rows already requeued,
+        or whose idempotency key has another execution in flight, are
+        skipped (the in-flight unique index would reject them). A DLQ row
+        is only marked requeued when its queue row was actually reset, so
+        one without a queue row stays replayable.
+        
+        Returns:
+            Execution IDs actually requeued
+        """
+        if not dlq_ids:
+            return []
+        
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    WITH locked AS (
+                        SELECT dlq_id, execution_id, failed_at
+                        FROM execution.execution_dlq
+                        WHERE dlq_id = ANY(%(dlq_ids)s::UUID[])
+                        AND requeued = false
+                        FOR UPDATE SKIP LOCKED
+                    ),
+                    picked AS (
+                        -- One execution per idempotency key (DISTINCT ON cannot lock)
+                        SELECT DISTINCT ON (e.tenant_id, e.idempotency_key)
+                            l.dlq_id, l.execution_id, e.status AS from_status
+                        FROM locked l
+                        JOIN execution.executions e ON e.execution_id = l.execution_id
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM execution.executions other
+                            WHERE other.tenant_id = e.tenant_id
+                            AND other.idempotency_key = e.idempotency_key
+                            AND other.execution_id <> e.execution_id
+                            AND other.status IN ('pending_approval', 'approved', 'queued', 'running')
+                        )
+                        ORDER BY e.tenant_id, e.idempotency_key, l.failed_at DESC
+                    ),
+                    requeued AS (
+                        UPDATE execution.execution_queue q
+                        SET status = 'pending',
+                            lease_token = NULL,
+                            lease_expires_at = NULL,
+                            dequeued_at = NULL,
+                            completed_at = NULL,
+                            last_error = NULL,
+                            attempt_count = CASE WHEN %(reset_retry_count)s THEN 0 ELSE q.attempt_count END,
+                            priority = COALESCE(%(new_priority)s, q.priority),
+                            deadline_at = CURRENT_TIMESTAMP + (q.deadline_at - q.enqueued_at),
+                            enqueued_at = CURRENT_TIMESTAMP,
+                            virtual_start = c.virtual_time,
+                            virtual_finish = c.virtual_time + q.cost / COALESCE(
+                                (SELECT weight FROM execution.tenant_scheduling ts
+                                 WHERE ts.tenant_id = q.tenant_id),
+                                1.0
+                            ),
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM picked, execution.scheduler_clock c
+                        WHERE q.execution_id = picked.execution_id
+                        AND c.id = 1
+                        RETURNING q.execution_id
+                    ),
+                    marked AS (
+                        -- Only DLQ rows whose queue row was actually reset
+                        UPDATE execution.execution_dlq d
+                        SET requeued = true,
+                            requeued_at = CURRENT_TIMESTAMP,
+                            requeued_by = %(actor_id)s
+                        FROM picked
+                        JOIN requeued ON requeued.execution_id = picked.execution_id
+                        WHERE d.dlq_id = picked.dlq_id
+                    ),
+                    restored AS (
+                        UPDATE execution.executions e
+                        SET previous_status = e.status,
+                            status = 'queued',
+                            status_changed_at = CURRENT_TIMESTAMP,
+                            error_message = NULL,
+                            error_details = NULL,
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM requeued
+                        WHERE e.execution_id = requeued.execution_id
+                    ),
+                    events AS (
+                        INSERT INTO execution.execution_events (
+                            execution_id, event_type, from_status, to_status, actor_id, actor_type
+                        )
+                        SELECT picked.execution_id, 'dlq_replay', picked.from_status, 'queued',
+                            %(actor_id)s, 'user'
+                        FROM picked
+                        JOIN requeued ON requeued.execution_id = picked.execution_id
+                    )
+                    SELECT execution_id FROM requeued
+                """, {
+                    "dlq_ids": [str(dlq_id) for dlq_id in dlq_ids],
+                    "actor_id": actor_id,
+                    "reset_retry_count": reset_retry_count,
+                    "new_priority": new_priority,
+                })
+                rows = cur.fetchall()
+                conn.commit()
+                return [UUID(str(row["execution_id"])) for row in rows]
+    
+    def get_in_flight_queue_entries(self, execution_ids: List[UUID]) -> List[UUID]:
+        """Return the subset of `execution_ids` whose queue entry is pending or processing"""
+        if not execution_ids:
+            return []
+        
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT execution_id FROM execution.execution_queue
+                    WHERE execution_id = ANY(%s::UUID[])
+                    AND status IN ('pending', 'processing')
+                """, ([str(e) for e in execution_ids],))
+                return [UUID(str(row[0])) for row in cur.fetchall()]
+    
     # ========================================================================
     # EXECUTION LOCKS
     # ========================================================================
@@ -546,4 +1130,25 @@ class ExecutionRepository:
                     WHERE sla_class = %s AND action_class = %s
                 """, (sla_class.value, action_class))
                 row = cur.fetchone()
-                return TimeoutPolicyModel(**dict(row)) if row else None
\ No newline at end of file
+                return TimeoutPolicyModel(**dict(row)) if row else None
+    
+    def list_timeout_policies(self) -> List[TimeoutPolicyModel]:
+        """Get the full SLA class × action class timeout matrix"""
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT * FROM execution.timeout_policies
+                    ORDER BY sla_class, action_class
+                """)
+                rows = cur.fetchall()
+                return [TimeoutPolicyModel(**dict(row)) for row in rows]
+    
+    def get_timeout_policy_version(self) -> int:
+        """Get the current timeout policy matrix version (bumped on every write)"""
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT last_value FROM execution.timeout_policies_version_seq
+                """)
+                row = cur.fetchone()
+                return int(row[0]) if row else 0
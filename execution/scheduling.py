@@ -0,0 +1,409 @@
+"""
+Phase 7: Stage E Queue Scheduling
+Per-tenant weighted fair queuing (start-time fair queuing), earliest-deadline
+promotion of at-risk entries and queue metrics
+
+The database queue (ExecutionRepository.enqueue_execution/dequeue_execution)
+implements the same tagging and ordering rules in SQL; FairScheduler is the
+in-memory reference used for simulation and tests.
+"""
+
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipeline.services.metrics_collector import Histogram
+
+# An entry whose slack (deadline - now - cost) is at most this many seconds
+# is at risk: it jumps the fair order of its priority band, earliest deadline
+# first. Everything else is served in virtual finish order.
+AT_RISK_SLACK_SECONDS = 30.0
+
+
+def virtual_tags(
+    system_virtual_time: float,
+    tenant_last_finish: Optional[float],
+    weight: float,
+    cost: float
+) -> Tuple[float, float]:
+    """
+    Compute start-time fair queuing tags for a new queue entry
+
+    start  = max(system virtual time, tenant's last pending finish tag)
+    finish = start + cost / weight
+
+    Args:
+        system_virtual_time: Start tag of the most recently dequeued entry
+        tenant_last_finish: Largest finish tag among the tenant's pending entries
+        weight: Tenant weight (> 0)
+        cost: Estimated work of the entry (> 0)
+
+    Returns:
+        (virtual_start, virtual_finish)
+    """
+    start = max(system_virtual_time, tenant_last_finish or 0.0)
+    return start, start + cost / weight
+
+
+@dataclass(order=True)
+class ScheduledItem:
+    """Queue entry as seen by the in-memory scheduler"""
+
+    sort_key: Tuple[Any, ...] = field(init=False, repr=False)
+    item_id: Any = field(compare=False)
+    tenant_id: str = field(compare=False)
+    priority: int = field(default=5, compare=False)
+    cost: float = field(default=1.0, compare=False)
+    enqueued_at: float = field(default=0.0, compare=False)
+    virtual_start: float = field(default=0.0, compare=False)
+    virtual_finish: float = field(default=0.0, compare=False)
+    seq: int = field(default=0, compare=False)
+    deadline: Optional[float] = field(default=None, compare=False)
+    on_deadline_miss: str = field(default="downgrade", compare=False)
+    sla_class: Optional[str] = field(default=None, compare=False)
+    downgraded: bool = field(default=False, compare=False)
+    queued: bool = field(default=True, compare=False)
+
+    def __post_init__(self):
+        self._update_sort_key()
+
+    def _update_sort_key(self) -> None:
+        # Fair order; downgraded entries sort below every priority band
+        self.sort_key = (
+            self.downgraded, self.priority,
+            self.virtual_finish, self.enqueued_at, self.seq,
+        )
+
+    def is_feasible(self, now: float) -> bool:
+        """Whether the entry can still finish by its deadline if started now"""
+        return self.deadline is None or now + self.cost <= self.deadline
+
+    def is_at_risk(self, now: float, slack_seconds: float) -> bool:
+        """Whether the entry's slack has dropped to `slack_seconds` or below"""
+        return self.deadline is not None and self.deadline - now - self.cost <= slack_seconds
+
+    def at_risk_key(self) -> Tuple[Any, ...]:
+        """Dispatch key when promoted: ahead of its band's fair order, EDF"""
+        return (self.downgraded, self.priority, 0, self.deadline, self.seq)
+
+    def fair_key(self) -> Tuple[Any, ...]:
+        """Dispatch key in fair order"""
+        return (self.downgraded, self.priority, 1, self.virtual_finish, self.enqueued_at, self.seq)
+
+
+class FairScheduler:
+    """
+    In-memory weighted fair queue with per-tenant concurrency ceilings
+
+    Dequeue order: priority band (1=highest), then virtual finish tag, then
+    arrival. Tenants already running `max_concurrency` entries are skipped.
+
+    When `dequeue` is given the current time, deadlines take part:
+    - Entries at risk (slack <= `at_risk_slack`) go ahead of their band's
+      fair order, earliest deadline first
+    - Entries that can no longer finish by their deadline are either
+      rejected (moved to `rejected`) or downgraded below every priority
+      band, per their `on_deadline_miss`
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+        default_weight: float = 1.0,
+        default_max_concurrency: Optional[int] = None,
+        at_risk_slack: float = AT_RISK_SLACK_SECONDS
+    ):
+        """
+        Initialize fair scheduler
+
+        Args:
+            weights: Tenant weights (missing tenants use default_weight)
+            max_concurrency: Tenant concurrency ceilings
+            default_weight: Weight for tenants not in `weights`
+            default_max_concurrency: Ceiling for tenants not in `max_concurrency`
+            at_risk_slack: Slack (seconds) at or below which an entry is promoted
+        """
+        self.weights = dict(weights or {})
+        self.max_concurrency = dict(max_concurrency or {})
+        self.default_weight = default_weight
+        self.default_max_concurrency = default_max_concurrency
+        self.at_risk_slack = at_risk_slack
+
+        self.virtual_time = 0.0
+        self._queues: Dict[str, List[ScheduledItem]] = defaultdict(list)
+        # Per-tenant (deadline, seq, item) heaps; both heaps drop dequeued
+        # or rejected entries lazily, when they reach the head
+        self._deadlines: Dict[str, List[Tuple[float, int, ScheduledItem]]] = defaultdict(list)
+        self._size = 0
+        self._last_finish: Dict[str, float] = {}
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.rejected: List[ScheduledItem] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _ceiling(self, tenant_id: str) -> Optional[int]:
+        return self.max_concurrency.get(tenant_id, self.default_max_concurrency)
+
+    def enqueue(
+        self,
+        item_id: Any,
+        tenant_id: str,
+        priority: int = 5,
+        cost: float = 1.0,
+        enqueued_at: float = 0.0,
+        deadline: Optional[float] = None,
+        on_deadline_miss: str = "downgrade",
+        sla_class: Optional[str] = None
+    ) -> ScheduledItem:
+        """Tag and enqueue an entry (deadline is absolute, same clock as enqueued_at)"""
+        with self._lock:
+            weight = self.weights.get(tenant_id, self.default_weight)
+            last_finish = self._last_finish.get(tenant_id) if self._pending[tenant_id] else None
+            start, finish = virtual_tags(self.virtual_time, last_finish, weight, cost)
+
+            item = ScheduledItem(
+                item_id=item_id,
+                tenant_id=tenant_id,
+                priority=priority,
+                cost=cost,
+                enqueued_at=enqueued_at,
+                virtual_start=start,
+                virtual_finish=finish,
+                seq=next(self._seq),
+                deadline=deadline,
+                on_deadline_miss=on_deadline_miss,
+                sla_class=sla_class,
+            )
+            heapq.heappush(self._queues[tenant_id], item)
+            if deadline is not None:
+                heapq.heappush(self._deadlines[tenant_id], (deadline, item.seq, item))
+            self._size += 1
+            self._last_finish[tenant_id] = finish
+            self._pending[tenant_id] += 1
+            return item
+
+    def dequeue(self, now: Optional[float] = None) -> Optional[ScheduledItem]:
+        """
+        Pop the next eligible entry (None if empty or all tenants at ceiling)
+
+        Args:
+            now: Current time; enables deadline-miss handling when given
+        """
+        with self._lock:
+            # Heaps per tenant: pick the smallest candidate among tenants
+            # below their ceiling (O(tenants) instead of re-heaping the backlog)
+            best: Optional[Tuple[Tuple[Any, ...], ScheduledItem]] = None
+            for tenant_id, queue in self._queues.items():
+                deadlines = self._deadlines[tenant_id]
+                if now is not None:
+                    self._settle_infeasible_heads(tenant_id, queue, deadlines, now)
+                self._drop_stale_heads(queue, deadlines)
+                if not queue:
+                    continue
+                ceiling = self._ceiling(tenant_id)
+                if ceiling is not None and self._running[tenant_id] >= ceiling:
+                    continue
+                candidate = (queue[0].fair_key(), queue[0])
+                if now is not None and deadlines:
+                    urgent = deadlines[0][2]
+                    if not urgent.downgraded and urgent.is_at_risk(now, self.at_risk_slack):
+                        candidate = min(candidate, (urgent.at_risk_key(), urgent), key=lambda c: c[0])
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+
+            if best is None:
+                return None
+
+            picked = best[1]
+            picked.queued = False
+            self._drop_stale_heads(self._queues[picked.tenant_id], self._deadlines[picked.tenant_id])
+            self._size -= 1
+            self.virtual_time = max(self.virtual_time, picked.virtual_start)
+            self._pending[picked.tenant_id] -= 1
+            self._running[picked.tenant_id] += 1
+            return picked
+
+    @staticmethod
+    def _drop_stale_heads(queue: List[ScheduledItem], deadlines: List[Tuple[float, int, ScheduledItem]]) -> None:
+        """Pop entries already dequeued or rejected through the other heap"""
+        while queue and not queue[0].queued:
+            heapq.heappop(queue)
+        while deadlines and (not deadlines[0][2].queued or deadlines[0][2].downgraded):
+            heapq.heappop(deadlines)
+
+    def _settle_infeasible_heads(
+        self,
+        tenant_id: str,
+        queue: List[ScheduledItem],
+        deadlines: List[Tuple[float, int, ScheduledItem]],
+        now: float
+    ) -> None:
+        """Reject or downgrade infeasible entries at the head of a tenant's deadline heap"""
+        # The head has the tenant's earliest deadline, so infeasible entries
+        # behind it are settled when they reach the head
+        downgraded = False
+        while deadlines:
+            item = deadlines[0][2]
+            if item.queued and not item.downgraded and item.is_feasible(now):
+                break
+            heapq.heappop(deadlines)
+            if not item.queued or item.downgraded:
+                continue
+            if item.on_deadline_miss == "reject":
+                item.queued = False
+                self._size -= 1
+                self._pending[tenant_id] -= 1
+                self.rejected.append(item)
+            else:
+                item.downgraded = True
+                item._update_sort_key()
+                downgraded = True
+        if downgraded:
+            heapq.heapify(queue)
+
+    def complete(self, item: ScheduledItem) -> None:
+        """Release the tenant's concurrency slot"""
+        with self._lock:
+            self._running[item.tenant_id] = max(0, self._running[item.tenant_id] - 1)
+
+    def depth_by_tenant(self) -> Dict[str, int]:
+        """Pending entries per tenant"""
+        with self._lock:
+            return {t: n for t, n in self._pending.items() if n > 0}
+
+    def running_by_tenant(self) -> Dict[str, int]:
+        """Running entries per tenant"""
+        with self._lock:
+            return {t: n for t, n in self._running.items() if n > 0}
+
+
+DEADLINE_OUTCOMES = ("on_time", "missed", "rejected")
+
+
+class QueueMetrics:
+    """Per-tenant queue depth and wait-time metrics, per-SLA deadline outcomes"""
+
+    def __init__(self):
+        self._wait_ms: Dict[str, Histogram] = defaultdict(Histogram)
+        self._depth: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+        self._dequeued: Dict[str, int] = defaultdict(int)
+        self._deadline: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(DEADLINE_OUTCOMES, 0)
+        )
+        self._lock = threading.Lock()
+
+    def record_dequeue(self, tenant_id: Optional[str], wait_ms: float) -> None:
+        """Record the queue wait of a dequeued entry"""
+        tenant = tenant_id or "unknown"
+        with self._lock:
+            self._dequeued[tenant] += 1
+            histogram = self._wait_ms[tenant]
+        histogram.observe(wait_ms)
+
+    def record_completion(self, sla_class: Optional[str], on_time: bool) -> None:
+        """Record whether a completed entry met its deadline"""
+        with self._lock:
+            self._deadline[sla_class or "unknown"]["on_time" if on_time else "missed"] += 1
+
+    def record_rejection(self, sla_class: Optional[str]) -> None:
+        """Record an entry rejected because it could no longer meet its deadline"""
+        with self._lock:
+            self._deadline[sla_class or "unknown"]["rejected"] += 1
+
+    def get_deadline_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get deadline outcomes per SLA class, with on-time ratio"""
+        with self._lock:
+            outcomes = {sla: dict(counts) for sla, counts in self._deadline.items()}
+
+        for counts in outcomes.values():
+            total = sum(counts[o] for o in DEADLINE_OUTCOMES)
+            counts["on_time_ratio"] = counts["on_time"] / total if total else 1.0
+        return dict(sorted(outcomes.items()))
+
+    def update_depths(
+        self,
+        depth_by_tenant: Dict[str, int],
+        running_by_tenant: Optional[Dict[str, int]] = None
+    ) -> None:
+        """Replace the current per-tenant depth (and running) gauges"""
+        with self._lock:
+            self._depth = dict(depth_by_tenant)
+            if running_by_tenant is not None:
+                self._running = dict(running_by_tenant)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-tenant metrics as a dictionary"""
+        with self._lock:
+            tenants = set(self._depth) | set(self._running) | set(self._wait_ms)
+            wait = dict(self._wait_ms)
+            depth = dict(self._depth)
+            running = dict(self._running)
+            dequeued = dict(self._dequeued)
+
+        return {
+            tenant: {
+                "queue_depth": depth.get(tenant, 0),
+                "running": running.get(tenant, 0),
+                "dequeued_total": dequeued.get(tenant, 0),
+                "wait_ms": wait[tenant].get_stats() if tenant in wait else Histogram().get_stats(),
+            }
+            for tenant in sorted(tenants)
+        }
+
+    def get_prometheus_metrics(self) -> str:
+        """Export metrics in Prometheus format"""
+        metrics = self.get_metrics()
+        lines = [
+            "# HELP execution_queue_depth Pending queue entries per tenant",
+            "# TYPE execution_queue_depth gauge",
+        ]
+        for tenant, m in metrics.items():
+            lines.append(f'execution_queue_depth{{tenant="{tenant}"}} {m["queue_depth"]}')
+
+        lines.append("# HELP execution_queue_running Running queue entries per tenant")
+        lines.append("# TYPE execution_queue_running gauge")
+        for tenant, m in metrics.items():
+            lines.append(f'execution_queue_running{{tenant="{tenant}"}} {m["running"]}')
+
+        lines.append("# HELP execution_queue_wait_ms Queue wait time in milliseconds")
+        lines.append("# TYPE execution_queue_wait_ms summary")
+        for tenant, m in metrics.items():
+            for key in ("p50", "p95", "p99"):
+                quantile = int(key[1:]) / 100
+                lines.append(
+                    f'execution_queue_wait_ms{{tenant="{tenant}",quantile="{quantile}"}} {m["wait_ms"][key]}'
+                )
+            lines.append(f'execution_queue_wait_ms_count{{tenant="{tenant}"}} {m["wait_ms"]["count"]}')
+
+        lines.append("# HELP execution_queue_deadline_total Queue entries by SLA class and deadline outcome")
+        lines.append("# TYPE execution_queue_deadline_total counter")
+        for sla_class, counts in self.get_deadline_metrics().items():
+            for outcome in DEADLINE_OUTCOMES:
+                lines.append(
+                    f'execution_queue_deadline_total{{sla_class="{sla_class}",outcome="{outcome}"}} {counts[outcome]}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+_queue_metrics: Optional[QueueMetrics] = None
+
+
+def get_queue_metrics() -> QueueMetrics:
+    """Get or create the global queue metrics instance"""
+    global _queue_metrics
+
+    if _queue_metrics is None:
+        _queue_metrics = QueueMetrics()
+
+    return _queue_metrics
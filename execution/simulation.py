@@ -0,0 +1,158 @@
+"""
+Phase 7: Stage E Queue Simulation
+Replay a recorded arrival trace against FIFO and EDF scheduling
+
+Trace format (JSONL, one arrival per line, times in seconds):
+    {"arrival": 0.0, "tenant_id": "t1", "sla_class": "fast", "priority": 3,
+     "cost": 5.0, "deadline": 30.0, "on_deadline_miss": "downgrade",
+     "service_time": 4.2}
+
+`deadline` is absolute on the same clock as `arrival` (null = none);
+`service_time` defaults to `cost`. ExecutionRepository.export_arrival_trace
+produces this format from the live queue.
+
+Usage:
+    python -m execution.simulation trace.jsonl --workers 4
+"""
+
+import argparse
+import heapq
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from execution.scheduling import FairScheduler, QueueMetrics
+
+POLICIES = ("fifo", "edf")
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Load a JSONL arrival trace, sorted by arrival time"""
+    with open(path) as f:
+        trace = [json.loads(line) for line in f if line.strip()]
+    return sorted(trace, key=lambda r: r["arrival"])
+
+
+def save_trace(trace: Iterable[Dict[str, Any]], path: str) -> None:
+    """Write an arrival trace as JSONL"""
+    with open(path, "w") as f:
+        for record in trace:
+            f.write(json.dumps(record) + "\n")
+
+
+def replay_trace(
+    trace: List[Dict[str, Any]],
+    policy: str = "edf",
+    workers: int = 4,
+    on_deadline_miss: Optional[str] = None,
+    max_concurrency: Optional[Dict[str, int]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Replay a trace through the in-memory scheduler with N workers
+
+    Args:
+        trace: Arrival records sorted by arrival time
+        policy: 'fifo' (arrival order) or 'edf' (priority band, at-risk
+            entries earliest deadline first, then fair-queuing tag - the
+            production dequeue order)
+        workers: Number of concurrent workers
+        on_deadline_miss: Override every record's miss policy (edf only)
+        max_concurrency: Per-tenant ceilings (edf only)
+
+    Returns:
+        Dict of sla_class -> {on_time, missed, rejected, on_time_ratio}
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy: {policy} (expected one of {POLICIES})")
+
+    edf = policy == "edf"
+    scheduler = FairScheduler(max_concurrency=max_concurrency if edf else None)
+    outcomes = QueueMetrics()
+    busy = []  # (finish_time, seq, item)
+    seq = 0
+    index = 0
+    now = 0.0
+
+    while index < len(trace) or len(scheduler) or busy:
+        next_arrival = trace[index]["arrival"] if index < len(trace) else float("inf")
+        next_completion = busy[0][0] if busy else float("inf")
+
+        if next_completion <= next_arrival:
+            now, _, item = heapq.heappop(busy)
+            scheduler.complete(item)
+            record = item.item_id
+            deadline = record.get("deadline")
+            outcomes.record_completion(
+                record.get("sla_class"), deadline is None or now <= deadline
+            )
+        else:
+            record = trace[index]
+            now = record["arrival"]
+            if edf:
+                scheduler.enqueue(
+                    item_id=record,
+                    tenant_id=record.get("tenant_id", "unknown"),
+                    priority=record.get("priority", 5),
+                    cost=record.get("cost", 1.0),
+                    enqueued_at=now,
+                    deadline=record.get("deadline"),
+                    on_deadline_miss=on_deadline_miss or record.get("on_deadline_miss", "downgrade"),
+                    sla_class=record.get("sla_class"),
+                )
+            else:
+                scheduler.enqueue(item_id=record, tenant_id="fifo", enqueued_at=now)
+            index += 1
+
+        while len(busy) < workers:
+            item = scheduler.dequeue(now if edf else None)
+            if item is None:
+                break
+            seq += 1
+            service_time = item.item_id.get("service_time", item.item_id.get("cost", 1.0))
+            heapq.heappush(busy, (now + service_time, seq, item))
+
+        while scheduler.rejected:
+            outcomes.record_rejection(scheduler.rejected.pop().sla_class)
+
+    return outcomes.get_deadline_metrics()
+
+
+def compare_policies(
+    trace: List[Dict[str, Any]],
+    workers: int = 4,
+    on_deadline_miss: Optional[str] = None
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Replay the same trace under FIFO and EDF"""
+    return {
+        "fifo": replay_trace(trace, "fifo", workers),
+        "edf": replay_trace(trace, "edf", workers, on_deadline_miss=on_deadline_miss),
+    }
+
+
+def deadline_misses(report: Dict[str, Dict[str, Any]]) -> int:
+    """Total missed + rejected entries in a replay report"""
+    return sum(m["missed"] + m["rejected"] for m in report.values())
+
+
+def format_comparison(comparison: Dict[str, Dict[str, Dict[str, Any]]]) -> str:
+    """Render a compare_policies result as a table"""
+    lines = [f"{'policy':<6} {'sla_class':<12} {'on_time':>8} {'missed':>8} {'rejected':>8} {'ratio':>7}"]
+    for policy, report in comparison.items():
+        for sla_class, m in report.items():
+            lines.append(
+                f"{policy:<6} {sla_class:<12} {m['on_time']:>8} {m['missed']:>8} "
+                f"{m['rejected']:>8} {m['on_time_ratio']:>7.1%}"
+            )
+        lines.append(f"{policy:<6} {'total misses':<12} {deadline_misses(report):>8}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FIFO and EDF on a recorded queue trace")
+    parser.add_argument("trace", help="JSONL arrival trace")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--on-deadline-miss", choices=["reject", "downgrade"], default=None)
+    args = parser.parse_args()
+
+    print(format_comparison(
+        compare_policies(load_trace(args.trace), args.workers, args.on_deadline_miss)
+    ))
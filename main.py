@@ -103,6 +103,33 @@ async def lifespan(app: FastAPI):
     logger.info("🔗 Flow: User → Stage AB (Combined) → Stage C → Stage D → Execution")
     logger.info("✨ V2 Benefits: No hallucinations, 20-30% faster, 100% tool accuracy")
     
+    # Cross-replica tool catalog invalidation (LISTEN tool_catalog_changed)
+    catalog_listener = None
+    try:
+        from api.tool_catalog_api import get_reload_service
+        from pipeline.services.catalog_listener import get_catalog_change_listener
+        catalog_listener = get_catalog_change_listener(reload_service=get_reload_service())
+        await catalog_listener.start()
+        logger.info("✅ Tool catalog change listener started")
+    except Exception as e:
+        logger.warning(f"⚠️ Tool catalog change listener not available: {e}")
+    
+    # Load the query embedding model before the first request needs it
+    if os.getenv("EMBEDDING_WARMUP", "true").lower() == "true":
+        try:
+            from pipeline.services.embedding_service import get_embedding_service
+            await asyncio.to_thread(get_embedding_service().warmup)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding warm-up skipped: {e}")
+    
+    # Load the Stage E timeout policy matrix before the first execution needs it
+    try:
+        from execution.policy_cache import get_timeout_policy_cache
+        if await asyncio.to_thread(get_timeout_policy_cache().warmup):
+            logger.info("✅ Timeout policies loaded")
+    except Exception as e:
+        logger.warning(f"⚠️ Timeout policy warm-up skipped: {e}")
+    
     try:
         # Check LLM availability - CRITICAL
         await check_llm_availability()
@@ -139,8 +166,13 @@ async def lifespan(app: FastAPI):
         logger.warning("⚠️  Continuing startup without LLM - limited functionality")
         yield
     finally:
+        if catalog_listener:
+            await catalog_listener.stop()
         if llm_client:
             await llm_client.disconnect()
+        # Write buffered Stage AB / tool execution telemetry before exit
+        from pipeline.services.telemetry_buffer import shutdown_telemetry_buffers
+        await asyncio.to_thread(shutdown_telemetry_buffers)
         logger.info("🛑 NEWIDEA.MD Pipeline shutting down")
 
 async def check_llm_availability():
@@ -207,6 +239,14 @@ try:
 except Exception as e:
     logger.warning(f"⚠️ Cache API not available: {e}")
 
+# Import and include Execution DLQ API
+try:
+    from api.routes.dlq import router as dlq_router
+    app.include_router(dlq_router, prefix="/api/v1")
+    logger.info("✅ Execution DLQ API registered")
+except Exception as e:
+    logger.warning(f"⚠️ Execution DLQ API not available: {e}")
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -7,5 +7,6 @@ redundant LLM calls and improve response times.
 
 from .cache_manager import CacheManager
 from .cache_keys import CacheKeyGenerator
+from .semantic_cache import SemanticSelectionCache, get_semantic_cache
 
-__all__ = ["CacheManager", "CacheKeyGenerator"]
\ No newline at end of file
+__all__ = ["CacheManager", "CacheKeyGenerator", "SemanticSelectionCache", "get_semantic_cache"]
\ No newline at end of file
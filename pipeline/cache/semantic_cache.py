@@ -0,0 +1,418 @@
+"""
+Semantic Selection Cache for OpsConductor Pipeline
+
+generate_stage_a_key only hits on byte-identical normalized input, so
+"restart nginx on web01" and "please restart nginx on web01" both pay the
+full Stage AB cost. This cache keys Stage AB selections by the query
+embedding Stage AB already computes:
+
+- Nearest previous request by cosine similarity (one mat-vec over a
+  fixed-size in-memory matrix)
+- Reuse only above a similarity threshold AND with an exactly matching
+  entity signature (extracted entities plus identifier-like tokens such as
+  hostnames, IPs, paths and numbers) and scope (platform filter, target
+  ambiguity)
+- FIFO ring of entries with a TTL; cleared on catalog reload
+- Hit rate, entity rejects and false-reuse rate (a sample of hits is
+  recomputed and compared)
+- evaluate_thresholds() replays a labelled request stream for offline
+  threshold tuning (see scripts/tune_semantic_cache_threshold.py)
+"""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tokens that name a specific target: contain a digit, or a path/host
+# separator (web01, 10.0.0.5, /var/log, db-prod, :8080)
+_TOKEN = re.compile(r"[\w./:-]+")
+_IDENTIFIER = re.compile(r"\d|[./:]|\w-\w")
+
+
+def entity_signature(entities: Iterable[Dict[str, Any]], request: str) -> Tuple[str, ...]:
+    """
+    Exact-match key for the targets of a request
+
+    Args:
+        entities: Extracted entities ({"type": ..., "value": ...})
+        request: User request (identifier-like tokens are added, so a
+            target the extractor missed still has to match)
+
+    Returns:
+        Sorted tuple of "type:value" and "token:..." strings
+    """
+    signature = {
+        f"{str(e.get('type', '')).lower()}:{str(e.get('value', '')).strip().lower()}"
+        for e in entities if isinstance(e, dict)
+    }
+    for token in _TOKEN.findall(request.lower()):
+        token = token.strip(".:-")  # Sentence punctuation, not part of the target
+        if _IDENTIFIER.search(token):
+            signature.add(f"token:{token}")
+    return tuple(sorted(signature))
+
+
+def selection_signature(selection: Any) -> Tuple[Any, ...]:
+    """What a reused selection must agree on with a fresh one"""
+    return (
+        tuple((t.tool_name, t.execution_order) for t in selection.selected_tools),
+        selection.next_stage,
+        str(selection.policy.risk_level),
+        tuple(sorted(selection.additional_inputs_needed)),
+    )
+
+
+@dataclass(frozen=True)
+class CachedSelection:
+    """A cache hit"""
+
+    selection: Any  # SelectionV1
+    entities: List[Dict[str, Any]]  # Entities parsed with the selection
+    request: str
+    similarity: float
+    slot: int
+
+
+class SemanticSelectionCache:
+    """
+    In-memory nearest-neighbour cache of Stage AB selections
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        capacity: int = 2048,
+        ttl_seconds: float = 600.0,
+        verify_rate: float = 0.02
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity for reuse
+            capacity: Maximum entries (oldest replaced first)
+            ttl_seconds: Entry lifetime
+            verify_rate: Fraction of hits recomputed to measure false reuse
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.verify_rate = verify_rate
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) float32, unit rows
+        self._expires = np.zeros(capacity)  # monotonic; 0 = empty slot
+        self._keys = np.full(capacity, -1, dtype=np.int64)  # interned (signature, scope)
+        self._key_ids: Dict[Tuple[Tuple[str, ...], str], int] = {}
+        self._key_refs: Dict[int, int] = {}  # key id -> slots using it
+        self._next_key = 0
+        self._entries: List[Optional[Tuple[Any, List[Dict[str, Any]], str]]] = [None] * capacity
+        self._next_slot = 0
+
+        # Statistics
+        self._lookups = 0
+        self._hits = 0
+        self._entity_rejects = 0
+        self._stores = 0
+        self._verified = 0
+        self._false_reuses = 0
+        self._clears = 0
+
+    # ========================================================================
+    # LOOKUP / STORE
+    # ========================================================================
+
+    def lookup(
+        self,
+        embedding: Sequence[float],
+        signature: Tuple[str, ...],
+        scope: str = ""
+    ) -> Optional[CachedSelection]:
+        """
+        Find the nearest cached request with the same signature and scope
+
+        Args:
+            embedding: Query embedding
+            signature: entity_signature() of the request
+            scope: Everything else the selection depends on
+
+        Returns:
+            CachedSelection if similarity >= threshold, else None
+        """
+        with self._lock:
+            self._lookups += 1
+            if self._matrix is None:
+                return None
+            query = self._unit(embedding)
+            if query is None or query.shape[0] != self._matrix.shape[1]:
+                return None
+
+            live = self._expires > time.monotonic()
+            scores = self._matrix @ query
+            scores[~live] = -np.inf
+            best_any = int(np.argmax(scores))
+
+            key = self._key_ids.get((signature, scope))
+            if key is not None:
+                scores[self._keys != key] = -np.inf
+            best = int(np.argmax(scores))
+            if key is not None and scores[best] >= self.threshold:
+                self._hits += 1
+                selection, entities, request = self._entries[best]
+                return CachedSelection(selection, entities, request, float(scores[best]), best)
+
+            if live[best_any] and float(self._matrix[best_any] @ query) >= self.threshold:
+                self._entity_rejects += 1  # A near neighbour, but for other targets or scope
+            return None
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        signature: Tuple[str, ...],
+        scope: str,
+        selection: Any,
+        entities: List[Dict[str, Any]],
+        request: str
+    ) -> None:
+        """
+        Cache a fresh selection (replaces the oldest entry when full)
+
+        Args:
+            embedding: Query embedding the selection was computed for
+            signature: entity_signature() of the request
+            scope: Everything else the selection depends on
+            selection: SelectionV1 (treated as read-only)
+            entities: Entities parsed with the selection
+            request: User request (for logging)
+        """
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._reset(vector.shape[0])
+
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.capacity
+            self._release(slot)
+
+            key = self._key_ids.get((signature, scope))
+            if key is None:
+                key = self._key_ids[(signature, scope)] = self._next_key
+                self._next_key += 1
+            self._key_refs[key] = self._key_refs.get(key, 0) + 1
+
+            self._matrix[slot] = vector
+            self._keys[slot] = key
+            self._expires[slot] = time.monotonic() + self.ttl_seconds
+            self._entries[slot] = (selection, list(entities), request)
+            self._stores += 1
+
+    # ========================================================================
+    # FALSE-REUSE TRACKING
+    # ========================================================================
+
+    def should_verify(self) -> bool:
+        """Whether to recompute this hit to check it (sampled at verify_rate)"""
+        return random.random() < self.verify_rate
+
+    def record_verification(self, hit: CachedSelection, fresh: Any) -> bool:
+        """
+        Compare a hit with the selection computed from scratch
+
+        A mismatch counts as a false reuse and evicts the entry.
+
+        Returns:
+            True if the cached selection matched
+        """
+        matched = selection_signature(hit.selection) == selection_signature(fresh)
+        with self._lock:
+            self._verified += 1
+            if not matched:
+                self._false_reuses += 1
+                if self._entries[hit.slot] is not None and self._entries[hit.slot][0] is hit.selection:
+                    self._release(hit.slot)
+        if not matched:
+            logger.warning(
+                f"Semantic cache false reuse (similarity {hit.similarity:.3f}): "
+                f"cached '{hit.request[:60]}'"
+            )
+        return matched
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a catalog change)"""
+        with self._lock:
+            if self._matrix is not None:
+                self._reset(self._matrix.shape[1])
+            self._clears += 1
+
+    def _reset(self, dim: int) -> None:
+        self._matrix = np.zeros((self.capacity, dim), dtype=np.float32)
+        self._expires[:] = 0
+        self._keys[:] = -1
+        self._key_ids = {}
+        self._key_refs = {}
+        self._entries = [None] * self.capacity
+        self._next_slot = 0
+
+    def _release(self, slot: int) -> None:
+        """Empty a slot; forget its key once no slot uses it"""
+        key = int(self._keys[slot])
+        if key >= 0:
+            self._key_refs[key] -= 1
+            if self._key_refs[key] == 0:
+                # Key ids are never reused, so a forgotten id cannot match
+                del self._key_refs[key]
+                self._key_ids = {k: v for k, v in self._key_ids.items() if v != key}
+        self._keys[slot] = -1
+        self._expires[slot] = 0
+        self._entries[slot] = None
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if not vector.size or norm < 1e-12:
+            return None
+        return vector / norm
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            entries = int(np.count_nonzero(self._expires > time.monotonic()))
+            return {
+                "entries": entries,
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "hit_rate_percent": round(self._hits / self._lookups * 100, 1) if self._lookups else 0.0,
+                "entity_rejects": self._entity_rejects,
+                "stores": self._stores,
+                "verified": self._verified,
+                "false_reuses": self._false_reuses,
+                "false_reuse_rate_percent": (
+                    round(self._false_reuses / self._verified * 100, 1) if self._verified else 0.0
+                ),
+                "clears": self._clears,
+            }
+
+
+# ============================================================================
+# OFFLINE THRESHOLD EVALUATION
+# ============================================================================
+
+def evaluate_thresholds(
+    embeddings: np.ndarray,
+    signatures: Sequence[Tuple[str, ...]],
+    labels: Sequence[Any],
+    thresholds: Sequence[float],
+    requests: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Replay a labelled request stream through the cache at each threshold
+
+    A miss stores the request; a hit is a false reuse when the cached
+    request's label differs from the query's.
+
+    Args:
+        embeddings: (n, dim) request embeddings, in arrival order
+        signatures: entity_signature() per request
+        labels: Stand-in for the selection (equal labels = same selection)
+        thresholds: Thresholds to evaluate
+        requests: Request texts; adds the exact-key hit rate for comparison
+
+    Returns:
+        One dict per threshold: hits, false_reuses, hit_rate, false_reuse_rate
+        (and exact_key_hit_rate when requests are given)
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    key_ids: Dict[Tuple[str, ...], int] = {}
+    keys = np.array([key_ids.setdefault(tuple(s), len(key_ids)) for s in signatures])
+    n = len(matrix)
+
+    exact_hits = None
+    if requests is not None:
+        seen = set()
+        exact_hits = 0
+        for request in requests:
+            key = request.strip().lower()
+            exact_hits += key in seen
+            seen.add(key)
+
+    results = []
+    for threshold in thresholds:
+        stored = np.zeros(n, dtype=bool)
+        hits = false_reuses = 0
+        for i in range(n):
+            candidates = np.flatnonzero(stored & (keys == keys[i]))
+            if candidates.size:
+                scores = matrix[candidates] @ matrix[i]
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    hits += 1
+                    false_reuses += labels[candidates[best]] != labels[i]
+                    continue
+            stored[i] = True
+        result = {
+            "threshold": float(threshold),
+            "hits": hits,
+            "false_reuses": int(false_reuses),
+            "hit_rate": hits / n if n else 0.0,
+            "false_reuse_rate": false_reuses / hits if hits else 0.0,
+        }
+        if exact_hits is not None:
+            result["exact_key_hit_rate"] = exact_hits / n if n else 0.0
+        results.append(result)
+    return results
+
+
+# ============================================================================
+# GLOBAL INSTANCE
+# ============================================================================
+
+_semantic_cache: Optional[SemanticSelectionCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticSelectionCache]:
+    """
+    Get or create the global semantic selection cache
+
+    Configured from SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL_SECONDS and SEMANTIC_CACHE_VERIFY_RATE. Off by
+    default: set SEMANTIC_CACHE_ENABLED=true once
+    scripts/tune_semantic_cache_threshold.py --encoder model has been run
+    against the deployed encoder and the threshold set from its output.
+
+    Returns:
+        SemanticSelectionCache, or None unless SEMANTIC_CACHE_ENABLED=true
+    """
+    global _semantic_cache
+
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticSelectionCache(
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+                    capacity=int(os.getenv("SEMANTIC_CACHE_SIZE", "2048")),
+                    ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600")),
+                    verify_rate=float(os.getenv("SEMANTIC_CACHE_VERIFY_RATE", "0.02")),
+                )
+    return _semantic_cache
@@ -0,0 +1,575 @@
+"""
+Catalog Connection Pools
+Connection pooling for tool catalog access, sync (psycopg2) and async (asyncpg)
+
+Both pools share one policy:
+- Pre-ping on idle: a connection is validated with SELECT 1 only after it
+  has sat idle longer than idle_check_seconds, not on every checkout
+- Max lifetime: connections older than max_lifetime_seconds are closed
+  and replaced on checkout or return
+- Server-side prepared statements: the hot catalog queries
+  (CATALOG_STATEMENTS) are prepared once per connection and executed by name
+- Acquisition wait: time spent waiting for a free slot goes into a
+  histogram (and the metrics collector's db_pool_wait)
+
+Callers wait for a free connection (up to acquire_timeout_seconds) instead
+of failing with "connection pool exhausted".
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+
+from pipeline.services.metrics_collector import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# HOT QUERIES
+# ============================================================================
+
+_CAPABILITY_SELECT = """
+    SELECT
+        t.id as tool_id,
+        t.tool_name,
+        t.version,
+        t.description as tool_description,
+        t.platform,
+        t.category,
+        t.defaults,
+        t.dependencies,
+        t.metadata,
+        c.id as capability_id,
+        c.capability_name,
+        c.description as capability_description,
+        p.id as pattern_id,
+        p.pattern_name,
+        p.description as pattern_description,
+        p.typical_use_cases,
+        p.time_estimate_ms,
+        p.cost_estimate,
+        p.complexity_score,
+        p.scope,
+        p.completeness,
+        p.limitations,
+        p.policy,
+        p.preference_match,
+        p.required_inputs,
+        p.expected_outputs
+    FROM tool_catalog.tools t
+    JOIN tool_catalog.tool_capabilities c ON t.id = c.tool_id
+    JOIN tool_catalog.tool_patterns p ON c.id = p.capability_id
+    WHERE
+        t.enabled = true
+        AND t.status = 'active'
+        AND t.is_latest = true
+        AND c.capability_name = $1
+"""
+
+# Statement name → SQL with $n placeholders
+CATALOG_STATEMENTS: Dict[str, str] = {
+    "catalog_tool_latest": """
+        SELECT * FROM tool_catalog.tools
+        WHERE LOWER(tool_name) = LOWER($1) AND is_latest = true
+        AND enabled = true
+    """,
+    "catalog_tool_version": """
+        SELECT * FROM tool_catalog.tools
+        WHERE LOWER(tool_name) = LOWER($1) AND version = $2
+        AND enabled = true
+    """,
+    "catalog_tools_by_capability": _CAPABILITY_SELECT + """
+        ORDER BY t.tool_name, p.pattern_name
+    """,
+    "catalog_tools_by_capability_platform": _CAPABILITY_SELECT + """
+        AND t.platform = $2
+        ORDER BY t.tool_name, p.pattern_name
+    """,
+}
+
+
+# ============================================================================
+# SHARED POLICY
+# ============================================================================
+
+@dataclass
+class PoolConfig:
+    """Catalog pool sizing and connection policy"""
+    min_size: int = 5  # Warm connections opened up front
+    max_size: int = 20
+    idle_check_seconds: float = 30.0  # Validate only after this much idle time
+    max_lifetime_seconds: float = 1800.0  # Recycle connections older than this
+    acquire_timeout_seconds: float = 30.0
+    prepared_statements: bool = True  # Off behind transaction-mode PgBouncer
+
+
+@dataclass
+class _TrackedConnection:
+    conn: Any
+    created_at: float
+    last_used_at: float
+    prepared: Dict[str, Any] = field(default_factory=dict)
+
+
+class _PoolPolicy:
+    """Idle pre-ping / max-lifetime decisions and statistics shared by both pools"""
+
+    def __init__(self, config: Optional[PoolConfig], metrics: Optional[Any]):
+        self.config = config or PoolConfig()
+        self.metrics = metrics
+        self.wait_ms = Histogram()
+
+        # Statistics
+        self._checkouts = 0
+        self._created = 0
+        self._pings = 0
+        self._ping_failures = 0
+        self._recycled = 0
+        self._closed = 0
+
+    @property
+    def minconn(self) -> int:
+        return self.config.min_size
+
+    @property
+    def maxconn(self) -> int:
+        return self.config.max_size
+
+    def _expired(self, tracked: _TrackedConnection, now: float) -> bool:
+        return now - tracked.created_at >= self.config.max_lifetime_seconds
+
+    def _needs_ping(self, tracked: _TrackedConnection, now: float) -> bool:
+        return now - tracked.last_used_at >= self.config.idle_check_seconds
+
+    def _observe_wait(self, started: float) -> None:
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.wait_ms.observe(wait_ms)
+        if self.metrics is not None:
+            self.metrics.record_pool_wait(wait_ms)
+
+    def _base_statistics(self, idle: int, in_use: int) -> Dict[str, Any]:
+        return {
+            "min_size": self.config.min_size,
+            "max_size": self.config.max_size,
+            "idle": idle,
+            "in_use": in_use,
+            "checkouts": self._checkouts,
+            "created": self._created,
+            "pings": self._pings,
+            "ping_failures": self._ping_failures,
+            "recycled": self._recycled,
+            "closed": self._closed,
+            "acquire_wait_ms": self.wait_ms.get_stats(),
+        }
+
+
+# ============================================================================
+# SYNC POOL (psycopg2)
+# ============================================================================
+
+class CatalogConnectionPool(_PoolPolicy):
+    """
+    Thread-safe psycopg2 pool with idle pre-ping, max lifetime and prepared
+    statements (getconn/putconn/closeall like psycopg2's pools)
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        config: Optional[PoolConfig] = None,
+        connect: Optional[Callable[[], Any]] = None,
+        metrics: Optional[Any] = None
+    ):
+        """
+        Initialize the pool and open min_size connections
+
+        Args:
+            dsn: PostgreSQL connection URL
+            config: Pool policy (defaults to PoolConfig())
+            connect: Connection factory (defaults to psycopg2.connect(dsn))
+            metrics: MetricsCollector for the acquisition-wait histogram
+        """
+        super().__init__(config, metrics)
+        self._connect = connect or (lambda: psycopg2.connect(dsn))
+        self._idle: List[_TrackedConnection] = []  # LIFO: hot connections stay hot
+        self._in_use: Dict[int, _TrackedConnection] = {}
+        self._slots = threading.BoundedSemaphore(self.config.max_size)
+        self._lock = threading.Lock()
+
+        for _ in range(self.config.min_size):
+            self._idle.append(self._open())
+
+    def _open(self) -> _TrackedConnection:
+        conn = self._connect()
+        now = time.monotonic()
+        with self._lock:
+            self._created += 1
+        return _TrackedConnection(conn, created_at=now, last_used_at=now)
+
+    def _close(self, tracked: _TrackedConnection) -> None:
+        with self._lock:
+            self._closed += 1
+        try:
+            tracked.conn.close()
+        except Exception:
+            pass
+
+    def _ping(self, tracked: _TrackedConnection) -> bool:
+        with self._lock:
+            self._pings += 1
+        try:
+            with tracked.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            tracked.conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"Idle catalog connection failed validation, replacing it: {e}")
+            with self._lock:
+                self._ping_failures += 1
+            return False
+
+    def getconn(self) -> Any:
+        """
+        Check out a connection, waiting for a free slot if needed
+
+        Raises:
+            PoolError: If no slot frees up within acquire_timeout_seconds
+            psycopg2.OperationalError: If a new connection cannot be opened
+        """
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.config.acquire_timeout_seconds):
+            raise PoolError(
+                f"connection pool exhausted (waited {self.config.acquire_timeout_seconds}s)"
+            )
+        self._observe_wait(started)
+
+        try:
+            tracked = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use[id(tracked.conn)] = tracked
+            self._checkouts += 1
+        return tracked.conn
+
+    def _checkout(self) -> _TrackedConnection:
+        while True:
+            with self._lock:
+                tracked = self._idle.pop() if self._idle else None
+            if tracked is None:
+                return self._open()
+
+            now = time.monotonic()
+            if self._expired(tracked, now) or tracked.conn.closed:
+                with self._lock:
+                    self._recycled += 1
+                self._close(tracked)
+                continue
+            if self._needs_ping(tracked, now) and not self._ping(tracked):
+                self._close(tracked)
+                continue
+            return tracked
+
+    def putconn(self, conn: Any, close: bool = False) -> None:
+        """
+        Return a connection; an open transaction is rolled back
+
+        Args:
+            conn: Connection from getconn()
+            close: Close it instead of keeping it
+        """
+        with self._lock:
+            tracked = self._in_use.pop(id(conn), None)
+        if tracked is None:
+            logger.warning("Returning a connection that is not checked out from this pool")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+
+        try:
+            now = time.monotonic()
+            if close or conn.closed:
+                self._close(tracked)
+            elif self._expired(tracked, now):
+                with self._lock:
+                    self._recycled += 1
+                self._close(tracked)
+            else:
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    self._close(tracked)
+                    return
+                if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                tracked.last_used_at = now
+                with self._lock:
+                    self._idle.append(tracked)
+        except Exception as e:
+            logger.warning(f"Error returning connection to pool: {e}")
+            self._close(tracked)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        """Close idle connections; checked-out ones are closed when returned"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for tracked in self._in_use.values():
+                tracked.created_at = float("-inf")  # expire on return
+        for tracked in idle:
+            self._close(tracked)
+
+    def execute_prepared(self, conn: Any, cursor: Any, name: str, params: Tuple = ()) -> None:
+        """
+        Execute a CATALOG_STATEMENTS query as a server-side prepared statement
+
+        The statement is prepared on first use per connection. If the
+        server lost it (or its cached plan no longer fits the schema), it
+        is re-prepared once.
+
+        Args:
+            conn: Connection from getconn()
+            cursor: Cursor on that connection
+            name: Key in CATALOG_STATEMENTS
+            params: Positional parameters ($1, $2, ...)
+        """
+        sql = CATALOG_STATEMENTS[name]
+        if not self.config.prepared_statements:
+            cursor.execute(_to_pyformat(sql, len(params)), params)
+            return
+
+        tracked = self._in_use.get(id(conn))
+        prepared = tracked.prepared if tracked is not None else {}
+        execute = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+
+        for attempt in range(2):
+            try:
+                if name not in prepared:
+                    cursor.execute(f"PREPARE {name} AS {sql}")
+                    prepared[name] = True
+                cursor.execute(execute, params)
+                return
+            except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.FeatureNotSupported):
+                if attempt:
+                    raise
+                # Session lost the statement or the schema changed under it
+                conn.rollback()
+                cursor.execute("DEALLOCATE ALL")
+                prepared.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pool statistics"""
+        with self._lock:
+            return self._base_statistics(len(self._idle), len(self._in_use))
+
+
+def _to_pyformat(sql: str, param_count: int) -> str:
+    """$1..$n → %s for unprepared psycopg2 execution"""
+    for i in range(param_count, 0, -1):
+        sql = sql.replace(f"${i}", "%s")
+    return sql
+
+
+# ============================================================================
+# ASYNC POOL (asyncpg)
+# ============================================================================
+
+async def _asyncpg_connect(dsn: str) -> Any:
+    import asyncpg
+    import json
+
+    conn = await asyncpg.connect(dsn)
+    # Match psycopg2: JSON/JSONB columns decode to Python objects
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    return conn
+
+
+class AsyncCatalogConnectionPool(_PoolPolicy):
+    """
+    asyncpg pool with the same idle pre-ping, max lifetime and prepared
+    statement policy, for catalog reads from async callers
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        config: Optional[PoolConfig] = None,
+        connect: Optional[Callable[[], Awaitable[Any]]] = None,
+        metrics: Optional[Any] = None
+    ):
+        """
+        Initialize the pool (connections are opened on demand)
+
+        Args:
+            dsn: PostgreSQL connection URL
+            config: Pool policy (defaults to PoolConfig())
+            connect: Coroutine factory for a connection (defaults to asyncpg)
+            metrics: MetricsCollector for the acquisition-wait histogram
+        """
+        super().__init__(config, metrics)
+        self._connect = connect or (lambda: _asyncpg_connect(dsn))
+        self._idle: Deque[_TrackedConnection] = deque()
+        self._in_use = 0
+        self._slots = asyncio.Semaphore(self.config.max_size)
+        self.loop = asyncio.get_running_loop()
+
+    async def _open(self) -> _TrackedConnection:
+        conn = await self._connect()
+        now = time.monotonic()
+        self._created += 1
+        return _TrackedConnection(conn, created_at=now, last_used_at=now)
+
+    async def _close(self, tracked: _TrackedConnection) -> None:
+        self._closed += 1
+        try:
+            await tracked.conn.close()
+        except Exception:
+            pass
+
+    async def _ping(self, tracked: _TrackedConnection) -> bool:
+        self._pings += 1
+        try:
+            await tracked.conn.fetchval("SELECT 1")
+            return True
+        except Exception as e:
+            logger.warning(f"Idle catalog connection failed validation, replacing it: {e}")
+            self._ping_failures += 1
+            return False
+
+    async def acquire(self) -> _TrackedConnection:
+        """
+        Check out a connection, waiting for a free slot if needed
+
+        Raises:
+            asyncio.TimeoutError: If no slot frees up within acquire_timeout_seconds
+        """
+        started = time.perf_counter()
+        await asyncio.wait_for(self._slots.acquire(), timeout=self.config.acquire_timeout_seconds)
+        self._observe_wait(started)
+
+        try:
+            while True:
+                tracked = self._idle.pop() if self._idle else None
+                if tracked is None:
+                    tracked = await self._open()
+                    break
+                now = time.monotonic()
+                if self._expired(tracked, now) or tracked.conn.is_closed():
+                    self._recycled += 1
+                    await self._close(tracked)
+                    continue
+                if self._needs_ping(tracked, now) and not await self._ping(tracked):
+                    await self._close(tracked)
+                    continue
+                break
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._in_use += 1
+        self._checkouts += 1
+        return tracked
+
+    async def release(self, tracked: _TrackedConnection, close: bool = False) -> None:
+        """
+        Return a connection
+
+        Args:
+            tracked: Connection from acquire()
+            close: Close it instead of keeping it
+        """
+        self._in_use -= 1
+        try:
+            now = time.monotonic()
+            if close or tracked.conn.is_closed():
+                await self._close(tracked)
+            elif self._expired(tracked, now):
+                self._recycled += 1
+                await self._close(tracked)
+            else:
+                tracked.last_used_at = now
+                self._idle.append(tracked)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """async with pool.connection() as tracked: ..."""
+        tracked = await self.acquire()
+        failed = False
+        try:
+            yield tracked
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            # A connection that raised mid-query may be unusable; don't reuse it
+            await self.release(tracked, close=failed and tracked.conn.is_closed())
+
+    async def _prepared(self, tracked: _TrackedConnection, name: str) -> Any:
+        statement = tracked.prepared.get(name)
+        if statement is None:
+            statement = await tracked.conn.prepare(CATALOG_STATEMENTS[name])
+            tracked.prepared[name] = statement
+        return statement
+
+    async def fetch(self, name: str, *args: Any) -> List[Any]:
+        """
+        Run a CATALOG_STATEMENTS query and return all rows
+
+        Args:
+            name: Key in CATALOG_STATEMENTS
+            *args: Positional parameters ($1, $2, ...)
+        """
+        async with self.connection() as tracked:
+            if not self.config.prepared_statements:
+                return await tracked.conn.fetch(CATALOG_STATEMENTS[name], *args)
+            for attempt in range(2):
+                try:
+                    statement = await self._prepared(tracked, name)
+                    return await statement.fetch(*args)
+                except Exception as e:
+                    # Schema changed under the cached plan: prepare again once
+                    if attempt or type(e).__name__ != "InvalidCachedStatementError":
+                        raise
+                    tracked.prepared.clear()
+
+    async def fetchrow(self, name: str, *args: Any) -> Optional[Any]:
+        """Run a CATALOG_STATEMENTS query and return the first row (or None)"""
+        rows = await self.fetch(name, *args)
+        return rows[0] if rows else None
+
+    async def close(self) -> None:
+        """Close idle connections"""
+        idle, self._idle = list(self._idle), deque()
+        for tracked in idle:
+            await self._close(tracked)
+
+    def terminate(self) -> None:
+        """Close idle connections without awaiting (from sync shutdown code)"""
+        idle, self._idle = list(self._idle), deque()
+        for tracked in idle:
+            self._closed += 1
+            try:
+                tracked.conn.terminate()
+            except Exception:
+                pass
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pool statistics"""
+        return self._base_statistics(len(self._idle), self._in_use)
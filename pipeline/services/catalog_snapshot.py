@@ -0,0 +1,485 @@
+"""
+Tool Catalog Snapshot
+Immutable, versioned in-memory view of the tool catalog
+
+This module provides:
+- One-shot build of tools → capabilities → patterns from a single query
+- Inverted indexes by capability, platform, category and tag
+- Copy-on-write swap: readers always see a complete snapshot
+- Version polling against tool_catalog.catalog_version_seq (bumped by
+  triggers on every catalog write), so rebuilds only happen on change
+- Per-tool patching when a change notification names the affected tools
+"""
+
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+ToolView = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable view of the active catalog at a given version
+
+    Tool dicts use the nested get_all_tools_with_structure format and are
+    shared between the indexes; callers must treat them as read-only.
+    """
+
+    version: int = 0
+    tools: Dict[str, ToolView] = field(default_factory=dict)  # lower(tool_name) -> tool
+    ordered: Tuple[ToolView, ...] = ()  # Sorted by tool_name
+    by_capability: Dict[str, Tuple[ToolView, ...]] = field(default_factory=dict)
+    by_capability_platform: Dict[Tuple[str, str], Tuple[ToolView, ...]] = field(default_factory=dict)
+    by_platform: Dict[str, Tuple[ToolView, ...]] = field(default_factory=dict)
+    by_category: Dict[str, Tuple[ToolView, ...]] = field(default_factory=dict)
+    by_tag: Dict[str, Tuple[ToolView, ...]] = field(default_factory=dict)
+    built_at: datetime = field(default_factory=datetime.now)
+    build_ms: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+    def get_tool(self, tool_name: str) -> Optional[ToolView]:
+        """Get a tool by name (case-insensitive)"""
+        return self.tools.get(tool_name.lower())
+
+    def tools_for_capability(
+        self,
+        capability_name: str,
+        platform: Optional[str] = None
+    ) -> List[ToolView]:
+        """
+        Tools with a capability, each carrying only that capability
+
+        Same shape as ToolCatalogService.get_tools_by_capability.
+        """
+        if platform:
+            return list(self.by_capability_platform.get((capability_name, platform), ()))
+        return list(self.by_capability.get(capability_name, ()))
+
+    def filter_tools(
+        self,
+        platform: Optional[str] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> List[ToolView]:
+        """Tools matching all given filters, sorted by tool_name"""
+        candidates = None
+        for index, key in (
+            (self.by_platform, platform),
+            (self.by_category, category),
+            (self.by_tag, tag),
+        ):
+            if key is None:
+                continue
+            matches = index.get(key, ())
+            if candidates is None:
+                candidates = matches
+            else:
+                ids = {id(t) for t in matches}
+                candidates = tuple(t for t in candidates if id(t) in ids)
+        return list(self.ordered if candidates is None else candidates)
+
+
+def _tool_tags(tool: ToolView) -> List[str]:
+    metadata = tool.get("metadata") or {}
+    tags = metadata.get("tags") if isinstance(metadata, dict) else None
+    return [t for t in tags if isinstance(t, str)] if isinstance(tags, list) else []
+
+
+INDEX_NAMES = ("by_capability", "by_capability_platform", "by_platform", "by_category", "by_tag")
+
+
+def _tool_sort_key(tool: ToolView) -> str:
+    return tool["tool_name"]
+
+
+def _index_entries(tool: ToolView) -> List[Tuple[str, Any, ToolView]]:
+    """(index name, key, entry) triples a tool contributes to the inverted indexes"""
+    platform = tool.get("platform")
+    entries = [("by_platform", platform, tool), ("by_category", tool.get("category"), tool)]
+    entries.extend(("by_tag", tag, tool) for tag in _tool_tags(tool))
+
+    capabilities = tool.get("capabilities") or {}
+    if capabilities:
+        base = {k: v for k, v in tool.items() if k != "capabilities"}
+        for capability_name, capability in capabilities.items():
+            # Per-capability view, as returned by get_tools_by_capability
+            # (patterns-less capabilities are excluded there by the inner join)
+            if not capability.get("patterns"):
+                continue
+            view = dict(base)
+            view["capabilities"] = {capability_name: capability}
+            entries.append(("by_capability", capability_name, view))
+            entries.append(("by_capability_platform", (capability_name, platform), view))
+    return entries
+
+
+def build_snapshot(tools: List[ToolView], version: int) -> CatalogSnapshot:
+    """
+    Build a snapshot and its inverted indexes
+
+    Args:
+        tools: Tools in get_all_tools_with_structure format (ownership is
+            taken; the dicts become part of the snapshot)
+        version: Catalog version the tools were read at
+
+    Returns:
+        CatalogSnapshot
+    """
+    start = time.perf_counter()
+
+    ordered = tuple(sorted(tools, key=_tool_sort_key))
+    by_name: Dict[str, ToolView] = {}
+    indexes: Dict[str, Dict[Any, List[ToolView]]] = {name: {} for name in INDEX_NAMES}
+
+    for tool in ordered:
+        by_name[tool["tool_name"].lower()] = tool
+        for index_name, key, entry in _index_entries(tool):
+            indexes[index_name].setdefault(key, []).append(entry)
+
+    build_ms = (time.perf_counter() - start) * 1000
+    return CatalogSnapshot(
+        version=version,
+        tools=by_name,
+        ordered=ordered,
+        build_ms=build_ms,
+        **{
+            name: {key: tuple(values) for key, values in index.items()}
+            for name, index in indexes.items()
+        },
+    )
+
+
+def patch_snapshot(
+    snapshot: CatalogSnapshot,
+    tool_names: Iterable[str],
+    tools: List[ToolView],
+    version: int
+) -> CatalogSnapshot:
+    """
+    Build a new snapshot with a few tools replaced or removed
+
+    Only the index entries of the affected tools are rebuilt; everything
+    else is shared with the previous snapshot, so the cost is proportional
+    to the change rather than the catalog size.
+
+    Args:
+        snapshot: Current snapshot (left untouched)
+        tool_names: Names of the tools that changed
+        tools: Current rows for those tools; names without a row (deleted,
+            disabled or no longer latest) are removed
+        version: Catalog version the patch brings the snapshot to (the
+            version of the change notifications it applies, not the current
+            database version, which may include changes to other tools)
+
+    Returns:
+        CatalogSnapshot
+    """
+    start = time.perf_counter()
+
+    names = {name.lower() for name in tool_names}
+    names.update(tool["tool_name"].lower() for tool in tools)
+    removed = [snapshot.tools[name] for name in names if name in snapshot.tools]
+    removed_ids = {id(tool) for tool in removed}
+
+    by_name = dict(snapshot.tools)
+    for name in names:
+        by_name.pop(name, None)
+    for tool in tools:
+        by_name[tool["tool_name"].lower()] = tool
+
+    ordered = [tool for tool in snapshot.ordered if id(tool) not in removed_ids]
+    for tool in tools:
+        bisect.insort(ordered, tool, key=_tool_sort_key)
+
+    affected = {(index_name, key) for tool in removed for index_name, key, _ in _index_entries(tool)}
+    additions: Dict[Tuple[str, Any], List[ToolView]] = {}
+    for tool in tools:
+        for index_name, key, entry in _index_entries(tool):
+            additions.setdefault((index_name, key), []).append(entry)
+    affected.update(additions)
+
+    indexes = {name: dict(getattr(snapshot, name)) for name in INDEX_NAMES}
+    for index_name, key in affected:
+        index = indexes[index_name]
+        entries = [e for e in index.get(key, ()) if e["tool_name"].lower() not in names]
+        for entry in additions.get((index_name, key), ()):
+            bisect.insort(entries, entry, key=_tool_sort_key)
+        if entries:
+            index[key] = tuple(entries)
+        else:
+            index.pop(key, None)
+
+    build_ms = (time.perf_counter() - start) * 1000
+    return CatalogSnapshot(
+        version=version,
+        tools=by_name,
+        ordered=tuple(ordered),
+        build_ms=build_ms,
+        **indexes,
+    )
+
+
+class CatalogSnapshotCache:
+    """
+    Holds the current CatalogSnapshot and rebuilds it when the catalog version moves
+
+    The snapshot is built once and replaced wholesale (copy-on-write), so
+    lookups never lock and never see a half-built index. A background
+    thread polls the catalog version; `request_refresh()` wakes it early
+    (e.g. after a local write). When the caller knows which tools changed
+    (catalog change notifications), only those tools are reloaded and
+    patched into a new snapshot.
+    """
+
+    def __init__(
+        self,
+        load_tools: Callable[[], List[ToolView]],
+        get_version: Callable[[], int],
+        refresh_interval_seconds: int = 300,
+        enable_background_refresh: bool = True,
+        load_tools_by_name: Optional[Callable[[List[str]], List[ToolView]]] = None
+    ):
+        """
+        Initialize snapshot cache
+
+        Args:
+            load_tools: Returns all active tools with nested structure
+            get_version: Returns the current catalog version
+            refresh_interval_seconds: How often to poll the catalog version
+                (a safety net; change notifications wake the poller directly)
+            enable_background_refresh: Start the version poller on first load
+            load_tools_by_name: Returns the active tools with the given names
+                (enables per-tool refresh)
+        """
+        self.load_tools = load_tools
+        self.get_version = get_version
+        self.load_tools_by_name = load_tools_by_name
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.enable_background_refresh = enable_background_refresh
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._load_lock = threading.Lock()
+
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_refresh = threading.Event()
+        self._wake = threading.Event()
+
+        # Tools named by refresh requests since the poller last ran
+        self._pending_tools: Set[str] = set()
+        self._pending_version = 0
+        self._pending_full = False
+        self._pending_lock = threading.Lock()
+
+        # Statistics
+        self._loads = 0
+        self._patches = 0
+        self._refresh_errors = 0
+
+    # ========================================================================
+    # LIFECYCLE
+    # ========================================================================
+
+    def load(self) -> CatalogSnapshot:
+        """Build a fresh snapshot and swap it in atomically"""
+        with self._load_lock:
+            # Read the version first: a write racing the load bumps it again,
+            # so the next poll rebuilds rather than missing the change
+            version = self.get_version()
+            snapshot = build_snapshot(self.load_tools(), version)
+            self._snapshot = snapshot
+            self._loads += 1
+
+            logger.info(
+                f"Tool catalog snapshot loaded: version={version}, tools={len(snapshot)}, "
+                f"capabilities={len(snapshot.by_capability)}, build_ms={snapshot.build_ms:.1f}"
+            )
+
+        if self.enable_background_refresh:
+            self.start()
+
+        return snapshot
+
+    def start(self) -> None:
+        """Start the background version poller"""
+        if self._refresh_thread is None:
+            self._stop_refresh.clear()
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop,
+                daemon=True,
+                name="CatalogSnapshotRefresh"
+            )
+            self._refresh_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background version poller"""
+        if self._refresh_thread is not None:
+            self._stop_refresh.set()
+            self._wake.set()
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Rebuild the snapshot if the catalog version moved
+
+        Returns:
+            True if a new snapshot was loaded
+        """
+        current = self._snapshot
+        version = self.get_version()
+        if current is not None and version == current.version:
+            return False
+        self.load()
+        return True
+
+    def refresh_tools(self, tool_names: Iterable[str], version: Optional[int] = None) -> CatalogSnapshot:
+        """
+        Reload only the named tools and patch them into a new snapshot
+
+        The patch is stamped with the version of the changes it applies, never
+        the current database version: other tools may have changed since, and
+        the next refresh_if_changed() must still see the version move and
+        rebuild. Falls back to a full load when no snapshot exists yet or no
+        per-tool loader was configured.
+
+        Args:
+            tool_names: Tools known to have changed
+            version: Catalog version of the change notifications being applied
+                (None = unknown; the snapshot keeps its version)
+        """
+        names = sorted({name.lower() for name in tool_names})
+        if self._snapshot is None or self.load_tools_by_name is None:
+            return self.load()
+
+        with self._load_lock:
+            version = max(self._snapshot.version, version or 0)
+            snapshot = patch_snapshot(self._snapshot, names, self.load_tools_by_name(names), version)
+            self._snapshot = snapshot
+            self._patches += 1
+
+        logger.debug(
+            f"Tool catalog snapshot patched: version={version}, tools={names}, "
+            f"build_ms={snapshot.build_ms:.2f}"
+        )
+        return snapshot
+
+    def request_refresh(self, tool_name: Optional[str] = None, version: Optional[int] = None) -> None:
+        """
+        Wake the poller to refresh now (non-blocking)
+
+        Args:
+            tool_name: Tool known to have changed (None = check the version
+                and reload everything if it moved)
+            version: Catalog version of the change (from its notification)
+        """
+        if self._refresh_thread is None:
+            return
+        with self._pending_lock:
+            if tool_name is None:
+                self._pending_full = True
+            else:
+                self._pending_tools.add(tool_name.lower())
+                self._pending_version = max(self._pending_version, version or 0)
+        self._wake.set()
+
+    def invalidate(self) -> None:
+        """Force a synchronous rebuild"""
+        self.load()
+
+    def _refresh_loop(self) -> None:
+        """Background thread polling the catalog version"""
+        while not self._stop_refresh.is_set():
+            self._wake.wait(timeout=self.refresh_interval_seconds)
+            self._wake.clear()
+            if self._stop_refresh.is_set():
+                break
+            with self._pending_lock:
+                tool_names, self._pending_tools = self._pending_tools, set()
+                version, self._pending_version = self._pending_version, 0
+                full, self._pending_full = self._pending_full, False
+            try:
+                if tool_names and not full:
+                    self.refresh_tools(tool_names, version)
+                else:
+                    self.refresh_if_changed()
+            except Exception as e:
+                self._refresh_errors += 1
+                logger.error(f"Tool catalog snapshot refresh failed: {e}")
+
+    # ========================================================================
+    # LOOKUPS
+    # ========================================================================
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot (built on first access)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        """Version of the current snapshot"""
+        return self.snapshot.version
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get snapshot statistics"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else 0,
+            "tools": len(snapshot) if snapshot else 0,
+            "capabilities": len(snapshot.by_capability) if snapshot else 0,
+            "build_ms": round(snapshot.build_ms, 2) if snapshot else 0.0,
+            "built_at": snapshot.built_at.isoformat() if snapshot else None,
+            "loads": self._loads,
+            "patches": self._patches,
+            "refresh_errors": self._refresh_errors,
+        }
+
+
+# Global instance
+_snapshot_cache: Optional[CatalogSnapshotCache] = None
+_snapshot_cache_lock = threading.Lock()
+
+
+def get_catalog_snapshot_cache(catalog_service=None) -> Optional[CatalogSnapshotCache]:
+    """
+    Get or create the global catalog snapshot cache
+
+    Args:
+        catalog_service: ToolCatalogService used to load the catalog (only
+            used on first call)
+
+    Returns:
+        CatalogSnapshotCache, or None if not yet created and no service given
+    """
+    global _snapshot_cache
+
+    if _snapshot_cache is None and catalog_service is not None:
+        with _snapshot_cache_lock:
+            if _snapshot_cache is None:
+                _snapshot_cache = CatalogSnapshotCache(
+                    load_tools=lambda: catalog_service.get_all_tools_with_structure(use_cache=False),
+                    get_version=catalog_service.get_catalog_version,
+                    load_tools_by_name=lambda names: catalog_service.get_all_tools_with_structure(
+                        use_cache=False, tool_names=names
+                    ),
+                )
+
+    return _snapshot_cache
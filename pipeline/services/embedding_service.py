@@ -5,16 +5,70 @@ Generates and manages embeddings for semantic tool retrieval in Stage AB.
 Uses sentence-transformers with bge-base-en-v1.5 (768d) for high-quality embeddings.
 Fallback to bge-small-en-v1.5 (384d) if memory constrained.
 
+Query path:
+- LRU cache keyed by a hash of the normalized text (BGE is uncased and
+  whitespace-insensitive, so normalizing does not change the embedding)
+- embed_text_async coalesces concurrent requests into batched encodes
+  (EmbeddingBatcher) run off the event loop
+- Backends: "torch" (fp32), "int8" (dynamic int8 quantization of the Linear
+  layers, CPU) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+- warmup() loads the model and runs the first encodes at startup
+
 Confidence: 0.9 | Doubt: Model download may fail; needs error handling
 """
 
+import hashlib
 import logging
 import os
+import time
+import warnings
 from typing import List, Dict, Any, Optional
 import numpy as np
 
+from pipeline.services.embedding_batcher import EmbeddingBatcher
+from pipeline.services.lru_cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("torch", "int8", "onnx")
+
+# Representative queries for warm-up
+WARMUP_TEXTS = [
+    "check disk usage on web01",
+    "restart the nginx service on all linux servers",
+    "show failed login attempts in the last hour",
+]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, trim and collapse whitespace (embedding-preserving for BGE)"""
+    return " ".join(text.lower().split())
+
+
+def embedding_cache_key(text: str) -> str:
+    """Cache key of a text: hash of its normalized form"""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def quantize_int8(model):
+    """
+    Dynamic int8 quantization of a model's Linear layers (CPU inference)
+    
+    Weights are stored as int8 and activations quantized on the fly;
+    embeddings stay within ~1e-4 cosine of fp32.
+    
+    Args:
+        model: SentenceTransformer (or any torch module) on CPU
+        
+    Returns:
+        Quantized copy of the model
+    """
+    import torch
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
 
 class EmbeddingService:
     """
@@ -23,20 +77,45 @@ class EmbeddingService:
     Uses sentence-transformers with BGE models (BAAI General Embedding).
     """
     
-    def __init__(self, model_name: str = "BAAI/bge-base-en-v1.5", dimension: int = 768):
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-base-en-v1.5",
+        dimension: int = 768,
+        backend: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
         """
         Initialize embedding service.
         
         Args:
-            model_name: HuggingFace model name
+            model_name: HuggingFace model name (or local model path)
             dimension: Expected embedding dimension (768 for base, 384 for small)
+            backend: "torch", "int8" or "onnx" (default: EMBEDDING_BACKEND or torch)
+            cache_size: Query embedding cache entries (default: EMBEDDING_CACHE_SIZE or 10000, 0 = off)
+            max_batch_size: Micro-batch size limit (default: EMBEDDING_MAX_BATCH or 32)
+            max_wait_ms: Micro-batch collection window (default: EMBEDDING_MAX_WAIT_MS or 2)
         """
         self.model_name = model_name
         self.dimension = dimension
+        self.backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{self.backend}' (expected one of {BACKENDS})")
         self.model = None
         self._initialized = False
         
-        logger.info(f"🔧 EmbeddingService: Initializing with model={model_name}, dim={dimension}")
+        if cache_size is None:
+            cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        # Embeddings of a fixed model never go stale: no TTL
+        self.cache = LRUCache(max_size=cache_size, default_ttl=0) if cache_size > 0 else None
+        self.batcher = EmbeddingBatcher(
+            self._encode,
+            max_batch_size=max_batch_size or int(os.getenv("EMBEDDING_MAX_BATCH", "32")),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_MAX_WAIT_MS", "2"))
+        )
+        
+        logger.info(f"🔧 EmbeddingService: Initializing with model={model_name}, dim={dimension}, backend={self.backend}")
     
     def _lazy_init(self):
         """Lazy initialization of the model (only when first needed)"""
@@ -52,10 +131,20 @@ class EmbeddingService:
             cache_dir = os.getenv("TRANSFORMERS_CACHE", "/tmp/transformers_cache")
             os.makedirs(cache_dir, exist_ok=True)
             
-            self.model = SentenceTransformer(self.model_name, cache_folder=cache_dir)
+            if self.backend == "onnx":
+                # Optional pre-quantized export, e.g. onnx/model_qint8_avx512_vnni.onnx
+                onnx_file = os.getenv("EMBEDDING_ONNX_FILE")
+                self.model = SentenceTransformer(
+                    self.model_name, cache_folder=cache_dir, backend="onnx",
+                    model_kwargs={"file_name": onnx_file} if onnx_file else None
+                )
+            elif self.backend == "int8":
+                self.model = quantize_int8(SentenceTransformer(self.model_name, cache_folder=cache_dir, device="cpu"))
+            else:
+                self.model = SentenceTransformer(self.model_name, cache_folder=cache_dir)
             self._initialized = True
             
-            logger.info(f"✅ Embedding model loaded successfully (dim={self.dimension})")
+            logger.info(f"✅ Embedding model loaded successfully (dim={self.dimension}, backend={self.backend})")
             
         except ImportError:
             logger.error("❌ sentence-transformers not installed. Run: pip install sentence-transformers")
@@ -64,6 +153,37 @@ class EmbeddingService:
             logger.error(f"❌ Failed to load embedding model: {str(e)}")
             raise RuntimeError(f"Failed to initialize embedding model: {str(e)}")
     
+    def encode_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Encode texts to a normalized float32 array (uncached; for bulk jobs).
+        
+        Args:
+            texts: Texts to encode
+            batch_size: Encoder batch size
+            
+        Returns:
+            Array of shape (len(texts), dimension)
+        """
+        self._lazy_init()
+        embeddings = np.asarray(
+            self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True),
+            dtype=np.float32
+        )
+        if embeddings.shape[-1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}d embedding, got {embeddings.shape[-1]}d")
+        return embeddings
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one batch (see encode_batch)"""
+        return self.encode_batch(texts, batch_size=max(len(texts), 1))
+    
+    def _cached(self, key: str) -> Optional[List[float]]:
+        """Cached embedding as a fresh list, or None"""
+        if self.cache is None:
+            return None
+        embedding = self.cache.get(key)
+        return None if embedding is None else embedding.tolist()
+    
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text string.
@@ -74,23 +194,90 @@ class EmbeddingService:
         Returns:
             List of floats representing the embedding vector
         """
+        key = embedding_cache_key(text)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        
         self._lazy_init()
         
         try:
-            # Generate embedding
-            embedding = self.model.encode(text, normalize_embeddings=True)
-            
-            # Convert to list and validate dimension
-            embedding_list = embedding.tolist()
-            
-            if len(embedding_list) != self.dimension:
-                raise ValueError(f"Expected {self.dimension}d embedding, got {len(embedding_list)}d")
-            
-            return embedding_list
+            embedding = self._encode([normalize_text(text)])[0]
+        except Exception as e:
+            logger.error(f"❌ Failed to generate embedding: {str(e)}")
+            raise RuntimeError(f"Embedding generation failed: {str(e)}")
+        
+        if self.cache is not None:
+            # A row is a view; a copy does not keep the encode output alive
+            self.cache.set(key, embedding.copy())
+        return embedding.tolist()
+    
+    async def embed_text_async(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single text without blocking the event loop.
+        
+        Cache misses are micro-batched with concurrent requests into one
+        encode call (see EmbeddingBatcher).
+        
+        Args:
+            text: Input text to embed
             
+        Returns:
+            List of floats representing the embedding vector
+        """
+        key = embedding_cache_key(text)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            embedding = await self.batcher.submit(normalize_text(text))
         except Exception as e:
             logger.error(f"❌ Failed to generate embedding: {str(e)}")
             raise RuntimeError(f"Embedding generation failed: {str(e)}")
+        
+        if self.cache is not None:
+            # A row is a view; a copy does not keep the encode output alive
+            self.cache.set(key, embedding.copy())
+        return embedding.tolist()
+    
+    def warmup(self, texts: Optional[List[str]] = None) -> float:
+        """
+        Load the model and run the first encodes (single and batched).
+        
+        The first forward passes allocate buffers and start the intra-op
+        thread pool; doing that at startup keeps it off the first requests.
+        Warm-up texts are not cached.
+        
+        Args:
+            texts: Texts to encode (default: WARMUP_TEXTS)
+            
+        Returns:
+            Warm-up time in milliseconds
+        """
+        start_time = time.time()
+        texts = texts or WARMUP_TEXTS
+        self._lazy_init()
+        self._encode(texts[:1])
+        self._encode((texts * self.batcher.max_batch_size)[:self.batcher.max_batch_size])
+        elapsed_ms = (time.time() - start_time) * 1000
+        logger.info(f"✅ Embedding model warmed up in {elapsed_ms:.0f}ms (backend={self.backend})")
+        return elapsed_ms
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get embedding cache and batching statistics.
+        
+        Returns:
+            Dictionary with backend, cache and batcher statistics
+        """
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "initialized": self._initialized,
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "batcher": self.batcher.get_statistics(),
+        }
     
     def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
         """
@@ -233,6 +420,9 @@ class EmbeddingService:
         """
         Backfill tool_index from existing tools in database.
         
+        Holds all entries in memory; to re-embed a full catalog use
+        ToolIndexService.rebuild_index (streaming, resumable).
+        
         Args:
             tools_from_db: List of tool dictionaries from tool_catalog.tools
             batch_size: Batch size for embedding generation
@@ -5,7 +5,8 @@ Zero-downtime tool catalog updates
 This service provides:
 - Event-driven cache invalidation
 - Webhook notifications for tool updates
-- Periodic refresh mechanism
+- Periodic refresh mechanism (a safety net; catalog writes are pushed
+  to every replica via NOTIFY, see catalog_listener.py)
 - Manual reload triggers
 - Reload history tracking
 """
@@ -27,6 +28,7 @@ class ReloadTrigger(str, Enum):
     PERIODIC = "periodic"
     WEBHOOK = "webhook"
     STARTUP = "startup"
+    NOTIFY = "notify"  # tool_catalog_changed from another replica or endpoint
 
 
 class ReloadEvent:
@@ -77,7 +79,7 @@ class HotReloadService:
     def __init__(
         self,
         enable_periodic_refresh: bool = False,
-        refresh_interval_seconds: int = 300,  # 5 minutes
+        refresh_interval_seconds: int = 3600,  # 1 hour
         max_history_size: int = 100
     ):
         """
@@ -85,7 +87,8 @@ class HotReloadService:
         
         Args:
             enable_periodic_refresh: Enable background periodic refresh
-            refresh_interval_seconds: Interval for periodic refresh (default: 5 minutes)
+            refresh_interval_seconds: Interval for periodic refresh (default: 1 hour;
+                changes arrive via NOTIFY, so this only catches missed ones)
             max_history_size: Maximum number of reload events to keep in history
         """
         self.enable_periodic_refresh = enable_periodic_refresh
@@ -314,7 +317,7 @@ _hot_reload_service: Optional[HotReloadService] = None
 
 def get_hot_reload_service(
     enable_periodic_refresh: bool = False,
-    refresh_interval_seconds: int = 300
+    refresh_interval_seconds: int = 3600
 ) -> HotReloadService:
     """
     Get or create the global hot reload service instance
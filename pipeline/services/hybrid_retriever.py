@@ -0,0 +1,315 @@
+"""
+Hybrid Retriever
+BM25 + vector retrieval over tool_index rows, fused with reciprocal rank
+fusion (RRF).
+
+The database path (ToolIndexService.build_retrieval_query) does the same in
+SQL: a tsvector/GIN full-text ranking and the pgvector HNSW ranking fused by
+RRF. This module is the in-memory counterpart, built once from the
+tool_index rows (or a catalog snapshot):
+
+- BM25Index: inverted index with per-posting BM25 weights precomputed, so a
+  query is a handful of NumPy scatter-adds
+- reciprocal_rank_fusion: score(d) = sum_i w_i / (k + rank_i(d))
+- HybridRetriever: BM25 top-N and cosine top-N over the embedding matrix,
+  fused with tunable k and per-source weights
+
+RRF uses ranks only, so BM25 scores and cosine similarities never need to be
+calibrated against each other.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default RRF constant (Cormack et al.); lower k favours top ranks more
+DEFAULT_RRF_K = 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Small English stopword list (matches the spirit of the 'english' text
+# search configuration used by the tsvector column)
+STOPWORDS = frozenset("""
+    a an and are as at be by can do for from get give how i in is it me my
+    of on or please show tell that the this to what when where which who why
+    with you your
+""".split())
+
+
+def tokenize(text: str, stem: bool = True) -> List[str]:
+    """
+    Lowercase alphanumeric tokens without stopwords, with plural 's' folded
+
+    Args:
+        text: Input text
+        stem: Fold plural 's' (off when Postgres does the stemming)
+
+    Returns:
+        List of tokens (order preserved, duplicates kept)
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if stem and len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def to_tsquery_text(text: str) -> Optional[str]:
+    """
+    OR-tsquery for to_tsquery('english', ...) from free text
+
+    Tokens are [a-z0-9]+ only, so no tsquery operators can leak in; they are
+    left unstemmed for the 'english' configuration to stem.
+
+    Returns:
+        e.g. "disk | usage | server", or None if the text has no terms
+    """
+    terms = list(dict.fromkeys(tokenize(text, stem=False)))
+    return " | ".join(terms) if terms else None
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: float = DEFAULT_RRF_K,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse ranked lists with reciprocal rank fusion
+
+    Args:
+        rankings: Ranked lists of ids (best first); ids may repeat across lists
+        k: RRF constant
+        weights: Per-list weights (default 1.0 each)
+
+    Returns:
+        List of (id, score) sorted by score descending (ties keep first-seen order)
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda pair: -pair[1])
+
+
+# ============================================================================
+# BM25
+# ============================================================================
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents
+
+    Per-posting weights idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+    are computed once at build time.
+    """
+
+    def __init__(self, documents: Sequence[Sequence[str]], k1: float = 1.2, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            documents: Token lists, one per document
+            k1: Term-frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+
+        lengths = np.array([len(doc) for doc in documents], dtype=np.float32)
+        avgdl = float(lengths.mean()) if self.size and lengths.sum() else 1.0
+        norm = k1 * (1 - b + b * lengths / avgdl)
+
+        counts: Dict[str, Dict[int, int]] = defaultdict(dict)
+        for doc_id, doc in enumerate(documents):
+            for token in doc:
+                counts[token][doc_id] = counts[token].get(doc_id, 0) + 1
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for token, tfs in counts.items():
+            doc_ids = np.fromiter(tfs.keys(), dtype=np.int32, count=len(tfs))
+            tf = np.fromiter(tfs.values(), dtype=np.float32, count=len(tfs))
+            df = len(tfs)
+            idf = np.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            self._postings[token] = (doc_ids, (idf * tf * (k1 + 1) / (tf + norm[doc_ids])).astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def scores(self, query_tokens: Iterable[str]) -> np.ndarray:
+        """BM25 score of every document for the query (0 where no term matches)"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(query_tokens):
+            posting = self._postings.get(token)
+            if posting is not None:
+                np.add.at(scores, posting[0], posting[1])
+        return scores
+
+    def search(self, query_tokens: Iterable[str], top_k: int = 10,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top documents for the query
+
+        Args:
+            query_tokens: Tokenized query
+            top_k: Number of results
+            mask: Optional boolean filter over documents
+
+        Returns:
+            List of (document index, score) with score > 0, best first
+        """
+        scores = self.scores(query_tokens)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        return _top_k(scores, top_k, positive_only=True)
+
+
+def _top_k(scores: np.ndarray, top_k: int, positive_only: bool = False) -> List[Tuple[int, float]]:
+    candidates = np.flatnonzero(scores > 0) if positive_only else np.arange(len(scores))
+    if len(candidates) > top_k:
+        part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = candidates[part]
+    # Stable on ties: lower index first
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return list(zip(order.tolist(), scores[order].tolist()))
+
+
+# ============================================================================
+# HYBRID RETRIEVER
+# ============================================================================
+
+def index_text(row: Dict[str, Any]) -> List[str]:
+    """Tokens of a tool_index row: name weighted 3x, tags 2x, description 1x"""
+    tags = " ".join(row.get("tags") or [])
+    name = f"{row.get('id', '')} {row.get('name', '')}".replace("-", " ").replace("_", " ")
+    return tokenize(name) * 3 + tokenize(tags.replace("_", " ")) * 2 + tokenize(row.get("desc_short", ""))
+
+
+class HybridRetriever:
+    """
+    In-memory BM25 + vector retrieval over tool_index rows with RRF fusion
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        embeddings: Optional[np.ndarray] = None,
+        rrf_k: float = DEFAULT_RRF_K,
+        text_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        similarity_threshold: float = 0.0
+    ):
+        """
+        Build the retriever
+
+        Args:
+            rows: tool_index rows (id, name, desc_short, platform, tags, cost_hint)
+            embeddings: (n, d) L2-normalized embedding matrix aligned with rows
+            rrf_k: RRF constant
+            text_weight: RRF weight of the BM25 ranking
+            vector_weight: RRF weight of the vector ranking
+            similarity_threshold: Minimum cosine similarity for vector hits
+        """
+        self.rows = [dict(row) for row in rows]
+        self.rrf_k = rrf_k
+        self.text_weight = text_weight
+        self.vector_weight = vector_weight
+        self.similarity_threshold = similarity_threshold
+        self.bm25 = BM25Index([index_text(row) for row in self.rows])
+        self.embeddings = None if embeddings is None else np.asarray(embeddings, dtype=np.float32)
+        self._platforms = np.array([row.get("platform", "") for row in self.rows])
+        self._positions = {row["id"]: i for i, row in enumerate(self.rows)}
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]], **kwargs) -> "HybridRetriever":
+        """Build from rows carrying their embedding in 'emb' (as loaded from tool_index)"""
+        rows = list(rows)
+        embeddings = None
+        if rows and rows[0].get("emb") is not None:
+            embeddings = np.array([_parse_vector(row["emb"]) for row in rows], dtype=np.float32)
+        return cls([{k: v for k, v in row.items() if k != "emb"} for row in rows], embeddings, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _platform_mask(self, platform: Optional[str]) -> Optional[np.ndarray]:
+        if not platform:
+            return None
+        return (self._platforms == platform) | (self._platforms == "multi-platform")
+
+    def text_ranking(self, query_text: str, top_k: int, platform: Optional[str] = None) -> List[int]:
+        """Row indexes by BM25 score"""
+        return [i for i, _ in self.bm25.search(tokenize(query_text), top_k, self._platform_mask(platform))]
+
+    def vector_ranking(self, query_embedding: Sequence[float], top_k: int,
+                       platform: Optional[str] = None) -> List[Tuple[int, float]]:
+        """(row index, similarity) by cosine similarity, above the threshold"""
+        if self.embeddings is None or not len(self.rows):
+            return []
+        sims = self.embeddings @ np.asarray(query_embedding, dtype=np.float32)
+        mask = self._platform_mask(platform)
+        if mask is not None:
+            sims = np.where(mask, sims, -np.inf)
+        return [(i, s) for i, s in _top_k(sims, top_k) if s >= self.similarity_threshold]
+
+    def search(
+        self,
+        query_text: str,
+        query_embedding: Optional[Sequence[float]] = None,
+        platform: Optional[str] = None,
+        top_k: int = 10,
+        candidate_k: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid search
+
+        Args:
+            query_text: User query text (BM25)
+            query_embedding: Query embedding (vector ranking skipped if None)
+            platform: Platform filter (multi-platform rows always pass)
+            top_k: Number of fused results
+            candidate_k: Depth of each ranking before fusion
+
+        Returns:
+            Row dicts (copies) best first; vector hits carry 'similarity'
+        """
+        # Same fusion as reciprocal_rank_fusion, scattered into a row-aligned array
+        fused = np.zeros(len(self.rows), dtype=np.float64)
+        text_hits = self.text_ranking(query_text, candidate_k, platform)
+        ranks = np.arange(1, candidate_k + 1, dtype=np.float64)
+        if text_hits:
+            fused[text_hits] += self.text_weight / (self.rrf_k + ranks[:len(text_hits)])
+        similarities: Dict[int, float] = {}
+        if query_embedding is not None:
+            vector_hits = self.vector_ranking(query_embedding, candidate_k, platform)
+            similarities = dict(vector_hits)
+            if vector_hits:
+                fused[[i for i, _ in vector_hits]] += self.vector_weight / (self.rrf_k + ranks[:len(vector_hits)])
+
+        results = []
+        for i, _ in _top_k(fused, top_k, positive_only=True):
+            row = dict(self.rows[i])
+            if i in similarities:
+                row["similarity"] = similarities[i]
+            results.append(row)
+        return results
+
+    def rows_by_id(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Rows for the given ids (unknown ids skipped)"""
+        return [dict(self.rows[self._positions[i]]) for i in ids if i in self._positions]
+
+
+def _parse_vector(value: Any) -> List[float]:
+    """pgvector value as returned by psycopg2 ('[0.1,0.2,...]') or a sequence"""
+    if isinstance(value, str):
+        return [float(x) for x in value.strip("[]").split(",") if x]
+    return list(value)
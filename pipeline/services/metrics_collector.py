@@ -181,6 +181,7 @@ class MetricsCollector:
         self.db_query_duration = Histogram()
         self.db_errors = Counter()
         self.db_connections_active = Gauge()
+        self.db_pool_wait = Histogram()
         
         # Hot reload metrics
         self.reload_count = Counter()
@@ -290,6 +291,10 @@ class MetricsCollector:
         """Update active database connections"""
         self.db_connections_active.set(active)
     
+    def record_pool_wait(self, wait_ms: float):
+        """Record time spent waiting to acquire a pooled connection"""
+        self.db_pool_wait.observe(wait_ms)
+    
     # ========================================================================
     # HOT RELOAD METRICS
     # ========================================================================
@@ -356,7 +361,8 @@ class MetricsCollector:
                     self.db_errors.get()
                 ),
                 'duration_ms': db_stats,
-                'active_connections': self.db_connections_active.get()
+                'active_connections': self.db_connections_active.get(),
+                'pool_wait_ms': self.db_pool_wait.get_stats()
             },
             'hot_reload': {
                 'total_reloads': self.reload_count.get(),
@@ -441,6 +447,7 @@ class MetricsCollector:
         self.db_queries.reset()
         self.db_query_duration.reset()
         self.db_errors.reset()
+        self.db_pool_wait.reset()
         
         self.reload_count.reset()
         self.reload_duration.reset()
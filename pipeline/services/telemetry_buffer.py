@@ -0,0 +1,537 @@
+"""
+Telemetry Buffer
+Fire-and-forget telemetry rows, written in batches with COPY
+
+ToolIndexService.log_telemetry and ToolCatalogService.record_telemetry used
+to open a connection and INSERT one row at the end of every request. This
+module moves that write off the request path:
+
+- add() appends the row to a bounded in-memory buffer and returns
+- A background thread flushes the buffer with one text-format COPY per
+  batch, when the batch fills or every flush interval
+- A COPY that fails for connection reasons puts the rows back (oldest kept)
+  and retries with backoff
+- Optional columns (added by a later migration) are written only if the
+  table has them, checked once on the flusher's first connection
+- A COPY rejected for its data (bad value, NOT NULL, foreign key) is retried
+  row by row; rows the database still rejects are dropped and counted, so
+  one poison row cannot hold up the rest
+- A COPY rejected for the statement itself (missing table or column, no
+  privilege) would fail the same way on every retry; the batch is dropped
+  and counted, and the error logged once
+- Otherwise rows are dropped only when the buffer is full; drops, rejects
+  and enqueue-to-write lag are counted per buffer
+- close() / shutdown_telemetry_buffers() flush what is left (also run at exit)
+"""
+
+import atexit
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the rows themselves; retrying the same batch cannot succeed
+DATA_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+# Errors caused by the statement or schema (UndefinedTable, UndefinedColumn,
+# InsufficientPrivilege); no batch can succeed until the schema changes
+SCHEMA_ERRORS = (psycopg2.ProgrammingError,)
+
+
+# ============================================================================
+# TEXT COPY ENCODING
+# ============================================================================
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _array_element(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _copy_value(value: Any) -> str:
+    """One column in COPY text format (NULL as \\N)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        text = "{" + ",".join(_array_element(v) for v in value) + "}"
+    elif isinstance(value, dict):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    return text.translate(_COPY_ESCAPES)
+
+
+def encode_copy_text(rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Encode rows for COPY ... FROM STDIN (text format)
+
+    Supports None, bool, int, float, str, list/tuple (text[] literal) and
+    dict (json/jsonb).
+    """
+    return "".join(
+        "\t".join(_copy_value(value) for value in row) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def existing_columns(cursor, table: str, columns: Sequence[str]) -> List[str]:
+    """
+    Those of `columns` that the table has (information_schema lookup)
+
+    Args:
+        cursor: DB-API cursor
+        table: Schema-qualified table name
+        columns: Column names to look for
+    """
+    schema, _, name = table.rpartition(".")
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = %s AND table_name = %s AND column_name = ANY(%s)",
+        (schema or "public", name, list(columns))
+    )
+    found = {row[0] for row in cursor.fetchall()}
+    return [column for column in columns if column in found]
+
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+class TelemetryBuffer:
+    """
+    Bounded buffer of rows for one table, flushed by a background thread
+    """
+
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        connect: Callable[[], Any],
+        max_rows: int = 10000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        max_backoff_seconds: float = 30.0,
+        optional_columns: Sequence[str] = ()
+    ):
+        """
+        Initialize telemetry buffer
+
+        Args:
+            table: Target table (schema-qualified)
+            columns: Column names, in row order
+            connect: Returns a new DB-API connection with copy_expert
+                (kept open by the flusher, replaced after an error)
+            max_rows: Buffer bound; rows added beyond it are dropped
+            batch_size: Rows per COPY; a full batch wakes the flusher
+            flush_interval_seconds: Maximum time a row waits for its batch
+            max_backoff_seconds: Cap on the retry delay after failed flushes
+            optional_columns: Columns (also in `columns`) written only if the
+                table has them; values for missing ones are left out of the COPY
+        """
+        self.table = table
+        self.columns = tuple(columns)
+        self.connect = connect
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.optional_columns = tuple(optional_columns)
+        self.copy_sql = f"COPY {table} ({', '.join(self.columns)}) FROM STDIN"
+        # Positions of the columns written (None until optional columns are checked)
+        self._column_indexes: Optional[List[int]] = (
+            None if self.optional_columns else list(range(len(self.columns)))
+        )
+
+        self._rows: Deque[Tuple[float, Tuple[Any, ...]]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One COPY at a time
+        self._conn = None
+
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stop_flush = threading.Event()
+        self._wake = threading.Event()
+        self._backoff = 0.0
+
+        # Statistics
+        self._added = 0
+        self._written = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._discarded = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._last_lag_seconds = 0.0
+        self._max_lag_seconds = 0.0
+        self._last_flush_ms = 0.0
+
+    # ========================================================================
+    # PRODUCER
+    # ========================================================================
+
+    def add(self, row: Sequence[Any]) -> bool:
+        """
+        Buffer one row (non-blocking)
+
+        Returns:
+            False if the buffer was full and the row was dropped
+        """
+        with self._lock:
+            self._added += 1
+            if len(self._rows) >= self.max_rows:
+                self._dropped += 1
+                dropped = self._dropped
+                accepted = False
+            else:
+                self._rows.append((time.monotonic(), tuple(row)))
+                accepted = True
+                full_batch = len(self._rows) >= self.batch_size
+
+        if not accepted:
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Telemetry buffer for {self.table} full, {dropped} rows dropped so far")
+            return False
+
+        if self._flush_thread is None:
+            self.start()
+        if full_batch:
+            self._wake.set()
+        return True
+
+    # ========================================================================
+    # LIFECYCLE
+    # ========================================================================
+
+    def start(self) -> None:
+        """Start the background flusher"""
+        with self._lock:
+            if self._flush_thread is not None:
+                return
+            self._stop_flush.clear()
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop,
+                daemon=True,
+                name=f"TelemetryFlush-{self.table}"
+            )
+        self._flush_thread.start()
+
+    def close(self, flush: bool = True) -> int:
+        """
+        Stop the flusher, write what is buffered and close the connection
+
+        Args:
+            flush: Write buffered rows before closing
+
+        Returns:
+            Rows written by the final flush
+        """
+        thread = self._flush_thread
+        if thread is not None:
+            self._stop_flush.set()
+            self._wake.set()
+            thread.join(timeout=10)
+            self._flush_thread = None
+
+        written = self.flush() if flush else 0
+        with self._flush_lock:
+            self._close_connection()
+        with self._lock:
+            remaining = len(self._rows)
+        if remaining:
+            logger.error(f"Telemetry buffer for {self.table} closed with {remaining} unwritten rows")
+        return written
+
+    # ========================================================================
+    # FLUSHING
+    # ========================================================================
+
+    def flush(self) -> int:
+        """
+        Write every buffered row now (in the calling thread)
+
+        Returns:
+            Rows written; stops at the first failed COPY (rows stay buffered)
+        """
+        written = 0
+        while True:
+            count = self._flush_batch()
+            if count <= 0:
+                return written
+            written += count
+
+    def _flush_batch(self) -> int:
+        """COPY up to batch_size rows; returns rows written, 0 if empty, -1 on failure"""
+        with self._flush_lock:
+            with self._lock:
+                count = min(len(self._rows), self.batch_size)
+                batch = [self._rows.popleft() for _ in range(count)]
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                self._copy([row for _, row in batch])
+                written = len(batch)
+            except DATA_ERRORS as e:
+                logger.warning(
+                    f"Telemetry batch of {len(batch)} rows rejected by {self.table} ({e}), "
+                    f"retrying row by row"
+                )
+                self._rollback()
+                written = self._copy_rows_individually(batch)
+                if written < 0:
+                    return -1
+            except SCHEMA_ERRORS as e:
+                self._discard(batch, e)
+                return len(batch)
+            except Exception as e:
+                self._retry_later(batch, e)
+                return -1
+
+            lag = time.monotonic() - batch[0][0]
+            self._written += written
+            self._flushes += 1
+            self._backoff = 0.0
+            self._last_lag_seconds = lag
+            self._max_lag_seconds = max(self._max_lag_seconds, lag)
+            self._last_flush_ms = (time.perf_counter() - started) * 1000
+            return len(batch)
+
+    def _copy(self, rows: List[Tuple[Any, ...]]) -> None:
+        """One COPY + commit on the flusher connection (opened on demand)"""
+        if self._conn is None:
+            self._conn = self.connect()
+        if self._column_indexes is None:
+            self._check_optional_columns()
+        if len(self._column_indexes) < len(self.columns):
+            rows = [tuple(row[i] for i in self._column_indexes) for row in rows]
+        with self._conn.cursor() as cursor:
+            cursor.copy_expert(self.copy_sql, io.BytesIO(encode_copy_text(rows)))
+        self._conn.commit()
+
+    def _check_optional_columns(self) -> None:
+        """Leave optional columns the table does not have out of the COPY (checked once)"""
+        with self._conn.cursor() as cursor:
+            present = set(existing_columns(cursor, self.table, self.optional_columns))
+        self._conn.commit()
+
+        missing = [c for c in self.optional_columns if c not in present]
+        if missing:
+            logger.warning(f"{self.table} has no column(s) {', '.join(missing)}; not writing them")
+        self._column_indexes = [i for i, c in enumerate(self.columns) if c not in missing]
+        written = [self.columns[i] for i in self._column_indexes]
+        self.copy_sql = f"COPY {self.table} ({', '.join(written)}) FROM STDIN"
+
+    def _copy_rows_individually(self, batch: List[Tuple[float, Tuple[Any, ...]]]) -> int:
+        """
+        Write a rejected batch one row per COPY, dropping the rows that fail
+
+        Returns:
+            Rows written, or -1 if a connection error interrupted the pass
+            (the unwritten rest of the batch is requeued)
+        """
+        written = 0
+        for i, (_, row) in enumerate(batch):
+            try:
+                self._copy([row])
+                written += 1
+            except SCHEMA_ERRORS as e:
+                self._written += written
+                self._discard(batch[i:], e)
+                return written
+            except DATA_ERRORS as e:
+                self._rollback()
+                self._rejected += 1
+                if self._rejected == 1 or self._rejected % 100 == 0:
+                    logger.error(
+                        f"Telemetry row rejected by {self.table}, dropped "
+                        f"({self._rejected} so far): {e}"
+                    )
+            except Exception as e:
+                self._written += written
+                self._retry_later(batch[i:], e)
+                return -1
+        return written
+
+    def _discard(self, batch: List[Tuple[float, Tuple[Any, ...]]], error: Exception) -> None:
+        """Statement-level failure: drop the batch instead of retrying it forever"""
+        self._rollback()
+        self._discarded += len(batch)
+        if self._discarded == len(batch):
+            logger.error(
+                f"Telemetry COPY into {self.table} failed ({error}); "
+                f"dropping rows until the schema is fixed"
+            )
+
+    def _retry_later(self, batch: List[Tuple[float, Tuple[Any, ...]]], error: Exception) -> None:
+        """Connection-level failure: reconnect next time, requeue, back off"""
+        self._close_connection()
+        self._requeue(batch)
+        self._failed_flushes += 1
+        self._backoff = min(
+            max(self._backoff * 2, self.flush_interval_seconds), self.max_backoff_seconds
+        )
+        logger.error(f"Telemetry flush of {len(batch)} rows to {self.table} failed: {error}")
+
+    def _rollback(self) -> None:
+        """End the aborted transaction; a connection that cannot is replaced"""
+        try:
+            self._conn.rollback()
+        except Exception:
+            self._close_connection()
+
+    def _requeue(self, batch: List[Tuple[float, Tuple[Any, ...]]]) -> None:
+        """Put a failed batch back in front; over the bound, the newest rows go"""
+        with self._lock:
+            self._rows.extendleft(reversed(batch))
+            overflow = len(self._rows) - self.max_rows
+            for _ in range(max(overflow, 0)):
+                self._rows.pop()
+            if overflow > 0:
+                self._dropped += overflow
+                logger.warning(f"Telemetry buffer for {self.table} full after failed flush, dropped {overflow} rows")
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _flush_loop(self) -> None:
+        """Background thread: flush on a full batch, the interval, or stop"""
+        while not self._stop_flush.is_set():
+            self._wake.wait(timeout=self._backoff or self.flush_interval_seconds)
+            self._wake.clear()
+            if self._stop_flush.is_set():
+                break
+            try:
+                while self._flush_batch() > 0 and not self._stop_flush.is_set():
+                    pass
+            except Exception as e:
+                logger.error(f"Telemetry flusher error for {self.table}: {e}")
+
+    # ========================================================================
+    # STATISTICS
+    # ========================================================================
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get buffer statistics (counts, drops, lag)"""
+        with self._lock:
+            buffered = len(self._rows)
+            oldest = self._rows[0][0] if self._rows else None
+        return {
+            "table": self.table,
+            "flusher_running": self._flush_thread is not None,
+            "buffered": buffered,
+            "max_rows": self.max_rows,
+            "added": self._added,
+            "written": self._written,
+            "dropped": self._dropped,
+            "rejected": self._rejected,
+            "discarded": self._discarded,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "lag_seconds": round(self._last_lag_seconds, 3),
+            "max_lag_seconds": round(self._max_lag_seconds, 3),
+            "oldest_buffered_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+        }
+
+
+# ============================================================================
+# GLOBAL BUFFERS
+# ============================================================================
+
+_buffers: Dict[str, TelemetryBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def telemetry_buffer_enabled() -> bool:
+    """Whether telemetry goes through the buffer (False = synchronous INSERT)"""
+    return os.getenv("TELEMETRY_BUFFER_ENABLED", "true").lower() == "true"
+
+
+def get_telemetry_buffer(
+    table: str,
+    columns: Sequence[str],
+    connect: Callable[[], Any],
+    optional_columns: Sequence[str] = ()
+) -> TelemetryBuffer:
+    """
+    Get or create the process-wide buffer for a table
+
+    Args:
+        table: Target table
+        columns: Column names, in row order (only used on first call)
+        connect: Connection factory (only used on first call)
+        optional_columns: Columns written only if the table has them (first call)
+
+    Returns:
+        TelemetryBuffer configured from TELEMETRY_BUFFER_MAX_ROWS,
+        TELEMETRY_BATCH_SIZE and TELEMETRY_FLUSH_MS
+    """
+    buffer = _buffers.get(table)
+    if buffer is None:
+        with _buffers_lock:
+            buffer = _buffers.get(table)
+            if buffer is None:
+                buffer = TelemetryBuffer(
+                    table,
+                    columns,
+                    connect,
+                    max_rows=int(os.getenv("TELEMETRY_BUFFER_MAX_ROWS", "10000")),
+                    batch_size=int(os.getenv("TELEMETRY_BATCH_SIZE", "500")),
+                    flush_interval_seconds=float(os.getenv("TELEMETRY_FLUSH_MS", "1000")) / 1000,
+                    optional_columns=optional_columns,
+                )
+                _buffers[table] = buffer
+    return buffer
+
+
+def get_telemetry_statistics() -> Dict[str, Dict[str, Any]]:
+    """Statistics for every telemetry buffer, by table"""
+    return {table: buffer.get_statistics() for table, buffer in list(_buffers.items())}
+
+
+def shutdown_telemetry_buffers() -> int:
+    """
+    Flush and close every telemetry buffer
+
+    Returns:
+        Rows written by the final flushes
+    """
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+        _buffers.clear()
+    written = 0
+    for buffer in buffers:
+        try:
+            written += buffer.close()
+        except Exception as e:
+            logger.error(f"Telemetry buffer shutdown for {buffer.table} failed: {e}")
+    if written:
+        logger.info(f"Flushed {written} telemetry rows on shutdown")
+    return written
+
+
+atexit.register(shutdown_telemetry_buffers)
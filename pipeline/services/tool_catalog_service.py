@@ -5,20 +5,30 @@ Database-backed tool management for 200+ tools
 This service provides:
 - CRUD operations for tools, capabilities, and patterns
 - Tool versioning and rollback
-- Performance telemetry tracking
+- Performance telemetry tracking (buffered, written in batches with COPY)
 - Hot reload without system restart
 - Query optimization with caching
+- Pooled connections with idle pre-ping, max lifetime and prepared
+  statements for the hot lookups (sync and async)
 """
 
+import asyncio
 import os
 import json
 import logging
 import time
-from typing import Dict, List, Optional, Any
+import uuid
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import psycopg2
 from psycopg2.extras import RealDictCursor, Json
-from psycopg2.pool import ThreadedConnectionPool
+
+from pipeline.services.catalog_pool import (
+    AsyncCatalogConnectionPool, CatalogConnectionPool, PoolConfig,
+)
+from pipeline.services.telemetry_buffer import (
+    get_telemetry_buffer, get_telemetry_statistics, telemetry_buffer_enabled,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,12 +52,17 @@ class ToolCatalogService:
         
         # Lazy-loaded connection pool (initialized on first use)
         # This allows the service to be instantiated without requiring DB access
+        # Connections are validated only after sitting idle, recycled after
+        # max lifetime, and the hot lookups run as prepared statements
         self._pool = None
-        self._pool_config = {
-            "minconn": 5,  # Keep warm connections ready
-            "maxconn": 20,  # Support higher concurrency
-            "dsn": self.database_url
-        }
+        self._async_pool = None
+        self._pool_config = PoolConfig(
+            min_size=5,  # Keep warm connections ready
+            max_size=20,  # Support higher concurrency
+            idle_check_seconds=float(os.getenv("TOOL_CATALOG_POOL_IDLE_CHECK_SECONDS", "30")),
+            max_lifetime_seconds=float(os.getenv("TOOL_CATALOG_POOL_MAX_LIFETIME_SECONDS", "1800")),
+            prepared_statements=os.getenv("TOOL_CATALOG_PREPARED_STATEMENTS", "true").lower() == "true",
+        )
         
         # LRU cache for hot paths (memory-bounded)
         # - max_size=1000: Limit memory usage
@@ -56,10 +71,30 @@ class ToolCatalogService:
         from pipeline.services.lru_cache import get_tool_cache
         self._cache = get_tool_cache(max_size=1000, default_ttl=300)
         
+        # Versioned in-memory catalog snapshot (shared per process) serves
+        # capability and full-structure lookups as dictionary reads; it is
+        # rebuilt only when tool_catalog.catalog_version_seq moves
+        from pipeline.services.catalog_snapshot import get_catalog_snapshot_cache
+        self._snapshot_enabled = os.getenv("TOOL_CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+        self._snapshot_cache = get_catalog_snapshot_cache(self) if self._snapshot_enabled else None
+        self._snapshot_retry_at = 0.0
+        
         # Initialize metrics collector
         from pipeline.services.metrics_collector import get_metrics_collector
         self.metrics = get_metrics_collector()
         
+        # Execution telemetry is buffered and COPYed in the background on its
+        # own connection (None = INSERT per call)
+        self.telemetry = (
+            get_telemetry_buffer(
+                "tool_catalog.tool_telemetry",
+                ("execution_id", "tool_id", "capability_id", "pattern_id", "actual_time_ms",
+                 "actual_cost", "success", "context_variables", "error_message"),
+                lambda: psycopg2.connect(self.database_url),
+            )
+            if telemetry_buffer_enabled() else None
+        )
+        
         logger.info("ToolCatalogService initialized (connection pool will be created on first use)")
     
     @property
@@ -67,29 +102,28 @@ class ToolCatalogService:
         """Lazy-load the connection pool on first access"""
         if self._pool is None:
             logger.info("Creating database connection pool...")
-            self._pool = ThreadedConnectionPool(**self._pool_config)
+            self._pool = CatalogConnectionPool(self.database_url, self._pool_config, metrics=self.metrics)
             logger.info("Database connection pool created successfully")
         return self._pool
     
+    def _get_async_pool(self) -> AsyncCatalogConnectionPool:
+        """Async pool for the running event loop (created on first use)"""
+        loop = asyncio.get_running_loop()
+        if self._async_pool is None or self._async_pool.loop is not loop:
+            self._async_pool = AsyncCatalogConnectionPool(
+                self.database_url, self._pool_config, metrics=self.metrics
+            )
+        return self._async_pool
+    
     def _get_connection(self):
-        """Get a connection from the pool with health check"""
+        """Get a connection from the pool (validated by the pool if it sat idle)"""
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                conn = self.pool.getconn()
-                # Test connection health
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                return conn
+                return self.pool.getconn()
             except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
-                logger.warning(f"Connection health check failed (attempt {attempt + 1}/{max_retries}): {e}")
+                logger.warning(f"Getting database connection failed (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
-                    # Close the bad connection and recreate pool
-                    try:
-                        if conn:
-                            conn.close()
-                    except:
-                        pass
                     # Recreate pool on last retry
                     if attempt == max_retries - 2:
                         logger.info("Recreating connection pool...")
@@ -148,6 +182,9 @@ class ToolCatalogService:
     
     def _clear_cache(self, pattern: Optional[str] = None):
         """Clear cache entries matching pattern"""
+        if self._snapshot_cache is not None:
+            self._snapshot_cache.request_refresh()
+        
         if hasattr(self._cache, 'clear_pattern'):
             if pattern is None:
                 self._cache.clear()
@@ -164,6 +201,76 @@ class ToolCatalogService:
                     self._cache.pop(key, None)
                     self._cache_timestamps.pop(key, None)
     
+    def _get_snapshot(self):
+        """Current catalog snapshot, or None to fall back to the database"""
+        if self._snapshot_cache is None or time.time() < self._snapshot_retry_at:
+            return None
+        try:
+            return self._snapshot_cache.snapshot
+        except Exception as e:
+            # Don't retry a full catalog load on every request
+            self._snapshot_retry_at = time.time() + 60
+            logger.warning(f"Catalog snapshot unavailable, using database queries: {e}")
+            return None
+    
+    def get_catalog_version(self) -> int:
+        """Get the catalog version (bumped by triggers on every catalog write)"""
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT last_value FROM tool_catalog.catalog_version_seq")
+                return cursor.fetchone()[0]
+        finally:
+            self._return_connection(conn)
+    
+    def get_tool_changes_since(self, since: Optional[datetime]) -> Tuple[List[str], datetime]:
+        """
+        Get names of tools touched since a watermark
+        
+        A tool counts as touched when its row, one of its capabilities or
+        patterns was written, or a tombstone was recorded for it (deletes
+        and renames). Names come back regardless of status, so callers
+        reload them and drop the ones no longer active.
+        
+        Args:
+            since: Previous watermark (None = only return a new watermark)
+        
+        Returns:
+            (tool names, new watermark), the watermark taken from the
+            database clock before reading
+        """
+        conn = self._get_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("SELECT now() AS watermark")
+                watermark = cursor.fetchone()['watermark']
+                if since is None:
+                    return [], watermark
+                
+                cursor.execute("""
+                    SELECT t.tool_name
+                    FROM tool_catalog.tools t
+                    WHERE t.updated_at > %(since)s
+                    UNION
+                    SELECT t.tool_name
+                    FROM tool_catalog.tool_capabilities c
+                    JOIN tool_catalog.tools t ON t.id = c.tool_id
+                    WHERE c.updated_at > %(since)s
+                    UNION
+                    SELECT t.tool_name
+                    FROM tool_catalog.tool_patterns p
+                    JOIN tool_catalog.tool_capabilities c ON c.id = p.capability_id
+                    JOIN tool_catalog.tools t ON t.id = c.tool_id
+                    WHERE p.updated_at > %(since)s
+                    UNION
+                    SELECT tb.tool_name
+                    FROM tool_catalog.tool_tombstones tb
+                    WHERE tb.deleted_at > %(since)s
+                """, {"since": since})
+                return [row['tool_name'] for row in cursor.fetchall()], watermark
+        finally:
+            self._return_connection(conn)
+    
     # ========================================================================
     # TOOL CRUD OPERATIONS
     # ========================================================================
@@ -267,17 +374,9 @@ class ToolCatalogService:
                 query_start = time.time()
                 
                 if version:
-                    cursor.execute("""
-                        SELECT * FROM tool_catalog.tools
-                        WHERE LOWER(tool_name) = LOWER(%s) AND version = %s
-                        AND enabled = true
-                    """, (tool_name, version))
+                    self.pool.execute_prepared(conn, cursor, "catalog_tool_version", (tool_name, version))
                 else:
-                    cursor.execute("""
-                        SELECT * FROM tool_catalog.tools
-                        WHERE LOWER(tool_name) = LOWER(%s) AND is_latest = true
-                        AND enabled = true
-                    """, (tool_name,))
+                    self.pool.execute_prepared(conn, cursor, "catalog_tool_latest", (tool_name,))
                 
                 result = cursor.fetchone()
                 
@@ -320,6 +419,11 @@ class ToolCatalogService:
         Returns:
             List of tools with their patterns for this capability
         """
+        if use_cache:
+            snapshot = self._get_snapshot()
+            if snapshot is not None:
+                return snapshot.tools_for_capability(capability_name, platform)
+        
         cache_key = f"capability:{capability_name}:{platform or 'all'}"
         
         # Check cache
@@ -331,101 +435,14 @@ class ToolCatalogService:
         conn = self._get_connection()
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                query = """
-                    SELECT 
-                        t.id as tool_id,
-                        t.tool_name,
-                        t.version,
-                        t.description as tool_description,
-                        t.platform,
-                        t.category,
-                        t.defaults,
-                        t.dependencies,
-                        t.metadata,
-                        c.id as capability_id,
-                        c.capability_name,
-                        c.description as capability_description,
-                        p.id as pattern_id,
-                        p.pattern_name,
-                        p.description as pattern_description,
-                        p.typical_use_cases,
-                        p.time_estimate_ms,
-                        p.cost_estimate,
-                        p.complexity_score,
-                        p.scope,
-                        p.completeness,
-                        p.limitations,
-                        p.policy,
-                        p.preference_match,
-                        p.required_inputs,
-                        p.expected_outputs
-                    FROM tool_catalog.tools t
-                    JOIN tool_catalog.tool_capabilities c ON t.id = c.tool_id
-                    JOIN tool_catalog.tool_patterns p ON c.id = p.capability_id
-                    WHERE 
-                        t.enabled = true 
-                        AND t.status = 'active'
-                        AND t.is_latest = true
-                        AND c.capability_name = %s
-                """
-                
-                params = [capability_name]
-                
                 if platform:
-                    query += " AND t.platform = %s"
-                    params.append(platform)
-                
-                query += " ORDER BY t.tool_name, p.pattern_name"
-                
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                
-                # Group by tool
-                tools = {}
-                for row in results:
-                    tool_name = row['tool_name']
-                    
-                    if tool_name not in tools:
-                        tools[tool_name] = {
-                            'tool_id': row['tool_id'],
-                            'tool_name': row['tool_name'],
-                            'version': row['version'],
-                            'description': row['tool_description'],
-                            'platform': row['platform'],
-                            'category': row['category'],
-                            'defaults': row['defaults'],
-                            'dependencies': row['dependencies'],
-                            'metadata': row['metadata'],
-                            'capabilities': {}
-                        }
-                    
-                    capability_name_key = row['capability_name']
-                    if capability_name_key not in tools[tool_name]['capabilities']:
-                        tools[tool_name]['capabilities'][capability_name_key] = {
-                            'capability_id': row['capability_id'],
-                            'capability_name': row['capability_name'],
-                            'description': row['capability_description'],
-                            'patterns': []
-                        }
-                    
-                    tools[tool_name]['capabilities'][capability_name_key]['patterns'].append({
-                        'pattern_id': row['pattern_id'],
-                        'pattern_name': row['pattern_name'],
-                        'description': row['pattern_description'],
-                        'typical_use_cases': row['typical_use_cases'],
-                        'time_estimate_ms': row['time_estimate_ms'],
-                        'cost_estimate': row['cost_estimate'],
-                        'complexity_score': float(row['complexity_score']),
-                        'scope': row['scope'],
-                        'completeness': row['completeness'],
-                        'limitations': row['limitations'],
-                        'policy': row['policy'],
-                        'preference_match': row['preference_match'],
-                        'required_inputs': row['required_inputs'],
-                        'expected_outputs': row['expected_outputs']
-                    })
+                    self.pool.execute_prepared(
+                        conn, cursor, "catalog_tools_by_capability_platform", (capability_name, platform)
+                    )
+                else:
+                    self.pool.execute_prepared(conn, cursor, "catalog_tools_by_capability", (capability_name,))
                 
-                result_list = list(tools.values())
+                result_list = self._group_capability_rows(cursor.fetchall())
                 self._set_cache(cache_key, result_list)
                 
                 return result_list
@@ -436,6 +453,149 @@ class ToolCatalogService:
         finally:
             self._return_connection(conn)
     
+    async def get_tool_by_name_async(
+        self,
+        tool_name: str,
+        version: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Async get_tool_by_name over the asyncpg pool (same cache)
+        
+        Args:
+            tool_name: Name of the tool
+            version: Specific version (if None, returns latest)
+            use_cache: Whether to use cache
+        
+        Returns:
+            Tool data or None if not found
+        """
+        cache_key = f"tool:{tool_name}:{version or 'latest'}"
+        
+        if use_cache:
+            cached = self._get_from_cache(cache_key)
+            if cached is not None:
+                if self.metrics:
+                    self.metrics.record_cache_hit(tool_name)
+                return cached
+        
+        if use_cache and self.metrics:
+            self.metrics.record_cache_miss(tool_name)
+        
+        query_start = time.time()
+        try:
+            if version:
+                row = await self._get_async_pool().fetchrow("catalog_tool_version", tool_name, version)
+            else:
+                row = await self._get_async_pool().fetchrow("catalog_tool_latest", tool_name)
+        except Exception as e:
+            if self.metrics:
+                self.metrics.record_db_query('SELECT', (time.time() - query_start) * 1000, success=False)
+            logger.error(f"Error getting tool {tool_name}: {e}")
+            raise
+        
+        if self.metrics:
+            self.metrics.record_db_query('SELECT', (time.time() - query_start) * 1000, success=True)
+        
+        if row is None:
+            return None
+        tool_data = dict(row)
+        self._set_cache(cache_key, tool_data)
+        return tool_data
+    
+    async def get_tools_by_capability_async(
+        self,
+        capability_name: str,
+        platform: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Async get_tools_by_capability over the asyncpg pool (same snapshot and cache)
+        
+        Args:
+            capability_name: Name of the capability (e.g., "service_control")
+            platform: Filter by platform (optional)
+            use_cache: Whether to use cache
+        
+        Returns:
+            List of tools with their patterns for this capability
+        """
+        if use_cache:
+            snapshot = self._get_snapshot()
+            if snapshot is not None:
+                return snapshot.tools_for_capability(capability_name, platform)
+        
+        cache_key = f"capability:{capability_name}:{platform or 'all'}"
+        
+        if use_cache:
+            cached = self._get_from_cache(cache_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            if platform:
+                rows = await self._get_async_pool().fetch(
+                    "catalog_tools_by_capability_platform", capability_name, platform
+                )
+            else:
+                rows = await self._get_async_pool().fetch("catalog_tools_by_capability", capability_name)
+        except Exception as e:
+            logger.error(f"Error getting tools by capability {capability_name}: {e}")
+            raise
+        
+        result_list = self._group_capability_rows(rows)
+        self._set_cache(cache_key, result_list)
+        return result_list
+    
+    @staticmethod
+    def _group_capability_rows(rows) -> List[Dict[str, Any]]:
+        """Group capability query rows (one per pattern) into tools"""
+        tools = {}
+        for row in rows:
+            tool_name = row['tool_name']
+            
+            if tool_name not in tools:
+                tools[tool_name] = {
+                    'tool_id': row['tool_id'],
+                    'tool_name': row['tool_name'],
+                    'version': row['version'],
+                    'description': row['tool_description'],
+                    'platform': row['platform'],
+                    'category': row['category'],
+                    'defaults': row['defaults'],
+                    'dependencies': row['dependencies'],
+                    'metadata': row['metadata'],
+                    'capabilities': {}
+                }
+            
+            capability_name_key = row['capability_name']
+            if capability_name_key not in tools[tool_name]['capabilities']:
+                tools[tool_name]['capabilities'][capability_name_key] = {
+                    'capability_id': row['capability_id'],
+                    'capability_name': row['capability_name'],
+                    'description': row['capability_description'],
+                    'patterns': []
+                }
+            
+            tools[tool_name]['capabilities'][capability_name_key]['patterns'].append({
+                'pattern_id': row['pattern_id'],
+                'pattern_name': row['pattern_name'],
+                'description': row['pattern_description'],
+                'typical_use_cases': row['typical_use_cases'],
+                'time_estimate_ms': row['time_estimate_ms'],
+                'cost_estimate': row['cost_estimate'],
+                'complexity_score': float(row['complexity_score']),
+                'scope': row['scope'],
+                'completeness': row['completeness'],
+                'limitations': row['limitations'],
+                'policy': row['policy'],
+                'preference_match': row['preference_match'],
+                'required_inputs': row['required_inputs'],
+                'expected_outputs': row['expected_outputs']
+            })
+        
+        return list(tools.values())
+    
     def get_all_tools(
         self,
         platform: Optional[str] = None,
@@ -503,7 +663,8 @@ class ToolCatalogService:
         platform: Optional[str] = None,
         category: Optional[str] = None,
         status: str = 'active',
-        use_cache: bool = True
+        use_cache: bool = True,
+        tool_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all tools with full nested structure (tools → capabilities → patterns)
@@ -516,10 +677,19 @@ class ToolCatalogService:
             category: Filter by category
             status: Filter by status (default: active)
             use_cache: Whether to use cache
+            tool_names: Only load these tools (case-insensitive; never cached)
         
         Returns:
             List of tools with nested capabilities and patterns
         """
+        if tool_names is not None:
+            use_cache = False
+        
+        if use_cache and status == 'active':
+            snapshot = self._get_snapshot()
+            if snapshot is not None:
+                return snapshot.filter_tools(platform=platform, category=category)
+        
         cache_key = f"all_tools_structure:{platform or 'all'}:{category or 'all'}:{status}"
         
         # Check cache
@@ -582,6 +752,10 @@ class ToolCatalogService:
                     query += " AND t.category = %s"
                     params.append(category)
                 
+                if tool_names is not None:
+                    query += " AND LOWER(t.tool_name) = ANY(%s)"
+                    params.append([name.lower() for name in tool_names])
+                
                 query += " ORDER BY t.tool_name, c.capability_name, p.pattern_name"
                 
                 cursor.execute(query, params)
@@ -645,7 +819,8 @@ class ToolCatalogService:
                     })
                 
                 result_list = list(tools.values())
-                self._set_cache(cache_key, result_list)
+                if tool_names is None:
+                    self._set_cache(cache_key, result_list)
                 
                 logger.debug(f"Retrieved {len(result_list)} tools with full structure")
                 return result_list
@@ -869,6 +1044,39 @@ class ToolCatalogService:
     # TELEMETRY OPERATIONS
     # ========================================================================
     
+    def _get_pattern_owner(self, pattern_id: int) -> Tuple[int, int]:
+        """
+        Get (tool_id, capability_id) for a pattern (cached)
+        
+        tool_telemetry.tool_id is NOT NULL, and callers only know the pattern.
+        
+        Raises:
+            ValueError: Unknown pattern ID
+        """
+        cache_key = f"pattern_owner:{pattern_id}"
+        owner = self._get_from_cache(cache_key)
+        if owner is not None:
+            return owner
+        
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.tool_id, p.capability_id
+                    FROM tool_catalog.tool_patterns p
+                    JOIN tool_catalog.tool_capabilities c ON c.id = p.capability_id
+                    WHERE p.id = %s
+                """, (pattern_id,))
+                row = cursor.fetchone()
+        finally:
+            self._return_connection(conn)
+        
+        if row is None:
+            raise ValueError(f"Unknown pattern ID {pattern_id}")
+        owner = (row[0], row[1])
+        self._set_cache(cache_key, owner)
+        return owner
+    
     def record_telemetry(
         self,
         pattern_id: int,
@@ -881,6 +1089,12 @@ class ToolCatalogService:
         """
         Record telemetry for a pattern execution
         
+        The owning tool and capability are looked up from the pattern
+        (cached). With the telemetry buffer enabled (TELEMETRY_BUFFER_ENABLED,
+        default) the row is written later by a background COPY; a full
+        buffer drops the row (counted in the buffer statistics) rather than
+        blocking the caller.
+        
         Args:
             pattern_id: Pattern ID
             actual_time_ms: Actual execution time in milliseconds
@@ -891,28 +1105,38 @@ class ToolCatalogService:
         
         Returns:
             Execution ID (UUID)
+        
+        Raises:
+            ValueError: Unknown pattern ID
         """
+        tool_id, capability_id = self._get_pattern_owner(pattern_id)
+        execution_id = str(uuid.uuid4())
+        
+        if self.telemetry is not None:
+            self.telemetry.add((
+                execution_id, tool_id, capability_id, pattern_id, actual_time_ms, actual_cost,
+                success, context_variables or {}, error_message
+            ))
+            return execution_id
+        
         conn = self._get_connection()
         try:
             with conn.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO tool_catalog.tool_telemetry (
-                        pattern_id, actual_time_ms, actual_cost, success,
-                        context_variables, error_message
+                        execution_id, tool_id, capability_id, pattern_id, actual_time_ms,
+                        actual_cost, success, context_variables, error_message
                     ) VALUES (
-                        %s, %s, %s, %s, %s, %s
+                        %s, %s, %s, %s, %s, %s, %s, %s, %s
                     )
-                    RETURNING execution_id
                 """, (
-                    pattern_id, actual_time_ms, actual_cost, success,
-                    Json(context_variables or {}), error_message
+                    execution_id, tool_id, capability_id, pattern_id, actual_time_ms,
+                    actual_cost, success, Json(context_variables or {}), error_message
                 ))
-                
-                execution_id = cursor.fetchone()[0]
                 conn.commit()
                 
                 logger.debug(f"Recorded telemetry for pattern ID {pattern_id}")
-                return str(execution_id)
+                return execution_id
                 
         except Exception as e:
             conn.rollback()
@@ -997,7 +1221,8 @@ class ToolCatalogService:
             "connection_pool": {
                 "min_connections": self.pool.minconn,
                 "max_connections": self.pool.maxconn,
-                "status": "healthy" if self.health_check() else "unhealthy"
+                "status": "healthy" if self.health_check() else "unhealthy",
+                **self.pool.get_statistics()
             },
             "cache": {}
         }
@@ -1012,6 +1237,11 @@ class ToolCatalogService:
                 "type": "simple_dict"
             }
         
+        if self._snapshot_cache is not None:
+            stats["snapshot"] = self._snapshot_cache.get_statistics()
+        
+        stats["telemetry"] = get_telemetry_statistics()
+        
         # Get database statistics
         try:
             conn = self._get_connection()
@@ -1211,6 +1441,9 @@ class ToolCatalogService:
     
     def close(self):
         """Close all connections"""
-        if self.pool:
-            self.pool.closeall()
-            logger.info("ToolCatalogService closed")
\ No newline at end of file
+        if self._pool is not None:
+            self._pool.closeall()
+        if self._async_pool is not None:
+            self._async_pool.terminate()
+            self._async_pool = None
+        logger.info("ToolCatalogService closed")
\ No newline at end of file
@@ -0,0 +1,448 @@
+"""
+Tool Index Backfill
+Streaming re-embed of tool_catalog.tool_index (e.g. after a model change).
+
+EmbeddingService.backfill_tool_index + ToolIndexService.bulk_insert_tool_index
+hold the whole catalog in memory, embed it, then upsert it into the live
+table with execute_values while readers contend with row locks and HNSW
+maintenance. This pipeline runs three overlapping stages instead:
+
+  reader    server-side cursor over tool_catalog.tools, keyset-ordered by tool_name
+  embedder  large encode batches (EmbeddingService.encode_batch)
+  writer    binary COPY into tool_catalog.tool_index_staging
+
+Each COPY commits together with its checkpoint row
+(tool_index_backfill_state, migration 0013), so an interrupted run resumes
+after the last committed tool. Once the source is exhausted the indexes,
+HNSW included, are built on the staging table while the live table keeps
+serving queries; a single short transaction then swaps the tables,
+re-applying the live table's grants. The staging emb column is sized for
+the model being loaded, so a dimension change (768 -> 384) swaps cleanly.
+
+Writes made to the live tool_index during a run are not carried over: the
+rebuilt index reflects tool_catalog.tools as read.
+"""
+
+import io
+import logging
+import queue
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "tool_catalog.tool_index_staging"
+COPY_COLUMNS = ("id", "name", "desc_short", "platform", "tags", "cost_hint", "emb")
+
+# Canonical tool_index indexes (name, definition); built on staging as <name>_staging
+INDEXES = [
+    ("idx_tool_index_name", "(name)"),
+    ("idx_tool_index_platform", "(platform)"),
+    ("idx_tool_index_tags", "USING GIN (tags)"),
+    ("idx_tool_index_updated_at", "(updated_at)"),
+    ("idx_tool_index_tsv", "USING GIN (tsv)"),  # migration 0012
+    ("tool_index_emb_hnsw", "USING hnsw (emb vector_cosine_ops)"),
+]
+
+SOURCE_QUERY = """
+    SELECT DISTINCT ON (tool_name) tool_name, description, platform, metadata
+    FROM tool_catalog.tools
+    WHERE is_latest = true AND enabled = true AND tool_name > %s
+    ORDER BY tool_name, updated_at DESC
+"""
+
+# Explicit privileges on the live table (grantee quoted, PUBLIC for oid 0)
+GRANTS_QUERY = """
+    SELECT acl.privilege_type,
+           CASE WHEN acl.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(acl.grantee)) END,
+           acl.is_grantable
+    FROM pg_class c, aclexplode(c.relacl) acl
+    WHERE c.oid = 'tool_catalog.tool_index'::regclass
+    ORDER BY 2, 1
+"""
+
+COPY_SQL = f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+
+CHECKPOINT_SQL = """
+    UPDATE tool_catalog.tool_index_backfill_state
+    SET last_id = %s, rows_written = rows_written + %s, updated_at = now()
+    WHERE run_id = %s
+"""
+
+# ============================================================================
+# BINARY COPY ENCODING
+# ============================================================================
+
+_TEXT_OID = 25
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+
+def _text(value: Any) -> bytes:
+    data = str(value).encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _text_array(values: Sequence[Any]) -> bytes:
+    if not values:
+        body = struct.pack("!iii", 0, 0, _TEXT_OID)
+    else:
+        body = struct.pack("!iiiii", 1, 0, _TEXT_OID, len(values), 1) + b"".join(_text(v) for v in values)
+    return struct.pack("!i", len(body)) + body
+
+
+def encode_copy_rows(entries: Sequence[Dict[str, Any]], embeddings: np.ndarray) -> bytes:
+    """
+    Encode tool_index rows as binary COPY tuples (without header/trailer)
+
+    Text columns are UTF-8, tags a one-dimensional text[] and emb pgvector's
+    binary form (int16 dim, int16 unused, big-endian float4s), so vectors
+    are copied as raw bytes instead of formatted as decimal text.
+
+    Args:
+        entries: Rows with id, name, desc_short, platform, tags, cost_hint
+        embeddings: (len(entries), dim) float array
+
+    Returns:
+        Concatenated tuples in COPY_COLUMNS order
+    """
+    vectors = np.ascontiguousarray(embeddings, dtype=">f4")
+    dim = vectors.shape[1]
+    vector_prefix = struct.pack("!ihh", 4 + 4 * dim, dim, 0)
+    field_count = struct.pack("!h", len(COPY_COLUMNS))
+
+    parts = []
+    for entry, vector in zip(entries, vectors):
+        parts += [
+            field_count,
+            _text(entry["id"]), _text(entry["name"]), _text(entry["desc_short"]),
+            _text(entry["platform"]), _text_array(entry["tags"]), _text(entry["cost_hint"]),
+            vector_prefix, vector.tobytes(),
+        ]
+    return b"".join(parts)
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+_DONE = object()
+
+
+class BackfillInterrupted(RuntimeError):
+    """A pipeline stage failed; committed batches are kept for resume"""
+
+
+class ToolIndexBackfill:
+    """
+    Resumable read → embed → COPY pipeline rebuilding tool_index
+    """
+
+    def __init__(
+        self,
+        embedding_service,
+        connect: Callable[[], Any],
+        run_id: Optional[str] = None,
+        read_batch_size: int = 1000,
+        embed_batch_size: int = 128,
+        queue_depth: int = 4,
+        maintenance_work_mem: str = "1GB",
+        parallel_workers: int = 4
+    ):
+        """
+        Initialize the backfill
+
+        Args:
+            embedding_service: EmbeddingService (prepare/format/encode_batch)
+            connect: Returns a new psycopg2 connection (one per stage)
+            run_id: Checkpoint key (default: "<model>@<dimension>")
+            read_batch_size: Rows per fetch, and per COPY/checkpoint
+            embed_batch_size: Encoder batch size
+            queue_depth: Batches buffered between stages
+            maintenance_work_mem: Session setting for the index builds
+            parallel_workers: max_parallel_maintenance_workers for the index builds
+        """
+        self.embedding_service = embedding_service
+        self.connect = connect
+        self.run_id = run_id or f"{embedding_service.model_name}@{embedding_service.dimension}"
+        self.read_batch_size = read_batch_size
+        self.embed_batch_size = embed_batch_size
+        self.queue_depth = queue_depth
+        self.maintenance_work_mem = maintenance_work_mem
+        self.parallel_workers = parallel_workers
+
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._stage_seconds = {"read": 0.0, "embed": 0.0, "write": 0.0}
+
+    def run(self, resume: bool = True) -> Dict[str, Any]:
+        """
+        Rebuild tool_index
+
+        Args:
+            resume: Continue an unfinished run with the same run_id (else start over)
+
+        Returns:
+            Dictionary with rows, rows/s, per-stage seconds and index build time
+
+        Raises:
+            BackfillInterrupted: A stage failed (rerun to resume)
+        """
+        start_time = time.time()
+        conn = self.connect()
+        try:
+            status, last_id, rows_before = self._start(conn, resume)
+            rows = 0
+            if status == "loading":
+                logger.info(f"🔄 Backfill {self.run_id}: loading after {last_id!r} ({rows_before} rows committed)")
+                rows = self._load(conn, last_id)
+                self._set_status(conn, "loaded")
+            load_seconds = time.time() - start_time
+
+            index_start = time.time()
+            built = self._build_indexes(conn)
+            index_seconds = time.time() - index_start
+            self._swap(conn, built)
+        finally:
+            conn.close()
+
+        elapsed = time.time() - start_time
+        result = {
+            "run_id": self.run_id,
+            "rows": rows,
+            "rows_total": rows_before + rows,
+            "resumed_after": last_id,
+            "load_seconds": round(load_seconds, 3),
+            "rows_per_second": round(rows / load_seconds, 1) if load_seconds > 0 else 0.0,
+            "stage_seconds": {k: round(v, 3) for k, v in self._stage_seconds.items()},
+            "index_seconds": round(index_seconds, 3),
+            "total_seconds": round(elapsed, 3),
+        }
+        logger.info(f"✅ Backfill {self.run_id}: {result['rows_total']} rows swapped in "
+                    f"({result['rows_per_second']} rows/s load, {result['index_seconds']}s indexes)")
+        return result
+
+    # ------------------------------------------------------------------
+    # Setup and checkpoints
+    # ------------------------------------------------------------------
+
+    def _start(self, conn, resume: bool):
+        """Resume the run's checkpoint, or reset state and create an empty staging table"""
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT status, last_id, rows_written FROM tool_catalog.tool_index_backfill_state WHERE run_id = %s",
+                (self.run_id,)
+            )
+            state = cursor.fetchone()
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (STAGING_TABLE,))
+            staging_exists = cursor.fetchone()[0]
+
+            if resume and state and state[0] in ("loading", "loaded") and staging_exists:
+                conn.commit()
+                return state[0], state[1], state[2]
+
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            cursor.execute(
+                f"CREATE TABLE {STAGING_TABLE} "
+                f"(LIKE tool_catalog.tool_index INCLUDING DEFAULTS INCLUDING GENERATED)"
+            )
+            # LIKE copies the live vector(n); size emb for the model being loaded
+            cursor.execute(
+                f"ALTER TABLE {STAGING_TABLE} ALTER COLUMN emb TYPE vector({int(self.embedding_service.dimension)})"
+            )
+            cursor.execute("""
+                INSERT INTO tool_catalog.tool_index_backfill_state (run_id) VALUES (%s)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    status = 'loading', last_id = NULL, rows_written = 0,
+                    started_at = now(), updated_at = now()
+            """, (self.run_id,))
+        conn.commit()
+        return "loading", None, 0
+
+    def _set_status(self, conn, status: str):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE tool_catalog.tool_index_backfill_state SET status = %s, updated_at = now() WHERE run_id = %s",
+                (status, self.run_id)
+            )
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _put(self, target: queue.Queue, item: Any):
+        """Blocking put that gives up once another stage has failed"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        while True:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _stage(self, name: str, body: Callable[[], None], out: Optional[queue.Queue]):
+        """Thread target: run a stage, record its failure, always signal downstream"""
+        try:
+            body()
+        except BaseException as e:
+            logger.error(f"❌ Backfill {name} stage failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            if out is not None:
+                self._put(out, _DONE)
+
+    def _read(self, last_id: Optional[str], out: queue.Queue):
+        prepare = self.embedding_service.prepare_tool_for_index
+        conn = self.connect()
+        try:
+            # Named cursor: rows stream from the server read_batch_size at a time
+            with conn.cursor(name="tool_index_backfill", cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = self.read_batch_size
+                cursor.execute(SOURCE_QUERY, (last_id or "",))
+                while not self._stop.is_set():
+                    started = time.perf_counter()
+                    rows = cursor.fetchmany(self.read_batch_size)
+                    entries = [prepare(row) for row in rows]
+                    self._stage_seconds["read"] += time.perf_counter() - started
+                    if not entries:
+                        break
+                    self._put(out, entries)
+        finally:
+            conn.close()
+
+    def _embed(self, source: queue.Queue, out: queue.Queue):
+        service = self.embedding_service
+        while True:
+            entries = self._get(source)
+            if entries is _DONE:
+                return
+            started = time.perf_counter()
+            texts = [service.format_tool_for_embedding(entry) for entry in entries]
+            embeddings = service.encode_batch(texts, batch_size=self.embed_batch_size)
+            self._stage_seconds["embed"] += time.perf_counter() - started
+            self._put(out, (entries, embeddings))
+
+    def _write(self, conn, source: queue.Queue) -> int:
+        written = 0
+        while True:
+            item = self._get(source)
+            if item is _DONE:
+                return written
+            entries, embeddings = item
+            started = time.perf_counter()
+            payload = COPY_HEADER + encode_copy_rows(entries, embeddings) + COPY_TRAILER
+            with conn.cursor() as cursor:
+                cursor.copy_expert(COPY_SQL, io.BytesIO(payload))
+                cursor.execute(CHECKPOINT_SQL, (entries[-1]["id"], len(entries), self.run_id))
+            conn.commit()  # rows and checkpoint together
+            written += len(entries)
+            self._stage_seconds["write"] += time.perf_counter() - started
+
+    def _load(self, conn, last_id: Optional[str]) -> int:
+        """Run reader and embedder threads feeding the writer (this thread)"""
+        self._stop.clear()
+        self._errors = []
+        read_out = queue.Queue(maxsize=self.queue_depth)
+        embed_out = queue.Queue(maxsize=self.queue_depth)
+        threads = [
+            threading.Thread(target=self._stage, name="backfill-read", daemon=True,
+                             args=("read", lambda: self._read(last_id, read_out), read_out)),
+            threading.Thread(target=self._stage, name="backfill-embed", daemon=True,
+                             args=("embed", lambda: self._embed(read_out, embed_out), embed_out)),
+        ]
+        for thread in threads:
+            thread.start()
+
+        written = 0
+        try:
+            written = self._write(conn, embed_out)
+        except Exception as e:
+            conn.rollback()
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise BackfillInterrupted(f"Backfill {self.run_id} interrupted: {self._errors[0]}") from self._errors[0]
+        return written
+
+    # ------------------------------------------------------------------
+    # Indexes and swap
+    # ------------------------------------------------------------------
+
+    def _build_indexes(self, conn) -> List[str]:
+        """Build tool_index's constraint and indexes on staging (idempotent for resume)"""
+        built = []
+        with conn.cursor() as cursor:
+            cursor.execute("SET maintenance_work_mem = %s", (self.maintenance_work_mem,))
+            cursor.execute("SET max_parallel_maintenance_workers = %s", (self.parallel_workers,))
+            cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = 'tool_index_staging_pkey'")
+            if cursor.fetchone() is None:
+                cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT tool_index_staging_pkey PRIMARY KEY (id)")
+            conn.commit()
+
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'tool_catalog' AND table_name = 'tool_index_staging' AND column_name = 'tsv'
+            """)
+            has_tsv = cursor.fetchone() is not None
+
+            for name, definition in INDEXES:
+                if "tsv" in definition and not has_tsv:
+                    continue
+                started = time.time()
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name}_staging ON {STAGING_TABLE} {definition}")
+                conn.commit()  # a resumed run skips indexes already built
+                built.append(name)
+                logger.info(f"📦 Built {name} on staging in {time.time() - started:.1f}s")
+
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+        conn.commit()
+        return built
+
+    def _swap(self, conn, indexes: List[str]):
+        """Replace tool_index with staging in one transaction (brief exclusive lock)"""
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = '5s'")
+            cursor.execute("LOCK TABLE tool_catalog.tool_index IN ACCESS EXCLUSIVE MODE")
+            # Dropping the live table drops its ACL; carry its grants over
+            cursor.execute(GRANTS_QUERY)
+            grants = cursor.fetchall()
+            cursor.execute("DROP TABLE tool_catalog.tool_index")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO tool_index")
+            cursor.execute("ALTER TABLE tool_catalog.tool_index RENAME CONSTRAINT tool_index_staging_pkey TO tool_index_pkey")
+            for name in indexes:
+                cursor.execute(f"ALTER INDEX tool_catalog.{name}_staging RENAME TO {name}")
+            for privilege, grantee, grantable in grants:
+                cursor.execute(
+                    f"GRANT {privilege} ON tool_catalog.tool_index TO {grantee}"
+                    + (" WITH GRANT OPTION" if grantable else "")
+                )
+            cursor.execute("""
+                CREATE TRIGGER trigger_tool_index_updated_at
+                    BEFORE UPDATE ON tool_catalog.tool_index
+                    FOR EACH ROW
+                    EXECUTE FUNCTION tool_catalog.update_tool_index_updated_at()
+            """)
+            cursor.execute(
+                "UPDATE tool_catalog.tool_index_backfill_state SET status = 'swapped', updated_at = now() WHERE run_id = %s",
+                (self.run_id,)
+            )
+        conn.commit()
+        logger.info(f"🔀 tool_index swapped ({len(indexes)} indexes)")
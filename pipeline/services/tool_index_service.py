@@ -6,18 +6,28 @@ Provides:
 - Semantic search (vector similarity)
 - Keyword/tag search (fallback)
 - Token-budgeted retrieval
-- Telemetry logging
+- Single-round-trip candidate retrieval (vector, keyword and always-include
+  sources merged, de-duplicated and ranked in one SQL statement)
+- Hybrid retrieval: full-text (tsvector/GIN) and vector (HNSW) rankings
+  fused by reciprocal rank fusion, in SQL or from an in-memory index
+- Telemetry logging (buffered, written in batches with COPY)
 
 Confidence: 0.93 | Doubt: Token estimates ±10-15%; keep 10% safety margin
 """
 
 import logging
 import time
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor, execute_values
 import os
 
+from pipeline.services.catalog_pool import CatalogConnectionPool, PoolConfig
+from pipeline.services.hybrid_retriever import DEFAULT_RRF_K, HybridRetriever, to_tsquery_text
+from pipeline.services.telemetry_buffer import existing_columns, get_telemetry_buffer, telemetry_buffer_enabled
+from pipeline.services.tool_index_backfill import ToolIndexBackfill
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +48,21 @@ class ToolIndexService:
     SIMILARITY_THRESHOLD = 0.50  # Minimum similarity score to include (balanced precision/recall)
     ALWAYS_INCLUDE = ["asset-query"]  # Always include these tools
     
+    # Hybrid retrieval (reciprocal rank fusion of full-text and vector ranks)
+    HYBRID_CANDIDATE_K = 40  # Depth of each ranking before fusion
+    TEXT_WEIGHT = 1.0
+    VECTOR_WEIGHT = 1.0
+    
+    TELEMETRY_TABLE = "tool_catalog.stage_ab_telemetry"
+    TELEMETRY_COLUMNS = (
+        "request_id", "user_intent", "catalog_size", "candidates_before_budget",
+        "rows_sent", "budget_used", "headroom_left", "selected_tool_ids",
+        "executed_tool_ids", "recall_at_k", "truncation_events",
+        "retrieval_time_ms", "llm_time_ms", "total_time_ms", "cache_hit",
+    )
+    # Added by migration 0015; left out of the write on older schemas
+    TELEMETRY_OPTIONAL_COLUMNS = ("cache_hit",)
+    
     def __init__(self):
         """Initialize tool index service."""
         self.db_config = {
@@ -47,12 +72,60 @@ class ToolIndexService:
             "user": os.getenv("POSTGRES_USER", "opsconductor"),
             "password": os.getenv("POSTGRES_PASSWORD", "opsconductor_secure_2024")
         }
+        # Shared pool for the read path (created on first use)
+        self._pool = None
+        self._pool_config = PoolConfig(
+            min_size=2,
+            max_size=int(os.getenv("TOOL_INDEX_POOL_MAX_SIZE", "10")),
+            prepared_statements=False
+        )
+        # "hybrid" (full-text + vector, RRF) or "vector" (vector only, keyword fallback).
+        # Hybrid needs the tsv column (migration 0012); without it the first
+        # retrieval falls back to vector (see _check_hybrid_support)
+        self.retrieval_mode = os.getenv("TOOL_INDEX_RETRIEVAL", "hybrid").lower()
+        self._hybrid_checked = False
+        self.rrf_k = float(os.getenv("TOOL_INDEX_RRF_K", str(DEFAULT_RRF_K)))
+        # In-memory hybrid index (see load_local_retriever); None = query the database
+        self.local_retriever: Optional[HybridRetriever] = None
+        # Telemetry rows are buffered and COPYed in the background (None = INSERT per call)
+        self.telemetry = (
+            get_telemetry_buffer(
+                self.TELEMETRY_TABLE, self.TELEMETRY_COLUMNS, self._get_connection,
+                optional_columns=self.TELEMETRY_OPTIONAL_COLUMNS
+            )
+            if telemetry_buffer_enabled() else None
+        )
+        # Columns for the synchronous INSERT (see _check_telemetry_columns)
+        self._telemetry_columns: Optional[Tuple[str, ...]] = None
         logger.info("🔧 ToolIndexService: Initialized")
     
+    @property
+    def pool(self) -> CatalogConnectionPool:
+        """Lazy-load the connection pool on first access."""
+        if self._pool is None:
+            self._pool = CatalogConnectionPool(
+                "", self._pool_config, connect=lambda: psycopg2.connect(**self.db_config)
+            )
+        return self._pool
+    
     def _get_connection(self):
-        """Get database connection."""
+        """Get a dedicated database connection (caller closes it)."""
         return psycopg2.connect(**self.db_config)
     
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection for a read."""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            self.pool.putconn(conn)
+    
+    @staticmethod
+    def _keywords(query_text: str) -> List[str]:
+        """Keywords for tag/ILIKE matching (simple split, at most 5)."""
+        return [kw.lower() for kw in query_text.split() if len(kw) > 2][:5]
+    
     def calculate_token_budget(self, base_tokens: Optional[int] = None) -> Tuple[int, int]:
         """
         Calculate token budget for tool index rows.
@@ -91,38 +164,33 @@ class ToolIndexService:
         start_time = time.time()
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Build query with optional platform filter and similarity threshold
-            if platform_filter:
-                query = """
-                    SELECT id, name, desc_short, platform, tags, cost_hint,
-                           1 - (emb <=> %s::vector) AS similarity
-                    FROM tool_catalog.tool_index
-                    WHERE (platform = %s OR platform = 'multi-platform')
-                      AND (1 - (emb <=> %s::vector)) >= %s
-                    ORDER BY emb <=> %s::vector
-                    LIMIT %s
-                """
-                cursor.execute(query, (query_embedding, platform_filter, query_embedding, 
-                                     self.SIMILARITY_THRESHOLD, query_embedding, top_k))
-            else:
-                query = """
-                    SELECT id, name, desc_short, platform, tags, cost_hint,
-                           1 - (emb <=> %s::vector) AS similarity
-                    FROM tool_catalog.tool_index
-                    WHERE (1 - (emb <=> %s::vector)) >= %s
-                    ORDER BY emb <=> %s::vector
-                    LIMIT %s
-                """
-                cursor.execute(query, (query_embedding, query_embedding, 
-                                     self.SIMILARITY_THRESHOLD, query_embedding, top_k))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Build query with optional platform filter and similarity threshold
+                if platform_filter:
+                    query = """
+                        SELECT id, name, desc_short, platform, tags, cost_hint,
+                               1 - (emb <=> %s::vector) AS similarity
+                        FROM tool_catalog.tool_index
+                        WHERE (platform = %s OR platform = 'multi-platform')
+                          AND (1 - (emb <=> %s::vector)) >= %s
+                        ORDER BY emb <=> %s::vector
+                        LIMIT %s
+                    """
+                    cursor.execute(query, (query_embedding, platform_filter, query_embedding, 
+                                         self.SIMILARITY_THRESHOLD, query_embedding, top_k))
+                else:
+                    query = """
+                        SELECT id, name, desc_short, platform, tags, cost_hint,
+                               1 - (emb <=> %s::vector) AS similarity
+                        FROM tool_catalog.tool_index
+                        WHERE (1 - (emb <=> %s::vector)) >= %s
+                        ORDER BY emb <=> %s::vector
+                        LIMIT %s
+                    """
+                    cursor.execute(query, (query_embedding, query_embedding, 
+                                         self.SIMILARITY_THRESHOLD, query_embedding, top_k))
+                
+                results = cursor.fetchall()
             
             elapsed_ms = int((time.time() - start_time) * 1000)
             logger.info(f"🔍 Vector search: {len(results)} results (similarity >= {self.SIMILARITY_THRESHOLD}) in {elapsed_ms}ms")
@@ -152,43 +220,38 @@ class ToolIndexService:
         """
         start_time = time.time()
         
+        # Extract keywords (simple split)
+        keywords = self._keywords(query_text)
+        
+        # Build ILIKE conditions
+        ilike_conditions = []
+        params = []
+        
+        for kw in keywords:
+            ilike_conditions.append("(name ILIKE %s OR desc_short ILIKE %s OR %s = ANY(tags))")
+            params.extend([f"%{kw}%", f"%{kw}%", kw])
+        
+        if not ilike_conditions:
+            return []
+        
+        where_clause = " OR ".join(ilike_conditions)
+        
+        if platform_filter:
+            where_clause = f"({where_clause}) AND (platform = %s OR platform = 'multi-platform')"
+            params.append(platform_filter)
+        
+        query = f"""
+            SELECT id, name, desc_short, platform, tags, cost_hint
+            FROM tool_catalog.tool_index
+            WHERE {where_clause}
+            LIMIT %s
+        """
+        params.append(top_k)
+        
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Extract keywords (simple split)
-            keywords = [kw.lower() for kw in query_text.split() if len(kw) > 2]
-            
-            # Build ILIKE conditions
-            ilike_conditions = []
-            params = []
-            
-            for kw in keywords[:5]:  # Limit to 5 keywords
-                ilike_conditions.append("(name ILIKE %s OR desc_short ILIKE %s OR %s = ANY(tags))")
-                params.extend([f"%{kw}%", f"%{kw}%", kw])
-            
-            if not ilike_conditions:
-                return []
-            
-            where_clause = " OR ".join(ilike_conditions)
-            
-            if platform_filter:
-                where_clause = f"({where_clause}) AND (platform = %s OR platform = 'multi-platform')"
-                params.append(platform_filter)
-            
-            query = f"""
-                SELECT id, name, desc_short, platform, tags, cost_hint
-                FROM tool_catalog.tool_index
-                WHERE {where_clause}
-                LIMIT %s
-            """
-            params.append(top_k)
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
             
             elapsed_ms = int((time.time() - start_time) * 1000)
             logger.info(f"🔍 Keyword search: {len(results)} results in {elapsed_ms}ms")
@@ -207,19 +270,14 @@ class ToolIndexService:
             List of tool index entries
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            query = """
-                SELECT id, name, desc_short, platform, tags, cost_hint
-                FROM tool_catalog.tool_index
-                WHERE id = ANY(%s)
-            """
-            cursor.execute(query, (self.ALWAYS_INCLUDE,))
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                query = """
+                    SELECT id, name, desc_short, platform, tags, cost_hint
+                    FROM tool_catalog.tool_index
+                    WHERE id = ANY(%s)
+                """
+                cursor.execute(query, (self.ALWAYS_INCLUDE,))
+                results = cursor.fetchall()
             
             return [dict(row) for row in results]
             
@@ -227,6 +285,281 @@ class ToolIndexService:
             logger.error(f"❌ Failed to get always-include tools: {str(e)}")
             return []
     
+    def build_retrieval_query(
+        self,
+        query_text: str,
+        query_embedding: Optional[List[float]] = None,
+        platform_filter: Optional[str] = None,
+        max_rows: int = 10
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the single retrieval statement used by retrieve_candidates.
+        
+        In hybrid mode (the default) this is build_hybrid_query. Otherwise,
+        sources (each a CTE, merged with UNION ALL):
+        - vector_hits: Top-K by cosine distance, then similarity threshold
+          (only when an embedding is given)
+        - keyword_hits: Name/description ILIKE or tag overlap
+          (only when no embedding is given)
+        - always-include IDs
+        
+        Rows are de-duplicated by id (vector > keyword > always-include),
+        ranked by similarity then name and cut to max_rows in SQL.
+        
+        Args:
+            query_text: User query text
+            query_embedding: Optional query embedding for vector search
+            platform_filter: Optional platform filter
+            max_rows: Maximum rows to return
+            
+        Returns:
+            Tuple of (sql, named parameters)
+        """
+        if self.retrieval_mode == "hybrid":
+            return self.build_hybrid_query(query_text, query_embedding, platform_filter, max_rows)
+        
+        params: Dict[str, Any] = {"always": list(self.ALWAYS_INCLUDE), "max_rows": max_rows}
+        platform_clause = ""
+        if platform_filter:
+            platform_clause = "AND (platform = %(platform)s OR platform = 'multi-platform')"
+            params["platform"] = platform_filter
+        
+        ctes = []
+        sources = []
+        
+        if query_embedding:
+            # Threshold applied after the ORDER BY/LIMIT so the ANN index drives the scan
+            params.update(emb=query_embedding, vector_k=self.VECTOR_TOP_K, threshold=self.SIMILARITY_THRESHOLD)
+            ctes.append(f"""vector_hits AS (
+                SELECT id, 1 - (emb <=> %(emb)s::vector) AS similarity
+                FROM tool_catalog.tool_index
+                WHERE true {platform_clause}
+                ORDER BY emb <=> %(emb)s::vector
+                LIMIT %(vector_k)s
+            )""")
+            sources.append("SELECT id, similarity, 0 AS source FROM vector_hits WHERE similarity >= %(threshold)s")
+        else:
+            keywords = self._keywords(query_text)
+            if keywords:
+                params.update(
+                    keywords=keywords,
+                    patterns=[f"%{kw}%" for kw in keywords],
+                    keyword_k=self.KEYWORD_TOP_K
+                )
+                ctes.append(f"""keyword_hits AS (
+                SELECT id
+                FROM tool_catalog.tool_index
+                WHERE (name ILIKE ANY(%(patterns)s) OR desc_short ILIKE ANY(%(patterns)s)
+                       OR tags && %(keywords)s::text[])
+                  {platform_clause}
+                ORDER BY name
+                LIMIT %(keyword_k)s
+            )""")
+                sources.append("SELECT id, NULL::float8 AS similarity, 1 AS source FROM keyword_hits")
+        
+        sources.append(
+            "SELECT id, NULL::float8 AS similarity, 2 AS source "
+            "FROM tool_catalog.tool_index WHERE id = ANY(%(always)s)"
+        )
+        
+        union = "\n                UNION ALL ".join(sources)
+        ctes.append(f"""hits AS (
+                {union}
+            )""")
+        ctes.append("""ranked AS (
+                SELECT DISTINCT ON (id) id, similarity
+                FROM hits
+                ORDER BY id, source
+            )""")
+        
+        query = f"""
+            WITH {', '.join(ctes)}
+            SELECT t.id, t.name, t.desc_short, t.platform, t.tags, t.cost_hint, r.similarity
+            FROM ranked r
+            JOIN tool_catalog.tool_index t ON t.id = r.id
+            ORDER BY r.similarity DESC NULLS LAST, t.name
+            LIMIT %(max_rows)s
+        """
+        return query, params
+    
+    def build_hybrid_query(
+        self,
+        query_text: str,
+        query_embedding: Optional[List[float]] = None,
+        platform_filter: Optional[str] = None,
+        max_rows: int = 10
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the hybrid retrieval statement (requires migration 0012).
+        
+        - vector_hits: HNSW nearest neighbours ranked by cosine distance,
+          kept if similarity >= SIMILARITY_THRESHOLD
+        - text_hits: tsv @@ OR-tsquery of the query terms (GIN), ranked by
+          ts_rank_cd
+        - always-include IDs (fused score 0, so they rank last)
+        
+        Each row scores sum(weight / (rrf_k + rank)) over the rankings it
+        appears in; rows are ordered by that score and cut to max_rows.
+        
+        Args:
+            query_text: User query text
+            query_embedding: Optional query embedding
+            platform_filter: Optional platform filter
+            max_rows: Maximum rows to return
+            
+        Returns:
+            Tuple of (sql, named parameters)
+        """
+        params: Dict[str, Any] = {
+            "always": list(self.ALWAYS_INCLUDE),
+            "max_rows": max_rows,
+            "rrf_k": self.rrf_k,
+            "candidate_k": self.HYBRID_CANDIDATE_K,
+        }
+        platform_clause = ""
+        if platform_filter:
+            platform_clause = "AND (platform = %(platform)s OR platform = 'multi-platform')"
+            params["platform"] = platform_filter
+        
+        ctes = []
+        sources = []
+        
+        if query_embedding:
+            params.update(emb=query_embedding, threshold=self.SIMILARITY_THRESHOLD, vector_weight=self.VECTOR_WEIGHT)
+            ctes.append(f"""vector_hits AS (
+                SELECT id, 1 - distance AS similarity, row_number() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT id, emb <=> %(emb)s::vector AS distance
+                    FROM tool_catalog.tool_index
+                    WHERE true {platform_clause}
+                    ORDER BY emb <=> %(emb)s::vector
+                    LIMIT %(candidate_k)s
+                ) nearest
+            )""")
+            sources.append(
+                "SELECT id, similarity, %(vector_weight)s / (%(rrf_k)s + rank) AS rrf "
+                "FROM vector_hits WHERE similarity >= %(threshold)s"
+            )
+        
+        tsquery = to_tsquery_text(query_text)
+        if tsquery:
+            params.update(tsquery=tsquery, text_weight=self.TEXT_WEIGHT)
+            ctes.append(f"""text_hits AS (
+                SELECT id, row_number() OVER (ORDER BY ts_rank_cd(tsv, query) DESC, id) AS rank
+                FROM tool_catalog.tool_index, to_tsquery('english', %(tsquery)s) AS query
+                WHERE tsv @@ query {platform_clause}
+                ORDER BY rank
+                LIMIT %(candidate_k)s
+            )""")
+            sources.append("SELECT id, NULL::float8 AS similarity, %(text_weight)s / (%(rrf_k)s + rank) AS rrf FROM text_hits")
+        
+        sources.append(
+            "SELECT id, NULL::float8 AS similarity, 0.0 AS rrf "
+            "FROM tool_catalog.tool_index WHERE id = ANY(%(always)s)"
+        )
+        
+        union = "\n                UNION ALL ".join(sources)
+        ctes.append(f"""hits AS (
+                {union}
+            )""")
+        ctes.append("""fused AS (
+                SELECT id, max(similarity) AS similarity, sum(rrf) AS rrf
+                FROM hits
+                GROUP BY id
+            )""")
+        
+        query = f"""
+            WITH {', '.join(ctes)}
+            SELECT t.id, t.name, t.desc_short, t.platform, t.tags, t.cost_hint, f.similarity
+            FROM fused f
+            JOIN tool_catalog.tool_index t ON t.id = f.id
+            ORDER BY f.rrf DESC, f.similarity DESC NULLS LAST, t.name
+            LIMIT %(max_rows)s
+        """
+        return query, params
+    
+    def load_local_retriever(self) -> HybridRetriever:
+        """
+        Load tool_index into an in-memory hybrid index (BM25 + vectors).
+        
+        Once loaded, retrieve_candidates is served from memory without a
+        database round trip; call again after the index is rebuilt.
+        
+        Returns:
+            The HybridRetriever now used by retrieve_candidates
+        """
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT id, name, desc_short, platform, tags, cost_hint, emb
+                FROM tool_catalog.tool_index
+                ORDER BY id
+            """)
+            rows = cursor.fetchall()
+        
+        self.local_retriever = HybridRetriever.from_rows(
+            rows,
+            rrf_k=self.rrf_k,
+            text_weight=self.TEXT_WEIGHT,
+            vector_weight=self.VECTOR_WEIGHT,
+            similarity_threshold=self.SIMILARITY_THRESHOLD
+        )
+        logger.info(f"✅ Local hybrid index loaded: {len(self.local_retriever)} tools")
+        return self.local_retriever
+    
+    def _retrieve_local(
+        self,
+        query_text: str,
+        query_embedding: Optional[List[float]],
+        platform_filter: Optional[str],
+        max_rows: int
+    ) -> List[Dict[str, Any]]:
+        """Hybrid retrieval from the in-memory index (same ordering as the SQL)."""
+        retriever = self.local_retriever
+        candidates = retriever.search(
+            query_text, query_embedding, platform_filter,
+            top_k=max_rows, candidate_k=self.HYBRID_CANDIDATE_K
+        )
+        seen = {c["id"] for c in candidates}
+        always = sorted(retriever.rows_by_id(i for i in self.ALWAYS_INCLUDE if i not in seen), key=lambda r: r["name"])
+        return (candidates + always)[:max_rows]
+    
+    def _check_hybrid_support(self, cursor) -> None:
+        """
+        Fall back to vector retrieval if tool_index has no tsv column.
+        
+        Checked once, on the first database retrieval. Without migration
+        0012 every hybrid query would fail with UndefinedColumn and Stage AB
+        would run with no candidates.
+        """
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'tool_catalog' AND table_name = 'tool_index' AND column_name = 'tsv'
+        """)
+        if cursor.fetchone() is None:
+            logger.warning(
+                "⚠️ TOOL_INDEX_RETRIEVAL=hybrid but tool_catalog.tool_index has no tsv column "
+                "(migration 0012 not applied); using vector retrieval"
+            )
+            self.retrieval_mode = "vector"
+        self._hybrid_checked = True
+    
+    def _check_telemetry_columns(self, cursor) -> None:
+        """
+        Leave cache_hit out of telemetry INSERTs if the table has no such column.
+        
+        Checked once, on the first synchronous write. Without migration 0015
+        every INSERT would fail with UndefinedColumn. The buffered path makes
+        the same check on its flusher connection.
+        """
+        present = set(existing_columns(cursor, self.TELEMETRY_TABLE, self.TELEMETRY_OPTIONAL_COLUMNS))
+        missing = [c for c in self.TELEMETRY_OPTIONAL_COLUMNS if c not in present]
+        if missing:
+            logger.warning(
+                f"⚠️ {self.TELEMETRY_TABLE} has no {', '.join(missing)} column "
+                "(migration 0015 not applied); logging telemetry without it"
+            )
+        self._telemetry_columns = tuple(c for c in self.TELEMETRY_COLUMNS if c not in missing)
+    
     def retrieve_candidates(
         self,
         query_text: str,
@@ -237,11 +570,15 @@ class ToolIndexService:
         """
         Retrieve candidate tools using union of multiple strategies.
         
-        Pipeline:
+        Pipeline (one statement, one pooled connection):
         1. Vector Top-K (if embedding provided)
-        2. Keyword/Tag Top-K (fallback)
+        2. Full-text Top-K (hybrid mode; keyword fallback only without
+           embedding in vector mode)
         3. Always-include IDs
-        4. Union → de-dup → slice to max_rows
+        4. Union → de-dup → rank (RRF in hybrid mode) → slice to max_rows (in SQL)
+        
+        With a local index loaded (load_local_retriever), the same hybrid
+        ranking is computed in memory instead.
         
         Args:
             query_text: User query text
@@ -260,57 +597,33 @@ class ToolIndexService:
         
         logger.info(f"🔍 Retrieving candidates: max_rows={max_rows}, platform={platform_filter}")
         
-        # Collect candidates from multiple sources
-        candidates_dict = {}  # Use dict for de-duplication by id
-        
-        # 1. Vector search (if embedding provided)
-        if query_embedding:
-            vector_results = self.vector_search(
-                query_embedding,
-                platform_filter=platform_filter,
-                top_k=self.VECTOR_TOP_K
-            )
-            for result in vector_results:
-                candidates_dict[result["id"]] = result
-            logger.info(f"   Vector: {len(vector_results)} candidates")
-        
-        # 2. Keyword/tag search (fallback ONLY if no vector search)
-        # NOTE: Keyword search disabled when embeddings available to avoid noise
-        if not query_embedding:
-            keyword_results = self.keyword_search(
-                query_text,
-                platform_filter=platform_filter,
-                top_k=self.KEYWORD_TOP_K
-            )
-            for result in keyword_results:
-                if result["id"] not in candidates_dict:
-                    candidates_dict[result["id"]] = result
-            logger.info(f"   Keyword: {len(keyword_results)} candidates")
-        else:
-            logger.info(f"   Keyword: skipped (vector search available)")
-        
-        # 3. Always-include tools
-        always_include = self.get_always_include_tools()
-        for result in always_include:
-            if result["id"] not in candidates_dict:
-                candidates_dict[result["id"]] = result
-        logger.info(f"   Always-include: {len(always_include)} candidates")
-        
-        # 4. De-dup and slice to max_rows
-        candidates = list(candidates_dict.values())
+        if self.local_retriever is not None:
+            candidates = self._retrieve_local(query_text, query_embedding, platform_filter, max_rows)
+            elapsed_ms = int((time.time() - start_time) * 1000)
+            logger.info(f"✅ Retrieved {len(candidates)} candidates in {elapsed_ms}ms (local index)")
+            return candidates
         
-        # Sort by similarity if available, otherwise by name
-        if query_embedding and candidates and "similarity" in candidates[0]:
-            candidates.sort(key=lambda x: x.get("similarity", 0), reverse=True)
-        else:
-            candidates.sort(key=lambda x: x["name"])
+        try:
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if self.retrieval_mode == "hybrid" and not self._hybrid_checked:
+                    self._check_hybrid_support(cursor)
+                query, params = self.build_retrieval_query(query_text, query_embedding, platform_filter, max_rows)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"❌ Candidate retrieval failed: {str(e)}")
+            return []
         
-        # Slice to token budget
-        candidates_before_budget = len(candidates)
-        candidates = candidates[:max_rows]
+        candidates = []
+        for row in rows:
+            candidate = dict(row)
+            # Keyword and always-include rows carry no similarity
+            if candidate.get("similarity") is None:
+                candidate.pop("similarity", None)
+            candidates.append(candidate)
         
         elapsed_ms = int((time.time() - start_time) * 1000)
-        logger.info(f"✅ Retrieved {len(candidates)} candidates (from {candidates_before_budget}) in {elapsed_ms}ms")
+        logger.info(f"✅ Retrieved {len(candidates)} candidates in {elapsed_ms}ms (single query)")
         
         return candidates
     
@@ -365,6 +678,8 @@ class ToolIndexService:
         """
         Bulk insert tool index entries.
         
+        For re-embedding the whole catalog use rebuild_index instead.
+        
         Args:
             entries: List of tool index entries
             
@@ -417,6 +732,28 @@ class ToolIndexService:
             logger.error(f"❌ Bulk insert failed: {str(e)}")
             return 0
     
+    def rebuild_index(self, embedding_service, resume: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        Re-embed the whole catalog into tool_index (e.g. after a model change).
+        
+        Streams tool_catalog.tools through embedding_service into a staging
+        table with COPY, builds the indexes there and swaps it in (see
+        ToolIndexBackfill). The live table keeps serving until the swap.
+        
+        Args:
+            embedding_service: EmbeddingService for the new model
+            resume: Continue an interrupted run of the same model
+            **kwargs: ToolIndexBackfill options (batch sizes, run_id, ...)
+            
+        Returns:
+            Backfill result (rows, rows/s, stage and index timings)
+        """
+        backfill = ToolIndexBackfill(embedding_service, connect=self._get_connection, **kwargs)
+        result = backfill.run(resume=resume)
+        if self.local_retriever is not None:
+            self.load_local_retriever()
+        return result
+    
     def log_telemetry(
         self,
         request_id: str,
@@ -432,11 +769,16 @@ class ToolIndexService:
         total_time_ms: int,
         executed_tool_ids: Optional[List[str]] = None,
         recall_at_k: Optional[float] = None,
-        truncation_events: int = 0
+        truncation_events: int = 0,
+        cache_hit: bool = False
     ) -> bool:
         """
         Log telemetry for Stage AB monitoring.
         
+        With the telemetry buffer enabled (TELEMETRY_BUFFER_ENABLED, default)
+        the row is buffered and written later by a background COPY, so this
+        does no I/O on the request path.
+        
         Args:
             request_id: Unique request ID
             user_intent: User query text
@@ -452,45 +794,58 @@ class ToolIndexService:
             executed_tool_ids: Tool IDs actually executed (optional)
             recall_at_k: Recall metric (optional)
             truncation_events: Number of truncation events
+            cache_hit: Selection reused from the semantic cache (written only
+                with migration 0015 applied)
             
         Returns:
-            True if successful
+            True if the row was written (or buffered)
         """
+        self._check_telemetry_alerts(headroom_left, recall_at_k, truncation_events)
+        
+        row = (
+            request_id, user_intent, catalog_size, candidates_before_budget,
+            rows_sent, budget_used, headroom_left, selected_tool_ids,
+            executed_tool_ids, recall_at_k, truncation_events,
+            retrieval_time_ms, llm_time_ms, total_time_ms, cache_hit
+        )
+        if self.telemetry is not None:
+            return self.telemetry.add(row)
+        
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            query = """
-                INSERT INTO tool_catalog.stage_ab_telemetry (
-                    request_id, user_intent, catalog_size, candidates_before_budget,
-                    rows_sent, budget_used, headroom_left, selected_tool_ids,
-                    executed_tool_ids, recall_at_k, truncation_events,
-                    retrieval_time_ms, llm_time_ms, total_time_ms
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            if self._telemetry_columns is None:
+                self._check_telemetry_columns(cursor)
+            columns = self._telemetry_columns
+            values = dict(zip(self.TELEMETRY_COLUMNS, row))
+            query = f"""
+                INSERT INTO {self.TELEMETRY_TABLE} ({', '.join(columns)})
+                VALUES ({', '.join(['%s'] * len(columns))})
             """
             
-            cursor.execute(query, (
-                request_id, user_intent, catalog_size, candidates_before_budget,
-                rows_sent, budget_used, headroom_left, selected_tool_ids,
-                executed_tool_ids, recall_at_k, truncation_events,
-                retrieval_time_ms, llm_time_ms, total_time_ms
-            ))
+            cursor.execute(query, tuple(values[c] for c in columns))
             
             conn.commit()
             cursor.close()
             conn.close()
             
-            # Check for alerts
-            if headroom_left < 15:
-                logger.warning(f"⚠️  Low headroom: {headroom_left}% remaining")
-            if recall_at_k is not None and recall_at_k < 0.98:
-                logger.warning(f"⚠️  Low recall: {recall_at_k:.2f}")
-            if truncation_events > 0:
-                logger.error(f"❌ Truncation events: {truncation_events}")
-            
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to log telemetry: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    @staticmethod
+    def _check_telemetry_alerts(
+        headroom_left: int,
+        recall_at_k: Optional[float],
+        truncation_events: int
+    ) -> None:
+        """Log alerts for low headroom, low recall and truncation."""
+        if headroom_left < 15:
+            logger.warning(f"⚠️  Low headroom: {headroom_left}% remaining")
+        if recall_at_k is not None and recall_at_k < 0.98:
+            logger.warning(f"⚠️  Low recall: {recall_at_k:.2f}")
+        if truncation_events > 0:
+            logger.error(f"❌ Truncation events: {truncation_events}")
\ No newline at end of file
@@ -31,6 +31,7 @@ from pipeline.schemas.decision_v1 import DecisionV1, IntentV1, EntityV1, RiskLev
 from pipeline.schemas.selection_v1 import SelectionV1, SelectedTool, ExecutionPolicy
 from llm.client import LLMClient, LLMRequest
 from llm.response_parser import ResponseParser
+from pipeline.cache.semantic_cache import CachedSelection, entity_signature, get_semantic_cache
 from pipeline.services.tool_catalog_service import ToolCatalogService
 from pipeline.services.tool_index_service import ToolIndexService
 from pipeline.services.embedding_service import get_embedding_service
@@ -64,6 +65,8 @@ class CombinedSelector:
         self.tool_index = ToolIndexService()
         self.embedding_service = get_embedding_service()
         self.asset_client = AssetServiceClient()
+        # Embedding-keyed reuse of selections for near-identical requests (None = disabled)
+        self.semantic_cache = get_semantic_cache()
         
         # Configuration
         self.config = {
@@ -84,7 +87,8 @@ class CombinedSelector:
         1. Early entity extraction (hostnames, IPs, services)
         2. Asset enrichment (query asset-service for metadata)
         3. Platform detection (from asset OS type)
-        4. Generate query embedding
+        4. Generate query embedding (and reuse the selection of a near-identical
+           earlier request with the same entities, if cached)
         5. Retrieve candidates from tool_index (semantic + platform filter)
         6. Apply token budget
         7. Send MINIMAL index to LLM (id, name, desc, tags, platform, cost)
@@ -114,6 +118,7 @@ class CombinedSelector:
             asset_metadata = None
             platform_filter = None
             missing_target_info = False
+            entities = None
             
             if self.config["enable_asset_enrichment"]:
                 # Extract entities early (quick LLM call for entity extraction only)
@@ -147,13 +152,26 @@ class CombinedSelector:
             
             if self.config["use_semantic_retrieval"]:
                 try:
-                    query_embedding = self.embedding_service.embed_text(user_request)
+                    query_embedding = await self.embedding_service.embed_text_async(user_request)
                     logger.info(f"✅ Generated query embedding ({len(query_embedding)}d)")
                 except Exception as e:
                     logger.warning(f"⚠️  Embedding generation failed: {str(e)}, falling back to keyword search")
                     if not self.config["fallback_to_keyword"]:
                         raise
             
+            # Step 2b: Semantic cache - nearest earlier request with exactly the
+            # same entities and platform scope (needs extracted entities)
+            cache_signature = cache_scope = cache_hit = None
+            if self.semantic_cache is not None and query_embedding is not None and entities is not None:
+                cache_signature = entity_signature(entities, user_request)
+                cache_scope = f"{platform_filter}|{missing_target_info}"
+                cache_hit = self.semantic_cache.lookup(query_embedding, cache_signature, cache_scope)
+                # A sample of hits is recomputed below to measure false reuse
+                if cache_hit is not None and not self.semantic_cache.should_verify():
+                    return self._reuse_cached_selection(
+                        cache_hit, context, start_time, request_id, user_request, retrieval_start
+                    )
+            
             # Step 3: Calculate token budget
             budget_tokens, max_rows = self.tool_index.calculate_token_budget()
             logger.info(f"📊 Token budget: {budget_tokens} tokens, max_rows={max_rows}")
@@ -276,6 +294,14 @@ class CombinedSelector:
                 ready_for_execution=self._is_ready_for_execution(validated_tools, additional_inputs)
             )
             
+            # Cache for near-identical requests (not if a selected tool failed validation)
+            if cache_signature is not None and len(validated_tools) == len(parsed['selected_tools']):
+                if cache_hit is None or not self.semantic_cache.record_verification(cache_hit, selection):
+                    self.semantic_cache.store(
+                        query_embedding, cache_signature, cache_scope,
+                        selection, parsed['entities'], user_request
+                    )
+            
             logger.info(f"✅ Stage AB: Complete in {processing_time}ms - {len(validated_tools)} tools selected, next_stage={next_stage}")
             return selection
             
@@ -283,6 +309,54 @@ class CombinedSelector:
             logger.error(f"❌ Stage AB: Failed to process request: {str(e)}")
             raise RuntimeError(f"Combined understanding + selection failed: {str(e)}") from e
     
+    def _reuse_cached_selection(self, hit: CachedSelection, context: Dict[str, Any],
+                                start_time: float, request_id: str, user_request: str,
+                                retrieval_start: float) -> SelectionV1:
+        """
+        Return a semantic cache hit as a new SelectionV1 for this request.
+        
+        The hit is logged to telemetry like any other request, marked
+        cache_hit with no candidates sent and no LLM time.
+        
+        Args:
+            hit: Cached selection of a near-identical earlier request
+            context: Request context (receives the cached entities)
+            start_time: Request start (for processing_time_ms)
+            request_id: Telemetry request ID
+            user_request: Original user request string
+            retrieval_start: Start of embedding + cache lookup (retrieval time)
+            
+        Returns:
+            Copy of the cached selection with fresh IDs and timing
+        """
+        context["entities"] = [dict(e) for e in hit.entities]
+        processing_time = int((time.time() - start_time) * 1000)
+        self.tool_index.log_telemetry(
+            request_id=request_id,
+            user_intent=user_request,
+            catalog_size=0,
+            candidates_before_budget=0,
+            rows_sent=0,
+            budget_used=0,
+            headroom_left=int(((self.tool_index.CTX - self.tool_index.BASE_TOKENS) / self.tool_index.CTX) * 100),
+            selected_tool_ids=[t.tool_name for t in hit.selection.selected_tools],
+            retrieval_time_ms=int((time.time() - retrieval_start) * 1000),
+            llm_time_ms=0,
+            total_time_ms=processing_time,
+            cache_hit=True
+        )
+        selection = hit.selection.model_copy(deep=True, update={
+            "selection_id": self._generate_selection_id(),
+            "decision_id": self._generate_decision_id(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "processing_time_ms": processing_time,
+        })
+        logger.info(
+            f"♻️  Stage AB: Semantic cache hit (similarity {hit.similarity:.3f}) in {processing_time}ms - "
+            f"reusing selection of '{hit.request[:60]}'"
+        )
+        return selection
+    
     def _create_minimal_index_prompt(self, user_request: str, candidates: List[Dict[str, Any]], 
                                      context: Optional[Dict[str, Any]]) -> Dict[str, str]:
         """
@@ -418,7 +492,7 @@ Analyze the request and select the appropriate tool IDs. Return JSON only."""
             
             # Check if tool exists in catalog
             try:
-                tool_meta = self.tool_catalog.get_tool_by_name(tool_id)
+                tool_meta = await self.tool_catalog.get_tool_by_name_async(tool_id)
                 if not tool_meta:
                     logger.warning(f"LLM selected non-existent tool: {tool_id}, skipping")
                     continue
@@ -816,6 +890,9 @@ Return JSON only."""
             except Exception as e:
                 health_status["components"]["tool_catalog"] = f"unhealthy: {str(e)}"
             
+            if self.semantic_cache is not None:
+                health_status["components"]["semantic_cache"] = self.semantic_cache.get_statistics()
+            
             # Overall health
             if not llm_healthy:
                 health_status["stage_ab"] = "degraded"
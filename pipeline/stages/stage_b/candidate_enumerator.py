@@ -6,9 +6,11 @@ their performance metrics using runtime context.
 
 This module:
 1. Loads tool profiles from YAML
-2. Matches capabilities to query requirements
-3. Evaluates expressions (time_ms, cost) with runtime context
-4. Builds ToolCandidate objects for scoring
+2. Indexes patterns by normalized capability (rebuilt when profiles reload)
+3. Matches capabilities to query requirements via the index
+4. Evaluates expressions (time_ms, cost) with runtime context (compiled
+   once per index build)
+5. Builds ToolCandidate objects for scoring
 
 Design Principles:
 1. Fail gracefully (skip invalid patterns, log errors)
@@ -17,13 +19,14 @@ Design Principles:
 4. Performance-conscious (cache profiles, evaluate once)
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, FrozenSet, Iterable, Set, Union
 import logging
+import time
 from dataclasses import dataclass
 
 from .profile_loader import ProfileLoader
-from .safe_math_eval import SafeMathEvaluator
-from .optimization_schemas import PatternProfile, PolicyConfig
+from .safe_math_eval import CompiledExpression, SafeMathEvaluator
+from .optimization_schemas import OptimizationProfilesConfig, PatternProfile, PolicyConfig
 
 
 logger = logging.getLogger(__name__)
@@ -66,6 +69,188 @@ class ToolCandidate:
     data_source: Optional[str] = None
 
 
+# Set once the capability registry failed to import, so requests don't
+# retry (and re-fail) the import every time
+_capability_hook_unavailable = False
+
+
+def load_alias_table(catalog_capabilities: Iterable[str]) -> Optional[Any]:
+    """
+    Capability alias table for the registry plus the catalog's names
+    
+    Returns None if the capability registry is unavailable, in which case
+    capability names are used as-is.
+    """
+    global _capability_hook_unavailable
+    if _capability_hook_unavailable:
+        return None
+    # PERMANENT FIX: Normalize capability names to canonical versions
+    try:
+        from capability_validation_hook import get_capability_hook
+        return get_capability_hook().refresh_alias_table(catalog_capabilities)
+    except ImportError as e:
+        _capability_hook_unavailable = True
+        logger.warning(f"Capability normalization hook not available - using raw capabilities: {e}")
+    except Exception as e:
+        logger.error(f"Capability normalization failed: {e} - using raw capabilities")
+    return None
+
+
+def normalize_capabilities(capabilities: List[str], alias_table: Optional[Any] = None) -> List[str]:
+    """
+    Normalize capability names to their canonical versions
+    
+    Args:
+        capabilities: Capability names (from Stage A or the catalog)
+        alias_table: Compiled alias table (raw names are kept if None)
+    """
+    if alias_table is None:
+        return list(capabilities)
+    return alias_table.canonicalize_all(capabilities)
+
+
+# Platform bit for multi-platform tools (and tools without a platform):
+# always included in the query mask
+ANY_PLATFORM = 1
+MULTI_PLATFORM_NAMES = (None, "", "multi-platform")
+
+
+@dataclass(frozen=True)
+class IndexedPattern:
+    """A (tool, capability, pattern) triple with precomputed filter data"""
+    order: int  # Position in profile iteration order (tool → capability → pattern)
+    tool_name: str
+    capability_name: str
+    pattern_name: str
+    pattern: PatternProfile
+    required_inputs: FrozenSet[str]
+    platform_mask: int
+    # Compiled time/cost expressions (numbers and invalid expressions are
+    # kept as-is and evaluated, or rejected, per request)
+    time_estimate_ms: Union[CompiledExpression, str, int, float]
+    cost_estimate: Union[CompiledExpression, str, int, float]
+
+
+# Shared by all enumerators; compiled expressions are cached per evaluator class
+_evaluator = SafeMathEvaluator()
+
+
+def compile_metric(value: Any) -> Union[CompiledExpression, Any]:
+    """
+    Compile a metric expression, leaving numbers and invalid values as-is
+    
+    Invalid expressions are logged and left for request-time evaluation,
+    which fails them the same way (and skips the pattern).
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        return _evaluator.compile(value)
+    except (SyntaxError, ValueError) as e:
+        logger.warning(f"Invalid expression '{value}': {e}")
+        return value
+
+
+class CapabilityIndex:
+    """
+    Inverted index: normalized capability → patterns providing it
+    
+    Built once per loaded profile set, so enumeration is a union over the
+    requested capabilities plus set filtering instead of a scan of every
+    tool, capability and pattern.
+    """
+    
+    def __init__(self, profiles: OptimizationProfilesConfig):
+        """
+        Build the index
+        
+        Args:
+            profiles: Loaded optimization profiles
+        """
+        start = time.perf_counter()
+        self.profiles = profiles
+        self.platform_bits: Dict[str, int] = {}
+        self.by_capability: Dict[str, List[IndexedPattern]] = {}
+        
+        # Normalize each distinct catalog capability once, not per request;
+        # the alias table is recompiled with the catalog's names
+        raw_names = sorted({
+            capability_name
+            for tool_profile in profiles.tools.values()
+            for capability_name in tool_profile.capabilities
+        })
+        self.alias_table = load_alias_table(raw_names)
+        canonical = dict(zip(raw_names, normalize_capabilities(raw_names, self.alias_table)))
+        
+        order = 0
+        for tool_name, tool_profile in profiles.tools.items():
+            platform_mask = self._platform_mask(tool_profile.platform)
+            for capability_name, capability_profile in tool_profile.capabilities.items():
+                entries = self.by_capability.setdefault(canonical[capability_name], [])
+                for pattern_name, pattern in capability_profile.patterns.items():
+                    entries.append(IndexedPattern(
+                        order=order,
+                        tool_name=tool_name,
+                        capability_name=capability_name,
+                        pattern_name=pattern_name,
+                        pattern=pattern,
+                        required_inputs=frozenset(pattern.requires_inputs),
+                        platform_mask=platform_mask,
+                        time_estimate_ms=compile_metric(pattern.time_estimate_ms),
+                        cost_estimate=compile_metric(pattern.cost_estimate)
+                    ))
+                    order += 1
+        
+        self.size = order
+        self.build_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Capability index built: {self.size} patterns, {len(self.by_capability)} capabilities "
+            f"in {self.build_ms:.1f}ms"
+        )
+    
+    def _platform_mask(self, platform: Optional[str]) -> int:
+        if platform in MULTI_PLATFORM_NAMES:
+            return ANY_PLATFORM
+        if platform not in self.platform_bits:
+            self.platform_bits[platform] = 1 << (len(self.platform_bits) + 1)
+        return self.platform_bits[platform]
+    
+    def normalize(self, capabilities: Iterable[str]) -> List[str]:
+        """Canonical names for requested capabilities (one dict lookup each)"""
+        return normalize_capabilities(capabilities, self.alias_table)
+    
+    def lookup(
+        self,
+        capabilities: Iterable[str],
+        platform: Optional[str] = None,
+        available_inputs: Optional[Set[str]] = None
+    ) -> List[IndexedPattern]:
+        """
+        Patterns providing any of the capabilities, in profile order
+        
+        Args:
+            capabilities: Normalized capability names
+            platform: Only tools for this platform (plus multi-platform tools)
+            available_inputs: Only patterns whose required inputs are all available
+            
+        Returns:
+            Matching index entries
+        """
+        entries = []
+        for capability_name in set(capabilities):
+            entries.extend(self.by_capability.get(capability_name, ()))
+        
+        if platform is not None:
+            mask = ANY_PLATFORM | self.platform_bits.get(platform, 0)
+            entries = [e for e in entries if e.platform_mask & mask]
+        
+        if available_inputs is not None:
+            entries = [e for e in entries if e.required_inputs <= available_inputs]
+        
+        entries.sort(key=lambda e: e.order)
+        return entries
+
+
 class CandidateEnumerator:
     """
     Enumerates candidate tools for a query.
@@ -91,19 +276,30 @@ class CandidateEnumerator:
         """
         self.profile_loader = profile_loader or ProfileLoader()
         self._profiles = None
+        self._index: Optional[CapabilityIndex] = None
+    
+    def _get_index(self) -> CapabilityIndex:
+        """Capability index for the loader's current profiles (rebuilt when they change)"""
+        profiles = self.profile_loader.load()
+        if self._index is None or profiles is not self._profiles:
+            self._index = CapabilityIndex(profiles)
+            self._profiles = profiles
+        return self._index
     
     def enumerate_candidates(
         self,
         required_capabilities: List[str],
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        platform: Optional[str] = None,
+        available_inputs: Optional[Set[str]] = None
     ) -> List[ToolCandidate]:
         """
         Enumerate all candidate tools matching required capabilities.
         
         Process:
         1. Normalize capability names (NEW: permanent fix for capability mismatches)
-        2. Load tool profiles (cached)
-        3. Filter by required capabilities
+        2. Look up matching patterns in the capability index (built per profile load)
+        3. Filter by platform and available inputs (if given)
         4. Evaluate expressions with context
         5. Build ToolCandidate objects
         6. Skip invalid patterns (log errors)
@@ -112,6 +308,8 @@ class CandidateEnumerator:
             required_capabilities: List of capability names (e.g., ["asset_query"])
             context: Runtime context for expression evaluation
                      Expected keys: N, pages, p95_latency, etc.
+            platform: Only tools for this platform (multi-platform tools always match)
+            available_inputs: Only patterns whose required inputs are all available
                      
         Returns:
             List of ToolCandidate objects with evaluated metrics
@@ -127,51 +325,35 @@ class CandidateEnumerator:
             >>> candidates[0].estimated_time_ms > 0
             True
         """
-        # PERMANENT FIX: Normalize capability names to canonical versions
-        try:
-            from capability_validation_hook import normalize_stage_a_capabilities
-            required_capabilities = normalize_stage_a_capabilities(required_capabilities)
-            logger.debug(f"Normalized capabilities: {required_capabilities}")
-        except ImportError:
-            logger.warning("Capability normalization hook not available - using raw capabilities")
-        except Exception as e:
-            logger.error(f"Capability normalization failed: {e} - using raw capabilities")
+        index = self._get_index()
+        required_capabilities = index.normalize(required_capabilities)
         
         # Default context if not provided
         if context is None:
             context = self._default_context()
         
-        # Load profiles (cached after first load)
-        if self._profiles is None:
-            self._profiles = self.profile_loader.load()
+        entries = index.lookup(required_capabilities, platform, available_inputs)
         
         candidates = []
-        
-        # Iterate through all tools and their capabilities
-        for tool_name, tool_profile in self._profiles.tools.items():
-            for capability_name, capability_profile in tool_profile.capabilities.items():
-                # Check if this capability matches requirements
-                if capability_name not in required_capabilities:
-                    continue
+        for entry in entries:
+            try:
+                candidate = self._build_candidate(
+                    tool_name=entry.tool_name,
+                    capability_name=entry.capability_name,
+                    pattern_name=entry.pattern_name,
+                    pattern=entry.pattern,
+                    context=context,
+                    time_estimate_ms=entry.time_estimate_ms,
+                    cost_estimate=entry.cost_estimate
+                )
+                candidates.append(candidate)
                 
-                # Enumerate all patterns for this capability
-                for pattern_name, pattern in capability_profile.patterns.items():
-                    try:
-                        candidate = self._build_candidate(
-                            tool_name=tool_name,
-                            capability_name=capability_name,
-                            pattern_name=pattern_name,
-                            pattern=pattern,
-                            context=context
-                        )
-                        candidates.append(candidate)
-                        
-                    except Exception as e:
-                        # Log error but continue (fail gracefully)
-                        logger.warning(
-                            f"Failed to evaluate pattern {tool_name}.{capability_name}.{pattern_name}: {e}"
-                        )
-                        continue
+            except Exception as e:
+                # Log error but continue (fail gracefully)
+                logger.warning(
+                    f"Failed to evaluate pattern {entry.tool_name}.{entry.capability_name}.{entry.pattern_name}: {e}"
+                )
+                continue
         
         logger.info(
             f"Enumerated {len(candidates)} candidates for capabilities: {required_capabilities}"
@@ -185,7 +367,9 @@ class CandidateEnumerator:
         capability_name: str,
         pattern_name: str,
         pattern: PatternProfile,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        time_estimate_ms: Any = None,
+        cost_estimate: Any = None
     ) -> ToolCandidate:
         """
         Build a ToolCandidate from a pattern profile.
@@ -198,6 +382,8 @@ class CandidateEnumerator:
             pattern_name: Pattern name
             pattern: PatternProfile from YAML
             context: Runtime context for evaluation
+            time_estimate_ms: Precompiled time expression (defaults to the pattern's)
+            cost_estimate: Precompiled cost expression (defaults to the pattern's)
             
         Returns:
             ToolCandidate with evaluated metrics
@@ -207,14 +393,14 @@ class CandidateEnumerator:
         """
         # Evaluate time estimate
         time_ms = self._evaluate_metric(
-            pattern.time_estimate_ms,
+            pattern.time_estimate_ms if time_estimate_ms is None else time_estimate_ms,
             context,
             metric_name="time_estimate_ms"
         )
         
         # Evaluate cost estimate
         cost = self._evaluate_metric(
-            pattern.cost_estimate,
+            pattern.cost_estimate if cost_estimate is None else cost_estimate,
             context,
             metric_name="cost_estimate"
         )
@@ -251,7 +437,8 @@ class CandidateEnumerator:
         Evaluate a metric value (number or expression).
         
         Args:
-            value: Metric value (int, float, or expression string)
+            value: Metric value (int, float, expression string or
+                CompiledExpression)
             context: Runtime context for evaluation
             metric_name: Metric name (for error messages)
             
@@ -265,15 +452,16 @@ class CandidateEnumerator:
         if isinstance(value, (int, float)):
             return float(value)
         
-        # If string, evaluate as expression
-        if isinstance(value, str):
+        # If string or compiled, evaluate as expression (strings are
+        # compiled on first use and cached)
+        if isinstance(value, (str, CompiledExpression)):
+            expression = value.expression if isinstance(value, CompiledExpression) else value
             try:
-                evaluator = SafeMathEvaluator()
-                result = evaluator.evaluate(value, context)
-                return float(result)
+                compiled = value if isinstance(value, CompiledExpression) else _evaluator.compile(value)
+                return compiled.evaluate(context)
             except Exception as e:
                 raise ValueError(
-                    f"Failed to evaluate {metric_name} expression '{value}': {e}"
+                    f"Failed to evaluate {metric_name} expression '{expression}': {e}"
                 )
         
         raise ValueError(
@@ -18,12 +18,25 @@ Design Principles:
 2. Explainable (can show why tool was selected)
 3. Preference-driven (respects user intent)
 4. Bounded [0,1] (normalized features × normalized weights)
+
+Candidates are scored as one float32 feature matrix (columns in
+FEATURE_NAMES order): a matrix-vector product with the weights, an optional
+policy mask, and argpartition when only the top k are needed.
 """
 
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+from .feature_normalizer import FEATURE_NAMES
+
+
+# Weight for each column of the feature matrix
+WEIGHT_NAMES = ('time', 'cost', 'complexity', 'accuracy', 'completeness')
+_WEIGHT_NAME_ARRAY = np.array(WEIGHT_NAMES, dtype=object)
+
 
 class PreferenceMode(Enum):
     """User preference modes detected from query"""
@@ -78,6 +91,10 @@ class FeatureWeights:
             return cls(time=0.15, cost=0.15, complexity=0.4, accuracy=0.15, completeness=0.15)
         else:  # BALANCED (default)
             return cls(time=0.2, cost=0.2, complexity=0.2, accuracy=0.2, completeness=0.2)
+    
+    def as_array(self) -> np.ndarray:
+        """Weights as a float32 vector in feature matrix column order"""
+        return np.array([getattr(self, name) for name in WEIGHT_NAMES], dtype=np.float32)
 
 
 @dataclass
@@ -120,7 +137,10 @@ class DeterministicScorer:
     def score_candidates(self, 
                         candidates: List[Dict[str, Any]], 
                         mode: PreferenceMode = PreferenceMode.BALANCED,
-                        custom_weights: Optional[FeatureWeights] = None) -> List[ScoredCandidate]:
+                        custom_weights: Optional[FeatureWeights] = None,
+                        features: Optional[np.ndarray] = None,
+                        mask: Optional[np.ndarray] = None,
+                        top_k: Optional[int] = None) -> List[ScoredCandidate]:
         """
         Score and rank tool candidates.
         
@@ -128,6 +148,12 @@ class DeterministicScorer:
             candidates: List of tool candidates with normalized features
             mode: User preference mode (ignored if custom_weights provided)
             custom_weights: Optional custom feature weights
+            features: Optional precomputed (n, 5) normalized feature matrix
+                (e.g. from FeatureNormalizer.normalize_matrix); built from
+                the candidates' 'features' dicts if not provided
+            mask: Optional boolean array, False = excluded (e.g. from
+                PolicyEnforcer.allowed_mask)
+            top_k: Only score and return the k best candidates
             
         Returns:
             List of ScoredCandidate objects, sorted by score (descending)
@@ -148,64 +174,138 @@ class DeterministicScorer:
         # Get weights
         weights = custom_weights or FeatureWeights.from_mode(mode)
         
-        # Score each candidate
-        scored_candidates = []
-        for candidate in candidates:
-            scored = self._score_single_candidate(candidate, weights)
-            scored_candidates.append(scored)
+        if features is None:
+            features = self.build_feature_matrix(candidates)
         
-        # Sort by score (descending)
-        scored_candidates.sort(key=lambda x: x.total_score, reverse=True)
+        # Score all candidates at once, then rank
+        weight_vector = weights.as_array()
+        scores = self.score_matrix(features, weight_vector)
+        ranked = self.rank(scores, mask=mask, top_k=top_k)
         
-        return scored_candidates
+        # Breakdown and justification for the ranked candidates only
+        contributions = features[ranked] * weight_vector
+        top_factors = _WEIGHT_NAME_ARRAY[np.argsort(-contributions, axis=1, kind='stable')[:, :2]]
+        return [
+            self._build_scored_candidate(candidates[i], features, i, contribution, total, weights, factors)
+            for i, contribution, total, factors in zip(
+                ranked.tolist(),
+                contributions.astype(np.float64).tolist(),
+                scores[ranked].astype(np.float64).tolist(),
+                top_factors.tolist()
+            )
+        ]
     
-    def _score_single_candidate(self, 
-                                candidate: Dict[str, Any], 
-                                weights: FeatureWeights) -> ScoredCandidate:
+    def build_feature_matrix(self, candidates: List[Dict[str, Any]]) -> np.ndarray:
         """
-        Score a single candidate.
+        Materialize candidates' normalized features as a float32 matrix.
         
         Args:
-            candidate: Tool candidate with features
-            weights: Feature weights
+            candidates: Tool candidates with 'features' dicts (missing
+                features default to 0.5)
             
         Returns:
-            ScoredCandidate with computed score
+            (n, 5) matrix, columns in FEATURE_NAMES order
         """
-        features = candidate.get('features', {})
-        tool_name = candidate.get('tool_name', 'unknown')
-        pattern_name = candidate.get('pattern', 'default')
+        values = (
+            features.get(name, 0.5)
+            for features in (candidate.get('features', {}) for candidate in candidates)
+            for name in FEATURE_NAMES
+        )
+        return np.fromiter(values, dtype=np.float32, count=len(candidates) * len(FEATURE_NAMES)).reshape(
+            -1, len(FEATURE_NAMES)
+        )
+    
+    def score_matrix(self, features: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Weighted scores for every row of a feature matrix.
         
-        # Extract normalized features (should already be [0,1])
-        time_score = features.get('time_ms', 0.5)
-        cost_score = features.get('cost', 0.5)
-        complexity_score = features.get('complexity', 0.5)
-        accuracy_score = features.get('accuracy', 0.5)
-        completeness_score = features.get('completeness', 0.5)
+        Args:
+            features: (n, 5) normalized feature matrix
+            weights: Weight vector (FeatureWeights.as_array()), or an
+                (n, 5) matrix of per-candidate weights
+            
+        Returns:
+            float32 array of n scores
+        """
+        if weights.ndim == 1:
+            return features @ weights
+        return np.einsum('ij,ij->i', features, weights)
+    
+    def rank(self,
+             scores: np.ndarray,
+             mask: Optional[np.ndarray] = None,
+             top_k: Optional[int] = None) -> np.ndarray:
+        """
+        Candidate indices by descending score.
+        
+        Ties keep candidate order, like a stable sort; with top_k, the k
+        best are selected with argpartition before sorting.
+        
+        Args:
+            scores: Score per candidate
+            mask: Optional boolean array, False = excluded
+            top_k: Only return the k best
+            
+        Returns:
+            Array of candidate indices
+        """
+        indices = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+        candidate_scores = scores[indices]
         
-        # Compute weighted contributions
-        weighted_contributions = {
-            'time': weights.time * time_score,
-            'cost': weights.cost * cost_score,
-            'complexity': weights.complexity * complexity_score,
-            'accuracy': weights.accuracy * accuracy_score,
-            'completeness': weights.completeness * completeness_score
-        }
+        if top_k is not None and top_k < len(indices):
+            if top_k <= 0:
+                return indices[:0]
+            best = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+            threshold = candidate_scores[best].min()
+            # Ties at the cut-off go to the earliest candidates
+            above = np.flatnonzero(candidate_scores > threshold)
+            ties = np.flatnonzero(candidate_scores == threshold)[:top_k - len(above)]
+            selected = np.concatenate([above, ties])
+            indices, candidate_scores = indices[selected], candidate_scores[selected]
         
-        # Total score (sum of weighted contributions)
-        total_score = sum(weighted_contributions.values())
+        return indices[np.lexsort((indices, -candidate_scores))]
+    
+    def _build_scored_candidate(self,
+                                candidate: Dict[str, Any],
+                                features: np.ndarray,
+                                index: int,
+                                contribution_row: List[float],
+                                total_score: float,
+                                weights: FeatureWeights,
+                                top_factors: List[str]) -> ScoredCandidate:
+        """
+        Build a ScoredCandidate from its row of the feature matrix.
+        
+        Args:
+            candidate: Tool candidate
+            features: Normalized feature matrix
+            index: Candidate's row in the matrix
+            contribution_row: weight × feature per column
+            total_score: Sum of contributions
+            weights: Feature weights
+            top_factors: Top 2 contributing factors (names)
+            
+        Returns:
+            ScoredCandidate with score breakdown and justification
+        """
+        tool_name = candidate.get('tool_name', 'unknown')
+        pattern_name = candidate.get('pattern', 'default')
+        feature_scores = candidate.get('features')
+        if feature_scores is None:
+            feature_scores = dict(zip(FEATURE_NAMES, features[index].tolist()))
+        weighted_contributions = dict(zip(WEIGHT_NAMES, contribution_row))
         
         # Generate justification
         justification = self._generate_justification(
-            tool_name, pattern_name, total_score, 
-            features, weighted_contributions, weights
+            tool_name, pattern_name, total_score,
+            feature_scores, weighted_contributions, weights, top_factors
         )
         
         return ScoredCandidate(
             tool_name=tool_name,
             pattern_name=pattern_name,
             total_score=total_score,
-            feature_scores=features,
+            feature_scores=feature_scores,
             weighted_contributions=weighted_contributions,
             justification=justification,
             raw_features=candidate.get('raw_features', {})
@@ -217,7 +317,8 @@ class DeterministicScorer:
                                total_score: float,
                                features: Dict[str, float],
                                contributions: Dict[str, float],
-                               weights: FeatureWeights) -> str:
+                               weights: FeatureWeights,
+                               top_factors: Optional[List[str]] = None) -> str:
         """
         Generate human-readable justification for score.
         
@@ -228,17 +329,19 @@ class DeterministicScorer:
             features: Normalized feature scores
             contributions: Weighted contributions
             weights: Feature weights
+            top_factors: Precomputed top 2 contributing factors (names)
             
         Returns:
             Justification string
         """
         # Find top contributing factors (top 2)
-        sorted_contributions = sorted(
-            contributions.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )
-        top_factors = sorted_contributions[:2]
+        if top_factors is None:
+            sorted_contributions = sorted(
+                contributions.items(), 
+                key=lambda x: x[1], 
+                reverse=True
+            )
+            top_factors = [factor for factor, _ in sorted_contributions[:2]]
         
         # Build justification
         justification_parts = [
@@ -247,7 +350,8 @@ class DeterministicScorer:
         ]
         
         # Add top factors
-        for factor, contribution in top_factors:
+        for factor in top_factors:
+            contribution = contributions[factor]
             feature_score = features.get(factor, 0.0)
             weight = getattr(weights, factor)
             justification_parts.append(
@@ -11,12 +11,21 @@ Mathematical Approach:
 - Log scale for time (captures human perception of speed)
 - Linear scale for cost (direct proportional value)
 - Bounded transforms prevent outliers from dominating
+
+Batches of candidates are normalized as one float32 matrix (see
+normalize_matrix), with the transform bounds precomputed per normalizer.
 """
 
 import math
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
+
+# Column order of feature matrices
+FEATURE_NAMES = ('time_ms', 'cost', 'complexity', 'accuracy', 'completeness')
+
 
 @dataclass
 class NormalizationConfig:
@@ -64,6 +73,17 @@ class FeatureNormalizer:
             config: Optional normalization configuration (uses defaults if not provided)
         """
         self.config = config or NormalizationConfig()
+        
+        # Precomputed bounds for normalize_matrix (per column of FEATURE_NAMES)
+        self._lower = np.array([
+            self.config.time_min_ms, self.config.cost_min, self.config.complexity_min, 0.0, 0.0
+        ])
+        self._upper = np.array([
+            self.config.time_max_ms, self.config.cost_max, self.config.complexity_max, 1.0, 1.0
+        ])
+        self._log_time_min = math.log(self.config.time_min_ms)
+        self._log_time_range = math.log(self.config.time_max_ms) - self._log_time_min
+        self._cost_range = self.config.cost_max - self.config.cost_min
     
     def normalize_features(self, features: Dict[str, Any]) -> Dict[str, float]:
         """
@@ -106,6 +126,31 @@ class FeatureNormalizer:
         
         return normalized
     
+    def normalize_matrix(self, raw: np.ndarray) -> np.ndarray:
+        """
+        Normalize a batch of candidates at once.
+        
+        Same transforms as normalize_features, applied column-wise.
+        
+        Args:
+            raw: (n, 5) raw feature values, columns in FEATURE_NAMES order
+            
+        Returns:
+            (n, 5) float32 matrix of normalized features [0,1], higher = better
+        """
+        raw = np.asarray(raw, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+        
+        # Clamp to bounds (NaN clamps to the upper bound, as _clamp does)
+        clamped = np.clip(np.where(np.isnan(raw), self._upper, raw), self._lower, self._upper)
+        
+        normalized = np.empty_like(clamped)
+        normalized[:, 0] = 1.0 - (np.log(clamped[:, 0]) - self._log_time_min) / self._log_time_range
+        normalized[:, 1] = 1.0 - (clamped[:, 1] - self.config.cost_min) / self._cost_range
+        normalized[:, 2] = 1.0 - clamped[:, 2]
+        normalized[:, 3:] = clamped[:, 3:]
+        
+        return np.clip(normalized, 0.0, 1.0).astype(np.float32)
+    
     def _normalize_time(self, time_ms: float) -> float:
         """
         Normalize time using bounded log transform.
@@ -25,9 +25,14 @@ from .policy_enforcer import PolicyEnforcer, PolicyConfig
 from .deterministic_scorer import DeterministicScorer, ScoredCandidate, PreferenceMode
 from .ambiguity_detector import AmbiguityDetector
 from .llm_tie_breaker import LLMTieBreaker
+from .tie_break_cache import get_tie_break_cache
 
 logger = logging.getLogger(__name__)
 
+# Scored candidates kept per selection: winner + 3 alternatives (the
+# tie-breaker only looks at the top 2)
+SCORED_CANDIDATES_KEPT = 4
+
 
 @dataclass
 class ToolSelectionResult:
@@ -92,7 +97,9 @@ class HybridOrchestrator:
         self.policy_enforcer = PolicyEnforcer()
         self.deterministic_scorer = DeterministicScorer()
         self.ambiguity_detector = AmbiguityDetector()
-        self.llm_tie_breaker = LLMTieBreaker(llm_client) if llm_client else None
+        self.llm_tie_breaker = (
+            LLMTieBreaker(llm_client, cache=get_tie_break_cache()) if llm_client else None
+        )
         self.telemetry_logger = telemetry_logger
         
         logger.info("HybridOrchestrator initialized")
@@ -160,22 +167,20 @@ class HybridOrchestrator:
                 },
                 'context': context
             }
-            candidate_dicts_for_policy.append((candidate, candidate_dict))
-        
-        # Filter candidates by policies
-        allowed_candidates = []
-        violations = []
-        
-        for candidate, candidate_dict in candidate_dicts_for_policy:
-            result = policy_enforcer.enforce_policies(candidate_dict)
-            
-            if result.allowed:
-                allowed_candidates.append(candidate)
-            else:
-                violations.append({
-                    'candidate': candidate,
-                    'reason': result.filtered_reason
-                })
+            candidate_dicts_for_policy.append(candidate_dict)
+        
+        # Filter candidates by policies (hard constraints as one mask;
+        # violation details only for the candidates filtered out)
+        allowed = policy_enforcer.allowed_mask(candidate_dicts_for_policy)
+        allowed_candidates = [c for c, ok in zip(candidates, allowed) if ok]
+        violations = [
+            {
+                'candidate': candidate,
+                'reason': policy_enforcer.enforce_policies(candidate_dict).filtered_reason
+            }
+            for candidate, candidate_dict, ok in zip(candidates, candidate_dicts_for_policy, allowed)
+            if not ok
+        ]
         
         logger.debug(
             f"Policy enforcement: {len(allowed_candidates)} allowed, "
@@ -188,29 +193,27 @@ class HybridOrchestrator:
                 f"Violations: {[v['reason'] for v in violations]}"
             )
         
-        # Step 4: Score candidates (convert to dicts with normalized features)
-        candidate_dicts = []
-        for candidate in allowed_candidates:
-            # Normalize features
-            normalized_features = self.feature_normalizer.normalize_features({
-                'time_ms': candidate.estimated_time_ms,
-                'cost': candidate.estimated_cost,
-                'complexity': candidate.complexity,
-                'accuracy': candidate.accuracy,
-                'completeness': candidate.completeness
-            })
-            
-            # Convert to dict format expected by scorer
-            candidate_dict = {
+        # Step 4: Score candidates (one normalized feature matrix for all)
+        features = self.feature_normalizer.normalize_matrix([
+            [c.estimated_time_ms, c.estimated_cost, c.complexity, c.accuracy, c.completeness]
+            for c in candidates
+        ])
+        candidate_dicts = [
+            {
                 'tool_name': candidate.tool_name,
                 'pattern': candidate.pattern_name,
-                'features': normalized_features,
                 'raw_features': {'candidate': candidate}  # Keep reference to original
             }
-            candidate_dicts.append(candidate_dict)
+            for candidate in candidates
+        ]
         
+        # Only the top candidates are used, unless telemetry records the
+        # full ranking
         scored_candidates = self.deterministic_scorer.score_candidates(
-            candidate_dicts, preference_mode
+            candidate_dicts, preference_mode,
+            features=features,
+            mask=allowed,
+            top_k=None if self.telemetry_logger else SCORED_CANDIDATES_KEPT
         )
         logger.debug(
             f"Scored candidates: top score={scored_candidates[0].total_score:.3f}"
@@ -228,7 +231,9 @@ class HybridOrchestrator:
             logger.info("Ambiguous case detected, using LLM tie-breaker")
             # Convert ScoredCandidate objects to dicts for LLM tie-breaker
             tie_result = await self.llm_tie_breaker.break_tie(
-                query, asdict(scored_candidates[0]), asdict(scored_candidates[1])
+                query, asdict(scored_candidates[0]), asdict(scored_candidates[1]),
+                preference_mode=preference_mode,
+                intent=(context or {}).get('intent_category')
             )
             # tie_result.chosen_candidate is a dict, need to find matching ScoredCandidate
             winner_tool_name = tie_result.chosen_candidate['tool_name']
@@ -15,13 +15,19 @@ Design Principles:
 3. FAIL HARD if LLM is unavailable or fails - NO FALLBACKS
 4. Log all LLM decisions for telemetry
 5. Include justification for explainability
+6. Recurring pairs are answered from the TieBreakCache (optional)
 """
 
+import asyncio
 import json
 import logging
+import math
 from typing import Dict, Optional, Tuple, Any
 from dataclasses import dataclass
 
+from .deterministic_scorer import PreferenceMode
+from .tie_break_cache import DEFAULT_CONFIDENCE, ReplaySample, TieBreakCache, TieBreakKey, candidate_id
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +38,8 @@ class TieBreakerResult:
     justification: str
     llm_choice: str  # "A" or "B"
     llm_response_raw: Optional[str] = None  # Raw LLM response for debugging
+    confidence: float = DEFAULT_CONFIDENCE  # LLM's stated confidence in the choice
+    cached: bool = False  # True if answered from the TieBreakCache
 
 
 class LLMTieBreaker:
@@ -66,32 +74,42 @@ OPTION B: {tool2_name}.{pattern2_name}
 - Limitations: {limitations2}
 
 Respond in JSON format:
-{{"choice": "A" or "B", "justification": "Brief explanation (1-2 sentences)"}}"""
+{{"choice": "A" or "B", "justification": "Brief explanation (1-2 sentences)", "confidence": 0.0 to 1.0}}"""
     
-    def __init__(self, llm_client: Optional[Any] = None):
+    def __init__(self, llm_client: Optional[Any] = None, cache: Optional[TieBreakCache] = None):
         """
         Initialize LLM tie-breaker.
         
         Args:
             llm_client: LLM client for tie-breaking. If None, break_tie() will raise RuntimeError.
+            cache: Decision cache for recurring pairs (optional, no caching if None)
         """
         self.llm_client = llm_client
+        self.cache = cache
+        self._replay_task: Optional[asyncio.Task] = None
     
     async def break_tie(
         self,
         query: str,
         candidate1: Dict,
         candidate2: Dict,
-        timeout_ms: int = 3000
+        timeout_ms: int = 3000,
+        preference_mode: Optional[PreferenceMode] = None,
+        intent: Optional[str] = None
     ) -> TieBreakerResult:
         """
         Use LLM to choose between two equally-scored candidates.
         
+        With a cache, a pair already decided for the same preference mode
+        and intent bucket is answered without calling the LLM.
+        
         Args:
             query: Original user query
             candidate1: First candidate dict (from DeterministicScorer)
             candidate2: Second candidate dict
             timeout_ms: LLM timeout in milliseconds
+            preference_mode: Detected preference mode (part of the cache key)
+            intent: Coarse intent category (part of the cache key)
         
         Returns:
             TieBreakerResult with chosen candidate and justification
@@ -103,6 +121,15 @@ Respond in JSON format:
         if self.llm_client is None:
             raise RuntimeError("LLM client is required for tie-breaking but was not provided")
         
+        key = None
+        if self.cache is not None:
+            key = TieBreakKey.build(candidate1, candidate2, preference_mode, intent)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if self.cache.sample_for_replay(key, query, candidate1, candidate2, cached):
+                    self._schedule_replay()
+                return self._cached_result(cached, candidate1, candidate2)
+        
         # Build prompt (now async to support asset context injection)
         prompt = await self._build_prompt(query, candidate1, candidate2)
         
@@ -110,11 +137,14 @@ Respond in JSON format:
         response = await self._call_llm(prompt, timeout_ms)
         
         # Parse response
-        choice, justification = self._parse_response(response)
+        choice, justification, confidence = self._parse_decision(response)
         
         # Select winner
         chosen = candidate1 if choice == "A" else candidate2
         
+        if key is not None:
+            self.cache.put(key, candidate_id(chosen), justification, confidence)
+        
         logger.info(
             f"LLM tie-breaker chose {choice}: {chosen['tool_name']}.{chosen['pattern_name']} "
             f"- {justification}"
@@ -124,9 +154,73 @@ Respond in JSON format:
             chosen_candidate=chosen,
             justification=justification,
             llm_choice=choice,
-            llm_response_raw=response
+            llm_response_raw=response,
+            confidence=confidence
+        )
+    
+    def _cached_result(self, cached, candidate1: Dict, candidate2: Dict) -> TieBreakerResult:
+        """Map a cached decision back onto this call's A/B order"""
+        choice = "A" if candidate_id(candidate1) == cached.winner else "B"
+        chosen = candidate1 if choice == "A" else candidate2
+        
+        logger.info(
+            f"LLM tie-breaker cache hit: {cached.winner} - {cached.justification}"
+        )
+        
+        return TieBreakerResult(
+            chosen_candidate=chosen,
+            justification=cached.justification,
+            llm_choice=choice,
+            confidence=cached.confidence,
+            cached=True
         )
     
+    # ========================================================================
+    # OFFLINE REPLAY
+    # ========================================================================
+    
+    def _schedule_replay(self) -> None:
+        """Start draining sampled cache hits in the background, once"""
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.get_running_loop().create_task(self.replay_samples())
+    
+    async def replay_samples(self, limit: Optional[int] = None, timeout_ms: int = 10000) -> int:
+        """
+        Re-ask the LLM for sampled cache hits and record agreement/drift.
+        
+        Runs off the request path; failures are logged and skipped since no
+        selection depends on the outcome.
+        
+        Args:
+            limit: Maximum number of samples to replay (all pending if None)
+            timeout_ms: LLM timeout per replay in milliseconds
+        
+        Returns:
+            Number of samples replayed
+        """
+        if self.cache is None or self.llm_client is None:
+            return 0
+        
+        replayed = 0
+        while limit is None or replayed < limit:
+            samples = self.cache.pop_replay_samples(1)
+            if not samples:
+                break
+            try:
+                await self._replay(samples[0], timeout_ms)
+                replayed += 1
+            except Exception as e:
+                logger.warning(f"Tie-break replay failed: {e}")
+        return replayed
+    
+    async def _replay(self, sample: ReplaySample, timeout_ms: int) -> bool:
+        """Ask the LLM again for one sample; returns True if it agreed"""
+        prompt = await self._build_prompt(sample.query, sample.candidate1, sample.candidate2)
+        response = await self._call_llm(prompt, timeout_ms)
+        choice, _, _ = self._parse_decision(response)
+        chosen = sample.candidate1 if choice == "A" else sample.candidate2
+        return self.cache.record_replay(sample, candidate_id(chosen))
+    
     async def _build_prompt(
         self,
         query: str,
@@ -229,6 +323,26 @@ Respond in JSON format:
         Returns:
             (choice, justification) tuple
         
+        Raises:
+            ValueError: If response cannot be parsed
+        """
+        choice, justification, _ = self._parse_decision(response)
+        return choice, justification
+    
+    def _parse_decision(self, response: str) -> Tuple[str, str, float]:
+        """
+        Parse LLM JSON response including the optional confidence.
+        
+        Expected format:
+        {"choice": "A" or "B", "justification": "...", "confidence": 0.0-1.0}
+        
+        Args:
+            response: Raw LLM response
+        
+        Returns:
+            (choice, justification, confidence) tuple; confidence defaults
+            to DEFAULT_CONFIDENCE when missing or not a number
+        
         Raises:
             ValueError: If response cannot be parsed
         """
@@ -255,7 +369,16 @@ Respond in JSON format:
             if not justification:
                 raise ValueError("Missing justification")
             
-            return choice, justification
+            try:
+                confidence = float(data.get('confidence', DEFAULT_CONFIDENCE))
+            except (TypeError, ValueError):
+                confidence = DEFAULT_CONFIDENCE
+            # Checked before clamping: max(0.0, nan) is 0.0
+            if math.isnan(confidence):
+                confidence = DEFAULT_CONFIDENCE
+            confidence = min(1.0, max(0.0, confidence))
+            
+            return choice, justification, confidence
         
         except (json.JSONDecodeError, ValueError) as e:
             logger.error(f"Failed to parse LLM response: {e}\nResponse: {response}")
@@ -115,6 +115,7 @@ class ToolProfile(BaseModel):
     """Complete optimization profile for a tool"""
     
     description: str = Field(..., description="Tool description")
+    platform: Optional[str] = Field(None, description="Tool platform (linux, windows, multi-platform, ...)")
     defaults: ToolDefaults = Field(default_factory=ToolDefaults, description="Default values")
     capabilities: Dict[str, CapabilityProfile] = Field(
         ...,
@@ -28,6 +28,8 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import numpy as np
+
 from pipeline.stages.stage_b.safe_math_eval import safe_eval
 
 logger = logging.getLogger(__name__)
@@ -232,6 +234,37 @@ class PolicyEnforcer:
         
         return filtered
     
+    def allowed_mask(self, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Hard-constraint check for a batch of candidates.
+        
+        Same decisions as enforce_policies(...).allowed, with the cost limit
+        and production-safe checks applied to whole columns; violation
+        details are left to enforce_policies for the candidates that fail.
+        
+        Args:
+            candidates: List of tool candidates
+            
+        Returns:
+            Boolean array, True = passes all hard constraints
+        """
+        profiles = [candidate.get('profile', {}) for candidate in candidates]
+        allowed = np.ones(len(profiles), dtype=bool)
+        
+        if self.config.max_cost is not None:
+            costs = np.array([profile.get('cost', 0.0) for profile in profiles], dtype=np.float64)
+            allowed &= ~(costs > self.config.max_cost)
+        
+        if self.config.require_production_safe and self.config.environment == "production":
+            allowed &= np.array([bool(profile.get('production_safe', False)) for profile in profiles], dtype=bool)
+        
+        # Permission and environment restrictions are rare; check those rows only
+        for i, profile in enumerate(profiles):
+            if allowed[i] and (profile.get('required_permissions') or profile.get('allowed_environments') is not None):
+                allowed[i] = self._check_permissions(profile) is None and self._check_environment(profile) is None
+        
+        return allowed
+    
     def _check_cost_limit(self, profile: Dict[str, Any]) -> Optional[PolicyViolation]:
         """Check if cost exceeds limit (hard constraint)"""
         if self.config.max_cost is None:
@@ -14,13 +14,61 @@ Design Principles:
 2. Explicit mode override support (from UI or API)
 3. Balanced default (when no signals detected)
 4. Case-insensitive matching
+5. One scan per query: all keywords compiled into a single prefix-trie
+   regex, results cached per normalized query
 """
 
-from typing import Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import re
 from .deterministic_scorer import PreferenceMode
 
 
+@dataclass(frozen=True)
+class PreferenceHit:
+    """A preference keyword found in a (normalized) query"""
+    mode: PreferenceMode
+    keyword: str
+    start: int
+    end: int
+
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """
+    Build a regex alternation factored into a prefix trie.
+    
+    "quick", "quickly" and "quiet" become qui(?:ck(?:ly)?|et), so the regex
+    engine tries each character once per position instead of every keyword
+    in turn, and scan cost stays flat as the vocabulary grows. Longer
+    keywords are tried first (greedy).
+    
+    Args:
+        keywords: Lowercase keywords/phrases
+        
+    Returns:
+        Regex source (no anchors or groups)
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # end of keyword
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        ends_here = '' in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if ends_here else group
+    
+    return build(trie)
+
+
 class PreferenceDetector:
     """
     Detects user preferences from query text.
@@ -62,18 +110,34 @@ class PreferenceDetector:
         "easily", "minimal", "minimally", "lightweight"
     ]
     
-    def __init__(self):
-        """Initialize preference detector."""
-        # Compile regex patterns for efficiency
-        self._fast_pattern = self._compile_pattern(self.FAST_KEYWORDS)
-        self._accurate_pattern = self._compile_pattern(self.ACCURATE_KEYWORDS)
-        self._thorough_pattern = self._compile_pattern(self.THOROUGH_KEYWORDS)
-        self._cheap_pattern = self._compile_pattern(self.CHEAP_KEYWORDS)
-        self._simple_pattern = self._compile_pattern(self.SIMPLE_KEYWORDS)
+    def __init__(self, cache_size: int = 4096):
+        """
+        Initialize preference detector.
+        
+        Args:
+            cache_size: Number of normalized queries whose hits are cached
+        """
+        # Mode order doubles as tie-break priority when counts are equal
+        self._mode_keywords: Dict[PreferenceMode, List[str]] = {
+            PreferenceMode.FAST: self.FAST_KEYWORDS,
+            PreferenceMode.ACCURATE: self.ACCURATE_KEYWORDS,
+            PreferenceMode.THOROUGH: self.THOROUGH_KEYWORDS,
+            PreferenceMode.CHEAP: self.CHEAP_KEYWORDS,
+            PreferenceMode.SIMPLE: self.SIMPLE_KEYWORDS,
+        }
+        
+        # A keyword listed under several modes counts for the first one
+        self._keyword_modes: Dict[str, PreferenceMode] = {}
+        for mode, keywords in self._mode_keywords.items():
+            for keyword in keywords:
+                self._keyword_modes.setdefault(keyword.lower(), mode)
+        
+        self._pattern = self._compile_pattern(list(self._keyword_modes))
+        self._scan_cached = lru_cache(maxsize=cache_size)(self._scan)
     
-    def _compile_pattern(self, keywords: list[str]) -> re.Pattern:
+    def _compile_pattern(self, keywords: List[str]) -> re.Pattern:
         """
-        Compile keyword list into regex pattern.
+        Compile all keywords into one regex pattern.
         
         Uses word boundaries to avoid partial matches (e.g., "fast" shouldn't match "breakfast").
         
@@ -83,10 +147,43 @@ class PreferenceDetector:
         Returns:
             Compiled regex pattern
         """
-        # Escape special regex characters and join with OR
-        escaped = [re.escape(kw) for kw in keywords]
-        pattern = r'\b(' + '|'.join(escaped) + r')\b'
-        return re.compile(pattern, re.IGNORECASE)
+        return re.compile(r'\b(' + _trie_pattern(keywords) + r')\b', re.IGNORECASE)
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Lowercase and collapse whitespace (the cache key)"""
+        return ' '.join(query.lower().split())
+    
+    def _scan(self, normalized_query: str) -> Tuple[PreferenceHit, ...]:
+        """Single pass over a normalized query yielding every keyword hit"""
+        return tuple(
+            PreferenceHit(self._keyword_modes[m.group(1)], m.group(1), m.start(), m.end())
+            for m in self._pattern.finditer(normalized_query)
+        )
+    
+    def find_preference_hits(self, query: str) -> Tuple[PreferenceHit, ...]:
+        """
+        Find all preference keywords in a query.
+        
+        Args:
+            query: User query text
+            
+        Returns:
+            Hits in query order; positions refer to the normalized query
+            (lowercased, whitespace collapsed)
+        """
+        return self._scan_cached(self._normalize(query))
+    
+    def _match_counts(self, query: str) -> Dict[PreferenceMode, int]:
+        """Count keyword hits per mode, in priority order"""
+        matches = dict.fromkeys(self._mode_keywords, 0)
+        for hit in self.find_preference_hits(query):
+            matches[hit.mode] += 1
+        return matches
+    
+    def cache_info(self):
+        """Hit/miss statistics of the normalized query cache"""
+        return self._scan_cached.cache_info()
     
     def detect_preference(
         self,
@@ -127,16 +224,8 @@ class PreferenceDetector:
             return self._parse_explicit_mode(explicit_mode)
         
         # Priority 2: Keyword detection
-        query_lower = query.lower()
-        
         # Count matches for each mode
-        matches = {
-            PreferenceMode.FAST: len(self._fast_pattern.findall(query_lower)),
-            PreferenceMode.ACCURATE: len(self._accurate_pattern.findall(query_lower)),
-            PreferenceMode.THOROUGH: len(self._thorough_pattern.findall(query_lower)),
-            PreferenceMode.CHEAP: len(self._cheap_pattern.findall(query_lower)),
-            PreferenceMode.SIMPLE: len(self._simple_pattern.findall(query_lower)),
-        }
+        matches = self._match_counts(query)
         
         # Find mode with most matches
         max_matches = max(matches.values())
@@ -216,15 +305,7 @@ class PreferenceDetector:
             return mode, 1.0
         
         # Keyword detection
-        query_lower = query.lower()
-        
-        matches = {
-            PreferenceMode.FAST: len(self._fast_pattern.findall(query_lower)),
-            PreferenceMode.ACCURATE: len(self._accurate_pattern.findall(query_lower)),
-            PreferenceMode.THOROUGH: len(self._thorough_pattern.findall(query_lower)),
-            PreferenceMode.CHEAP: len(self._cheap_pattern.findall(query_lower)),
-            PreferenceMode.SIMPLE: len(self._simple_pattern.findall(query_lower)),
-        }
+        matches = self._match_counts(query)
         
         max_matches = max(matches.values())
         
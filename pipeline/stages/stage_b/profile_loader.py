@@ -8,6 +8,8 @@ Database Mode (default):
 - Loads tools from PostgreSQL via ToolCatalogService
 - Transforms database format to OptimizationProfilesConfig
 - Caches for 5 minutes (matching ToolCatalogService TTL)
+- Reloads incrementally: only tools touched since the last load
+  (updated_at / tombstones) are fetched and patched in
 
 YAML Mode (fallback):
 - Loads from YAML file
@@ -16,9 +18,11 @@ YAML Mode (fallback):
 
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
+from datetime import datetime, timedelta
 import logging
 import os
+import threading
 import time
 
 from .optimization_schemas import (
@@ -34,6 +38,11 @@ from .optimization_schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Delta reloads look back this far past the previous watermark: updated_at
+# is the writing transaction's start time, so a transaction that commits
+# after a reload can carry an older timestamp
+DELTA_OVERLAP = timedelta(seconds=30)
+
 
 class ProfileLoader:
     """
@@ -46,6 +55,7 @@ class ProfileLoader:
     - Inheritance (tool defaults → capability → pattern)
     - Expression validation
     - Caching for performance
+    - Incremental reload with atomic swap of the profile map
     """
     
     def __init__(
@@ -69,6 +79,13 @@ class ProfileLoader:
         self._profiles: Optional[OptimizationProfilesConfig] = None
         self._catalog_service = None
         
+        # Incremental reload state: database clock at the last (full or
+        # delta) load, and tools explicitly invalidated since
+        self._last_seen: Optional[datetime] = None
+        self._pending_tools: Set[str] = set()
+        self._delta_pending = False
+        self._reload_lock = threading.RLock()
+        
         # Initialize metrics collector
         try:
             from pipeline.services.metrics_collector import get_metrics_collector
@@ -84,6 +101,94 @@ class ProfileLoader:
             self._catalog_service = ToolCatalogService(database_url=self.database_url)
         return self._catalog_service
     
+    def _transform_tool(self, tool_data: Dict[str, Any]) -> Optional[ToolProfile]:
+        """
+        Transform one database tool (with nested capabilities/patterns) to a ToolProfile
+        
+        Args:
+            tool_data: Tool from get_all_tools_with_structure
+            
+        Returns:
+            ToolProfile, or None if the tool has no capability with patterns
+        """
+        # Extract defaults from tool
+        defaults_data = tool_data.get('defaults', {})
+        tool_defaults = ToolDefaults(
+            accuracy_level=defaults_data.get('accuracy_level'),
+            freshness=defaults_data.get('freshness'),
+            data_source=defaults_data.get('data_source'),
+            scope=defaults_data.get('scope'),
+            completeness=defaults_data.get('completeness')
+        )
+        
+        # Transform capabilities
+        capabilities_dict = {}
+        for cap_name, cap_data in tool_data.get('capabilities', {}).items():
+            patterns_dict = {}
+            
+            for pattern_data in cap_data.get('patterns', []):
+                pattern_name = pattern_data['pattern_name']
+                
+                # Transform policy
+                policy_data = pattern_data.get('policy', {})
+                policy = PolicyConfig(
+                    max_cost=policy_data.get('max_cost'),
+                    max_N_immediate=policy_data.get('max_N_immediate'),
+                    requires_approval=policy_data.get('requires_approval', False),
+                    requires_background_if=policy_data.get('requires_background_if'),
+                    production_safe=policy_data.get('production_safe', True)
+                )
+                
+                # Transform preference_match
+                pref_data = pattern_data.get('preference_match', {})
+                preference_match = PreferenceMatchScores(
+                    speed=pref_data.get('speed', 0.5),
+                    accuracy=pref_data.get('accuracy', 0.5),
+                    cost=pref_data.get('cost', 0.5),
+                    complexity=pref_data.get('complexity', 0.5),
+                    completeness=pref_data.get('completeness', 0.5)
+                )
+                
+                # Transform required_inputs to requires_inputs (field name difference)
+                required_inputs = pattern_data.get('required_inputs', [])
+                requires_inputs = [inp.get('name', str(inp)) if isinstance(inp, dict) else str(inp) 
+                                  for inp in required_inputs]
+                
+                # Create pattern
+                pattern = PatternProfile(
+                    description=pattern_data.get('description', ''),
+                    typical_use_cases=pattern_data.get('typical_use_cases', []),
+                    time_estimate_ms=pattern_data.get('time_estimate_ms', '100'),
+                    cost_estimate=pattern_data.get('cost_estimate', 1),
+                    complexity_score=pattern_data.get('complexity_score', 0.5),
+                    accuracy_level=pattern_data.get('accuracy_level'),
+                    freshness=pattern_data.get('freshness'),
+                    scope=pattern_data.get('scope'),
+                    completeness=pattern_data.get('completeness'),
+                    data_source=pattern_data.get('data_source'),
+                    limitations=pattern_data.get('limitations', []),
+                    requires_inputs=requires_inputs,
+                    policy=policy,
+                    preference_match=preference_match
+                )
+                
+                patterns_dict[pattern_name] = pattern
+            
+            # Create capability
+            if patterns_dict:  # Only add capability if it has patterns
+                capabilities_dict[cap_name] = CapabilityProfile(patterns=patterns_dict)
+        
+        # Create tool profile
+        if not capabilities_dict:  # Only add tool if it has capabilities
+            return None
+        
+        return ToolProfile(
+            description=tool_data.get('description', ''),
+            platform=tool_data.get('platform'),
+            defaults=tool_defaults,
+            capabilities=capabilities_dict
+        )
+    
     def _transform_database_to_profiles(self, tools_data: List[Dict[str, Any]]) -> OptimizationProfilesConfig:
         """
         Transform database format to OptimizationProfilesConfig
@@ -97,83 +202,9 @@ class ProfileLoader:
         tools_dict = {}
         
         for tool_data in tools_data:
-            tool_name = tool_data['tool_name']
-            
-            # Extract defaults from tool
-            defaults_data = tool_data.get('defaults', {})
-            tool_defaults = ToolDefaults(
-                accuracy_level=defaults_data.get('accuracy_level'),
-                freshness=defaults_data.get('freshness'),
-                data_source=defaults_data.get('data_source'),
-                scope=defaults_data.get('scope'),
-                completeness=defaults_data.get('completeness')
-            )
-            
-            # Transform capabilities
-            capabilities_dict = {}
-            for cap_name, cap_data in tool_data.get('capabilities', {}).items():
-                patterns_dict = {}
-                
-                for pattern_data in cap_data.get('patterns', []):
-                    pattern_name = pattern_data['pattern_name']
-                    
-                    # Transform policy
-                    policy_data = pattern_data.get('policy', {})
-                    policy = PolicyConfig(
-                        max_cost=policy_data.get('max_cost'),
-                        max_N_immediate=policy_data.get('max_N_immediate'),
-                        requires_approval=policy_data.get('requires_approval', False),
-                        requires_background_if=policy_data.get('requires_background_if'),
-                        production_safe=policy_data.get('production_safe', True)
-                    )
-                    
-                    # Transform preference_match
-                    pref_data = pattern_data.get('preference_match', {})
-                    preference_match = PreferenceMatchScores(
-                        speed=pref_data.get('speed', 0.5),
-                        accuracy=pref_data.get('accuracy', 0.5),
-                        cost=pref_data.get('cost', 0.5),
-                        complexity=pref_data.get('complexity', 0.5),
-                        completeness=pref_data.get('completeness', 0.5)
-                    )
-                    
-                    # Transform required_inputs to requires_inputs (field name difference)
-                    required_inputs = pattern_data.get('required_inputs', [])
-                    requires_inputs = [inp.get('name', str(inp)) if isinstance(inp, dict) else str(inp) 
-                                      for inp in required_inputs]
-                    
-                    # Create pattern
-                    pattern = PatternProfile(
-                        description=pattern_data.get('description', ''),
-                        typical_use_cases=pattern_data.get('typical_use_cases', []),
-                        time_estimate_ms=pattern_data.get('time_estimate_ms', '100'),
-                        cost_estimate=pattern_data.get('cost_estimate', 1),
-                        complexity_score=pattern_data.get('complexity_score', 0.5),
-                        accuracy_level=pattern_data.get('accuracy_level'),
-                        freshness=pattern_data.get('freshness'),
-                        scope=pattern_data.get('scope'),
-                        completeness=pattern_data.get('completeness'),
-                        data_source=pattern_data.get('data_source'),
-                        limitations=pattern_data.get('limitations', []),
-                        requires_inputs=requires_inputs,
-                        policy=policy,
-                        preference_match=preference_match
-                    )
-                    
-                    patterns_dict[pattern_name] = pattern
-                
-                # Create capability
-                if patterns_dict:  # Only add capability if it has patterns
-                    capabilities_dict[cap_name] = CapabilityProfile(patterns=patterns_dict)
-            
-            # Create tool profile
-            if capabilities_dict:  # Only add tool if it has capabilities
-                tool_profile = ToolProfile(
-                    description=tool_data.get('description', ''),
-                    defaults=tool_defaults,
-                    capabilities=capabilities_dict
-                )
-                tools_dict[tool_name] = tool_profile
+            tool_profile = self._transform_tool(tool_data)
+            if tool_profile is not None:
+                tools_dict[tool_data['tool_name']] = tool_profile
         
         # Create and return config
         config = OptimizationProfilesConfig(
@@ -183,10 +214,13 @@ class ProfileLoader:
         
         return config
     
-    def _load_from_database(self) -> OptimizationProfilesConfig:
+    def _load_from_database(self, use_cache: bool = True) -> OptimizationProfilesConfig:
         """
         Load profiles from database
         
+        Args:
+            use_cache: Allow ToolCatalogService to serve the catalog from its caches
+        
         Returns:
             Validated optimization profiles
         """
@@ -195,11 +229,21 @@ class ProfileLoader:
         try:
             service = self._get_catalog_service()
             
+            # Watermark first, so writes racing the load are picked up by the next delta
+            try:
+                _, watermark = service.get_tool_changes_since(None)
+            except Exception as e:
+                watermark = None
+                logger.warning(f"Catalog change tracking unavailable, reloads will be full: {e}")
+            
             # Get all tools with full structure
-            tools_data = service.get_all_tools_with_structure()
+            tools_data = service.get_all_tools_with_structure(use_cache=use_cache)
             
             # Transform to OptimizationProfilesConfig
             self._profiles = self._transform_database_to_profiles(tools_data)
+            self._last_seen = watermark
+            self._pending_tools = set()
+            self._delta_pending = False
             
             logger.info(f"Loaded {len(self._profiles.tools)} tool profiles from database")
             
@@ -217,6 +261,65 @@ class ProfileLoader:
             logger.error(f"Error loading from database: {e}")
             raise ValueError(f"Failed to load profiles from database: {e}") from e
     
+    def _load_delta(self) -> OptimizationProfilesConfig:
+        """
+        Reload only the tools touched since the last load
+        
+        Touched tools (updated_at past the watermark, tombstones, and tools
+        invalidated by name) are fetched, transformed and patched into a
+        copy of the profile map, which then replaces the current one in a
+        single reference assignment. Readers holding the previous config
+        keep a consistent view. Tools that no longer come back (deleted,
+        disabled, superseded or left without patterns) are dropped.
+        
+        Falls back to a full load when change tracking is unavailable.
+        
+        Returns:
+            Updated optimization profiles
+        """
+        with self._reload_lock:
+            current = self._profiles
+            tool_names, self._pending_tools = self._pending_tools, set()
+            self._delta_pending = False
+            
+            if current is None or self._last_seen is None:
+                return self._load_from_database(use_cache=False)
+            
+            start_time = time.time()
+            try:
+                service = self._get_catalog_service()
+                changed, watermark = service.get_tool_changes_since(self._last_seen - DELTA_OVERLAP)
+                names = tool_names.union(changed)
+                
+                tools = dict(current.tools)
+                updated = 0
+                if names:
+                    for name in names:
+                        tools.pop(name, None)
+                    for tool_data in service.get_all_tools_with_structure(
+                        use_cache=False, tool_names=sorted(names)
+                    ):
+                        tool_profile = self._transform_tool(tool_data)
+                        if tool_profile is not None:
+                            tool_profile.apply_defaults()
+                            tools[tool_data['tool_name']] = tool_profile
+                            updated += 1
+                
+                # model_copy skips re-validating the untouched profiles
+                removed = sum(1 for name in names if name in current.tools and name not in tools)
+                self._profiles = current.model_copy(update={"tools": tools})
+                self._last_seen = watermark
+            except Exception as e:
+                logger.warning(f"Incremental profile reload failed, reloading all tools: {e}")
+                return self._load_from_database(use_cache=False)
+            
+            duration_ms = (time.time() - start_time) * 1000
+            logger.info(
+                f"Incremental profile reload: {len(names)} touched, {updated} updated, "
+                f"{removed} removed in {duration_ms:.1f}ms ({len(tools)} tools)"
+            )
+            return self._profiles
+    
     def _load_from_yaml(self) -> OptimizationProfilesConfig:
         """
         YAML LOADING REMOVED - DATABASE ONLY
@@ -236,12 +339,15 @@ class ProfileLoader:
         Raises:
             ValueError: If database load fails
         """
-        # Return cached if available
+        # Return cached if available (patched first if tools were invalidated)
         if self._profiles is not None and not force_reload:
+            if self._delta_pending:
+                return self._load_delta()
             return self._profiles
         
         # ALWAYS load from database - NO YAML FALLBACK
-        return self._load_from_database()
+        with self._reload_lock:
+            return self._load_from_database(use_cache=not force_reload)
     
     def get_tool_profile(self, tool_name: str) -> Optional[ToolProfile]:
         """
@@ -254,13 +360,10 @@ class ProfileLoader:
             Tool profile or None if not found
         """
         start_time = time.time()
-        from_cache = self._profiles is not None
+        from_cache = self._profiles is not None and not self._delta_pending
         
         try:
-            if self._profiles is None:
-                self.load()
-            
-            result = self._profiles.tools.get(tool_name)
+            result = self.load().tools.get(tool_name)
             
             # Record metrics
             if self._metrics:
@@ -293,17 +396,16 @@ class ProfileLoader:
         Returns:
             Dictionary of tool name -> profile
         """
-        if self._profiles is None:
-            self.load()
-        
-        return self._profiles.tools
+        return self.load().tools
     
     def invalidate_cache(self, tool_name: Optional[str] = None):
         """
         Invalidate cached profiles
         
         Args:
-            tool_name: Specific tool to invalidate (None = invalidate all)
+            tool_name: Specific tool to invalidate (None = invalidate all).
+                A single tool is refreshed by a delta reload on next load;
+                the rest of the profile map stays cached.
         """
         if tool_name is None:
             # Invalidate entire cache
@@ -315,15 +417,14 @@ class ProfileLoader:
                 self._metrics.record_cache_eviction()
                 self._metrics.update_cache_size(0)
         else:
-            # For now, invalidate entire cache since profiles are loaded together
-            # In future, could implement partial invalidation
-            self._profiles = None
+            with self._reload_lock:
+                self._pending_tools.add(tool_name)
+                self._delta_pending = True
             logger.info(f"ProfileLoader cache invalidated (tool: {tool_name})")
             
             # Record cache eviction
             if self._metrics:
                 self._metrics.record_cache_eviction()
-                self._metrics.update_cache_size(0)
         
         # Also invalidate ToolCatalogService cache if using database
         if self.use_database and self._catalog_service is not None:
@@ -334,12 +435,16 @@ class ProfileLoader:
         Force reload profiles from source
         
         Args:
-            tool_name: Specific tool to reload (None = reload all)
+            tool_name: Specific tool to reload (None = reload all). With a
+                tool name only that tool and any others touched since the
+                last load are fetched.
             
         Returns:
             Reloaded profiles
         """
         self.invalidate_cache(tool_name)
+        if tool_name is not None:
+            return self.load()
         return self.load(force_reload=True)
     
     def validate_expressions(self) -> list[str]:
@@ -9,11 +9,19 @@ Security:
 - Restricted AST parsing
 - Whitelisted operations only
 - Bounded computation
+
+Expressions are parsed and validated once, then cached as a tree of
+closures (see SafeMathEvaluator.compile); evaluate_batch() runs a compiled
+expression over NumPy columns of inputs in one pass.
 """
 
 import ast
 import math
-from typing import Dict, Any, Union
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Union
+
+import numpy as np
 
 
 class SafeMathEvaluator:
@@ -77,6 +85,26 @@ class SafeMathEvaluator:
         """
         self.max_depth = max_depth
     
+    def compile(self, expression: str) -> "CompiledExpression":
+        """
+        Parse and validate an expression once
+        
+        Compiled expressions are cached per evaluator class, expression and
+        max depth, so profiles compiled at load time are free to look up on
+        every request.
+        
+        Args:
+            expression: Mathematical expression string
+            
+        Returns:
+            CompiledExpression
+            
+        Raises:
+            ValueError: If expression contains disallowed operations
+            SyntaxError: If expression is malformed
+        """
+        return _compile_cached(type(self), expression, self.max_depth)
+    
     def evaluate(
         self,
         expression: Union[str, int, float],
@@ -100,24 +128,35 @@ class SafeMathEvaluator:
         if isinstance(expression, (int, float)):
             return float(expression)
         
-        # Parse expression to AST
-        try:
-            tree = ast.parse(expression, mode='eval')
-        except SyntaxError as e:
-            raise SyntaxError(f"Invalid expression syntax: {expression}") from e
-        
-        # Validate AST (no disallowed operations)
-        self._validate_ast(tree.body, depth=0)
+        return self.compile(expression).evaluate(context)
+    
+    def evaluate_batch(
+        self,
+        expression: Union[str, int, float],
+        columns: Mapping[str, Any]
+    ) -> np.ndarray:
+        """
+        Evaluate an expression for many rows of inputs in one pass
         
-        # Build evaluation context
-        eval_context = self._build_context(context)
+        Args:
+            expression: Mathematical expression string or numeric value
+            columns: Variable values; 1-D arrays (one value per row, all
+                the same length) or scalars shared by every row
+                (e.g., {'N': np.array([10, 100, 1000]), 'pages': 1})
+                
+        Returns:
+            float64 array with one result per row
+            
+        Raises:
+            ValueError: If expression contains disallowed operations, or
+                evaluating any row fails (same message as evaluate() for
+                the first failing row)
+            SyntaxError: If expression is malformed
+        """
+        if isinstance(expression, (int, float)):
+            return np.full(_batch_rows(columns)[1], float(expression))
         
-        # Evaluate AST
-        try:
-            result = self._eval_node(tree.body, eval_context)
-            return float(result)
-        except Exception as e:
-            raise ValueError(f"Error evaluating expression '{expression}': {e}") from e
+        return self.compile(expression).evaluate_batch(columns)
     
     def _validate_ast(self, node: ast.AST, depth: int):
         """
@@ -167,86 +206,276 @@ class SafeMathEvaluator:
         """
         Build evaluation context with defaults and user values
         """
-        context = {}
-        
-        # Add constants
-        context.update(self.ALLOWED_CONSTANTS)
-        
-        # Add functions
-        context.update(self.ALLOWED_FUNCTIONS)
-        
-        # Add default variables
-        context.update(self.DEFAULT_VARS)
-        
-        # Override with user context
-        context.update(user_context)
-        
-        return context
+        # Constants, functions and default variables, overridden by user values
+        return {
+            **self.ALLOWED_CONSTANTS,
+            **self.ALLOWED_FUNCTIONS,
+            **self.DEFAULT_VARS,
+            **user_context,
+        }
     
-    def _eval_node(self, node: ast.AST, context: Dict[str, Any]) -> Union[int, float]:
+    def _build_batch_context(self, columns: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Evaluate AST node recursively
+        Build evaluation context for whole columns (NumPy function variants)
         """
-        if isinstance(node, ast.BinOp):
-            left = self._eval_node(node.left, context)
-            right = self._eval_node(node.right, context)
+        return {
+            **self.ALLOWED_CONSTANTS,
+            **{name: VECTOR_FUNCTIONS.get(name, func) for name, func in self.ALLOWED_FUNCTIONS.items()},
+            **self.DEFAULT_VARS,
+            **columns,
+        }
+
+
+# ============================================================================
+# COMPILED EXPRESSIONS
+# ============================================================================
+
+def _vector_log(x, *base):
+    if base:
+        (base,) = base
+        return np.log(x) / np.log(base)
+    return np.log(x)
+
+
+def _vector_unary(func: Callable) -> Callable:
+    # Exactly one argument, like the math functions (NumPy ufuncs would take
+    # a second positional argument as the output array)
+    return lambda x: func(x)
+
+
+def _vector_rounding(func: Callable) -> Callable:
+    def rounded(x):
+        # math.ceil/floor raise on inf and NaN; leave those rows to evaluate()
+        if not np.all(np.isfinite(x)):
+            raise ValueError("cannot convert non-finite value to integer")
+        return func(x)
+    return rounded
+
+
+def _vector_extremum(func: Callable, reduce: Callable) -> Callable:
+    def extremum(*args):
+        # min()/max() with a single iterable, or NaN ordering: defer to Python
+        if len(args) < 2 or any(np.any(np.isnan(arg)) for arg in args):
+            return func(*args)
+        result = args[0]
+        for arg in args[1:]:
+            result = reduce(result, arg)
+        return result
+    return extremum
+
+
+# NumPy equivalents of ALLOWED_FUNCTIONS used by batch evaluation
+VECTOR_FUNCTIONS = {
+    'log': _vector_log,
+    'log10': _vector_unary(np.log10),
+    'log2': _vector_unary(np.log2),
+    'sqrt': _vector_unary(np.sqrt),
+    'min': _vector_extremum(min, np.minimum),
+    'max': _vector_extremum(max, np.maximum),
+    'abs': _vector_unary(np.abs),
+    'ceil': _vector_rounding(np.ceil),
+    'floor': _vector_rounding(np.floor),
+    'exp': _vector_unary(np.exp),
+}
+
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_ZERO_DIVISOR_ERRORS = {
+    ast.Div: "Division by zero",
+    ast.FloorDiv: "Division by zero",
+    ast.Mod: "Modulo by zero",
+}
+
+Node = Callable[[Dict[str, Any]], Any]
+
+
+def _compile_node(node: ast.AST, vector: bool) -> Node:
+    """
+    Compile a validated AST node into a closure over the evaluation context
+    
+    Scalar and vector (whole-column) closures differ only in how the
+    division and exponent guards test their operand.
+    """
+    if isinstance(node, ast.BinOp):
+        left = _compile_node(node.left, vector)
+        right = _compile_node(node.right, vector)
+        op_type = type(node.op)
+        apply = _ARITHMETIC.get(op_type)
+        
+        if op_type in _ZERO_DIVISOR_ERRORS:
+            message = _ZERO_DIVISOR_ERRORS[op_type]
             
-            if isinstance(node.op, ast.Add):
-                return left + right
-            elif isinstance(node.op, ast.Sub):
-                return left - right
-            elif isinstance(node.op, ast.Mult):
-                return left * right
-            elif isinstance(node.op, ast.Div):
-                if right == 0:
-                    raise ValueError("Division by zero")
-                return left / right
-            elif isinstance(node.op, ast.FloorDiv):
-                if right == 0:
-                    raise ValueError("Division by zero")
-                return left // right
-            elif isinstance(node.op, ast.Mod):
-                if right == 0:
-                    raise ValueError("Modulo by zero")
-                return left % right
-            elif isinstance(node.op, ast.Pow):
+            def divide(context):
+                l, r = left(context), right(context)
+                if (np.any(r == 0) if vector else r == 0):
+                    raise ValueError(message)
+                return apply(l, r)
+            return divide
+        
+        if op_type is ast.Pow:
+            def power(context):
+                l, r = left(context), right(context)
                 # Limit exponent to prevent huge numbers
-                if abs(right) > 100:
+                if (np.any(np.abs(r) > 100) if vector else abs(r) > 100):
                     raise ValueError("Exponent too large")
-                return left ** right
+                return l ** r
+            return power
         
-        elif isinstance(node, ast.UnaryOp):
-            operand = self._eval_node(node.operand, context)
-            
-            if isinstance(node.op, ast.USub):
-                return -operand
-            elif isinstance(node.op, ast.UAdd):
-                return +operand
+        if apply is not None:
+            return lambda context: apply(left(context), right(context))
+    
+    elif isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, vector)
+        if isinstance(node.op, ast.USub):
+            return lambda context: -operand(context)
+        if isinstance(node.op, ast.UAdd):
+            return lambda context: +operand(context)
+    
+    elif isinstance(node, ast.Call):
+        func_name = node.func.id
+        args = [_compile_node(arg, vector) for arg in node.args]
         
-        elif isinstance(node, ast.Call):
-            func_name = node.func.id
+        def call(context):
             func = context[func_name]
-            
-            # Evaluate arguments
-            args = [self._eval_node(arg, context) for arg in node.args]
-            
-            # Call function
-            return func(*args)
+            return func(*[arg(context) for arg in args])
+        return call
+    
+    elif isinstance(node, ast.Name):
+        var_name = node.id
         
-        elif isinstance(node, ast.Name):
-            var_name = node.id
+        def variable(context):
             if var_name not in context:
                 raise ValueError(f"Variable '{var_name}' not defined in context")
             return context[var_name]
+        return variable
+    
+    elif isinstance(node, ast.Constant):
+        value = node.value
+        return lambda context: value
+    
+    node_name = type(node).__name__
+    
+    def unsupported(context):
+        raise ValueError(f"Cannot evaluate node type {node_name}")
+    return unsupported
+
+
+def _batch_rows(columns: Mapping[str, Any]):
+    """
+    Split batch inputs into arrays and scalars
+    
+    Returns:
+        (context with sequences converted to float64 arrays, row count)
+    """
+    context = {}
+    rows = None
+    for name, value in columns.items():
+        if isinstance(value, (np.ndarray, list, tuple)):
+            value = np.asarray(value, dtype=np.float64)
+            if value.ndim != 1:
+                raise ValueError(f"Column '{name}' must be 1-dimensional")
+            if rows is not None and len(value) != rows:
+                raise ValueError(f"Column '{name}' has {len(value)} rows, expected {rows}")
+            rows = len(value)
+        context[name] = value
+    return context, 1 if rows is None else rows
+
+
+class CompiledExpression:
+    """
+    A parsed and validated expression, ready to evaluate
+    
+    Evaluation skips parsing and validation; the runtime checks (division
+    by zero, exponent limit, undefined variables) and error messages are
+    the same as SafeMathEvaluator.evaluate().
+    """
+    
+    def __init__(self, expression: str, tree: ast.Expression, evaluator: SafeMathEvaluator):
+        self.expression = expression
+        self._evaluator = evaluator
+        self._scalar = _compile_node(tree.body, vector=False)
+        self._vector = _compile_node(tree.body, vector=True)
+    
+    def evaluate(self, context: Dict[str, Any]) -> float:
+        """
+        Evaluate with one set of variable values
         
-        elif isinstance(node, ast.Constant):
-            return node.value
-        
-        elif isinstance(node, ast.Num):  # Python 3.7 compatibility
-            return node.n
+        Args:
+            context: Variable values (e.g., {'N': 100, 'p95_latency': 150})
+            
+        Returns:
+            Evaluated result as float
+            
+        Raises:
+            ValueError: If evaluation fails
+        """
+        eval_context = self._evaluator._build_context(context)
+        try:
+            return float(self._scalar(eval_context))
+        except Exception as e:
+            raise ValueError(f"Error evaluating expression '{self.expression}': {e}") from e
+    
+    def evaluate_batch(self, columns: Mapping[str, Any]) -> np.ndarray:
+        """
+        Evaluate for every row of the input columns in one pass
         
-        else:
-            raise ValueError(f"Cannot evaluate node type {type(node).__name__}")
+        Args:
+            columns: 1-D arrays of equal length, or scalars shared by all rows
+            
+        Returns:
+            float64 array with one result per row
+            
+        Raises:
+            ValueError: If any row fails (same message as evaluate() for
+                the first failing row)
+        """
+        batch, rows = _batch_rows(columns)
+        try:
+            with np.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+                result = np.asarray(self._vector(self._evaluator._build_batch_context(batch)))
+            if result.dtype.kind not in 'biuf':
+                raise TypeError(f"non-numeric result of type {result.dtype}")
+            return np.array(np.broadcast_to(result, (rows,)), dtype=np.float64)
+        except Exception:
+            # Some row fails (or hits a math/NumPy edge case such as log(0)):
+            # evaluate row by row, so the first failing row raises exactly
+            # as evaluate() would
+            return np.array([self.evaluate(row) for row in self._split_rows(batch, rows)], dtype=np.float64)
+    
+    @staticmethod
+    def _split_rows(batch: Dict[str, Any], rows: int) -> List[Dict[str, Any]]:
+        values = {
+            name: value.tolist() if isinstance(value, np.ndarray) else [value] * rows
+            for name, value in batch.items()
+        }
+        return [{name: column[i] for name, column in values.items()} for i in range(rows)]
+    
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r})"
+
+
+@lru_cache(maxsize=4096)
+def _compile_cached(evaluator_class: type, expression: str, max_depth: int) -> CompiledExpression:
+    evaluator = evaluator_class(max_depth=max_depth)
+    
+    # Parse expression to AST
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise SyntaxError(f"Invalid expression syntax: {expression}") from e
+    
+    # Validate AST (no disallowed operations)
+    evaluator._validate_ast(tree.body, depth=0)
+    
+    return CompiledExpression(expression, tree, evaluator)
 
 
 # Global instance
@@ -328,6 +328,8 @@ class StageBSelector:
             "require_production_safe": decision.risk_level in ["high", "critical"],
             "decision_confidence": decision.overall_confidence,
             "risk_level": decision.risk_level.value,
+            # Coarse intent bucket for the tie-break cache key
+            "intent_category": decision.intent.category,
         }
         
         # Add cost limit if specified
@@ -0,0 +1,329 @@
+"""
+Tie-Break Cache - Phase 4
+
+Remembers LLM tie-break decisions so recurring ambiguous pairs skip the LLM.
+
+The same pairs come back constantly (two overlapping service-status tools,
+say) with only trivially different phrasing, so the query text is not part
+of the key:
+
+    (sorted candidate ids, preference weight vector, coarse intent bucket)
+
+Candidate ids are "tool.pattern" and sorted, so A/B order does not matter.
+The preference vector is the FeatureWeights of the detected mode, which is
+what actually separates two otherwise identical tie-breaks.
+
+Entry TTL scales with the LLM's stated confidence: clear-cut choices live
+for hours, coin flips for minutes. A sample of cache hits is queued and
+replayed against the LLM off the request path; a replay that disagrees
+counts as drift and drops the entry.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pipeline.services.lru_cache import LRUCache
+from .deterministic_scorer import FeatureWeights, PreferenceMode
+
+logger = logging.getLogger(__name__)
+
+# Confidence assumed when the LLM response does not state one
+DEFAULT_CONFIDENCE = 0.5
+
+
+def candidate_id(candidate: Dict[str, Any]) -> str:
+    """Stable identifier of a scored candidate dict: tool.pattern"""
+    return f"{candidate.get('tool_name', 'unknown')}.{candidate.get('pattern_name', 'unknown')}"
+
+
+@dataclass(frozen=True)
+class TieBreakKey:
+    """Normalized identity of a tie-break decision"""
+    candidates: Tuple[str, str]  # sorted candidate ids
+    preference: Tuple[float, ...]  # rounded FeatureWeights vector
+    intent: str  # coarse intent bucket
+
+    @classmethod
+    def build(
+        cls,
+        candidate1: Dict[str, Any],
+        candidate2: Dict[str, Any],
+        preference_mode: Optional[PreferenceMode] = None,
+        intent: Optional[str] = None
+    ) -> "TieBreakKey":
+        """
+        Build the key for a pair of candidates
+
+        Args:
+            candidate1: First candidate dict
+            candidate2: Second candidate dict
+            preference_mode: Detected preference mode (balanced if None)
+            intent: Intent category from Stage A (e.g. "monitoring")
+
+        Returns:
+            TieBreakKey, identical for either candidate order
+        """
+        weights = FeatureWeights.from_mode(preference_mode or PreferenceMode.BALANCED)
+        return cls(
+            candidates=tuple(sorted((candidate_id(candidate1), candidate_id(candidate2)))),
+            preference=tuple(round(float(w), 3) for w in weights.as_array()),
+            intent=(intent or "unknown").strip().lower() or "unknown",
+        )
+
+    def cache_key(self) -> str:
+        """String form used as the LRU cache key"""
+        preference = ",".join(f"{w:g}" for w in self.preference)
+        return f"tiebreak:{'|'.join(self.candidates)}:{preference}:{self.intent}"
+
+
+@dataclass
+class CachedTieBreak:
+    """A remembered LLM decision"""
+    winner: str  # candidate id of the chosen candidate
+    justification: str
+    confidence: float
+    ttl_seconds: int
+    created_at: float
+
+
+@dataclass
+class ReplaySample:
+    """A cache hit queued for offline replay against the LLM"""
+    key: TieBreakKey
+    query: str
+    candidate1: Dict[str, Any]
+    candidate2: Dict[str, Any]
+    cached: CachedTieBreak
+
+
+class TieBreakCache:
+    """
+    LRU cache of LLM tie-break decisions with confidence-weighted TTL,
+    hit/miss metrics and sampled replay for drift measurement.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2000,
+        min_ttl_seconds: int = 300,
+        max_ttl_seconds: int = 6 * 3600,
+        replay_sample_rate: float = 0.05,
+        max_pending_replays: int = 100,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Initialize tie-break cache
+
+        Args:
+            max_size: Maximum number of cached decisions
+            min_ttl_seconds: TTL of a zero-confidence decision
+            max_ttl_seconds: TTL of a full-confidence decision
+            replay_sample_rate: Fraction of cache hits queued for replay
+            max_pending_replays: Replay queue bound (oldest samples dropped)
+            rng: Random source for sampling (seedable for tests)
+        """
+        self.min_ttl_seconds = min_ttl_seconds
+        self.max_ttl_seconds = max_ttl_seconds
+        self.replay_sample_rate = replay_sample_rate
+        self._cache = LRUCache(max_size=max_size, default_ttl=max_ttl_seconds)
+        self._replays: Deque[ReplaySample] = deque(maxlen=max_pending_replays)
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._sampled = 0
+        self._replayed = 0
+        self._agreements = 0
+        self._disagreements = 0
+
+    def ttl_for(self, confidence: float) -> int:
+        """
+        Confidence-weighted TTL
+
+        Args:
+            confidence: LLM confidence in [0, 1]
+
+        Returns:
+            TTL in seconds, linear between min_ttl_seconds and max_ttl_seconds
+            (at least 1, since a TTL of 0 means no expiration in LRUCache)
+        """
+        confidence = min(1.0, max(0.0, confidence))
+        ttl = int(self.min_ttl_seconds + (self.max_ttl_seconds - self.min_ttl_seconds) * confidence)
+        return max(1, ttl)
+
+    def get(self, key: TieBreakKey) -> Optional[CachedTieBreak]:
+        """
+        Look up a decision
+
+        Args:
+            key: Normalized tie-break key
+
+        Returns:
+            CachedTieBreak or None if missing/expired
+        """
+        cached = self._cache.get(key.cache_key())
+        with self._lock:
+            if cached is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return cached
+
+    def put(self, key: TieBreakKey, winner: str, justification: str,
+            confidence: float = DEFAULT_CONFIDENCE) -> CachedTieBreak:
+        """
+        Remember a decision
+
+        Args:
+            key: Normalized tie-break key
+            winner: Candidate id the LLM chose
+            justification: LLM justification
+            confidence: LLM confidence in [0, 1]
+
+        Returns:
+            The stored entry
+        """
+        ttl = self.ttl_for(confidence)
+        cached = CachedTieBreak(
+            winner=winner,
+            justification=justification,
+            confidence=confidence,
+            ttl_seconds=ttl,
+            created_at=time.time(),
+        )
+        self._cache.set(key.cache_key(), cached, ttl=ttl)
+        with self._lock:
+            self._stores += 1
+        return cached
+
+    def invalidate(self, key: TieBreakKey) -> bool:
+        """Drop one decision; returns True if it was cached"""
+        return self._cache.delete(key.cache_key())
+
+    def clear(self) -> None:
+        """Drop all decisions and pending replays"""
+        self._cache.clear()
+        with self._lock:
+            self._replays.clear()
+
+    # ========================================================================
+    # REPLAY
+    # ========================================================================
+
+    def sample_for_replay(self, key: TieBreakKey, query: str, candidate1: Dict[str, Any],
+                          candidate2: Dict[str, Any], cached: CachedTieBreak) -> bool:
+        """
+        Queue a cache hit for replay with probability replay_sample_rate
+
+        Returns:
+            True if the hit was queued
+        """
+        if self.replay_sample_rate <= 0 or self._rng.random() >= self.replay_sample_rate:
+            return False
+        with self._lock:
+            self._replays.append(ReplaySample(key, query, candidate1, candidate2, cached))
+            self._sampled += 1
+        return True
+
+    def pop_replay_samples(self, limit: Optional[int] = None) -> List[ReplaySample]:
+        """
+        Take queued replay samples, oldest first
+
+        Args:
+            limit: Maximum number of samples (all if None)
+
+        Returns:
+            List of ReplaySample
+        """
+        with self._lock:
+            count = len(self._replays) if limit is None else min(limit, len(self._replays))
+            return [self._replays.popleft() for _ in range(count)]
+
+    @property
+    def pending_replays(self) -> int:
+        """Number of samples waiting for replay"""
+        return len(self._replays)
+
+    def record_replay(self, sample: ReplaySample, winner: str) -> bool:
+        """
+        Compare a replayed LLM decision with the cached one
+
+        A disagreement drops the entry (if it is still the one that was
+        sampled) so the next request asks the LLM again.
+
+        Args:
+            sample: The replayed sample
+            winner: Candidate id the LLM chose on replay
+
+        Returns:
+            True if the replay agreed with the cached decision
+        """
+        agreed = winner == sample.cached.winner
+        with self._lock:
+            self._replayed += 1
+            if agreed:
+                self._agreements += 1
+            else:
+                self._disagreements += 1
+
+        if not agreed:
+            current = self._cache.get(sample.key.cache_key())
+            if current is sample.cached:
+                self.invalidate(sample.key)
+            logger.info(
+                f"Tie-break drift for {'|'.join(sample.key.candidates)}: "
+                f"cached {sample.cached.winner}, replay chose {winner}"
+            )
+        return agreed
+
+    # ========================================================================
+    # STATISTICS
+    # ========================================================================
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache, hit/miss and replay agreement statistics"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups > 0 else 0.0,
+                "stores": self._stores,
+                "replay_sampled": self._sampled,
+                "replay_pending": len(self._replays),
+                "replayed": self._replayed,
+                "agreements": self._agreements,
+                "disagreements": self._disagreements,
+                "agreement_rate": self._agreements / self._replayed if self._replayed > 0 else None,
+            }
+
+
+# Global tie-break cache instance
+_tie_break_cache: Optional[TieBreakCache] = None
+_tie_break_cache_lock = threading.Lock()
+
+
+def get_tie_break_cache() -> TieBreakCache:
+    """
+    Get global tie-break cache instance (singleton)
+
+    Returns:
+        TieBreakCache instance
+    """
+    global _tie_break_cache
+
+    if _tie_break_cache is None:
+        with _tie_break_cache_lock:
+            if _tie_break_cache is None:
+                _tie_break_cache = TieBreakCache()
+
+    return _tie_break_cache
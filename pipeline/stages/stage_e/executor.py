@@ -5,22 +5,25 @@ Main entry point for execution with hybrid routing and safety features
 
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 from uuid import UUID, uuid4
 
 from execution.dtos import ExecutionRequest, ExecutionResponse
 from execution.models import (
     ApprovalModel,
+    DeadlineMissPolicy,
+    ExecutionEventModel,
     ExecutionMode,
     ExecutionModel,
     ExecutionStatus,
-    SLAClass,
     calculate_idempotency_key,
     determine_execution_mode,
     determine_sla_class,
 )
+from execution.policy_cache import get_timeout_policy_cache
 from execution.repository import ExecutionRepository
+from execution.scheduling import get_queue_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +54,17 @@ class StageEExecutor:
         # Initialize repository
         self.repository = ExecutionRepository(self.db_connection_string)
         
+        # Timeout policies rarely change: serve them from an in-process,
+        # version-refreshed cache (warmed at startup) instead of querying on
+        # every request
+        self.policy_cache = get_timeout_policy_cache(self.db_connection_string)
+        
+        # Queued work that can no longer meet its SLA deadline is either
+        # rejected outright or downgraded to best-effort
+        self.deadline_miss_policy = DeadlineMissPolicy(
+            os.getenv("EXECUTION_DEADLINE_MISS_POLICY", DeadlineMissPolicy.DOWNGRADE.value)
+        )
+        
         logger.info("StageEExecutor initialized")
     
     async def execute(
@@ -83,18 +97,9 @@ class StageEExecutor:
                 actor_id
             )
             
-            # Step 2: Check for duplicate execution (idempotency)
-            # DISABLED FOR TESTING - CACHING CAUSES ISSUES
-            # existing_execution = self.repository.get_execution_by_idempotency_key(
-            #     tenant_id,
-            #     idempotency_key
-            # )
-            # 
-            # if existing_execution:
-            #     logger.info(
-            #         f"Duplicate execution detected: {existing_execution.execution_id}"
-            #     )
-            #     return self._build_execution_response(existing_execution)
+            # Step 2: Duplicate detection happens atomically at insert time
+            # (Step 7) against in-flight executions only, so a finished plan
+            # can be run again but a retried/double submission cannot
             
             # Step 3: Determine SLA class and execution mode
             estimated_duration = self._estimate_duration(request.plan)
@@ -108,7 +113,7 @@ class StageEExecutor:
             
             # Step 4: Get timeout policy
             action_class = self._determine_action_class(request.plan)
-            timeout_policy = self.repository.get_timeout_policy(sla_class, action_class)
+            timeout_policy = self.policy_cache.get(sla_class, action_class)
             
             if not timeout_policy:
                 raise ValueError(
@@ -139,8 +144,16 @@ class StageEExecutor:
                 metadata=request.metadata,
             )
             
-            # Step 7: Save execution to database
-            execution = self.repository.create_execution(execution)
+            # Step 7: Save execution to database (or attach to in-flight duplicate)
+            execution, created = self.repository.create_execution_if_absent(execution)
+            
+            if not created:
+                logger.info(
+                    f"Duplicate submission attached to in-flight execution: "
+                    f"{execution.execution_id}"
+                )
+                self._record_duplicate_submission(execution, actor_id, request.trace_id)
+                return self._build_execution_response(execution, deduplicated=True)
             
             logger.info(f"Created execution: {execution.execution_id}")
             
@@ -417,7 +430,7 @@ class StageEExecutor:
         try:
             # Get timeout policy
             action_class = self._determine_action_class(execution.plan_snapshot)
-            timeout_policy = self.repository.get_timeout_policy(
+            timeout_policy = self.policy_cache.get(
                 execution.sla_class,
                 action_class
             )
@@ -428,11 +441,43 @@ class StageEExecutor:
                     f"action_class={action_class}"
                 )
             
-            # Create queue entry
+            cost = max(1.0, self._estimate_duration(execution.plan_snapshot))
+            
+            # Reject early: no point queueing work that cannot finish in time.
+            # timeout_at is naive UTC when built here but tz-aware when loaded
+            # from TIMESTAMPTZ, so compare both as aware UTC. The execution has
+            # not been queued yet, so CANCELLED is the legal terminal state.
+            deadline_at = execution.timeout_at
+            if deadline_at is not None and deadline_at.tzinfo is None:
+                deadline_at = deadline_at.replace(tzinfo=timezone.utc)
+            if (
+                self.deadline_miss_policy == DeadlineMissPolicy.REJECT
+                and deadline_at
+                and datetime.now(timezone.utc) + timedelta(seconds=cost) > deadline_at
+            ):
+                self.repository.update_execution_status(
+                    execution.execution_id,
+                    ExecutionStatus.CANCELLED,
+                    previous_status=execution.status,
+                    error_message="Rejected: SLA deadline unreachable before start"
+                )
+                get_queue_metrics().record_rejection(execution.sla_class.value)
+                logger.warning(
+                    f"Execution rejected before enqueue (deadline unreachable): "
+                    f"{execution.execution_id}"
+                )
+                return
+            
+            # Create queue entry (deadline = SLA timeout, for EDF ordering)
             queue_entry = ExecutionQueueModel(
                 execution_id=execution.execution_id,
                 priority=self._calculate_priority(execution),
                 sla_class=execution.sla_class,
+                idempotency_key=execution.idempotency_key,
+                tenant_id=execution.tenant_id,
+                cost=cost,
+                deadline_at=execution.timeout_at,
+                on_deadline_miss=self.deadline_miss_policy,
                 visibility_timeout_seconds=timeout_policy.lease_timeout_seconds,
                 max_attempts=timeout_policy.max_attempts,
             )
@@ -506,6 +551,41 @@ class StageEExecutor:
             f"execution={execution.execution_id}, level={execution.approval_level}"
         )
     
+    def _record_duplicate_submission(
+        self,
+        execution: ExecutionModel,
+        actor_id: int,
+        trace_id: Optional[UUID]
+    ) -> None:
+        """
+        Record a duplicate submission on the existing execution's event stream
+        
+        Args:
+            execution: In-flight execution the duplicate was attached to
+            actor_id: Actor who re-submitted
+            trace_id: Trace ID of the duplicate request
+        """
+        try:
+            self.repository.create_execution_event(
+                ExecutionEventModel(
+                    execution_id=execution.execution_id,
+                    event_type="duplicate_submission",
+                    actor_id=actor_id,
+                    actor_type="user",
+                    details={
+                        "idempotency_key": execution.idempotency_key,
+                        "status_at_attach": execution.status.value,
+                        "duplicate_trace_id": str(trace_id) if trace_id else None,
+                    },
+                    trace_id=execution.trace_id,
+                )
+            )
+        except Exception as e:
+            # Attaching must not fail the request just because auditing failed
+            logger.warning(
+                f"Failed to record duplicate submission for {execution.execution_id}: {e}"
+            )
+    
     def _determine_initial_status(self, approval_level: int) -> ExecutionStatus:
         """Determine initial execution status based on approval level"""
         if approval_level == 0:
@@ -558,19 +638,19 @@ class StageEExecutor:
             Priority (1-10)
         """
         # Priority based on SLA class
-        if execution.sla_class == SLAClass.FAST:
-            return 1
-        elif execution.sla_class == SLAClass.MEDIUM:
-            return 5
-        else:
-            return 10
+        return self.policy_cache.priority_for(execution.sla_class)
     
-    def _build_execution_response(self, execution: ExecutionModel) -> ExecutionResponse:
+    def _build_execution_response(
+        self,
+        execution: ExecutionModel,
+        deduplicated: bool = False
+    ) -> ExecutionResponse:
         """
         Build execution response from execution model
         
         Args:
             execution: Execution model
+            deduplicated: True if this request attached to an existing execution
         
         Returns:
             ExecutionResponse
@@ -615,4 +695,5 @@ class StageEExecutor:
             error_message=execution.error_message,
             trace_id=execution.trace_id,
             tags=execution.tags,
+            deduplicated=deduplicated,
         )
\ No newline at end of file
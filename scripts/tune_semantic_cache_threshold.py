@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Offline threshold tuning for the Stage AB semantic cache
+
+Replays the requests in training_data/ (in file order, repeats included)
+through SemanticSelectionCache at a range of similarity thresholds and
+reports hit rate and false-reuse rate for each.
+
+- Ground truth: two requests should share a selection when their labels
+  match. The label of a request text is its most common (category,
+  capabilities) in the file, because individual rows are noisy.
+- Entities: the LLM extractor is not run offline, so the signature is the
+  identifier-token part of entity_signature(). That is stricter than
+  nothing but looser than live, so false reuse here is an upper bound.
+- --paraphrase mixes in polite/filler variants ("please ...", "... now")
+  of the same requests, which the exact-key cache cannot hit.
+
+Usage:
+    python scripts/tune_semantic_cache_threshold.py
+    python scripts/tune_semantic_cache_threshold.py --paraphrase --max-false-reuse 0.01
+    python scripts/tune_semantic_cache_threshold.py --encoder ngram   # no model download
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline.cache.semantic_cache import entity_signature, evaluate_thresholds
+
+PREFIXES = ["please ", "can you ", "could you please ", "i need to ", "hey, "]
+SUFFIXES = ["", "", " now", " please", " for me", "?"]
+THRESHOLDS = [0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98, 0.99]
+
+
+def load_requests(path: Path, paraphrase: bool, seed: int = 0):
+    """Requests in file order and the modal label of each request text"""
+    rows = [json.loads(line) for line in path.open() if line.strip()]
+    votes = defaultdict(Counter)
+    for row in rows:
+        expected = row["expected_response"]
+        key = row["request"].strip().lower()
+        votes[key][(expected["category"], tuple(sorted(expected["capabilities"])))] += 1
+    label_of = {key: counter.most_common(1)[0][0] for key, counter in votes.items()}
+
+    rng = random.Random(seed)
+    requests = []
+    for row in rows:
+        request = row["request"]
+        if paraphrase and rng.random() < 0.5:
+            request = f"{rng.choice(PREFIXES)}{request}{rng.choice(SUFFIXES)}"
+        requests.append((request, label_of[row["request"].strip().lower()]))
+    return requests
+
+
+def ngram_encoder(texts, dim: int = 1024):
+    """Hashed word + character trigram counts (a model-free stand-in)"""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        text = text.lower()
+        features = text.split()
+        padded = f"  {text}  "
+        features += [padded[j:j + 3] for j in range(len(padded) - 2)]
+        for feature in features:
+            matrix[i, zlib.crc32(feature.encode()) % dim] += 1.0
+    return matrix
+
+
+def model_encoder(texts):
+    """The Stage AB query encoder (EmbeddingService, same normalization)"""
+    from pipeline.services.embedding_service import get_embedding_service, normalize_text
+    service = get_embedding_service()
+    return service.encode_batch([normalize_text(t) for t in texts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--data", default=str(ROOT / "training_data" / "training_data_10k.jsonl"))
+    parser.add_argument("--encoder", choices=["model", "ngram"], default="model")
+    parser.add_argument("--paraphrase", action="store_true", help="Mix in paraphrased variants")
+    parser.add_argument("--max-false-reuse", type=float, default=0.01,
+                        help="Highest acceptable false-reuse rate for the recommendation")
+    args = parser.parse_args()
+
+    requests = load_requests(Path(args.data), args.paraphrase)
+    texts = [request for request, _ in requests]
+    labels = [label for _, label in requests]
+    signatures = [entity_signature([], text) for text in texts]
+
+    unique = sorted(set(texts))
+    started = time.time()
+    encode = model_encoder if args.encoder == "model" else ngram_encoder
+    unique_embeddings = np.asarray(encode(unique), dtype=np.float32)
+    row_of = {text: i for i, text in enumerate(unique)}
+    embeddings = unique_embeddings[[row_of[text] for text in texts]]
+    print(f"📦 {len(texts)} requests ({len(unique)} distinct) from {args.data}")
+    print(f"🔢 Encoded with '{args.encoder}' in {time.time() - started:.1f}s")
+
+    results = evaluate_thresholds(embeddings, signatures, labels, THRESHOLDS, requests=texts)
+
+    print()
+    print(f"Exact-key cache hit rate: {results[0]['exact_key_hit_rate']:.1%}")
+    print(f"{'threshold':>9}  {'hit rate':>8}  {'false reuse':>11}  {'hits':>6}")
+    for result in results:
+        print(
+            f"{result['threshold']:>9.2f}  {result['hit_rate']:>8.1%}  "
+            f"{result['false_reuse_rate']:>11.2%}  {result['hits']:>6}"
+        )
+
+    acceptable = [r for r in results if r["false_reuse_rate"] <= args.max_false_reuse]
+    print()
+    if acceptable:
+        best = acceptable[0]
+        print(
+            f"✅ Recommended SEMANTIC_CACHE_THRESHOLD={best['threshold']:.2f} "
+            f"(hit rate {best['hit_rate']:.1%}, false reuse {best['false_reuse_rate']:.2%})"
+        )
+    else:
+        print(f"❌ No threshold keeps false reuse under {args.max_false_reuse:.1%}")
+
+
+if __name__ == "__main__":
+    main()
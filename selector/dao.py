@@ -17,6 +17,7 @@ Usage:
 from typing import Sequence, Optional, Dict, Any, List
 import asyncpg
 from shared.embeddings import embed_128, to_vec_literal
+from shared.vector_index import get_selector_vector_index
 
 
 async def select_topk(
@@ -29,7 +30,8 @@ async def select_topk(
     Select top-k tools most similar to query text using vector similarity.
     
     Uses cosine distance (<=> operator) to find tools with embeddings closest
-    to the query embedding. Results are ordered by:
+    to the query embedding. Searches the in-process vector index when it is
+    loaded and falls back to pgvector otherwise. Results are ordered by:
     1. Vector similarity (primary)
     2. Usage count (secondary, for ties)
     3. Updated timestamp (tertiary, for freshness)
@@ -54,11 +56,19 @@ async def select_topk(
     """
     # Generate embedding for query
     vec = embed_128(query_text)
-    vec_lit = to_vec_literal(vec)
     
     # Convert platform to list (empty list means no filter)
     plat = list(platform) if platform else []
     
+    # In-process index first (None = not loaded or failed: use pgvector)
+    index = get_selector_vector_index()
+    if index is not None and index.loaded:
+        rows = await index.search(conn, vec, plat, k)
+        if rows is not None:
+            return rows
+    
+    vec_lit = to_vec_literal(vec)
+    
     # Execute vector similarity search
     # Note: $2::text[] = '{}'::text[] checks if platform filter is empty
     #       platform && $2::text[] checks if tool's platform overlaps with filter
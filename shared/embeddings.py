@@ -4,16 +4,39 @@ Shared embedding utilities for tool catalog and runtime search.
 Provides deterministic 128-dimensional embeddings using SHA256-based hashing.
 This ensures compatibility between tool indexing and runtime search queries.
 
+The digests of a whole batch are laid out in one buffer and turned into
+vectors with NumPy. The norm is accumulated the way the original
+pure-Python loop's sum() does on the running interpreter (plain left to
+right before 3.12, Neumaier compensated from 3.12), so results are
+bit-identical to it there. Across interpreter versions they agree at the
+6-decimal precision of to_vec_literal. Repeated query texts are memoised.
+
 Usage:
-    from shared.embeddings import embed_128, to_vec_literal
+    from shared.embeddings import embed_128, embed_128_batch, to_vec_literal
     
     vec = embed_128("scan network for open ports")
     vec_lit = to_vec_literal(vec)  # -> "[0.123456,0.234567,...]"
+    matrix = embed_128_batch(tool_texts)  # (len(tool_texts), 128) float64
 """
 
 import hashlib
 import math
-from typing import List
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+EMBED_DIM = 128
+_ROUNDS = 4  # SHA256 gives 32 bytes = 32 values, need 4 rounds for 128
+_ROUND_SUFFIXES = tuple(str(i).encode("utf-8") for i in range(_ROUNDS))
+
+# Memoised query embeddings (repeated selector queries skip the hashing)
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_128_CACHE_SIZE", "4096"))
+
+# sum() over floats is Neumaier-compensated from Python 3.12
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
 
 
 def embed_128(text: str) -> List[float]:
@@ -27,7 +50,7 @@ def embed_128(text: str) -> List[float]:
         text: Input text to embed
         
     Returns:
-        List of 128 floats with L2 norm ≈ 1.0
+        List of 128 floats with L2 norm ≈ 1.0 (a new list; callers may modify it)
         
     Example:
         >>> vec = embed_128("hello world")
@@ -36,21 +59,80 @@ def embed_128(text: str) -> List[float]:
         >>> 0.95 <= sum(x*x for x in vec)**0.5 <= 1.05
         True
     """
-    # Generate multiple hashes to get 128 values
-    # SHA256 gives 32 bytes = 32 values, need 4 rounds for 128
-    vec = []
-    for i in range(4):
-        # Hash with salt to get different values per round
-        salted = f"{text}::{i}".encode('utf-8')
-        hash_bytes = hashlib.sha256(salted).digest()
-        # Convert bytes to floats in [-1, 1]
-        for byte in hash_bytes:
-            # Map byte (0-255) to float (-1 to 1)
-            vec.append((byte / 127.5) - 1.0)
-    
-    # Take first 128 values and normalize
-    vec = vec[:128]
-    return _normalize(vec)
+    return list(_embed_128_cached(text))
+
+
+@lru_cache(maxsize=EMBED_CACHE_SIZE)
+def _embed_128_cached(text: str) -> Tuple[float, ...]:
+    return tuple(embed_128_batch([text])[0].tolist())
+
+
+def embed_128_batch(texts: Sequence[str]) -> np.ndarray:
+    """
+    Embed many texts at once.
+    
+    Row i is bit-identical to embed_128(texts[i]), and to the original
+    pure-Python hashing on the same interpreter.
+    
+    Args:
+        texts: Input texts
+        
+    Returns:
+        float64 array of shape (len(texts), 128)
+    """
+    digests = bytearray()
+    for text in texts:
+        # Hash with salt to get different values per round: "{text}::{i}"
+        prefix = hashlib.sha256(f"{text}::".encode("utf-8"))
+        for suffix in _ROUND_SUFFIXES:
+            salted = prefix.copy()
+            salted.update(suffix)
+            digests += salted.digest()
+
+    # Map byte (0-255) to float (-1 to 1)
+    vecs = np.frombuffer(bytes(digests), dtype=np.uint8).reshape(len(texts), EMBED_DIM) / 127.5 - 1.0
+
+    norms = np.sqrt(_sum_of_squares(vecs * vecs, _COMPENSATED_SUM))
+    # Avoid division by zero
+    norms[norms < 1e-10] = 1.0
+    return vecs / norms[:, None]
+
+
+def _sum_of_squares(squares: np.ndarray, compensated: bool) -> np.ndarray:
+    """
+    Row sums in the same order and rounding as sum() over each row.
+    
+    np.sum's pairwise summation would differ in the last bit.
+    
+    Args:
+        squares: (n, dim) array
+        compensated: Neumaier summation as in Python 3.12+ sum(), else
+            plain left-to-right addition as in earlier versions
+    """
+    if not compensated:
+        return np.add.accumulate(squares, axis=1)[:, -1] if len(squares) else np.zeros(0)
+    
+    total = np.zeros(len(squares))
+    compensation = np.zeros(len(squares))
+    for column in squares.T:
+        step = total + column
+        compensation += np.where(
+            np.abs(total) >= np.abs(column), (total - step) + column, (column - step) + total
+        )
+        total = step
+    # sum() only adds a finite compensation
+    return np.where(np.isfinite(compensation), total + compensation, total)
+
+
+def embed_128_cache_info() -> Dict[str, int]:
+    """Hit/miss counts of the embed_128 memo"""
+    info = _embed_128_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+@lru_cache(maxsize=16)
+def _vec_format(dim: int) -> str:
+    return "[" + ",".join(["%.6f"] * dim) + "]"
 
 
 def to_vec_literal(vec: List[float]) -> str:
@@ -70,7 +152,7 @@ def to_vec_literal(vec: List[float]) -> str:
         >>> to_vec_literal(vec)
         '[0.100000,0.200000,0.300000]'
     """
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+    return _vec_format(len(vec)) % tuple(vec)
 
 
 def _normalize(vec: List[float]) -> List[float]:
@@ -0,0 +1,373 @@
+"""
+In-process vector index for selector tool search.
+
+Holds every tool embedding from the public `tool` table in one contiguous,
+L2-normalized float32 matrix, so a search is a single matrix-vector product
+plus argpartition instead of a pgvector round trip. Results match the
+selector's SQL ordering exactly:
+
+    ORDER BY embedding <=> q NULLS LAST, usage_count DESC, updated_at DESC
+
+(the DB path goes through the ivfflat index and is approximate; this is an
+exact scan). The matrix is reloaded when tool_version_seq moves (bumped by
+a statement trigger, see migration 0014), checked at most once per
+refresh interval. Until the index is loaded, or when a search fails,
+select_topk falls back to the pgvector query.
+
+Usage:
+    from shared.vector_index import get_selector_vector_index
+
+    index = get_selector_vector_index()
+    await index.load(conn)                                  # at startup
+    rows = await index.search(conn, embed_128(query), ["linux"], k=8)
+    if rows is None:
+        ...  # not loaded or failed: run the pgvector query
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LOAD_QUERY = """
+    SELECT key, name, LEFT(short_desc,160) AS short_desc, platform, tags,
+           embedding::real[] AS embedding, usage_count, updated_at
+    FROM tool
+"""
+
+VERSION_QUERY = "SELECT last_value, is_called FROM tool_version_seq"
+
+# Without migration 0014 the version is a fingerprint of the table
+FINGERPRINT_QUERY = "SELECT count(*), max(updated_at), sum(usage_count) FROM tool"
+UNDEFINED_TABLE = "42P01"
+
+# Scores below any cosine similarity (-1): zero vectors sort after real
+# ones (pgvector gives them a NaN distance), NULL embeddings last
+_ZERO_SCORE = np.float32(-2.0)
+_NULL_SCORE = np.float32(-3.0)
+
+
+@dataclass(frozen=True)
+class ToolMatrix:
+    """
+    Immutable tool matrix at one catalog version
+
+    Row i of `matrix` is the normalized embedding of `rows[i]`. Tools
+    sharing an embedding copy the score of its first occurrence
+    (`duplicate_rows` <- `duplicate_of`): BLAS does not guarantee
+    bit-identical dot products for identical rows, and SQL ties them
+    exactly. Searches only read it; a reload swaps in a new ToolMatrix
+    wholesale.
+    """
+
+    version: Any = None
+    matrix: np.ndarray = field(default_factory=lambda: np.zeros((0, 128), dtype=np.float32))
+    duplicate_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    duplicate_of: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    sentinel_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))  # NULL / zero embeddings
+    sentinel_scores: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    usage_count: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    updated_at: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    platforms: Dict[str, np.ndarray] = field(default_factory=dict)  # platform -> sorted row indices
+    rows: Tuple[Dict[str, Any], ...] = ()
+    build_ms: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the numeric arrays"""
+        arrays = (self.matrix, self.duplicate_rows, self.duplicate_of, self.sentinel_rows,
+                  self.sentinel_scores, self.usage_count, self.updated_at, *self.platforms.values())
+        return sum(a.nbytes for a in arrays)
+
+    def search(
+        self,
+        query_vec: Sequence[float],
+        platform: Optional[Sequence[str]] = None,
+        k: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k tools by cosine similarity, in the selector SQL's order
+
+        Args:
+            query_vec: Query embedding (normalized here)
+            platform: Keep tools whose platform overlaps this list (empty = all)
+            k: Number of results
+
+        Returns:
+            List of tool dicts with keys: key, name, short_desc, platform, tags
+        """
+        n = len(self.rows)
+        if n == 0 or k <= 0:
+            return []
+
+        q = np.asarray(query_vec, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        scores = self.matrix @ (q / norm if norm > 0 else q)
+        scores[self.duplicate_rows] = scores[self.duplicate_of]
+        scores[self.sentinel_rows] = self.sentinel_scores
+
+        if platform:
+            matches = [self.platforms[p] for p in platform if p in self.platforms]
+            if not matches:
+                return []
+            if len(matches) == 1:
+                eligible = matches[0]
+            else:
+                union = np.zeros(n, dtype=bool)
+                for rows in matches:
+                    union[rows] = True
+                eligible = np.flatnonzero(union)
+            scores = scores[eligible]
+        else:
+            eligible = None
+
+        # Everything scoring at least the k-th best, so ties at the cut-off
+        # are settled by usage_count / updated_at like the SQL does
+        m = len(scores)
+        if k < m:
+            kth = np.partition(scores, m - k)[m - k]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(m)
+        candidate_scores = scores[candidates]
+        if eligible is not None:
+            candidates = eligible[candidates]
+
+        order = np.lexsort((
+            -self.updated_at[candidates],
+            -self.usage_count[candidates],
+            -candidate_scores,
+        ))
+        return [dict(self.rows[i]) for i in candidates[order[:k]]]
+
+
+def _timestamp(value: Any) -> float:
+    """updated_at as epoch seconds (NULL sorts first under DESC, like Postgres)"""
+    if value is None:
+        return np.inf
+    return value.timestamp() if hasattr(value, "timestamp") else float(value)
+
+
+def build_tool_matrix(records: Sequence[Any], version: Any = None, dim: int = 128) -> ToolMatrix:
+    """
+    Build a ToolMatrix from tool rows
+
+    Args:
+        records: Rows with key, name, short_desc, platform, tags, embedding
+            (float list or None), usage_count, updated_at
+        version: Catalog version the rows were read at
+        dim: Embedding dimension
+
+    Returns:
+        ToolMatrix
+    """
+    started = time.perf_counter()
+    n = len(records)
+    matrix = np.zeros((n, dim), dtype=np.float32)
+    sentinel = np.zeros(n, dtype=np.float32)
+    usage_count = np.empty(n, dtype=np.int64)
+    updated_at = np.empty(n, dtype=np.float64)
+    platform_rows: Dict[str, List[int]] = {}
+    rows = []
+
+    for i, record in enumerate(records):
+        embedding = record["embedding"]
+        if embedding is None:
+            sentinel[i] = _NULL_SCORE
+        else:
+            matrix[i] = embedding
+        usage_count[i] = record["usage_count"] or 0
+        updated_at[i] = _timestamp(record["updated_at"])
+        for p in record["platform"] or ():
+            platform_rows.setdefault(p, []).append(i)
+        rows.append({
+            "key": record["key"],
+            "name": record["name"],
+            "short_desc": record["short_desc"],
+            "platform": record["platform"],
+            "tags": record["tags"],
+        })
+
+    norms = np.linalg.norm(matrix, axis=1)
+    sentinel[(norms == 0) & (sentinel == 0)] = _ZERO_SCORE
+    np.divide(matrix, norms[:, None], out=matrix, where=norms[:, None] > 0)
+    sentinel_rows = np.flatnonzero(sentinel)
+
+    _, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+    first_of = first[inverse.reshape(-1)]
+    duplicate_rows = np.flatnonzero(first_of != np.arange(n))
+
+    platforms = {p: np.array(indices, dtype=np.intp) for p, indices in platform_rows.items()}
+
+    return ToolMatrix(
+        version=version,
+        matrix=matrix,
+        duplicate_rows=duplicate_rows,
+        duplicate_of=first_of[duplicate_rows],
+        sentinel_rows=sentinel_rows,
+        sentinel_scores=sentinel[sentinel_rows],
+        usage_count=usage_count,
+        updated_at=updated_at,
+        platforms=platforms,
+        rows=tuple(rows),
+        build_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+class SelectorVectorIndex:
+    """
+    Current ToolMatrix plus the version check that keeps it fresh
+
+    Searches never wait for a reload: while one request reloads, the
+    others keep searching the previous matrix.
+    """
+
+    def __init__(self, refresh_interval_seconds: float = 30.0, dim: int = 128):
+        """
+        Initialize the index (empty until load)
+
+        Args:
+            refresh_interval_seconds: Minimum time between catalog version checks
+            dim: Embedding dimension
+        """
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.dim = dim
+        self._matrix: Optional[ToolMatrix] = None
+        self._next_check = 0.0
+        self._use_sequence = True
+        self._lock = asyncio.Lock()
+
+        # Statistics
+        self._loads = 0
+        self._searches = 0
+        self._fallbacks = 0
+        self._errors = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._matrix is not None
+
+    @property
+    def matrix(self) -> Optional[ToolMatrix]:
+        return self._matrix
+
+    async def get_version(self, conn) -> Any:
+        """Current catalog version (sequence, or a table fingerprint without 0014)"""
+        if self._use_sequence:
+            try:
+                row = await conn.fetchrow(VERSION_QUERY)
+                return (row["last_value"], row["is_called"])
+            except Exception as e:
+                if getattr(e, "sqlstate", None) != UNDEFINED_TABLE:
+                    raise
+                logger.warning(f"tool_version_seq missing, using table fingerprint: {e}")
+                self._use_sequence = False
+        return tuple(await conn.fetchrow(FINGERPRINT_QUERY))
+
+    async def load(self, conn) -> ToolMatrix:
+        """Read every tool and swap in a new matrix"""
+        # Version first: a write racing the load bumps it again, so the
+        # next check reloads rather than missing the change
+        version = await self.get_version(conn)
+        records = await conn.fetch(LOAD_QUERY)
+        matrix = build_tool_matrix(records, version, self.dim)
+        self._matrix = matrix
+        self._next_check = time.monotonic() + self.refresh_interval_seconds
+        self._loads += 1
+        logger.info(
+            f"Selector vector index loaded: tools={len(matrix)}, "
+            f"bytes={matrix.nbytes}, build_ms={matrix.build_ms:.1f}"
+        )
+        return matrix
+
+    async def refresh_if_changed(self, conn) -> bool:
+        """
+        Reload if the catalog version moved
+
+        Returns:
+            True if a new matrix was loaded
+        """
+        async with self._lock:
+            self._next_check = time.monotonic() + self.refresh_interval_seconds
+            current = self._matrix
+            if current is not None and await self.get_version(conn) == current.version:
+                return False
+            await self.load(conn)
+            return True
+
+    async def search(
+        self,
+        conn,
+        query_vec: Sequence[float],
+        platform: Optional[Sequence[str]] = None,
+        k: int = 8
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top-k tools from the in-process matrix
+
+        Args:
+            conn: Connection used for the (rate-limited) version check
+            query_vec: Query embedding
+            platform: Platform filter (empty = all)
+            k: Number of results
+
+        Returns:
+            Tool dicts, or None when the caller should use pgvector instead
+        """
+        if self._matrix is None:
+            self._fallbacks += 1
+            return None
+        try:
+            if time.monotonic() >= self._next_check and not self._lock.locked():
+                await self.refresh_if_changed(conn)
+            self._searches += 1
+            return self._matrix.search(query_vec, platform, k)
+        except Exception as e:
+            self._errors += 1
+            self._fallbacks += 1
+            logger.error(f"Selector vector index search failed, falling back to pgvector: {e}")
+            return None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        matrix = self._matrix
+        return {
+            "loaded": matrix is not None,
+            "tools": len(matrix) if matrix else 0,
+            "bytes": matrix.nbytes if matrix else 0,
+            "build_ms": round(matrix.build_ms, 2) if matrix else 0.0,
+            "loads": self._loads,
+            "searches": self._searches,
+            "fallbacks": self._fallbacks,
+            "errors": self._errors,
+        }
+
+
+# Global instance
+_selector_index: Optional[SelectorVectorIndex] = None
+
+
+def get_selector_vector_index() -> Optional[SelectorVectorIndex]:
+    """
+    Get or create the global selector index
+
+    Returns:
+        SelectorVectorIndex, or None when disabled with SELECTOR_VECTOR_INDEX=false
+    """
+    global _selector_index
+    if os.getenv("SELECTOR_VECTOR_INDEX", "true").lower() in ("false", "0", "no"):
+        return None
+    if _selector_index is None:
+        _selector_index = SelectorVectorIndex(
+            refresh_interval_seconds=float(os.getenv("SELECTOR_INDEX_REFRESH_SECONDS", "30"))
+        )
+    return _selector_index
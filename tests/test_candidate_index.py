@@ -0,0 +1,148 @@
+"""
+Capability Index Tests
+Inverted-index candidate enumeration: parity with the linear scan, platform
+and required-input filtering, rebuild on profile reload, and enumeration
+timings at 100 / 1k / 10k patterns
+"""
+
+import time
+
+import pytest
+
+from pipeline.stages.stage_b.candidate_enumerator import CandidateEnumerator, CapabilityIndex
+from pipeline.stages.stage_b.profile_loader import ProfileLoader
+from tests.test_catalog_snapshot import CAPABILITIES, PLATFORMS, _synthetic_tools
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _profiles(tool_count, capabilities_per_tool=1):
+    tools = _synthetic_tools(tool_count, capabilities_per_tool=capabilities_per_tool)
+    for i, tool in enumerate(tools):
+        if i % 10 == 0:
+            tool["platform"] = "multi-platform"
+        for capability in tool["capabilities"].values():
+            for pattern in capability["patterns"]:
+                pattern["required_inputs"] = [{"name": "host"}] + ([{"name": "credentials"}] if i % 3 == 0 else [])
+    return ProfileLoader()._transform_database_to_profiles(tools)
+
+
+class FakeLoader:
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.loads = 0
+
+    def load(self, force_reload=False):
+        self.loads += 1
+        return self.profiles
+
+
+def _linear_scan(profiles, required_capabilities):
+    """Matching as done before the index: every tool, capability and pattern"""
+    matches = []
+    for tool_name, tool_profile in profiles.tools.items():
+        for capability_name, capability_profile in tool_profile.capabilities.items():
+            if capability_name not in required_capabilities:
+                continue
+            for pattern_name in capability_profile.patterns:
+                matches.append((tool_name, capability_name, pattern_name))
+    return matches
+
+
+def _keys(items):
+    return [(c.tool_name, c.capability_name, c.pattern_name) for c in items]
+
+
+# ============================================================================
+# INDEX TESTS
+# ============================================================================
+
+def test_index_matches_linear_scan_order():
+    profiles = _profiles(200, capabilities_per_tool=3)
+    index = CapabilityIndex(profiles)
+    enumerator = CandidateEnumerator(FakeLoader(profiles))
+
+    for requested in (["capability_3"], ["capability_1", "capability_7", "capability_1"], ["unknown"]):
+        expected = _linear_scan(profiles, requested)
+        assert _keys(index.lookup(requested)) == expected
+        assert _keys(enumerator.enumerate_candidates(requested, {"N": 10})) == expected
+    assert index.size == 600
+
+
+def test_platform_mask_keeps_multi_platform_tools():
+    index = CapabilityIndex(_profiles(80))
+
+    linux = index.lookup(CAPABILITIES, platform="linux")
+    platforms = {index.profiles.tools[e.tool_name].platform for e in linux}
+    assert platforms == {"linux", "multi-platform"}
+    assert len(linux) == 16 + 8  # i % 4 == 0 except i % 20 == 0, plus every i % 10 == 0
+
+    # Unknown platform: only the tools that run everywhere
+    assert {index.profiles.tools[e.tool_name].platform for e in index.lookup(CAPABILITIES, platform="aix")} == {
+        "multi-platform"
+    }
+
+
+def test_required_inputs_subset_filter():
+    index = CapabilityIndex(_profiles(30))
+
+    host_only = index.lookup(CAPABILITIES, available_inputs={"host"})
+    everything = index.lookup(CAPABILITIES, available_inputs={"host", "credentials", "port"})
+    assert len(host_only) == 20
+    assert len(everything) == 30
+    assert all(e.required_inputs == frozenset({"host"}) for e in host_only)
+
+
+def test_index_rebuilt_only_when_profiles_change():
+    loader = FakeLoader(_profiles(20))
+    enumerator = CandidateEnumerator(loader)
+
+    enumerator.enumerate_candidates(["capability_0"])
+    first = enumerator._index
+    enumerator.enumerate_candidates(["capability_0"])
+    assert enumerator._index is first
+
+    # Profile reload swaps the config object
+    loader.profiles = _profiles(40)
+    candidates = enumerator.enumerate_candidates(["capability_0"])
+    assert enumerator._index is not first
+    assert len(candidates) == 1
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.parametrize("pattern_count", [100, 1000, 10000])
+def test_enumeration_benchmark(pattern_count):
+    """Matching cost before (linear scan) and after (index) per request"""
+    profiles = _profiles(pattern_count)
+    index = CapabilityIndex(profiles)
+    requests = [[CAPABILITIES[i % len(CAPABILITIES)], CAPABILITIES[(i * 7) % len(CAPABILITIES)]] for i in range(200)]
+
+    started = time.perf_counter()
+    for requested in requests:
+        _linear_scan(profiles, requested)
+    scan_us = (time.perf_counter() - started) / len(requests) * 1e6
+
+    started = time.perf_counter()
+    for requested in requests:
+        index.lookup(requested, platform=PLATFORMS[0])
+    index_us = (time.perf_counter() - started) / len(requests) * 1e6
+
+    enumerator = CandidateEnumerator(FakeLoader(profiles))
+    enumerator.enumerate_candidates(requests[0])
+    started = time.perf_counter()
+    for requested in requests[:20]:
+        enumerator.enumerate_candidates(requested, {"N": 100})
+    enumerate_ms = (time.perf_counter() - started) / 20 * 1000
+
+    print(
+        f"\n{pattern_count} patterns: scan={scan_us:.0f}us, index={index_us:.0f}us, "
+        f"index build={index.build_ms:.1f}ms, full enumerate={enumerate_ms:.2f}ms"
+    )
+
+    if pattern_count >= 1000:
+        assert index_us < scan_us
@@ -0,0 +1,221 @@
+"""
+Capability Alias Table Tests
+Variant spellings, registry/catalog precedence, bounded memo, refresh on
+catalog reload, enumerator wiring, per-request normalization cost, and the
+file-based CLI paths failing loudly without aiofiles
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import capability_management_system
+from capability_management_system import (
+    CapabilityAliasTable, CapabilityAuditor, CapabilityMigrator, CapabilityRegistry,
+    capability_lookup_key, capability_variants,
+)
+from capability_validation_hook import get_capability_hook, normalize_stage_a_capabilities
+from pipeline.stages.stage_b.candidate_enumerator import CandidateEnumerator
+from tests.test_candidate_index import FakeLoader, _profiles
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+STAGE_A_OUTPUTS = [
+    ["file_reading", "system_monitoring"],
+    ["service_management"],
+    ["File-Read", "process_monitoring", "asset_query"],
+    ["network_connectivity", "Network Tests", "credential_lookup"],
+    ["docker_management", "db_query", "capability_3"],
+    ["systemStatus", "ASSET_SEARCH", "capability_12", "unknown_capability"],
+]
+
+
+def _legacy_normalize(registry, capabilities):
+    """Per-request normalization as done before the alias table"""
+    from capability_validation_hook import CapabilityValidationHook  # imported on every request
+    normalized = []
+    for cap in capabilities:
+        if cap in registry.capabilities:
+            normalized.append(getattr(registry.capabilities[cap], '_canonical_name', cap))
+        else:
+            normalized.append(cap)
+    return normalized
+
+
+# ============================================================================
+# TABLE TESTS
+# ============================================================================
+
+def test_variants_resolve_to_canonical_names():
+    table = CapabilityRegistry().alias_table
+    cases = {
+        "file_reading": "file_reading",
+        "FILE_READING": "file_reading",
+        "file-reading": "file_reading",
+        "fileReading": "file_reading",
+        "File Reads": "file_reading",
+        "read_file": "file_reading",
+        "service_management": "service_control",
+        "Service-Managements": "service_control",
+        "db_queries": "database_query",
+        "SQL Execution": "database_query",
+        "inventory.query": "asset_query",
+        "  system_status ": "system_monitoring",
+    }
+    for name, canonical in cases.items():
+        assert table.resolve(name) == canonical, name
+    assert table.resolve("made_up") is None
+    assert table.canonicalize("made_up") == "made_up"
+
+
+def test_lookup_key_folds_spelling():
+    assert capability_lookup_key("File-Reads") == capability_lookup_key("fileRead") == "file_read"
+    assert capability_lookup_key("policies") == "policy"
+    assert capability_lookup_key("processes") == "process"
+    assert capability_lookup_key("status") == "status"
+    assert {"asset_queries", "asset-query", "AssetQuery", "assetQuery"} <= capability_variants("asset_query")
+
+
+def test_short_tokens_and_non_plurals_are_not_folded():
+    assert capability_lookup_key("dns_lookup") == "dns_lookup"
+    assert capability_lookup_key("aws_inventory") == "aws_inventory"
+    assert capability_lookup_key("list_vms") == "list_vms"
+    assert capability_lookup_key("kubernetes_deploys") == "kubernetes_deploy"
+    assert capability_lookup_key("dn_lookup") != capability_lookup_key("dns_lookup")
+
+    table = CapabilityRegistry().build_alias_table(["dns_lookup", "dn_lookup"])
+    assert table.resolve("DNS-Lookup") == "dns_lookup"
+    assert table.resolve("dn_lookups") == "dn_lookup"
+
+
+def test_only_exact_names_and_aliases_are_valid():
+    registry = CapabilityRegistry()
+    for name in ("file_reading", "read_file", "service_management", "db_query"):
+        assert registry.is_valid_capability(name), name
+    for name in ("File-Reads", "fileReading", "db_queries", "SQL Execution", "made_up"):
+        assert not registry.is_valid_capability(name), name
+
+    # Loose spellings still get a canonical suggestion
+    assert registry.get_canonical_name("db_queries") == "database_query"
+    assert registry.get_canonical_name("made_up") == "made_up"
+
+    validator = capability_management_system.CapabilityValidator(registry, "postgresql://unused")
+    valid, issues = asyncio.run(validator.validate_new_tool({"capabilities": [{"capability_name": "File-Reads"}]}))
+    assert not valid and issues == [
+        "Invalid capability 'File-Reads' - not in canonical registry",
+        "Use canonical name 'file_reading' instead of 'File-Reads'",
+    ]
+
+
+def test_catalog_names_are_canonical_unless_registry_knows_them():
+    registry = CapabilityRegistry()
+    table = registry.build_alias_table(["capability_1", "Service_Management", "log_shipping"])
+
+    assert table.resolve("Capability-1") == "capability_1"
+    assert table.resolve("log shippings") == "log_shipping"
+    # Registry spellings win over the catalog's spelling
+    assert table.resolve("Service_Management") == "service_control"
+    assert table.catalog_capabilities == {"capability_1", "Service_Management", "log_shipping"}
+    assert registry.alias_table.resolve("log_shipping") is None
+
+
+def test_unseen_strings_are_memoized_and_bounded():
+    table = CapabilityAliasTable.build(CapabilityRegistry(), memo_size=3)
+    for name in ["FILE__READING!", "x1", "x2", "x3", "x4"]:
+        table.resolve(name)
+    assert len(table._memo) == 3
+    assert "FILE__READING!" not in table._memo
+    assert table.resolve("FILE__READING!") == "file_reading"
+
+
+# ============================================================================
+# HOOK AND ENUMERATOR TESTS
+# ============================================================================
+
+def test_hook_refreshes_only_when_catalog_names_change():
+    hook = get_capability_hook()
+    first = hook.refresh_alias_table(["capability_1", "capability_2"])
+    assert hook.refresh_alias_table(["capability_2", "capability_1"]) is first
+
+    second = hook.refresh_alias_table(["capability_1", "capability_2", "capability_3"])
+    assert second is not first and hook.alias_table is second
+    assert normalize_stage_a_capabilities(["Capability-3", "File Reads", "nope"]) == [
+        "capability_3", "file_reading", "nope",
+    ]
+
+
+def test_enumerator_normalizes_through_index_table():
+    loader = FakeLoader(_profiles(40))
+    enumerator = CandidateEnumerator(loader)
+
+    exact = enumerator.enumerate_candidates(["capability_1"], {"N": 10})
+    variant = enumerator.enumerate_candidates(["Capability-1", "CAPABILITIES_1"], {"N": 10})
+    assert exact and [c.tool_name for c in variant] == [c.tool_name for c in exact]
+
+    # Catalog reload with a new capability: the table follows
+    profiles = _profiles(40)
+    tool = next(iter(profiles.tools.values()))
+    tool.capabilities["log_shipping"] = tool.capabilities.pop(next(iter(tool.capabilities)))
+    loader.profiles = profiles
+    assert enumerator.enumerate_candidates(["Log Shippings"], {"N": 10})
+    assert "log_shipping" in enumerator._index.alias_table.catalog_capabilities
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_file_paths_require_aiofiles(monkeypatch):
+    monkeypatch.setattr(capability_management_system, "aiofiles", None)
+    registry = CapabilityRegistry()
+    auditor = CapabilityAuditor(registry, "postgresql://unused")
+    migrator = CapabilityMigrator(registry, "postgresql://unused")
+
+    for call in (
+        auditor._audit_optimization_profiles(),
+        auditor._audit_stage_a_capabilities(),
+        migrator._migrate_optimization_profiles(dry_run=True),
+        migrator._generate_stage_a_training_data(dry_run=False),
+    ):
+        with pytest.raises(ImportError, match="aiofiles"):
+            asyncio.run(call)
+    # A dry run writes nothing and does not need aiofiles
+    assert asyncio.run(migrator._generate_stage_a_training_data(dry_run=True)) > 0
+
+
+def test_normalization_benchmark():
+    """Per-request normalization: registry lookups per call vs compiled table"""
+    registry = CapabilityRegistry()
+    enumerator = CandidateEnumerator(FakeLoader(_profiles(100)))
+    index = enumerator._get_index()
+    requests = STAGE_A_OUTPUTS * 2000
+
+    started = time.perf_counter()
+    for capabilities in requests:
+        _legacy_normalize(registry, capabilities)
+    legacy_us = (time.perf_counter() - started) / len(requests) * 1e6
+
+    started = time.perf_counter()
+    for capabilities in requests:
+        [capability_lookup_key(c) for c in capabilities]
+    heuristic_us = (time.perf_counter() - started) / len(requests) * 1e6
+
+    started = time.perf_counter()
+    for capabilities in requests:
+        index.normalize(capabilities)
+    table_us = (time.perf_counter() - started) / len(requests) * 1e6
+
+    print(
+        f"\n{len(requests)} Stage A outputs, us/request: registry lookups={legacy_us:.2f}, "
+        f"string folding={heuristic_us:.2f}, alias table={table_us:.2f}"
+    )
+
+    assert index.normalize(STAGE_A_OUTPUTS[3]) == [
+        "network_connectivity", "network_connectivity", "credential_access",
+    ]
+    assert table_us < legacy_us
+    assert table_us < heuristic_us / 3
@@ -0,0 +1,433 @@
+"""
+Tool Catalog Change Listener Tests
+NOTIFY payload handling, exact LRU invalidation, per-tool snapshot patching,
+reconnect resync and a two-process propagation test against Postgres
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import uuid
+
+import pytest
+
+from pipeline.services.catalog_listener import CATALOG_CHANNEL, CatalogChange, CatalogChangeListener
+from pipeline.services.catalog_snapshot import CatalogSnapshotCache, build_snapshot, patch_snapshot
+from pipeline.services.hot_reload_service import HotReloadService, ReloadTrigger
+from pipeline.services.lru_cache import LRUCache
+from tests.test_catalog_snapshot import FakeCatalog, _sample_tools, _synthetic_tools
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class FakeConnection:
+    """asyncpg-compatible LISTEN connection driven by the test"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.closed = False
+        self.broken = False
+
+    async def add_listener(self, channel, callback):
+        assert channel == CATALOG_CHANNEL
+        self.callbacks.append(callback)
+
+    async def execute(self, query):
+        if self.broken:
+            raise ConnectionError("connection lost")
+
+    async def close(self):
+        self.closed = True
+
+    def notify(self, change):
+        payload = change if isinstance(change, str) else change.to_payload()
+        for callback in self.callbacks:
+            callback(self, 4242, CATALOG_CHANNEL, payload)
+
+
+class FakeConnector:
+    def __init__(self):
+        self.connections = []
+
+    async def __call__(self, database_url):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+
+def _names(entries):
+    return [t["tool_name"] for t in entries]
+
+
+def _index_names(snapshot):
+    return {
+        name: {key: _names(values) for key, values in getattr(snapshot, name).items()}
+        for name in ("by_capability", "by_capability_platform", "by_platform", "by_category", "by_tag")
+    }
+
+
+def _populated_cache():
+    cache = LRUCache(max_size=100, default_ttl=300)
+    for key in (
+        "tool:Systemctl:latest", "tool:sc:latest", "tool:ping:1.0",
+        "capability:service_control:all", "capability:service_control:linux",
+        "capability:service_status:all", "capability:reachability:all",
+        "all_tools_structure:all:all:active",
+    ):
+        cache.set(key, ["cached"])
+    return cache
+
+
+# ============================================================================
+# PAYLOAD TESTS
+# ============================================================================
+
+def test_payload_round_trip_and_rejects_garbage():
+    change = CatalogChange(tool_name="Systemctl", version=12, table="tool_patterns",
+                           operation="INSERT", tool_id=1, capability_name="service_status")
+    assert CatalogChange.from_payload(change.to_payload()) == change
+    assert CatalogChange.from_payload('{"tool_name": null, "version": 3, "op": "TRUNCATE"}').tool_name is None
+
+    for payload in ("not json", '{"tool_name": "x"}', "[]"):
+        with pytest.raises(ValueError):
+            CatalogChange.from_payload(payload)
+
+
+def test_statement_payload_lists_every_tool():
+    payload = json.dumps({
+        "changes": [
+            {"tool_name": "ping", "tool_id": 3, "capability_name": "reachability"},
+            {"tool_name": "sc", "tool_id": 2, "capability_name": None},
+        ],
+        "version": 7, "table": "tool_capabilities", "op": "DELETE",
+    })
+    assert CatalogChange.list_from_payload(payload) == [
+        CatalogChange(tool_name="ping", version=7, table="tool_capabilities", operation="DELETE",
+                      tool_id=3, capability_name="reachability"),
+        CatalogChange(tool_name="sc", version=7, table="tool_capabilities", operation="DELETE", tool_id=2),
+    ]
+
+    unlisted = '{"changes": null, "version": 8, "table": "tools", "op": "TRUNCATE"}'
+    assert CatalogChange.list_from_payload(unlisted) == [
+        CatalogChange(tool_name=None, version=8, table="tools", operation="TRUNCATE"),
+    ]
+    single = CatalogChange(tool_name="ping", version=9)
+    assert CatalogChange.list_from_payload(single.to_payload()) == [single]
+
+    for payload in ("not json", '{"changes": [{}], "version": 1}', '{"changes": 3, "version": 1}'):
+        with pytest.raises(ValueError):
+            CatalogChange.list_from_payload(payload)
+
+
+# ============================================================================
+# INVALIDATION TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_change_invalidates_only_affected_entries():
+    catalog = FakeCatalog(_sample_tools())
+    snapshot_cache = CatalogSnapshotCache(catalog.load_tools, catalog.get_version, enable_background_refresh=False)
+    snapshot_cache.load()
+    cache = _populated_cache()
+    listener = CatalogChangeListener(cache=cache, snapshot_cache=snapshot_cache)
+
+    listener.handle_change(CatalogChange(tool_name="Systemctl", version=2, table="tools"))
+
+    # Systemctl's own entry, its capabilities (from the snapshot) and the
+    # aggregate structure go; other tools and capabilities survive
+    assert sorted(cache._cache) == [
+        "capability:reachability:all", "tool:ping:1.0", "tool:sc:latest",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unknown_tool_clears_all_capability_entries():
+    cache = _populated_cache()
+    listener = CatalogChangeListener(cache=cache)
+
+    listener.handle_change(CatalogChange(tool_name="newtool", version=2, table="tools", operation="INSERT"))
+    assert sorted(cache._cache) == ["tool:Systemctl:latest", "tool:ping:1.0", "tool:sc:latest"]
+
+    cache = _populated_cache()
+    listener = CatalogChangeListener(cache=cache)
+    listener.handle_change(CatalogChange(tool_name=None, version=3, table="tools", operation="TRUNCATE"))
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_child_table_change_uses_payload_capability():
+    cache = _populated_cache()
+    listener = CatalogChangeListener(cache=cache)
+
+    listener.handle_change(CatalogChange(
+        tool_name="ping", version=2, table="tool_capabilities",
+        operation="INSERT", capability_name="reachability",
+    ))
+    assert "capability:reachability:all" not in cache._cache
+    assert "capability:service_control:all" in cache._cache
+    assert "tool:ping:1.0" not in cache._cache
+
+
+# ============================================================================
+# SNAPSHOT PATCH TESTS
+# ============================================================================
+
+def test_patch_matches_full_rebuild():
+    tools = _sample_tools()
+    snapshot = build_snapshot(tools, version=1)
+
+    changed = dict(tools[0], platform="multi-platform", capabilities={
+        "service_status": tools[0]["capabilities"]["service_status"],
+    })
+    added = dict(tools[2], tool_id=4, tool_name="curl", metadata={"tags": ["reachability"]})
+    patched = patch_snapshot(snapshot, ["systemctl", "sc", "curl"], [changed, added], version=2)
+
+    expected = build_snapshot([changed, tools[2], added], version=2)
+    assert _names(patched.ordered) == _names(expected.ordered) == ["Systemctl", "curl", "ping"]
+    assert _index_names(patched) == _index_names(expected)
+    assert patched.get_tool("SC") is None
+    # The previous snapshot is untouched
+    assert len(snapshot) == 3 and snapshot.get_tool("sc") is not None
+    assert _names(snapshot.tools_for_capability("service_control")) == ["Systemctl", "sc"]
+
+
+def test_named_refresh_patches_without_full_load():
+    catalog = FakeCatalog(_sample_tools())
+    loaded_by_name = []
+
+    def load_tools_by_name(names):
+        loaded_by_name.append(names)
+        return [dict(t) for t in catalog.tools if t["tool_name"].lower() in names]
+
+    snapshot_cache = CatalogSnapshotCache(
+        catalog.load_tools, catalog.get_version, refresh_interval_seconds=3600,
+        load_tools_by_name=load_tools_by_name,
+    )
+    try:
+        snapshot_cache.load()
+        catalog.tools = [t for t in catalog.tools if t["tool_name"] != "sc"]
+        catalog.version = 2
+        snapshot_cache.request_refresh("sc", version=2)
+
+        deadline = time.time() + 2
+        while snapshot_cache.version != 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert snapshot_cache.version == 2
+        assert snapshot_cache.snapshot.get_tool("sc") is None
+        assert loaded_by_name == [["sc"]]
+        assert catalog.loads == 1
+    finally:
+        snapshot_cache.stop()
+
+
+def test_patch_keeps_the_notified_version_so_polling_catches_other_changes():
+    catalog = FakeCatalog(_sample_tools())
+    snapshot_cache = CatalogSnapshotCache(
+        catalog.load_tools, catalog.get_version, enable_background_refresh=False,
+        load_tools_by_name=lambda names: [dict(t) for t in catalog.tools if t["tool_name"].lower() in names],
+    )
+    snapshot_cache.load()
+
+    # Version 2 dropped sc (notified); version 3 changed ping, notification not yet seen
+    catalog.tools = [t for t in catalog.tools if t["tool_name"] != "sc"]
+    catalog.tools = [dict(t, platform="multi-platform") if t["tool_name"] == "ping" else t for t in catalog.tools]
+    catalog.version = 3
+
+    snapshot_cache.refresh_tools(["sc"], version=2)
+    assert snapshot_cache.version == 2
+    assert snapshot_cache.snapshot.get_tool("ping")["platform"] != "multi-platform"
+
+    assert snapshot_cache.refresh_if_changed() is True
+    assert snapshot_cache.version == 3 and catalog.loads == 2
+    assert snapshot_cache.snapshot.get_tool("ping")["platform"] == "multi-platform"
+
+    # Without a notification version the snapshot keeps its own
+    snapshot_cache.refresh_tools(["ping"])
+    assert snapshot_cache.version == 3
+
+
+def test_single_tool_patch_benchmark():
+    """One changed tool against a 50k-tool snapshot: patch vs full rebuild"""
+    tools = _synthetic_tools(50000)
+    snapshot = build_snapshot(tools, version=1)
+    changed = dict(tools[1234], description="updated")
+
+    started = time.perf_counter()
+    patched = patch_snapshot(snapshot, [changed["tool_name"]], [changed], version=2)
+    patch_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n50000 tools: full build={snapshot.build_ms:.1f}ms, single-tool patch={patch_ms:.1f}ms")
+
+    assert patched.get_tool(changed["tool_name"])["description"] == "updated"
+    assert len(patched) == 50000
+    assert patch_ms < snapshot.build_ms / 5
+
+
+# ============================================================================
+# LISTENER LIFECYCLE TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_notifications_coalesce_hot_reloads():
+    events = []
+    reload_service = HotReloadService()
+    reload_service.register_reload_handler(lambda event: events.append((event.trigger, event.tool_name)))
+
+    connector = FakeConnector()
+    listener = CatalogChangeListener(connect=connector, reload_service=reload_service)
+    await listener.start(wait_connected=True)
+    try:
+        connection = connector.connections[0]
+        for version, table in enumerate(("tools", "tool_capabilities", "tool_patterns"), start=1):
+            connection.notify(CatalogChange(tool_name="ping", version=version, table=table))
+        connection.notify(CatalogChange(tool_name="sc", version=4))
+        connection.notify(json.dumps({
+            "changes": [{"tool_name": "sc", "tool_id": 2, "capability_name": None},
+                        {"tool_name": "curl", "tool_id": 4, "capability_name": None}],
+            "version": 5, "table": "tools", "op": "UPDATE",
+        }))
+        await listener._reload_task
+
+        # Five notifications (the last one a two-tool statement), one reload per tool
+        assert events == [(ReloadTrigger.NOTIFY, "curl"), (ReloadTrigger.NOTIFY, "ping"), (ReloadTrigger.NOTIFY, "sc")]
+        assert listener.get_statistics()["last_version"] == 5
+    finally:
+        await listener.stop()
+    assert connection.closed
+
+
+@pytest.mark.asyncio
+async def test_reconnect_invalidates_everything():
+    cache = _populated_cache()
+    connector = FakeConnector()
+    listener = CatalogChangeListener(
+        cache=cache, connect=connector, keepalive_seconds=0.01, reconnect_delay_seconds=0.01,
+    )
+    await listener.start(wait_connected=True)
+    try:
+        assert len(cache) == 8  # First connect only checks the snapshot version
+        connector.connections[0].broken = True
+
+        deadline = time.time() + 2
+        while len(connector.connections) < 2 or not listener.connected:
+            assert time.time() < deadline
+            await asyncio.sleep(0.01)
+
+        assert len(cache) == 0
+        assert listener.get_statistics()["connections"] == 2
+    finally:
+        await listener.stop()
+
+
+# ============================================================================
+# TWO-PROCESS PROPAGATION (requires Postgres with migration 0010)
+# ============================================================================
+
+TEST_DATABASE_URL = os.getenv("TOOL_CATALOG_TEST_DATABASE_URL")
+
+
+def _listener_process(database_url, ready, received):
+    """Replica B: keep a cached entry for the tool and report when it is invalidated"""
+
+    async def run():
+        cache = LRUCache(max_size=10, default_ttl=300)
+        listener = CatalogChangeListener(database_url=database_url, cache=cache)
+        handle_change = listener.handle_change
+
+        def timed_handle_change(change):
+            handle_change(change)
+            received.put((time.time(), change.tool_name, change.operation))
+
+        listener.handle_change = timed_handle_change
+        await listener.start(wait_connected=True)
+        ready.set()
+        await asyncio.sleep(10)
+        await listener.stop()
+
+    asyncio.run(run())
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TOOL_CATALOG_TEST_DATABASE_URL not set")
+def test_two_process_propagation_under_100ms():
+    import psycopg2
+
+    context = multiprocessing.get_context("spawn")
+    ready, received = context.Event(), context.Queue()
+    replica = context.Process(target=_listener_process, args=(TEST_DATABASE_URL, ready, received), daemon=True)
+    replica.start()
+    assert ready.wait(timeout=10)
+
+    tool_name = f"notify_probe_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    latencies = []
+    try:
+        with conn.cursor() as cursor:
+            statements = [
+                ("INSERT", "INSERT INTO tool_catalog.tools (tool_name, version, description, platform, category) "
+                           "VALUES (%s, '1.0', 'probe', 'linux', 'system')"),
+                ("UPDATE", "UPDATE tool_catalog.tools SET description = 'probe v2' WHERE tool_name = %s"),
+                ("DELETE", "DELETE FROM tool_catalog.tools WHERE tool_name = %s"),
+            ]
+            for operation, statement in statements:
+                cursor.execute(statement, (tool_name,))
+                committed_at = time.time()
+                conn.commit()
+                received_at, name, op = received.get(timeout=5)
+                assert (name, op) == (tool_name, operation)
+                latencies.append(received_at - committed_at)
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM tool_catalog.tools WHERE tool_name = %s", (tool_name,))
+        conn.commit()
+        conn.close()
+        replica.terminate()
+
+    print(f"\nNOTIFY propagation: {', '.join(f'{l * 1000:.1f}ms' for l in latencies)}")
+    assert max(latencies) < 0.1
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TOOL_CATALOG_TEST_DATABASE_URL not set")
+def test_bulk_write_sends_one_notification_per_statement():
+    import psycopg2
+
+    prefix = f"notify_bulk_{uuid.uuid4().hex[:8]}"
+    names = [f"{prefix}_{i}" for i in range(50)]
+    listen = psycopg2.connect(TEST_DATABASE_URL)
+    listen.autocommit = True
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with listen.cursor() as cursor:
+            cursor.execute(f"LISTEN {CATALOG_CHANNEL}")
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT last_value FROM tool_catalog.catalog_version_seq")
+            version_before = cursor.fetchone()[0]
+            cursor.execute(
+                "INSERT INTO tool_catalog.tools (tool_name, version, description, platform, category) "
+                "SELECT name, '1.0', 'probe', 'linux', 'system' FROM unnest(%s::text[]) AS name",
+                (names,),
+            )
+            cursor.execute("UPDATE tool_catalog.tools SET description = 'probe v2' WHERE tool_name LIKE %s",
+                           (f"{prefix}_%",))
+        conn.commit()
+
+        deadline = time.time() + 5
+        while len(listen.notifies) < 2 and time.time() < deadline:
+            listen.poll()
+            time.sleep(0.01)
+        time.sleep(0.1)
+        listen.poll()
+
+        changes = [CatalogChange.list_from_payload(n.payload) for n in listen.notifies]
+        assert [c[0].operation for c in changes] == ["INSERT", "UPDATE"]
+        assert [sorted(change.tool_name for change in c) for c in changes] == [sorted(names)] * 2
+        assert [c[0].version for c in changes] == [version_before + 1, version_before + 2]
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM tool_catalog.tools WHERE tool_name LIKE %s", (f"{prefix}_%",))
+        conn.commit()
+        conn.close()
+        listen.close()
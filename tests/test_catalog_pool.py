@@ -0,0 +1,411 @@
+"""
+Catalog Connection Pool Tests
+Idle pre-ping, max-lifetime recycling, prepared statements, waiting instead
+of failing when exhausted, ToolCatalogService wrappers and a 200-way
+concurrency benchmark against simulated round trips
+"""
+
+import asyncio
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from pipeline.services.catalog_pool import (
+    AsyncCatalogConnectionPool, CatalogConnectionPool, PoolConfig,
+)
+from pipeline.services.tool_catalog_service import ToolCatalogService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+TOOL_ROW = {"id": 1, "tool_name": "systemctl", "version": "1.0", "is_latest": True, "enabled": True}
+
+CAPABILITY_ROWS = [
+    {
+        "tool_id": 1, "tool_name": "systemctl", "version": "1.0", "tool_description": "d",
+        "platform": "linux", "category": "system", "defaults": {}, "dependencies": [], "metadata": {},
+        "capability_id": 10, "capability_name": "service_control", "capability_description": "c",
+        "pattern_id": 100 + i, "pattern_name": f"pattern_{i}", "pattern_description": "p",
+        "typical_use_cases": [], "time_estimate_ms": "100", "cost_estimate": "1", "complexity_score": 0.3,
+        "scope": "single_item", "completeness": "complete", "limitations": [], "policy": {},
+        "preference_match": {}, "required_inputs": [], "expected_outputs": [],
+    }
+    for i in range(2)
+]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.round_trip()
+        self.conn.statements.append(sql.split()[0] if sql.split()[0] != "EXECUTE" else sql.split()[1])
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        if "tool_capabilities" in sql or "catalog_tools_by_capability" in sql:
+            self.rows = [dict(row) for row in CAPABILITY_ROWS]
+        elif "tools" in sql or "catalog_tool_" in sql:
+            self.rows = [dict(TOOL_ROW)]
+        else:
+            self.rows = [(1,)]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    """psycopg2-like connection; every execute is one simulated round trip"""
+
+    def __init__(self, rtt=0.0):
+        self.rtt = rtt
+        self.statements = []
+        self.broken = False
+        self.closed = 0
+        self.rollbacks = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def round_trip(self):
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnector:
+    def __init__(self, rtt=0.0):
+        self.rtt = rtt
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection(self.rtt)
+        self.connections.append(conn)
+        return conn
+
+
+class FakeStatement:
+    def __init__(self, conn, sql):
+        self.conn = conn
+        self.sql = sql
+
+    async def fetch(self, *args):
+        await self.conn.round_trip()
+        return self.conn.rows_for(self.sql)
+
+
+class FakeAsyncConnection:
+    """asyncpg-like connection with simulated round trips and planning cost"""
+
+    def __init__(self, rtt, plan_cost):
+        self.rtt = rtt
+        self.plan_cost = plan_cost
+        self.pings = 0
+        self.prepares = 0
+        self.queries = 0
+        self._closed = False
+
+    async def round_trip(self, extra=0.0):
+        self.queries += 1
+        await asyncio.sleep(self.rtt + extra)
+
+    def rows_for(self, sql):
+        if "tool_capabilities" in sql:
+            return [dict(row) for row in CAPABILITY_ROWS]
+        return [dict(TOOL_ROW)]
+
+    async def fetchval(self, sql):
+        self.pings += 1
+        await self.round_trip()
+        return 1
+
+    async def prepare(self, sql):
+        self.prepares += 1
+        await self.round_trip(self.plan_cost)
+        return FakeStatement(self, sql)
+
+    async def fetch(self, sql, *args):
+        # Unprepared: parsed and planned on every execution
+        await self.round_trip(self.plan_cost)
+        return self.rows_for(sql)
+
+    def is_closed(self):
+        return self._closed
+
+    async def close(self):
+        self._closed = True
+
+    def terminate(self):
+        self._closed = True
+
+
+def _async_connector(rtt=0.0, plan_cost=0.0):
+    connections = []
+
+    async def connect():
+        conn = FakeAsyncConnection(rtt, plan_cost)
+        connections.append(conn)
+        return conn
+
+    return connect, connections
+
+
+def _pool(connector=None, metrics=None, **config):
+    config.setdefault("min_size", 1)
+    return CatalogConnectionPool("postgresql://unused", PoolConfig(**config),
+                                 connect=connector or FakeConnector(), metrics=metrics)
+
+
+# ============================================================================
+# SYNC POOL TESTS
+# ============================================================================
+
+def test_fresh_connections_are_not_pinged():
+    pool = _pool(idle_check_seconds=30)
+    for _ in range(5):
+        conn = pool.getconn()
+        pool.putconn(conn)
+    assert conn.statements == []
+    assert pool.get_statistics()["pings"] == 0
+
+
+def test_idle_connection_is_pinged_and_replaced_when_dead():
+    connector = FakeConnector()
+    pool = _pool(connector, idle_check_seconds=0)
+
+    conn = pool.getconn()
+    assert conn.statements == ["SELECT"]
+    pool.putconn(conn)
+
+    conn.broken = True
+    replacement = pool.getconn()
+    assert replacement is not conn and conn.closed
+    stats = pool.get_statistics()
+    assert (stats["pings"], stats["ping_failures"], stats["created"]) == (2, 1, 2)
+
+
+def test_connections_are_recycled_after_max_lifetime():
+    connector = FakeConnector()
+    pool = _pool(connector, max_lifetime_seconds=60)
+    conn = pool.getconn()
+    pool.putconn(conn)
+
+    pool._idle[0].created_at -= 61
+    assert pool.getconn() is not conn
+    assert conn.closed and pool.get_statistics()["recycled"] == 1
+
+
+def test_statements_are_prepared_once_per_connection():
+    pool = _pool()
+    conn = pool.getconn()
+    with conn.cursor() as cursor:
+        for _ in range(3):
+            pool.execute_prepared(conn, cursor, "catalog_tool_latest", ("systemctl",))
+        assert cursor.fetchone()["tool_name"] == "systemctl"
+    assert conn.statements == ["PREPARE", "catalog_tool_latest", "catalog_tool_latest", "catalog_tool_latest"]
+
+    # Returned and checked out again: still prepared on this session
+    pool.putconn(conn)
+    conn = pool.getconn()
+    with conn.cursor() as cursor:
+        pool.execute_prepared(conn, cursor, "catalog_tool_latest", ("systemctl",))
+    assert conn.statements[-1] == "catalog_tool_latest" and conn.statements.count("PREPARE") == 1
+
+
+def test_lost_prepared_statement_is_prepared_again():
+    pool = _pool()
+    conn = pool.getconn()
+    pool._in_use[id(conn)].prepared["catalog_tool_latest"] = True  # e.g. after DISCARD ALL
+
+    calls = []
+    original = FakeCursor.execute
+
+    def execute(cursor, sql, params=None):
+        calls.append(sql.split()[0])
+        if sql.startswith("EXECUTE") and calls.count("EXECUTE") == 1:
+            raise psycopg2.errors.InvalidSqlStatementName("prepared statement does not exist")
+        original(cursor, sql, params)
+
+    FakeCursor.execute = execute
+    try:
+        with conn.cursor() as cursor:
+            pool.execute_prepared(conn, cursor, "catalog_tool_latest", ("systemctl",))
+    finally:
+        FakeCursor.execute = original
+    assert calls == ["EXECUTE", "DEALLOCATE", "PREPARE", "EXECUTE"]
+
+
+def test_release_rolls_back_open_transaction():
+    pool = _pool()
+    conn = pool.getconn()
+    with conn.cursor() as cursor:
+        pool.execute_prepared(conn, cursor, "catalog_tool_latest", ("systemctl",))
+    pool.putconn(conn)
+    assert conn.rollbacks == 1 and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+def test_exhausted_pool_waits_and_records_wait():
+    pool = _pool(min_size=0, max_size=1, acquire_timeout_seconds=2)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+
+    assert pool.getconn() is conn
+    assert pool.get_statistics()["acquire_wait_ms"]["max"] >= 40
+
+    blocked = _pool(min_size=0, max_size=1, acquire_timeout_seconds=0.01)
+    blocked.getconn()
+    with pytest.raises(psycopg2.pool.PoolError):
+        blocked.getconn()
+
+
+# ============================================================================
+# SERVICE TESTS
+# ============================================================================
+
+def _service(monkeypatch):
+    monkeypatch.setenv("TOOL_CATALOG_SNAPSHOT_ENABLED", "false")
+    service = ToolCatalogService("postgresql://unused")
+    service._pool = _pool(metrics=service.metrics)
+    service._cache.clear()
+    return service
+
+
+def test_service_wrappers_use_prepared_statements(monkeypatch):
+    service = _service(monkeypatch)
+    waits_before = service.metrics.get_metrics()["database"]["pool_wait_ms"]["count"]
+
+    assert service.get_tool_by_name("systemctl", use_cache=False)["tool_name"] == "systemctl"
+    tools = service.get_tools_by_capability("service_control", platform="linux", use_cache=False)
+    assert [p["pattern_name"] for p in tools[0]["capabilities"]["service_control"]["patterns"]] == [
+        "pattern_0", "pattern_1",
+    ]
+
+    conn = service._pool._idle[0].conn
+    assert conn.statements == [
+        "PREPARE", "catalog_tool_latest", "PREPARE", "catalog_tools_by_capability_platform",
+    ]
+    assert service._pool.get_statistics()["in_use"] == 0
+    assert service.metrics.get_metrics()["database"]["pool_wait_ms"]["count"] == waits_before + 2
+
+
+@pytest.mark.asyncio
+async def test_async_wrappers_share_cache_and_prepare_once(monkeypatch):
+    service = _service(monkeypatch)
+    connect, connections = _async_connector()
+    service._async_pool = AsyncCatalogConnectionPool("postgresql://unused", PoolConfig(), connect=connect)
+
+    tool = await service.get_tool_by_name_async("systemctl", use_cache=False)
+    await service.get_tool_by_name_async("systemctl", use_cache=False)
+    tools = await service.get_tools_by_capability_async("service_control")
+    assert tool["tool_name"] == "systemctl"
+    assert tools == service._group_capability_rows(CAPABILITY_ROWS)
+
+    # Cached by the async path, served by the sync wrapper
+    assert service.get_tools_by_capability("service_control") == tools
+    assert len(connections) == 1 and connections[0].prepares == 2 and connections[0].pings == 0
+
+    service.close()
+    assert service._async_pool is None and connections[0].is_closed()
+
+
+# ============================================================================
+# ASYNC POOL TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_async_pool_pings_only_after_idle_and_recycles():
+    connect, connections = _async_connector()
+    pool = AsyncCatalogConnectionPool(
+        "postgresql://unused", PoolConfig(idle_check_seconds=30, max_lifetime_seconds=60), connect=connect
+    )
+    for _ in range(3):
+        await pool.fetchrow("catalog_tool_latest", "systemctl")
+    assert connections[0].pings == 0
+
+    pool._idle[0].last_used_at -= 31
+    await pool.fetchrow("catalog_tool_latest", "systemctl")
+    assert connections[0].pings == 1
+
+    pool._idle[0].created_at -= 61
+    await pool.fetchrow("catalog_tool_latest", "systemctl")
+    stats = pool.get_statistics()
+    assert len(connections) == 2 and connections[0].is_closed()
+    assert (stats["recycled"], stats["checkouts"], stats["in_use"]) == (1, 5, 0)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+async def _run_load(pool, concurrency=200, requests_per_task=5):
+    latencies = []
+
+    async def worker(i):
+        for _ in range(requests_per_task):
+            started = time.perf_counter()
+            await pool.fetchrow("catalog_tool_latest", f"tool_{i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+class LegacyPool(AsyncCatalogConnectionPool):
+    """Previous behaviour: SELECT 1 on every checkout, unprepared queries"""
+
+    def __init__(self, connect):
+        super().__init__("postgresql://unused", PoolConfig(idle_check_seconds=0, prepared_statements=False),
+                         connect=connect)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_benchmark():
+    """200 concurrent lookups, 2 ms simulated RTT, 1 ms planning per unprepared query"""
+    legacy_connect, _ = _async_connector(rtt=0.002, plan_cost=0.001)
+    legacy = LegacyPool(legacy_connect)
+    pooled_connect, _ = _async_connector(rtt=0.002, plan_cost=0.001)
+    pooled = AsyncCatalogConnectionPool("postgresql://unused", PoolConfig(), connect=pooled_connect)
+
+    legacy_qps, legacy_p99 = await _run_load(legacy)
+    pooled_qps, pooled_p99 = await _run_load(pooled)
+
+    stats = pooled.get_statistics()
+    print(
+        f"\n200 concurrent, 1000 lookups: legacy {legacy_qps:.0f} qps p99={legacy_p99:.1f}ms; "
+        f"pooled {pooled_qps:.0f} qps p99={pooled_p99:.1f}ms; "
+        f"acquire wait p99={stats['acquire_wait_ms']['p99']:.1f}ms, pings={stats['pings']}"
+    )
+
+    assert stats["pings"] == 0 and stats["created"] == 20
+    assert legacy.get_statistics()["pings"] == 1000 - 20  # every reuse of the 20 connections
+    assert pooled_qps > legacy_qps * 1.5
+    assert pooled_p99 < legacy_p99
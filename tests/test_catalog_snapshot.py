@@ -0,0 +1,254 @@
+"""
+Tool Catalog Snapshot Tests
+Inverted indexes, copy-on-write refresh, ToolCatalogService integration and
+build benchmarks at 500 / 5k / 50k tools
+"""
+
+import time
+import tracemalloc
+
+import pytest
+
+from pipeline.services.catalog_snapshot import CatalogSnapshotCache, build_snapshot
+from pipeline.services.tool_catalog_service import ToolCatalogService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+PLATFORMS = ["linux", "windows", "network", "custom"]
+CATEGORIES = ["system", "network", "monitoring", "security"]
+CAPABILITIES = [f"capability_{i}" for i in range(40)]
+
+
+def _pattern(index):
+    return {
+        "pattern_id": index,
+        "pattern_name": f"pattern_{index}",
+        "description": "synthetic pattern",
+        "typical_use_cases": ["check status"],
+        "time_estimate_ms": "100 + 2 * N",
+        "cost_estimate": "1",
+        "complexity_score": 0.3,
+        "scope": "single_item",
+        "completeness": "complete",
+        "limitations": [],
+        "policy": {"max_cost": 5, "requires_approval": False, "production_safe": True},
+        "preference_match": {"speed": 0.8, "accuracy": 0.9, "cost": 0.9, "complexity": 0.7, "completeness": 0.9},
+        "required_inputs": [{"name": "host"}],
+        "expected_outputs": [{"name": "status"}],
+    }
+
+
+def _synthetic_tools(count, capabilities_per_tool=3):
+    tools = []
+    for i in range(count):
+        capabilities = {}
+        for j in range(capabilities_per_tool):
+            name = CAPABILITIES[(i + j * 7) % len(CAPABILITIES)]
+            capabilities[name] = {
+                "capability_id": i * 10 + j,
+                "capability_name": name,
+                "description": "synthetic capability",
+                "patterns": [_pattern(i * 10 + j)],
+            }
+        tools.append({
+            "tool_id": i,
+            "tool_name": f"tool_{i:06d}",
+            "version": "1.0",
+            "description": "synthetic tool",
+            "platform": PLATFORMS[i % len(PLATFORMS)],
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "defaults": {},
+            "dependencies": [],
+            "metadata": {"tags": [f"team-{i % 5}", "synthetic"]},
+            "capabilities": capabilities,
+        })
+    return tools
+
+
+def _sample_tools():
+    return [
+        {
+            "tool_id": 1, "tool_name": "Systemctl", "version": "1.0", "description": "",
+            "platform": "linux", "category": "system", "defaults": {}, "dependencies": [],
+            "metadata": {"tags": ["services"]},
+            "capabilities": {
+                "service_control": {"capability_id": 10, "capability_name": "service_control",
+                                    "description": "", "patterns": [_pattern(1)]},
+                "service_status": {"capability_id": 11, "capability_name": "service_status",
+                                   "description": "", "patterns": [_pattern(2)]},
+            },
+        },
+        {
+            "tool_id": 2, "tool_name": "sc", "version": "1.0", "description": "",
+            "platform": "windows", "category": "system", "defaults": {}, "dependencies": [],
+            "metadata": None,
+            "capabilities": {
+                "service_control": {"capability_id": 20, "capability_name": "service_control",
+                                    "description": "", "patterns": [_pattern(3)]},
+                "draft_capability": {"capability_id": 21, "capability_name": "draft_capability",
+                                     "description": "", "patterns": []},
+            },
+        },
+        {
+            "tool_id": 3, "tool_name": "ping", "version": "1.0", "description": "",
+            "platform": "network", "category": "network", "defaults": {}, "dependencies": [],
+            "metadata": {"tags": ["services", "reachability"]}, "capabilities": {},
+        },
+    ]
+
+
+class FakeCatalog:
+    def __init__(self, tools):
+        self.tools = tools
+        self.version = 1
+        self.loads = 0
+
+    def load_tools(self):
+        self.loads += 1
+        return [dict(t) for t in self.tools]
+
+    def get_version(self):
+        return self.version
+
+
+# ============================================================================
+# INDEX TESTS
+# ============================================================================
+
+def test_capability_index_returns_single_capability_views():
+    snapshot = build_snapshot(_sample_tools(), version=7)
+
+    tools = snapshot.tools_for_capability("service_control")
+    assert [t["tool_name"] for t in tools] == ["Systemctl", "sc"]
+    assert all(list(t["capabilities"]) == ["service_control"] for t in tools)
+    assert [t["tool_name"] for t in snapshot.tools_for_capability("service_control", "windows")] == ["sc"]
+    assert snapshot.tools_for_capability("unknown") == []
+
+
+def test_capabilities_without_patterns_not_indexed():
+    snapshot = build_snapshot(_sample_tools(), version=1)
+    assert snapshot.tools_for_capability("draft_capability") == []
+    # ...but the full structure still carries them
+    assert "draft_capability" in snapshot.get_tool("sc")["capabilities"]
+
+
+def test_platform_category_tag_indexes():
+    snapshot = build_snapshot(_sample_tools(), version=1)
+    assert len(snapshot) == 3
+    assert [t["tool_name"] for t in snapshot.filter_tools()] == ["Systemctl", "ping", "sc"]
+    assert [t["tool_name"] for t in snapshot.filter_tools(platform="linux")] == ["Systemctl"]
+    assert [t["tool_name"] for t in snapshot.filter_tools(category="system")] == ["Systemctl", "sc"]
+    assert [t["tool_name"] for t in snapshot.filter_tools(tag="services")] == ["Systemctl", "ping"]
+    assert [t["tool_name"] for t in snapshot.filter_tools(category="system", tag="services")] == ["Systemctl"]
+    assert snapshot.get_tool("SYSTEMCTL")["tool_id"] == 1
+
+
+# ============================================================================
+# SNAPSHOT CACHE TESTS
+# ============================================================================
+
+def test_refresh_only_when_version_moves():
+    catalog = FakeCatalog(_sample_tools())
+    cache = CatalogSnapshotCache(catalog.load_tools, catalog.get_version, enable_background_refresh=False)
+
+    first = cache.snapshot
+    assert cache.refresh_if_changed() is False
+    assert catalog.loads == 1
+
+    catalog.version = 2
+    catalog.tools = catalog.tools[:1]
+    assert cache.refresh_if_changed() is True
+    assert cache.version == 2
+    assert len(cache.snapshot) == 1
+    # Copy-on-write: readers holding the old snapshot still see it intact
+    assert first.version == 1 and len(first) == 3
+
+
+def test_request_refresh_wakes_poller():
+    catalog = FakeCatalog(_sample_tools())
+    cache = CatalogSnapshotCache(catalog.load_tools, catalog.get_version, refresh_interval_seconds=3600)
+    try:
+        cache.load()
+        catalog.version = 5
+        cache.request_refresh()
+
+        deadline = time.time() + 2
+        while cache.version != 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert cache.version == 5
+    finally:
+        cache.stop()
+
+
+# ============================================================================
+# SERVICE INTEGRATION
+# ============================================================================
+
+def _service_with_snapshot(catalog):
+    service = ToolCatalogService("postgresql://unused")
+    service._snapshot_cache = CatalogSnapshotCache(
+        catalog.load_tools, catalog.get_version, enable_background_refresh=False
+    )
+    return service
+
+
+def test_service_serves_capability_lookups_from_snapshot():
+    service = _service_with_snapshot(FakeCatalog(_sample_tools()))
+
+    tools = service.get_tools_by_capability("service_control", platform="linux")
+    assert [t["tool_name"] for t in tools] == ["Systemctl"]
+    assert [t["tool_name"] for t in service.get_all_tools_with_structure(category="network")] == ["ping"]
+    # No database connection was needed
+    assert service._pool is None
+
+
+def test_service_backs_off_when_snapshot_unavailable():
+    calls = []
+
+    def failing_load():
+        calls.append(1)
+        raise RuntimeError("catalog_version_seq missing")
+
+    service = ToolCatalogService("postgresql://unused")
+    service._snapshot_cache = CatalogSnapshotCache(failing_load, lambda: 1, enable_background_refresh=False)
+
+    assert service._get_snapshot() is None
+    assert service._get_snapshot() is None
+    assert len(calls) == 1
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.parametrize("count", [500, 5000, 50000])
+def test_snapshot_build_benchmark(count):
+    """Build time and memory of a snapshot; lookups are dict reads"""
+    tools = _synthetic_tools(count)
+
+    # build_snapshot only reads the input dicts, so the same input is reused
+    started = time.perf_counter()
+    snapshot = build_snapshot(tools, version=1)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    tracemalloc.start()
+    build_snapshot(tools, version=1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lookups = 10000
+    started = time.perf_counter()
+    for i in range(lookups):
+        snapshot.tools_for_capability(CAPABILITIES[i % len(CAPABILITIES)], PLATFORMS[i % len(PLATFORMS)])
+    lookup_us = (time.perf_counter() - started) / lookups * 1e6
+
+    print(
+        f"\n{count} tools: build={build_ms:.1f}ms, index memory={peak / 1024 / 1024:.1f}MB, "
+        f"lookup={lookup_us:.1f}us"
+    )
+
+    assert len(snapshot) == count
+    assert sum(len(v) for v in snapshot.by_capability.values()) == count * 3
@@ -0,0 +1,348 @@
+"""
+Phase 7: Deadline-Aware (EDF) Scheduling Tests
+Fair order with EDF promotion of at-risk entries, reject/downgrade of
+infeasible work, per-SLA deadline reporting and FIFO vs EDF trace replay
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from execution.models import (
+    ActionClass,
+    DeadlineMissPolicy,
+    ExecutionFSM,
+    ExecutionMode,
+    ExecutionModel,
+    ExecutionStatus,
+    SLAClass,
+    TimeoutPolicyModel,
+)
+from execution.policy_cache import TimeoutPolicyCache
+from execution.repository import ExecutionRepository
+from execution.scheduling import FairScheduler, QueueMetrics, get_queue_metrics
+from execution.simulation import (
+    compare_policies,
+    deadline_misses,
+    format_comparison,
+    load_trace,
+    replay_trace,
+    save_trace,
+)
+from pipeline.stages.stage_e.executor import StageEExecutor
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class FakeRepository:
+    """Records queue writes and status changes"""
+
+    def __init__(self):
+        self.queue = []
+        self.status_updates = []
+
+    def list_timeout_policies(self):
+        return [
+            TimeoutPolicyModel(
+                sla_class=sla_class,
+                action_class=action_class,
+                step_timeout_seconds=10,
+                execution_timeout_seconds=30,
+                lease_timeout_seconds=45,
+                approval_timeout_seconds=300,
+                max_attempts=3,
+            )
+            for sla_class in SLAClass
+            for action_class in ActionClass
+        ]
+
+    def get_timeout_policy_version(self):
+        return 1
+
+    def enqueue_execution(self, queue_entry):
+        self.queue.append(queue_entry)
+        return queue_entry
+
+    def update_execution_status(self, execution_id, status, previous_status=None, error_message=None):
+        assert previous_status is None or ExecutionFSM.is_valid_transition(previous_status, status)
+        self.status_updates.append((execution_id, status))
+
+
+@pytest.fixture
+def repository():
+    return FakeRepository()
+
+
+@pytest.fixture
+def executor(repository):
+    executor = StageEExecutor("postgresql://unused")
+    executor.repository = repository
+    executor.policy_cache = TimeoutPolicyCache(repository, enable_background_refresh=False)
+    return executor
+
+
+def _execution(timeout_at):
+    return ExecutionModel(
+        tenant_id="tenant-1",
+        actor_id=1,
+        idempotency_key="key",
+        plan_snapshot={"steps": [{"id": "s1", "tool": "systemctl"}]},
+        execution_mode=ExecutionMode.BACKGROUND,
+        sla_class=SLAClass.FAST,
+        approval_level=0,
+        status=ExecutionStatus.APPROVED,
+        timeout_at=timeout_at,
+    )
+
+
+def _mixed_trace(seed=7):
+    """Long batch jobs with loose deadlines, interleaved with tight fast jobs"""
+    rng = random.Random(seed)
+    trace = []
+    for i in range(60):
+        arrival = i * 0.5
+        trace.append({
+            "arrival": arrival, "tenant_id": "batch", "sla_class": "long",
+            "priority": 5, "cost": 4.0, "deadline": arrival + 120.0,
+        })
+    for i in range(80):
+        arrival = rng.uniform(0, 40)
+        trace.append({
+            "arrival": arrival, "tenant_id": "ops", "sla_class": "fast",
+            "priority": 5, "cost": 1.0, "deadline": arrival + 8.0,
+        })
+    return sorted(trace, key=lambda r: r["arrival"])
+
+
+# ============================================================================
+# EDF ORDERING TESTS
+# ============================================================================
+
+def test_deadlines_alone_do_not_override_fair_order():
+    scheduler = FairScheduler(at_risk_slack=5.0)
+    scheduler.enqueue("late", "a", deadline=100.0)
+    scheduler.enqueue("early", "b", deadline=50.0)
+    scheduler.enqueue("none", "c")
+    assert [scheduler.dequeue(now=0.0).item_id for _ in range(3)] == ["late", "early", "none"]
+
+
+def test_at_risk_entries_promoted_earliest_deadline_first():
+    scheduler = FairScheduler(at_risk_slack=5.0)
+    scheduler.enqueue("fair", "a", deadline=100.0)
+    scheduler.enqueue("risky_later", "b", deadline=14.0)
+    scheduler.enqueue("risky", "b", deadline=12.0)
+    scheduler.enqueue("none", "c")
+    # At now=8 both b entries have slack <= 5; a tenant's at-risk entry
+    # may also overtake its own fair order
+    order = [scheduler.dequeue(now=8.0).item_id for _ in range(4)]
+    assert order == ["risky", "risky_later", "fair", "none"]
+
+
+def test_priority_band_beats_deadline():
+    scheduler = FairScheduler()
+    scheduler.enqueue("urgent_low", "a", priority=10, deadline=1.0)
+    scheduler.enqueue("high", "b", priority=1, deadline=100.0)
+    assert scheduler.dequeue().item_id == "high"
+
+
+def test_deadlines_not_enforced_without_now():
+    scheduler = FairScheduler()
+    scheduler.enqueue("past", "a", deadline=1.0, on_deadline_miss="reject")
+    assert scheduler.dequeue().item_id == "past"
+
+
+def test_infeasible_entry_rejected():
+    scheduler = FairScheduler()
+    scheduler.enqueue("doomed", "a", cost=5.0, deadline=10.0, on_deadline_miss="reject")
+    scheduler.enqueue("ok", "a", cost=5.0, deadline=20.0, on_deadline_miss="reject")
+
+    assert scheduler.dequeue(now=8.0).item_id == "ok"
+    assert [i.item_id for i in scheduler.rejected] == ["doomed"]
+    assert len(scheduler) == 0
+    assert scheduler.depth_by_tenant() == {}
+
+
+def test_infeasible_entry_downgraded_below_all_bands():
+    scheduler = FairScheduler()
+    scheduler.enqueue("doomed", "a", priority=1, cost=5.0, deadline=10.0)
+    scheduler.enqueue("lowest", "b", priority=10)
+
+    assert scheduler.dequeue(now=8.0).item_id == "lowest"
+    downgraded = scheduler.dequeue(now=8.0)
+    assert downgraded.item_id == "doomed"
+    assert downgraded.downgraded is True
+    assert scheduler.rejected == []
+
+
+# ============================================================================
+# METRICS TESTS
+# ============================================================================
+
+def test_deadline_metrics_per_sla_class():
+    metrics = QueueMetrics()
+    metrics.record_completion("fast", on_time=True)
+    metrics.record_completion("fast", on_time=True)
+    metrics.record_completion("fast", on_time=False)
+    metrics.record_rejection("fast")
+    metrics.record_completion("long", on_time=True)
+
+    report = metrics.get_deadline_metrics()
+    assert report["fast"] == {"on_time": 2, "missed": 1, "rejected": 1, "on_time_ratio": 0.5}
+    assert report["long"]["on_time_ratio"] == 1.0
+
+    text = metrics.get_prometheus_metrics()
+    assert 'execution_queue_deadline_total{sla_class="fast",outcome="rejected"} 1' in text
+
+
+# ============================================================================
+# EXECUTOR TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_queue_entry_carries_deadline(executor, repository):
+    timeout_at = datetime.utcnow() + timedelta(seconds=30)
+    await executor._enqueue_execution(_execution(timeout_at))
+
+    entry = repository.queue[0]
+    assert entry.deadline_at == timeout_at
+    assert entry.on_deadline_miss == DeadlineMissPolicy.DOWNGRADE
+
+
+@pytest.mark.asyncio
+async def test_reject_policy_refuses_unreachable_deadline(executor, repository):
+    executor.deadline_miss_policy = DeadlineMissPolicy.REJECT
+    before = get_queue_metrics().get_deadline_metrics().get("fast", {}).get("rejected", 0)
+
+    execution = _execution(datetime.utcnow() - timedelta(seconds=1))
+    await executor._enqueue_execution(execution)
+
+    assert repository.queue == []
+    assert repository.status_updates == [(execution.execution_id, ExecutionStatus.CANCELLED)]
+    assert get_queue_metrics().get_deadline_metrics()["fast"]["rejected"] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_reject_policy_with_aware_deadline(executor, repository):
+    """timeout_at loaded from TIMESTAMPTZ is tz-aware"""
+    executor.deadline_miss_policy = DeadlineMissPolicy.REJECT
+    before = get_queue_metrics().get_deadline_metrics().get("fast", {}).get("rejected", 0)
+
+    doomed = _execution(datetime.now(timezone.utc) - timedelta(seconds=1))
+    await executor._enqueue_execution(doomed)
+    assert repository.status_updates == [(doomed.execution_id, ExecutionStatus.CANCELLED)]
+    assert get_queue_metrics().get_deadline_metrics()["fast"]["rejected"] == before + 1
+
+    feasible = _execution(datetime.now(timezone(timedelta(hours=2))) + timedelta(seconds=30))
+    await executor._enqueue_execution(feasible)
+    assert [entry.execution_id for entry in repository.queue] == [feasible.execution_id]
+    assert repository.status_updates[-1] == (feasible.execution_id, ExecutionStatus.QUEUED)
+
+
+def test_dequeue_expiry_is_bounded_and_skips_locked_rows():
+    class RecordingCursor:
+        def __init__(self):
+            self.calls = []
+
+        def execute(self, sql, params):
+            self.calls.append((" ".join(sql.split()), params))
+
+        def fetchall(self):
+            return [{"sla_class": "fast"}]
+
+    cursor = RecordingCursor()
+    assert ExecutionRepository("postgresql://unused")._expire_infeasible_entries(cursor, limit=25) == 1
+
+    sql, params = cursor.calls[0]
+    assert "ORDER BY deadline_at LIMIT %s FOR UPDATE SKIP LOCKED" in sql
+    assert "WHERE queue_id IN (SELECT queue_id FROM infeasible)" in sql
+    assert params == (25, ExecutionStatus.TIMEOUT.value)
+
+
+def test_dequeue_orders_by_fair_tag_and_promotes_only_at_risk_entries(monkeypatch):
+    class RecordingCursor:
+        def __init__(self):
+            self.calls = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            self.calls.append((" ".join(sql.split()), params))
+
+        def fetchall(self):
+            return []
+
+        def fetchone(self):
+            return None
+
+    class Connection:
+        def __init__(self, cursor):
+            self._cursor = cursor
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def cursor(self, cursor_factory=None):
+            return self._cursor
+
+        def commit(self):
+            pass
+
+    cursor = RecordingCursor()
+    repository = ExecutionRepository("postgresql://unused")
+    monkeypatch.setattr(repository, "_get_connection", lambda: Connection(cursor))
+    assert repository.dequeue_execution("worker-1", at_risk_slack_seconds=12) is None
+
+    sql, params = cursor.calls[-1]
+    order = sql[sql.index("ORDER BY"):sql.index("LIMIT 1")]
+    assert order.index("q.priority ASC") < order.index("CASE WHEN q.deadline_at") < order.index("q.virtual_finish ASC")
+    assert "THEN q.deadline_at END ASC NULLS LAST" in order
+    assert "q.deadline_at ASC NULLS LAST" not in order
+    assert params["at_risk_slack"] == 12
+
+
+# ============================================================================
+# TRACE REPLAY
+# ============================================================================
+
+def test_trace_round_trip(tmp_path):
+    trace = _mixed_trace()
+    path = tmp_path / "trace.jsonl"
+    save_trace(reversed(trace), str(path))
+    assert load_trace(str(path)) == trace
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        replay_trace([], policy="lifo")
+
+
+def test_edf_misses_fewer_deadlines_than_fifo():
+    """Replay the same trace: EDF lets tight fast jobs overtake batch work"""
+    trace = _mixed_trace()
+    comparison = compare_policies(trace, workers=2)
+    print("\n" + format_comparison(comparison))
+
+    fifo_misses = deadline_misses(comparison["fifo"])
+    edf_misses = deadline_misses(comparison["edf"])
+    assert edf_misses < fifo_misses
+    assert comparison["edf"]["fast"]["on_time_ratio"] > comparison["fifo"]["fast"]["on_time_ratio"]
+    # Every arrival is accounted for
+    for report in comparison.values():
+        assert sum(m["on_time"] + m["missed"] + m["rejected"] for m in report.values()) == len(trace)
+
+
+def test_reject_policy_sheds_infeasible_work():
+    trace = _mixed_trace()
+    report = replay_trace(trace, "edf", workers=2, on_deadline_miss="reject")
+    assert sum(m["missed"] for m in report.values()) == 0
+    assert sum(m["on_time"] + m["rejected"] for m in report.values()) == len(trace)
@@ -0,0 +1,498 @@
+"""
+Phase 7: Bulk DLQ Replay Tests
+Failure signatures, filtered dry runs, throttled replay and its impact on
+live queue latency (simulated workers on a virtual clock), and replay as a
+background API job behind Keycloak bearer-token auth
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwk, jwt
+
+import api.auth as auth
+import api.routes.dlq as dlq_routes
+from execution.dlq import DLQReplayJobs, DLQReplayService, TokenBucket, classify_error, failure_signature
+from execution.dtos import DLQFilter, DLQReplayRequest, DLQReplayResponse
+from execution.models import ExecutionDLQModel, SLAClass
+from execution.repository import ExecutionRepository
+from execution.scheduling import FairScheduler
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+BASE_TIME = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _entry(index, last_error, tenant_id="tenant-1", minutes=0):
+    return ExecutionDLQModel(
+        id=index,
+        execution_id=uuid4(),
+        failure_reason="max_attempts_exceeded",
+        attempt_count=3,
+        last_error=last_error,
+        sla_class=SLAClass.MEDIUM,
+        tenant_id=tenant_id,
+        failed_at=BASE_TIME + timedelta(minutes=minutes),
+    )
+
+
+def _outage_entries(count):
+    """Asset-service outage: mostly connection errors, a few timeouts"""
+    entries = []
+    for i in range(1, count + 1):
+        if i % 10 == 0:
+            error = f"TimeoutError: step {i} exceeded 30s"
+        else:
+            error = f"ConnectionError: asset-service at 10.0.{i % 250}.7:3002 refused (request {uuid4()})"
+        entries.append(_entry(i, error, tenant_id=f"tenant-{i % 3}", minutes=i % 60))
+    return entries
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = int(len(ordered) * percentile / 100)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class SimulatedQueue:
+    """
+    DLQ repository + live queue drained by workers on a virtual clock
+
+    Replayed and live entries share one FIFO band (the worst case: same
+    tenant, same priority). Live entries arrive every `live_interval`.
+    """
+
+    def __init__(self, entries, workers=4, service_time=0.05, live_interval=0.1, live_until=0.0):
+        self.entries = {e.dlq_id: e for e in entries}
+        self.requeued = set()
+        self.actor_ids = set()
+        self.workers = workers
+        self.service_time = service_time
+        self.scheduler = FairScheduler()
+        self.busy = []  # (finish_time, seq, item)
+        self.done = set()
+        self.live_waits = []
+        self.max_in_flight_seen = 0
+        self.now = 0.0
+        self._seq = 0
+        self._live = [i * live_interval for i in range(int(live_until / live_interval))]
+        self._replayed = set()
+
+    # Repository contract -------------------------------------------------
+
+    def list_dlq_entries(self, dlq_filter, after_id=0, limit=500):
+        rows = []
+        for entry in sorted(self.entries.values(), key=lambda e: e.id):
+            if entry.id <= after_id:
+                continue
+            if not dlq_filter.include_requeued and entry.dlq_id in self.requeued:
+                continue
+            if dlq_filter.error_class and classify_error(entry) != dlq_filter.error_class:
+                continue
+            if dlq_filter.tenant_id and entry.tenant_id != dlq_filter.tenant_id:
+                continue
+            if dlq_filter.failed_after and entry.failed_at < dlq_filter.failed_after:
+                continue
+            if dlq_filter.failed_before and entry.failed_at >= dlq_filter.failed_before:
+                continue
+            rows.append(entry)
+            if len(rows) == limit:
+                break
+        return rows
+
+    def requeue_dlq_entries(self, dlq_ids, actor_id, reset_retry_count=True, new_priority=None):
+        self.actor_ids.add(actor_id)
+        requeued = []
+        for dlq_id in dlq_ids:
+            if dlq_id in self.requeued:
+                continue
+            self.requeued.add(dlq_id)
+            execution_id = self.entries[dlq_id].execution_id
+            self.scheduler.enqueue(("replay", execution_id), "tenant", enqueued_at=self.now)
+            self._replayed.add(execution_id)
+            requeued.append(execution_id)
+        self._dispatch()
+        self.max_in_flight_seen = max(self.max_in_flight_seen, self._replay_in_flight())
+        return requeued
+
+    def get_in_flight_queue_entries(self, execution_ids):
+        return [e for e in execution_ids if e not in self.done]
+
+    # Virtual clock -------------------------------------------------------
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.advance(self.now + seconds)
+
+    def advance(self, until):
+        while True:
+            next_live = self._live[0] if self._live else float("inf")
+            next_done = self.busy[0][0] if self.busy else float("inf")
+            if min(next_live, next_done) > until:
+                break
+            if next_done <= next_live:
+                self.now, _, item = heapq.heappop(self.busy)
+                self.scheduler.complete(item)
+                if item.item_id[0] == "replay":
+                    self.done.add(item.item_id[1])
+            else:
+                self.now = self._live.pop(0)
+                self.scheduler.enqueue(("live", None), "tenant", enqueued_at=self.now)
+            self._dispatch()
+        self.now = max(self.now, until)
+
+    def drain(self):
+        while self._live or self.busy or len(self.scheduler):
+            self.advance(self.now + 1.0)
+
+    def _dispatch(self):
+        while len(self.busy) < self.workers:
+            item = self.scheduler.dequeue()
+            if item is None:
+                return
+            if item.item_id[0] == "live":
+                self.live_waits.append(self.now - item.enqueued_at)
+            self._seq += 1
+            heapq.heappush(self.busy, (self.now + self.service_time, self._seq, item))
+
+    def _replay_in_flight(self):
+        return len(self._replayed - self.done)
+
+
+def _service(queue, **kwargs):
+    return DLQReplayService(queue, clock=queue.clock, sleep=queue.sleep, poll_interval_seconds=0.01, **kwargs)
+
+
+# ============================================================================
+# SIGNATURE TESTS
+# ============================================================================
+
+def test_classify_error_uses_exception_name():
+    assert classify_error(_entry(1, "ConnectionError: refused")) == "ConnectionError"
+    assert classify_error(_entry(2, "step failed")) == "max_attempts_exceeded"
+    assert classify_error(_entry(3, None)) == "max_attempts_exceeded"
+
+
+def test_signature_ignores_volatile_fragments():
+    a = _entry(1, f"ConnectionError: 10.0.0.1:3002 refused (request {uuid4()}) after 3 tries")
+    b = _entry(2, f"ConnectionError: 10.0.9.8:3002 refused (request {uuid4()}) after 5 tries")
+    c = _entry(3, "TimeoutError: 10.0.0.1:3002 refused")
+    assert failure_signature(a) == failure_signature(b)
+    assert failure_signature(a) != failure_signature(c)
+
+
+# ============================================================================
+# DRY RUN / FILTER TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_dry_run_groups_by_signature_without_requeueing():
+    queue = SimulatedQueue(_outage_entries(100))
+    response = await _service(queue).replay(DLQReplayRequest(actor_id=1))
+
+    assert response.dry_run is True
+    assert response.matched == 100
+    assert [(g.error_class, g.count) for g in response.groups] == [
+        ("ConnectionError", 90), ("TimeoutError", 10)
+    ]
+    assert sum(response.groups[0].tenants.values()) == 90
+    assert len(response.groups[0].sample_execution_ids) == 5
+    assert queue.requeued == set()
+
+
+@pytest.mark.asyncio
+async def test_filters_by_error_class_tenant_and_time():
+    queue = SimulatedQueue(_outage_entries(300))
+    dlq_filter = DLQFilter(
+        error_class="TimeoutError",
+        tenant_id="tenant-0",
+        failed_after=BASE_TIME,
+        failed_before=BASE_TIME + timedelta(minutes=30),
+    )
+    groups = _service(queue, page_size=7).inspect(dlq_filter)
+
+    expected = [
+        e for e in queue.entries.values()
+        if e.id % 10 == 0 and e.tenant_id == "tenant-0" and e.id % 60 < 30
+    ]
+    assert sum(g.count for g in groups) == len(expected) > 0
+
+
+def test_signature_filter_scans_past_sparse_pages():
+    queue = SimulatedQueue(_outage_entries(50))  # every 10th row is a timeout
+    service = _service(queue, page_size=7)
+    timeouts = [g for g in service.inspect(DLQFilter()) if g.error_class == "TimeoutError"][0]
+
+    rows = list(service.iter_entries(DLQFilter(signature=timeouts.signature, max_rows=3)))
+    assert [e.id for e in rows] == [10, 20, 30]
+    assert [e.id for e in service.iter_entries(DLQFilter(signature=timeouts.signature))] == [10, 20, 30, 40, 50]
+
+
+def test_requeue_marks_only_rows_whose_queue_entry_was_reset():
+    class RecordingCursor:
+        def __init__(self):
+            self.sql = None
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params):
+            self.sql = " ".join(sql.split())
+
+        def fetchall(self):
+            return []
+
+    cursor = RecordingCursor()
+
+    class Connection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def cursor(self, cursor_factory=None):
+            return cursor
+
+        def commit(self):
+            pass
+
+    repository = ExecutionRepository("postgresql://unused")
+    repository._get_connection = Connection
+    assert repository.requeue_dlq_entries([uuid4()], actor_id=1) == []
+
+    requeued = cursor.sql.index("requeued AS ( UPDATE execution.execution_queue")
+    marked = cursor.sql.index("marked AS (")
+    assert requeued < marked
+    assert "JOIN requeued ON requeued.execution_id = picked.execution_id WHERE d.dlq_id" in cursor.sql
+
+
+@pytest.mark.asyncio
+async def test_replay_by_signature_only_touches_that_group():
+    queue = SimulatedQueue(_outage_entries(50))
+    service = _service(queue)
+    timeouts = [g for g in service.inspect(DLQFilter()) if g.error_class == "TimeoutError"][0]
+
+    response = await service.replay(DLQReplayRequest(
+        actor_id=1, dry_run=False, filter=DLQFilter(signature=timeouts.signature)
+    ))
+    assert response.replayed == 5
+    assert {queue.entries[d].id % 10 for d in queue.requeued} == {0}
+
+
+# ============================================================================
+# THROTTLING TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_acquisitions():
+    queue = SimulatedQueue([])
+    bucket = TokenBucket(rate=10.0, capacity=10.0, clock=queue.clock, sleep=queue.sleep)
+    for _ in range(5):
+        await bucket.acquire(10)
+    assert queue.now == pytest.approx(4.0)
+
+
+@pytest.mark.asyncio
+async def test_replay_respects_rate_limit():
+    queue = SimulatedQueue(_outage_entries(200), workers=1000)
+    response = await _service(queue).replay(DLQReplayRequest(
+        actor_id=1, dry_run=False, rate_per_second=50, batch_size=25, max_in_flight=None
+    ))
+    assert response.replayed == 200
+    # 50 banked tokens, then 150 more at 50/s
+    assert response.duration_seconds == pytest.approx(3.0, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_replay_respects_in_flight_ceiling():
+    queue = SimulatedQueue(_outage_entries(300), workers=4)
+    response = await _service(queue).replay(DLQReplayRequest(
+        actor_id=1, dry_run=False, rate_per_second=None, batch_size=50, max_in_flight=20
+    ))
+    assert response.replayed == 300
+    assert queue.max_in_flight_seen <= 20
+
+
+@pytest.mark.asyncio
+async def test_already_requeued_rows_are_skipped():
+    entries = _outage_entries(10)
+    queue = SimulatedQueue(entries)
+    service = _service(queue)
+    rows = list(service.iter_entries(DLQFilter()))
+    queue.requeued.update(e.dlq_id for e in rows[:4])  # Replayed concurrently elsewhere
+
+    response = await service.replay(DLQReplayRequest(actor_id=1, dry_run=False))
+    # Pagination runs after the concurrent replay, so only 6 rows match now
+    assert (response.matched, response.replayed, response.skipped) == (6, 6, 0)
+
+    queue.requeued.clear()
+    queue.requeued.update(e.dlq_id for e in rows)
+    response = await service.replay(DLQReplayRequest(
+        actor_id=1, dry_run=False, filter=DLQFilter(include_requeued=True)
+    ))
+    assert (response.matched, response.replayed, response.skipped) == (10, 0, 10)
+
+
+# ============================================================================
+# LIVE QUEUE IMPACT
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_throttled_replay_protects_live_queue_latency():
+    """1000-row replay vs live traffic: unthrottled flood vs paced batches"""
+    results = {}
+    for name, request in {
+        "unthrottled": DLQReplayRequest(
+            actor_id=1, dry_run=False, rate_per_second=None, batch_size=1000, max_in_flight=None
+        ),
+        "throttled": DLQReplayRequest(
+            actor_id=1, dry_run=False, rate_per_second=40, batch_size=20, max_in_flight=20
+        ),
+    }.items():
+        # 4 workers x 50ms = 80 entries/s capacity; live load 10/s for 40s
+        queue = SimulatedQueue(_outage_entries(1000), workers=4, service_time=0.05, live_until=40.0)
+        started = time.perf_counter()
+        response = await _service(queue).replay(request)
+        wall = time.perf_counter() - started
+        queue.drain()
+
+        results[name] = response
+        print(
+            f"\n{name}: replayed={response.replayed} in {response.duration_seconds:.1f}s "
+            f"({response.replayed_per_second:.0f}/s virtual, {response.replayed / wall:.0f}/s wall), "
+            f"live p99 wait={_percentile(queue.live_waits, 99) * 1000:.0f}ms"
+        )
+        results[name + "_p99"] = _percentile(queue.live_waits, 99)
+
+    assert results["unthrottled"].replayed == results["throttled"].replayed == 1000
+    # The flood parks live work behind ~12s of replay; throttling keeps it sub-second
+    assert results["unthrottled_p99"] > 5.0
+    assert results["throttled_p99"] < 0.5
+    assert results["throttled"].replayed_per_second >= 30
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+def _rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+REALM_KEY = _rsa_key()
+
+
+def _token(key=REALM_KEY, kid="realm-key", **claims):
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    payload = {
+        "sub": "user-7", "preferred_username": "ops", "iss": auth.KEYCLOAK_ISSUER,
+        "exp": int(time.time()) + 300, "actor_id": 7, "realm_access": {"roles": ["operator"]},
+    }
+    payload.update(claims)
+    return {"Authorization": f"Bearer {jwt.encode(payload, pem, algorithm='RS256', headers={'kid': kid})}"}
+
+
+@pytest.fixture
+def dlq_client(monkeypatch):
+    public = REALM_KEY.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    realm_jwk = dict(jwk.construct(public, "RS256").to_dict(), kid="realm-key")
+    jwks = auth.JWKSCache("http://keycloak.test/certs")
+    jwks._fetch = lambda: {"keys": [realm_jwk]}
+    monkeypatch.setattr(auth, "_jwks", jwks)
+
+    app = FastAPI()
+    app.include_router(dlq_routes.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_every_dlq_route_requires_a_verified_token(dlq_client, monkeypatch):
+    monkeypatch.setattr(dlq_routes.replay_service, "inspect", lambda dlq_filter: [])
+    spoofed = {"X-Authenticated": "true", "X-User-Id": "1"}
+    routes = [
+        ("post", "/execution/dlq/inspect", {}),
+        ("post", "/execution/dlq/replay", {"dry_run": True}),
+        ("get", f"/execution/dlq/replay/{uuid4()}", None),
+    ]
+    for method, path, body in routes:
+        for headers in ({}, spoofed, _token(key=_rsa_key()), _token(exp=int(time.time()) - 10),
+                        _token(iss="http://evil/realms/opsconductor")):
+            kwargs = {"headers": headers} if body is None else {"json": body, "headers": headers}
+            response = getattr(dlq_client, method)(path, **kwargs)
+            assert response.status_code == 401, (path, headers)
+
+    assert dlq_client.post("/execution/dlq/inspect", json={}, headers=_token()).json() == []
+    assert dlq_client.post("/execution/dlq/inspect", json={}, headers=_token(actor_id=None)).status_code == 403
+    viewer = _token(realm_access={"roles": ["viewer"]})
+    assert dlq_client.post("/execution/dlq/inspect", json={}, headers=viewer).status_code == 200
+    assert dlq_client.post("/execution/dlq/replay", json={"dry_run": True}, headers=viewer).status_code == 403
+
+
+def test_replay_runs_as_a_polled_background_job(dlq_client, monkeypatch):
+    queue = SimulatedQueue(_outage_entries(200), workers=4)
+    monkeypatch.setattr(dlq_routes, "replay_jobs", DLQReplayJobs(_service(queue)))
+    caller = _token()
+    body = {"dry_run": False, "rate_per_second": None, "batch_size": 50, "max_in_flight": 20, "actor_id": 1}
+
+    client = dlq_client
+    started = client.post("/execution/dlq/replay", json=body, headers=caller)
+    assert started.status_code == 202
+    job = started.json()
+    assert job["actor_id"] == 7 and job["status"] == "running"
+
+    deadline = time.monotonic() + 5
+    while job["status"] == "running":
+        assert time.monotonic() < deadline, "replay job did not finish"
+        time.sleep(0.01)
+        job = client.get(f"/execution/dlq/replay/{job['job_id']}", headers=caller).json()
+
+    assert client.get(f"/execution/dlq/replay/{uuid4()}", headers=caller).status_code == 404
+
+    assert job["status"] == "completed" and job["finished_at"]
+    assert job["result"]["replayed"] == 200
+    assert queue.actor_ids == {7}  # the authenticated caller, not the body
+
+
+@pytest.mark.asyncio
+async def test_only_one_live_replay_job_at_a_time():
+    release = threading.Event()  # the replay runs on the job's own loop
+
+    class BlockingService:
+        async def replay(self, request):
+            while not release.is_set():
+                await asyncio.sleep(0.005)
+            return DLQReplayResponse(dry_run=request.dry_run, matched=0)
+
+    jobs = DLQReplayJobs(BlockingService(), max_finished=1)
+    first = jobs.submit(DLQReplayRequest(dry_run=False), actor_id=1)
+    with pytest.raises(ValueError):
+        jobs.submit(DLQReplayRequest(dry_run=False), actor_id=2)
+    dry = jobs.submit(DLQReplayRequest(dry_run=True), actor_id=2)
+
+    release.set()
+    while any(j.status == "running" for j in jobs._jobs.values()):
+        await asyncio.sleep(0.005)
+    assert len(jobs._jobs) == 1  # only the newest finished job is kept
+    assert (jobs.get(first.job_id) or jobs.get(dry.job_id)).status == "completed"
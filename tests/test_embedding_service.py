@@ -0,0 +1,220 @@
+"""
+Embedding Service Tests
+Normalized-text cache, async micro-batching, int8 agreement with fp32,
+warm-up, and throughput / p99 at concurrency 1, 16 and 64
+
+The model is a small randomly initialised BERT (4 layers, 256d) built
+offline, so these run without downloading BGE; forward passes are real.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from pipeline.services.embedding_batcher import EmbeddingBatcher
+from pipeline.services.embedding_service import (
+    EmbeddingService, embedding_cache_key, normalize_text,
+)
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+TRAINING = Path(__file__).resolve().parent.parent / "training_data" / "training_data_10k.jsonl"
+DIM = 256
+
+
+def _queries():
+    with open(TRAINING) as f:
+        return list(dict.fromkeys(json.loads(line)["request"] for line in f))
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("bert")
+    words = sorted({w for q in _queries() for w in normalize_text(q).split() if w.isalnum()})
+    (path / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(words) + 5, hidden_size=DIM, num_hidden_layers=4,
+                        num_attention_heads=4, intermediate_size=4 * DIM)
+    BertModel(config).save_pretrained(path / "hf")
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(path / "hf")
+
+    model = SentenceTransformer(modules=[
+        models.Transformer(str(path / "hf")), models.Pooling(DIM, "cls"), models.Normalize()
+    ], device="cpu")
+    model.save(str(path / "st"))
+    return str(path / "st")
+
+
+def _service(model_path, **kwargs):
+    service = EmbeddingService(model_name=model_path, dimension=DIM, **kwargs)
+    service.encodes = []
+    encode = service._encode
+
+    def counting(texts):
+        service.encodes.append(len(texts))
+        return encode(texts)
+
+    service._encode = counting
+    service.batcher.encode = counting
+    return service
+
+
+async def _load(embed, texts, concurrency):
+    """
+    Requests arrive in waves of `concurrency` at once (the next wave when the
+    last one is answered); latency counts from arrival, so time spent queued
+    behind a blocked event loop is included. Returns (latencies, wall seconds).
+    """
+    latencies = []
+
+    async def request(text, arrived):
+        await embed(text)
+        latencies.append(time.perf_counter() - arrived)
+
+    started = time.perf_counter()
+    for i in range(0, len(texts), concurrency):
+        arrived = time.perf_counter()
+        await asyncio.gather(*(request(text, arrived) for text in texts[i:i + concurrency]))
+    return latencies, time.perf_counter() - started
+
+
+# ============================================================================
+# CACHE AND BATCHING
+# ============================================================================
+
+def test_cache_is_keyed_by_normalized_text(model_path):
+    service = _service(model_path)
+    first = service.embed_text("Check disk usage  on web01")
+    assert embedding_cache_key(" check DISK usage on\tweb01 ") == embedding_cache_key("check disk usage on web01")
+    assert service.embed_text(" check DISK usage on\tweb01 ") == first
+    assert service.encodes == [1]
+    assert len(first) == DIM and abs(np.linalg.norm(first) - 1) < 1e-5
+
+    # Callers cannot corrupt the cached vector
+    first[0] = 42.0
+    assert service.embed_text("check disk usage on web01")[0] != 42.0
+
+    stats = service.get_statistics()["cache"]
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert EmbeddingService(model_name=model_path, dimension=DIM, cache_size=0).cache is None
+
+
+def test_concurrent_requests_share_batched_encodes(model_path):
+    service = _service(model_path, max_batch_size=16, max_wait_ms=5)
+    texts = _queries()[:40] + _queries()[32:40]  # 8 duplicates, queued in the same batch
+
+    async def run():
+        return await asyncio.gather(*(service.embed_text_async(t) for t in texts))
+
+    results = asyncio.run(run())
+
+    assert sum(service.encodes) == 40 and max(service.encodes) <= 16
+    assert len(service.encodes) <= 4
+    assert results[40:] == results[32:40]
+
+    reference = _service(model_path, cache_size=0)
+    for text, embedding in zip(texts[:5], results):
+        np.testing.assert_allclose(embedding, reference.embed_text(text), atol=1e-5)
+
+    stats = service.get_statistics()["batcher"]
+    assert (stats["requests"], stats["encoded"], stats["deduplicated"]) == (48, 40, 8)
+
+    # Cached vectors own their memory instead of pinning the batch output
+    cached = [service.cache.get(embedding_cache_key(t)) for t in texts[:40]]
+    assert all(c.base is None and c.shape == (DIM,) for c in cached)
+
+
+def test_batch_failure_reaches_every_waiter():
+    def broken(texts):
+        raise RuntimeError("CUDA out of memory")
+
+    batcher = EmbeddingBatcher(broken, max_batch_size=8, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(str(i)) for i in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.get_statistics()["batches"] == 1
+
+    # The worker survives and serves the next loop
+    batcher.encode = lambda texts: [t.upper() for t in texts]
+    assert asyncio.run(batcher.submit("ok")) == "OK"
+    batcher.close()
+
+
+# ============================================================================
+# BACKENDS AND WARM-UP
+# ============================================================================
+
+def test_int8_backend_agrees_with_fp32(model_path):
+    fp32 = EmbeddingService(model_name=model_path, dimension=DIM, cache_size=0)
+    int8 = EmbeddingService(model_name=model_path, dimension=DIM, cache_size=0, backend="int8")
+    texts = [normalize_text(q) for q in _queries()[:200]]
+
+    a, b = fp32._encode(texts), int8._encode(texts)
+    cosine = (a * b).sum(axis=1)
+    print(f"\nint8 vs fp32 cosine over {len(texts)} queries: min={cosine.min():.5f} mean={cosine.mean():.5f}")
+    assert cosine.min() > 0.999
+
+    with pytest.raises(ValueError):
+        EmbeddingService(backend="fp16")
+
+
+def test_warmup_loads_model_without_caching(model_path):
+    service = _service(model_path, max_batch_size=8)
+    assert not service._initialized
+    elapsed_ms = service.warmup()
+    assert service._initialized and elapsed_ms > 0
+    assert service.encodes == [1, 8]
+    assert len(service.cache) == 0
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.parametrize("backend", ["torch", "int8"])
+def test_throughput_and_p99_by_concurrency(model_path, backend):
+    """Per-request encode on the event loop (previous embed_text) vs micro-batched async"""
+    queries = [normalize_text(q) for q in _queries()]
+    legacy = EmbeddingService(model_name=model_path, dimension=DIM, cache_size=0, backend=backend)
+    batched = EmbeddingService(model_name=model_path, dimension=DIM, cache_size=0, backend=backend)
+    legacy.warmup()
+    batched.warmup()
+
+    async def legacy_embed(text):
+        return legacy.model.encode(text, normalize_embeddings=True).tolist()
+
+    lines = []
+    offset = 0
+    for concurrency, requests in ((1, 30), (16, 160), (64, 320)):
+        texts = queries[offset:offset + requests]
+        offset += requests
+        results = {}
+        for name, embed in (("per-request", legacy_embed), ("batched", batched.embed_text_async)):
+            latencies, wall = asyncio.run(_load(embed, texts, concurrency))
+            results[name] = (len(texts) / wall, np.percentile(latencies, 99) * 1000)
+        lines.append(
+            f"c={concurrency:2d}: per-request {results['per-request'][0]:6.0f}/s p99 {results['per-request'][1]:6.1f}ms"
+            f" | batched {results['batched'][0]:6.0f}/s p99 {results['batched'][1]:6.1f}ms"
+        )
+        if concurrency > 1:
+            assert results["batched"][0] > 1.5 * results["per-request"][0]
+            assert results["batched"][1] < results["per-request"][1]
+
+    stats = batched.get_statistics()["batcher"]
+    print(f"\n[{backend}] embeddings/s and p99 (avg batch {stats['avg_batch_size']}):\n  " + "\n  ".join(lines))
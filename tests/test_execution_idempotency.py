@@ -0,0 +1,235 @@
+"""
+Phase 7: In-flight Execution Idempotency Tests
+Duplicate submissions attach to the existing in-flight execution
+"""
+
+import asyncio
+import copy
+import threading
+from uuid import uuid4
+
+import pytest
+
+from execution.dtos import ExecutionRequest
+from execution.models import (
+    ActionClass,
+    ExecutionFSM,
+    ExecutionStatus,
+    SLAClass,
+    TimeoutPolicyModel,
+    calculate_idempotency_key,
+    normalize_plan_for_idempotency,
+)
+from execution.policy_cache import TimeoutPolicyCache
+from pipeline.stages.stage_e.executor import StageEExecutor
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def _plan(step_prefix: str = "a1b2c3d4", timestamp: str = "2025-01-01T00:00:00Z"):
+    """Plan as produced by Stage C: generated step IDs and timestamps"""
+    first = f"step_{step_prefix}_systemctl_status"
+    second = f"step_{step_prefix}_journalctl_logs"
+    return {
+        "type": "read",
+        "timestamp": timestamp,
+        "steps": [
+            {"id": first, "tool": "systemctl", "inputs": {"service": "nginx"}, "depends_on": []},
+            {"id": second, "tool": "journalctl", "inputs": {"unit": "nginx"}, "depends_on": [first]},
+        ],
+        "rollback_plan": [{"step_id": second, "rollback_action": "none"}],
+        "targets": [{"id": 2, "hostname": "web02"}, {"id": 1, "hostname": "web01"}],
+    }
+
+
+class FakeRepository:
+    """Enforces in-flight uniqueness like the partial unique index"""
+
+    def __init__(self):
+        self.executions = {}
+        self.events = []
+        self.queue = []
+        self._lock = threading.Lock()
+
+    def list_timeout_policies(self):
+        return [
+            TimeoutPolicyModel(
+                sla_class=sla_class,
+                action_class=action_class,
+                step_timeout_seconds=10,
+                execution_timeout_seconds=30,
+                lease_timeout_seconds=45,
+                approval_timeout_seconds=300,
+                max_attempts=3,
+            )
+            for sla_class in SLAClass
+            for action_class in ActionClass
+        ]
+
+    def get_timeout_policy_version(self):
+        return 1
+
+    def create_execution_if_absent(self, execution):
+        with self._lock:
+            for existing in self.executions.values():
+                if (
+                    existing.tenant_id == execution.tenant_id
+                    and existing.idempotency_key == execution.idempotency_key
+                    and not ExecutionFSM.is_terminal_state(existing.status)
+                ):
+                    return existing, False
+            self.executions[execution.execution_id] = execution
+            return execution, True
+
+    def create_execution_event(self, event):
+        self.events.append(event)
+        return event
+
+    def create_approval(self, approval):
+        return approval
+
+    def get_execution_by_id(self, execution_id):
+        return self.executions.get(execution_id)
+
+    def get_execution_steps(self, execution_id):
+        return []
+
+
+@pytest.fixture
+def repository():
+    return FakeRepository()
+
+
+@pytest.fixture
+def executor(repository):
+    executor = StageEExecutor("postgresql://unused")
+    executor.repository = repository
+    executor.policy_cache = TimeoutPolicyCache(repository, enable_background_refresh=False)
+    return executor
+
+
+# ============================================================================
+# KEY NORMALIZATION TESTS
+# ============================================================================
+
+def test_key_ignores_generated_step_ids_and_timestamps():
+    key1 = calculate_idempotency_key(_plan("aaaa1111", "2025-01-01T00:00:00Z"), "t", 1)
+    key2 = calculate_idempotency_key(_plan("bbbb2222", "2025-01-01T00:00:05Z"), "t", 1)
+    assert key1 == key2
+
+
+def test_key_ignores_target_order():
+    plan = _plan()
+    reordered = _plan()
+    reordered["targets"].reverse()
+    assert calculate_idempotency_key(plan, "t", 1) == calculate_idempotency_key(reordered, "t", 1)
+
+
+def test_key_changes_with_plan_content():
+    plan = _plan()
+    changed = _plan()
+    changed["steps"][0]["inputs"]["service"] = "apache2"
+    assert calculate_idempotency_key(plan, "t", 1) != calculate_idempotency_key(changed, "t", 1)
+
+
+def test_key_keeps_step_arguments_named_like_volatile_keys():
+    plan = _plan()
+    plan["steps"][0]["inputs"].update(timestamp="2025-01-01", request_id="INC-1")
+    other_day = _plan()
+    other_day["steps"][0]["inputs"].update(timestamp="2025-01-02", request_id="INC-1")
+    other_ticket = _plan()
+    other_ticket["steps"][0]["inputs"].update(timestamp="2025-01-01", request_id="INC-2")
+
+    keys = {calculate_idempotency_key(p, "t", 1) for p in (plan, other_day, other_ticket)}
+    assert len(keys) == 3
+    assert normalize_plan_for_idempotency(plan)["steps"][0]["inputs"]["timestamp"] == "2025-01-01"
+
+
+def test_key_ignores_volatile_plan_and_step_metadata():
+    plan = _plan()
+    plan["execution_metadata"] = {"total_estimated_time": 5, "created_at": "2025-01-01T00:00:00Z"}
+    plan["steps"][0].update(created_at="2025-01-01T00:00:00Z", metadata={"trace_id": "abc", "retries": 1})
+    later = _plan()
+    later["execution_metadata"] = {"total_estimated_time": 5, "created_at": "2025-01-01T00:00:09Z"}
+    later["steps"][0].update(created_at="2025-01-01T00:00:09Z", metadata={"trace_id": "def", "retries": 1})
+
+    assert calculate_idempotency_key(plan, "t", 1) == calculate_idempotency_key(later, "t", 1)
+    assert normalize_plan_for_idempotency(plan)["steps"][0]["metadata"] == {"retries": 1}
+
+
+def test_normalization_keeps_step_references_consistent():
+    normalized = normalize_plan_for_idempotency(_plan())
+    assert [s["id"] for s in normalized["steps"]] == ["step_0", "step_1"]
+    assert normalized["steps"][1]["depends_on"] == ["step_0"]
+    assert normalized["rollback_plan"][0]["step_id"] == "step_1"
+    assert "timestamp" not in normalized
+
+
+def test_normalization_does_not_mutate_plan():
+    plan = _plan()
+    original = copy.deepcopy(plan)
+    calculate_idempotency_key(plan, "t", 1)
+    assert plan == original
+
+
+def test_in_flight_states():
+    in_flight = set(ExecutionFSM.in_flight_states())
+    assert in_flight == {
+        ExecutionStatus.PENDING_APPROVAL,
+        ExecutionStatus.APPROVED,
+        ExecutionStatus.QUEUED,
+        ExecutionStatus.RUNNING,
+    }
+
+
+# ============================================================================
+# EXECUTOR TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_duplicate_submission_attaches_to_in_flight(executor, repository):
+    """A retried submission returns the existing execution without a new run"""
+    first = await executor.execute(
+        ExecutionRequest(plan=_plan("aaaa1111"), approval_level=1), "tenant-1", 1
+    )
+    second = await executor.execute(
+        ExecutionRequest(plan=_plan("bbbb2222"), approval_level=1), "tenant-1", 1
+    )
+
+    assert second.execution_id == first.execution_id
+    assert first.deduplicated is False
+    assert second.deduplicated is True
+    assert len(repository.executions) == 1
+    assert [e.event_type for e in repository.events] == ["duplicate_submission"]
+
+
+@pytest.mark.asyncio
+async def test_terminal_execution_can_be_rerun(executor, repository):
+    first = await executor.execute(
+        ExecutionRequest(plan=_plan(), approval_level=1), "tenant-1", 1
+    )
+    repository.executions[first.execution_id].status = ExecutionStatus.COMPLETED
+
+    second = await executor.execute(
+        ExecutionRequest(plan=_plan(), approval_level=1), "tenant-1", 1
+    )
+    assert second.execution_id != first.execution_id
+    assert second.deduplicated is False
+
+
+@pytest.mark.asyncio
+async def test_retry_storm_creates_single_execution(executor, repository):
+    """Concurrent retries of the same plan collapse to one execution"""
+    requests = [
+        executor.execute(
+            ExecutionRequest(plan=_plan(uuid4().hex[:8]), approval_level=1), "tenant-1", 1
+        )
+        for _ in range(20)
+    ]
+    responses = await asyncio.gather(*requests)
+
+    assert len({r.execution_id for r in responses}) == 1
+    assert sum(1 for r in responses if not r.deduplicated) == 1
+    assert len(repository.events) == 19
@@ -0,0 +1,206 @@
+"""
+Phase 7: Per-Tenant Fair Scheduling Tests
+Weighted fair queuing, concurrency ceilings and the noisy-neighbour scenario
+"""
+
+import heapq
+
+import pytest
+
+from execution.scheduling import FairScheduler, QueueMetrics, virtual_tags
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = int(len(ordered) * percentile / 100)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def _simulate(scheduler, arrivals, workers=4, service_time=1.0, tenant_key=None, timeout=None):
+    """
+    Discrete-event simulation of workers draining a scheduler
+
+    Args:
+        scheduler: FairScheduler instance
+        arrivals: List of (time, tenant_id) sorted by time
+        workers: Number of concurrent workers
+        service_time: Time each entry takes to run
+        tenant_key: Optional mapping applied to tenant IDs before enqueue
+            (a constant key turns the scheduler into plain FIFO)
+        timeout: Give every entry a deadline `timeout` after arrival, as the
+            executor does with the execution's timeout_at
+
+    Returns:
+        Dict of tenant_id -> list of queue waits
+    """
+    waits = {}
+    busy = []  # (finish_time, seq, item, real_tenant)
+    seq = 0
+    index = 0
+    now = 0.0
+
+    while index < len(arrivals) or len(scheduler) or busy:
+        next_arrival = arrivals[index][0] if index < len(arrivals) else float("inf")
+        next_completion = busy[0][0] if busy else float("inf")
+
+        if next_completion <= next_arrival:
+            now, _, item, _ = heapq.heappop(busy)
+            scheduler.complete(item)
+        else:
+            now, tenant = arrivals[index]
+            key = tenant_key(tenant) if tenant_key else tenant
+            deadline = now + timeout if timeout is not None else None
+            scheduler.enqueue(item_id=(index, tenant), tenant_id=key, enqueued_at=now, deadline=deadline)
+            index += 1
+
+        while len(busy) < workers:
+            item = scheduler.dequeue(now)
+            if item is None:
+                break
+            real_tenant = item.item_id[1]
+            waits.setdefault(real_tenant, []).append(now - item.enqueued_at)
+            seq += 1
+            heapq.heappush(busy, (now + service_time, seq, item, real_tenant))
+
+    return waits
+
+
+def _noisy_neighbour_arrivals():
+    """Bulk tenant floods 2000 entries at t=0; interactive submits every 2s"""
+    arrivals = [(0.0, "bulk") for _ in range(2000)]
+    arrivals += [(0.5 + 2.0 * i, "interactive") for i in range(100)]
+    return sorted(arrivals, key=lambda a: a[0])
+
+
+# ============================================================================
+# TAGGING TESTS
+# ============================================================================
+
+def test_virtual_tags_start_at_system_time():
+    assert virtual_tags(10.0, None, 1.0, 2.0) == (10.0, 12.0)
+
+
+def test_virtual_tags_continue_tenant_backlog():
+    assert virtual_tags(10.0, 15.0, 2.0, 2.0) == (15.0, 16.0)
+
+
+# ============================================================================
+# SCHEDULER TESTS
+# ============================================================================
+
+def test_equal_weights_interleave_tenants():
+    scheduler = FairScheduler()
+    for i in range(10):
+        scheduler.enqueue(("a", i), "a")
+    for i in range(10):
+        scheduler.enqueue(("b", i), "b")
+
+    order = [scheduler.dequeue().tenant_id for _ in range(6)]
+    assert order.count("a") == 3
+    assert order.count("b") == 3
+
+
+def test_weights_set_share():
+    scheduler = FairScheduler(weights={"gold": 2.0})
+    for i in range(60):
+        scheduler.enqueue(("gold", i), "gold")
+        scheduler.enqueue(("std", i), "std")
+
+    order = [scheduler.dequeue().tenant_id for _ in range(30)]
+    assert order.count("gold") == 20
+    assert order.count("std") == 10
+
+
+def test_priority_band_is_strict():
+    scheduler = FairScheduler()
+    scheduler.enqueue("low", "a", priority=10)
+    scheduler.enqueue("high", "b", priority=1)
+    assert scheduler.dequeue().item_id == "high"
+
+
+def test_concurrency_ceiling_skips_tenant():
+    scheduler = FairScheduler(max_concurrency={"bulk": 1})
+    scheduler.enqueue("b1", "bulk")
+    scheduler.enqueue("b2", "bulk")
+    scheduler.enqueue("i1", "interactive", enqueued_at=1.0)
+
+    first = scheduler.dequeue()
+    assert first.item_id == "b1"
+    assert scheduler.dequeue().item_id == "i1"
+    assert scheduler.dequeue() is None  # bulk at ceiling
+
+    scheduler.complete(first)
+    assert scheduler.dequeue().item_id == "b2"
+
+
+def test_depth_and_running_by_tenant():
+    scheduler = FairScheduler()
+    scheduler.enqueue("a1", "a")
+    scheduler.enqueue("a2", "a")
+    scheduler.dequeue()
+    assert scheduler.depth_by_tenant() == {"a": 1}
+    assert scheduler.running_by_tenant() == {"a": 1}
+
+
+# ============================================================================
+# METRICS TESTS
+# ============================================================================
+
+def test_queue_metrics_per_tenant():
+    metrics = QueueMetrics()
+    metrics.update_depths({"a": 3, "b": 1}, {"a": 2})
+    metrics.record_dequeue("a", 120.0)
+    metrics.record_dequeue("b", 5.0)
+
+    data = metrics.get_metrics()
+    assert data["a"]["queue_depth"] == 3
+    assert data["a"]["running"] == 2
+    assert data["b"]["wait_ms"]["count"] == 1
+
+    text = metrics.get_prometheus_metrics()
+    assert 'execution_queue_depth{tenant="a"} 3' in text
+    assert 'execution_queue_wait_ms_count{tenant="b"} 1' in text
+
+
+# ============================================================================
+# NOISY NEIGHBOUR
+# ============================================================================
+
+def test_noisy_neighbour_interactive_wait_bounded():
+    """Interactive p99 wait stays bounded while a bulk tenant floods the queue"""
+    arrivals = _noisy_neighbour_arrivals()
+
+    fifo_waits = _simulate(FairScheduler(), arrivals, tenant_key=lambda _: "all")
+    fair_waits = _simulate(
+        FairScheduler(max_concurrency={"bulk": 3}),
+        arrivals,
+    )
+
+    fifo_p99 = _percentile(fifo_waits["interactive"], 99)
+    fair_p99 = _percentile(fair_waits["interactive"], 99)
+    print(f"\ninteractive p99 wait: fifo={fifo_p99:.1f}s fair={fair_p99:.1f}s")
+
+    # FIFO: interactive waits behind the whole bulk backlog
+    assert fifo_p99 > 100
+    # Fair: bounded by roughly one service time
+    assert fair_p99 <= 1.0
+    # Bulk work still completes
+    assert len(fair_waits["bulk"]) == 2000
+
+
+@pytest.mark.parametrize("timeout", [None, 3600.0])
+def test_noisy_neighbour_fair_without_ceiling(timeout):
+    """Fair order alone bounds interactive wait, deadlines set or not"""
+    waits = _simulate(FairScheduler(), _noisy_neighbour_arrivals(), timeout=timeout)
+
+    interactive_p99 = _percentile(waits["interactive"], 99)
+    print(f"\ninteractive p99 wait (timeout={timeout}): {interactive_p99:.1f}s")
+
+    # Every bulk entry has an earlier deadline than any interactive one,
+    # so deadline-first ordering would make interactive wait out the flood
+    assert interactive_p99 <= 1.0
+    assert len(waits["bulk"]) == 2000 and len(waits["interactive"]) == 100
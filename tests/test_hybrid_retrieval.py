@@ -0,0 +1,316 @@
+"""
+Hybrid Retrieval Tests
+BM25 index, reciprocal rank fusion, the hybrid SQL statement, the in-memory
+retriever behind ToolIndexService, and recall@k / latency on a labelled
+query set derived from training_data/
+"""
+
+import json
+import math
+import random
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pipeline.services.catalog_pool import CatalogConnectionPool
+from pipeline.services.hybrid_retriever import (
+    BM25Index, HybridRetriever, reciprocal_rank_fusion, to_tsquery_text, tokenize,
+)
+from pipeline.services.tool_index_service import ToolIndexService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+TRAINING = Path(__file__).resolve().parent.parent / "training_data" / "training_data_10k.jsonl"
+
+
+def _embed(text, dim=256):
+    """Deterministic character-trigram embedding (stand-in for the BGE model)"""
+    vec = np.zeros(dim, dtype=np.float32)
+    padded = f"  {text.lower()}  "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode()) % dim] += 1
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+def _labelled_set():
+    """
+    Tools and labelled queries derived from the training data
+
+    Each distinct request is labelled with the capabilities most of its
+    occurrences carry. Half of the requests describe tools (three requests
+    per tool, one capability each); the other half are the queries.
+    """
+    votes, counts = defaultdict(Counter), Counter()
+    with open(TRAINING) as f:
+        for line in f:
+            row = json.loads(line)
+            counts[row["request"]] += 1
+            votes[row["request"]].update(row["expected_response"]["capabilities"])
+    labels = {
+        q: {c for c, n in v.items() if n * 2 >= counts[q]} or {v.most_common(1)[0][0]}
+        for q, v in votes.items()
+    }
+
+    requests = sorted(labels)
+    random.Random(7).shuffle(requests)
+    build, evaluate = requests[::2], requests[1::2]
+
+    by_capability = defaultdict(list)
+    for request in build:
+        for capability in labels[request]:
+            by_capability[capability].append(request)
+
+    tools = []
+    for capability, examples in sorted(by_capability.items()):
+        for i in range(0, len(examples), 3):
+            tools.append({
+                "id": f"{capability.replace('_', '-')}-{i // 3}",
+                "name": capability.replace("_", " "),
+                "desc_short": "; ".join(examples[i:i + 3])[:110],
+                "platform": "multi-platform",
+                "tags": [capability],
+                "cost_hint": "low",
+            })
+    return tools, [(q, labels[q]) for q in evaluate]
+
+
+def _capability(tool_id):
+    return tool_id.rsplit("-", 1)[0].replace("-", "_")
+
+
+def _recall(tool_ids, relevant):
+    found = {_capability(i) for i in tool_ids}
+    return len(relevant & found) / len(relevant)
+
+
+def _ilike(tools, query, k):
+    """Previous keyword_search: first five words, ILIKE/tag match, unranked LIMIT"""
+    keywords = [w.lower() for w in query.split() if len(w) > 2][:5]
+    hits = []
+    for tool in tools:
+        if any(kw in tool["name"].lower() or kw in tool["desc_short"].lower() or kw in tool["tags"]
+               for kw in keywords):
+            hits.append(tool["id"])
+            if len(hits) == k:
+                break
+    return hits
+
+
+class RowsCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchall(self):
+        return self.rows
+
+
+class RowsConnection:
+    def __init__(self, rows):
+        self.cursor_ = RowsCursor(rows)
+        self.closed = 0
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_
+
+    def get_transaction_status(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+# ============================================================================
+# UNIT TESTS
+# ============================================================================
+
+def test_tokenize_and_tsquery_are_operator_free():
+    assert tokenize("Show the logs for web-01's Services") == ["log", "web", "01", "service"]
+    assert tokenize("Restart services") == tokenize("restart service") == ["restart", "service"]
+    assert tokenize("check process")[-1] == "process"
+    assert to_tsquery_text("disk & !usage | (disk) <-> x:*") == "disk | usage"
+    assert to_tsquery_text("status of services") == "status | services"
+    assert to_tsquery_text("what is the") is None
+
+
+def test_reciprocal_rank_fusion():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60))
+    assert fused["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused["a"] == pytest.approx(1 / 61)
+    assert [i for i, _ in reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)] == ["b", "a", "d", "c"]
+
+    # Weighting the second list lets its top item win
+    weighted = reciprocal_rank_fusion([["a", "b"], ["c"]], k=1, weights=[1.0, 3.0])
+    assert weighted[0] == ("c", pytest.approx(1.5))
+
+
+def test_bm25_matches_reference_formula():
+    rng = random.Random(3)
+    vocabulary = [f"w{i}" for i in range(30)]
+    docs = [[rng.choice(vocabulary) for _ in range(rng.randint(1, 12))] for _ in range(60)]
+    index = BM25Index(docs, k1=1.2, b=0.75)
+    avgdl = sum(map(len, docs)) / len(docs)
+
+    def reference(query, doc):
+        score = 0.0
+        for term in set(query):
+            df = sum(term in d for d in docs)
+            tf = doc.count(term)
+            if tf:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * 2.2 / (tf + 1.2 * (1 - 0.75 + 0.75 * len(doc) / avgdl))
+        return score
+
+    query = ["w1", "w7", "w7", "w22", "unknown"]
+    np.testing.assert_allclose(index.scores(query), [reference(query, d) for d in docs], rtol=1e-5)
+    top = index.search(query, top_k=5)
+    assert [score for _, score in top] == sorted((score for _, score in top), reverse=True)
+    assert all(score > 0 for _, score in index.search(["w1"], top_k=100))
+
+
+def test_retriever_filters_platform_and_threshold():
+    rows = [
+        {"id": "systemctl", "name": "systemctl", "desc_short": "restart linux services", "platform": "linux",
+         "tags": ["service"]},
+        {"id": "sc-exe", "name": "sc.exe", "desc_short": "restart windows services", "platform": "windows",
+         "tags": ["service"]},
+        {"id": "ansible", "name": "ansible", "desc_short": "restart services anywhere", "platform": "multi-platform",
+         "tags": ["automation"]},
+    ]
+    embeddings = np.stack([_embed(r["desc_short"]) for r in rows])
+    retriever = HybridRetriever(rows, embeddings, similarity_threshold=0.6)
+
+    query = "restart linux services"
+    results = retriever.search(query, _embed(query), platform="linux")
+    assert [r["id"] for r in results] == ["systemctl", "ansible"]
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert "similarity" not in results[1] or results[1]["similarity"] >= 0.6
+    assert [r["id"] for r in retriever.search("sc.exe", None)] == ["sc-exe"]
+
+
+# ============================================================================
+# SERVICE TESTS
+# ============================================================================
+
+def test_hybrid_query_fuses_text_and_vector_ranks():
+    service = ToolIndexService()
+    assert service.retrieval_mode == "hybrid"
+
+    sql, params = service.build_retrieval_query("Restart the nginx services!", [0.1] * 8, "linux", 12)
+    assert "vector_hits" in sql and "text_hits" in sql
+    assert "tsv @@ query" in sql and "to_tsquery('english', %(tsquery)s)" in sql
+    assert "sum(rrf)" in sql and "ORDER BY f.rrf DESC" in sql
+    assert params["tsquery"] == "restart | nginx | services"
+    assert (params["rrf_k"], params["candidate_k"], params["max_rows"]) == (60, 40, 12)
+
+    sql, params = service.build_retrieval_query("restart nginx", None, None, 12)
+    assert "vector_hits" not in sql and "text_hits" in sql and "platform" not in params
+
+    sql, _ = service.build_retrieval_query("the", None, None, 12)
+    assert "text_hits" not in sql and "ANY(%(always)s)" in sql
+
+
+@pytest.mark.parametrize("has_tsv", [True, False])
+def test_hybrid_needs_the_tsv_column(has_tsv):
+    """Without migration 0012 the service falls back to vector retrieval"""
+    class SchemaCursor(RowsCursor):
+        def fetchone(self):
+            return (1,) if has_tsv else None
+
+    conn = RowsConnection([{"id": "df", "name": "df", "similarity": 0.9}])
+    conn.cursor_ = SchemaCursor(conn.cursor_.rows)
+    service = ToolIndexService()
+    service._pool = CatalogConnectionPool("", service._pool_config, connect=lambda: conn)
+
+    for _ in range(2):
+        assert [c["id"] for c in service.retrieve_candidates("restart nginx", [0.1] * 8, None, 5)] == ["df"]
+
+    executed = conn.cursor_.executed
+    assert "information_schema.columns" in executed[0]
+    assert len(executed) == 3  # checked once
+    assert service.retrieval_mode == ("hybrid" if has_tsv else "vector")
+    assert ("text_hits" in executed[-1]) is has_tsv
+
+
+def test_local_retriever_serves_candidates_without_queries(monkeypatch):
+    monkeypatch.setenv("TOOL_INDEX_RRF_K", "20")
+    service = ToolIndexService()
+    rows = [
+        {"id": "asset-query", "name": "asset-query", "desc_short": "query asset inventory",
+         "platform": "multi-platform", "tags": ["asset"], "cost_hint": "low"},
+        {"id": "df", "name": "df", "desc_short": "report disk space usage", "platform": "linux",
+         "tags": ["disk"], "cost_hint": "low"},
+        {"id": "du", "name": "du", "desc_short": "estimate file space usage", "platform": "linux",
+         "tags": ["disk"], "cost_hint": "low"},
+    ]
+    for row in rows:
+        row["emb"] = "[" + ",".join(f"{x:.6f}" for x in _embed(row["desc_short"])) + "]"
+    conn = RowsConnection(rows)
+    service._pool = CatalogConnectionPool("", service._pool_config, connect=lambda: conn)
+
+    retriever = service.load_local_retriever()
+    assert retriever.rrf_k == 20 and retriever.embeddings.shape == (3, 256)
+    executed = len(conn.cursor_.executed)
+
+    candidates = service.retrieve_candidates("disk space usage", list(_embed("disk space usage")), "linux", max_rows=5)
+    assert [c["id"] for c in candidates] == ["df", "du", "asset-query"]
+    assert "emb" not in candidates[0] and "similarity" not in candidates[-1]
+    assert service.retrieve_candidates("disk", None, None, max_rows=1)[0]["id"] in ("df", "du")
+    assert len(conn.cursor_.executed) == executed
+
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+
+def test_recall_and_latency_on_training_queries():
+    """Recall@k and us/query: ILIKE keywords vs vector vs BM25 vs hybrid RRF"""
+    tools, queries = _labelled_set()
+    embeddings = np.stack([_embed(f"{t['name']} | {t['desc_short']} | {' '.join(t['tags'])}") for t in tools])
+    retriever = HybridRetriever(tools, embeddings)
+    query_embeddings = {q: _embed(q) for q, _ in queries}
+
+    methods = {
+        "ilike": lambda q, k: _ilike(tools, q, k),
+        "vector": lambda q, k: [tools[i]["id"] for i, _ in retriever.vector_ranking(query_embeddings[q], k)],
+        "bm25": lambda q, k: [tools[i]["id"] for i in retriever.text_ranking(q, k)],
+        "hybrid": lambda q, k: [t["id"] for t in retriever.search(q, query_embeddings[q], top_k=k)],
+    }
+
+    recall = {}
+    latency_us = {}
+    for name, method in methods.items():
+        for k in (3, 5, 10):
+            recall[name, k] = float(np.mean([_recall(method(q, k), relevant) for q, relevant in queries]))
+        started = time.perf_counter()
+        for q, _ in queries:
+            method(q, 10)
+        latency_us[name] = (time.perf_counter() - started) / len(queries) * 1e6
+
+    print(f"\n{len(tools)} tools, {len(queries)} labelled queries")
+    for name in methods:
+        print(f"  {name:7s} recall@3={recall[name, 3]:.3f} @5={recall[name, 5]:.3f} "
+              f"@10={recall[name, 10]:.3f}  {latency_us[name]:.0f} us/query")
+
+    for k in (3, 5, 10):
+        assert recall["hybrid", k] > recall["vector", k]
+        assert recall["hybrid", k] > 2 * recall["ilike", k]
+    # Hybrid at 5 rows finds what vector-only needed ~10 rows for
+    assert recall["hybrid", 5] > recall["vector", 5] + 0.03
+    assert latency_us["hybrid"] < 1000
@@ -0,0 +1,159 @@
+"""
+Single-Pass Preference Detection Tests
+Trie-regex scan parity with per-mode regexes on the training corpus, hit
+positions, normalized query cache and micro-benchmarks (including a 10x
+larger vocabulary)
+"""
+
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+import pytest
+
+from pipeline.stages.stage_b.deterministic_scorer import PreferenceMode
+from pipeline.stages.stage_b.preference_detector import PreferenceDetector, PreferenceHit, _trie_pattern
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+CORPUS = Path(__file__).resolve().parent.parent / "training_data" / "training_data_10k.jsonl"
+
+PREFERENCE_PHRASES = [
+    "quickly", "accurate", "all of", "cheap", "simple", "double check", "in detail", "low-cost", "asap",
+]
+
+
+def _corpus():
+    """Training requests, a third of them with preference phrasing mixed in"""
+    rng = random.Random(13)
+    queries = []
+    with open(CORPUS) as f:
+        for line in f:
+            query = json.loads(line)["request"]
+            if rng.random() < 0.33:
+                query = f"{query} {rng.choice(PREFERENCE_PHRASES)} {rng.choice(PREFERENCE_PHRASES)}"
+            queries.append(query)
+    return queries
+
+
+class LegacyDetector(PreferenceDetector):
+    """Previous matching: one regex per mode, findall on every request"""
+
+    def __init__(self):
+        super().__init__()
+        self._legacy = {
+            mode: re.compile(r'\b(' + '|'.join(re.escape(kw) for kw in keywords) + r')\b', re.IGNORECASE)
+            for mode, keywords in self._mode_keywords.items()
+        }
+
+    def _match_counts(self, query):
+        query_lower = query.lower()
+        return {mode: len(pattern.findall(query_lower)) for mode, pattern in self._legacy.items()}
+
+
+def _large_vocabulary(detector_cls, extra):
+    """Detector class with `extra` synthetic keywords per mode"""
+    rng = random.Random(3)
+
+    def words(prefix):
+        return [prefix + "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)) for _ in range(extra)]
+
+    return type("LargeVocabulary", (detector_cls,), {
+        "FAST_KEYWORDS": detector_cls.FAST_KEYWORDS + words("fa"),
+        "ACCURATE_KEYWORDS": detector_cls.ACCURATE_KEYWORDS + words("ac"),
+        "THOROUGH_KEYWORDS": detector_cls.THOROUGH_KEYWORDS + words("th"),
+        "CHEAP_KEYWORDS": detector_cls.CHEAP_KEYWORDS + words("ch"),
+        "SIMPLE_KEYWORDS": detector_cls.SIMPLE_KEYWORDS + words("si"),
+    })
+
+
+# ============================================================================
+# PARITY TESTS
+# ============================================================================
+
+def test_matches_per_mode_regexes_on_training_corpus():
+    detector, legacy = PreferenceDetector(), LegacyDetector()
+    queries = _corpus()
+
+    for query in queries:
+        assert detector._match_counts(query) == legacy._match_counts(query), query
+        assert detector.detect_preference_with_confidence(query) == legacy.detect_preference_with_confidence(query)
+    assert sum(detector.detect_preference(q) != PreferenceMode.BALANCED for q in queries) > 1000
+
+
+def test_trie_pattern_prefers_longest_keyword():
+    pattern = re.compile(r'\b(' + _trie_pattern(["quick", "quickly", "quiet", "double", "double check"]) + r')\b')
+    assert pattern.findall("quickly quick quiet quietly double check doubles") == [
+        "quickly", "quick", "quiet", "double check",
+    ]
+
+
+def test_hits_carry_mode_and_position():
+    hits = PreferenceDetector().find_preference_hits("Give me a QUICK,  precise count of ALL hosts")
+    assert hits == (
+        PreferenceHit(PreferenceMode.FAST, "quick", 10, 15),
+        PreferenceHit(PreferenceMode.ACCURATE, "precise", 17, 24),
+        PreferenceHit(PreferenceMode.THOROUGH, "all", 34, 37),
+    )
+    assert "give me a quick, precise count of all hosts"[17:24] == "precise"
+
+
+def test_ties_keep_mode_priority():
+    detector = PreferenceDetector()
+    assert detector.detect_preference("simple but accurate") == PreferenceMode.ACCURATE
+    mode, confidence = detector.detect_preference_with_confidence("cheap and fast")
+    assert mode == PreferenceMode.FAST and confidence == pytest.approx(0.8)
+    assert detector.detect_preference("breakfast is fasting") == PreferenceMode.BALANCED
+
+
+def test_normalized_queries_share_cache_entries():
+    detector = PreferenceDetector(cache_size=8)
+    detector.detect_preference("Quick  count of hosts")
+    detector.detect_preference("quick count of HOSTS ")
+    detector.detect_preference_with_confidence("  QUICK count of hosts")
+
+    info = detector.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+    # Explicit modes never touch the cache
+    assert detector.detect_preference("quick", explicit_mode="thorough") == PreferenceMode.THOROUGH
+    assert detector.cache_info().misses == 1
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_detection_benchmark():
+    """Training corpus: per-mode findall vs single scan vs cached, and 10x vocabulary"""
+    queries = _corpus()
+
+    def timed(detector):
+        started = time.perf_counter()
+        for query in queries:
+            detector.detect_preference(query)
+        return (time.perf_counter() - started) / len(queries) * 1e6
+
+    legacy_us = timed(LegacyDetector())
+    scan_us = timed(PreferenceDetector(cache_size=0))
+    cached = PreferenceDetector()
+    timed(cached)
+    cached_us = timed(cached)
+
+    legacy_large_us = timed(_large_vocabulary(LegacyDetector, 200)())
+    scan_large_us = timed(_large_vocabulary(PreferenceDetector, 200)(cache_size=0))
+
+    print(
+        f"\n{len(queries)} queries, us/query: per-mode={legacy_us:.1f}, single scan={scan_us:.1f}, "
+        f"cached={cached_us:.2f}; 10x vocabulary: per-mode={legacy_large_us:.1f}, single scan={scan_large_us:.1f}"
+    )
+
+    assert scan_us < legacy_us
+    assert cached_us < scan_us
+    assert scan_large_us < scan_us * 2
+    assert scan_large_us < legacy_large_us
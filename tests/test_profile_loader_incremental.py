@@ -0,0 +1,201 @@
+"""
+Incremental ProfileLoader Reload Tests
+updated_at / tombstone deltas, atomic profile map swap, fallbacks and a
+single-tool update benchmark against a 10k-tool catalog
+"""
+
+import copy
+import time
+from datetime import datetime, timedelta
+
+from pipeline.stages.stage_b.profile_loader import ProfileLoader
+from tests.test_catalog_snapshot import _synthetic_tools
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class FakeCatalogService:
+    """Tool catalog with updated_at tracking and tombstones on a manual clock"""
+
+    def __init__(self, tools):
+        self.now = datetime(2025, 1, 1, 12, 0, 0)
+        self.tools = {t["tool_name"]: t for t in tools}
+        self.updated_at = {name: self.now - timedelta(days=1) for name in self.tools}
+        self.tombstones = {}
+        self.full_loads = 0
+        self.loaded_names = []
+        self.tracking_available = True
+
+    def tick(self, seconds=60):
+        self.now += timedelta(seconds=seconds)
+
+    def update(self, tool):
+        self.tick()
+        self.tools[tool["tool_name"]] = tool
+        self.updated_at[tool["tool_name"]] = self.now
+
+    def delete(self, tool_name):
+        self.tick()
+        del self.tools[tool_name]
+        del self.updated_at[tool_name]
+        self.tombstones[tool_name] = self.now
+
+    # ToolCatalogService contract -----------------------------------------
+
+    def get_tool_changes_since(self, since):
+        if not self.tracking_available:
+            raise RuntimeError('relation "tool_catalog.tool_tombstones" does not exist')
+        if since is None:
+            return [], self.now
+        names = [n for n, at in self.updated_at.items() if at > since]
+        names += [n for n, at in self.tombstones.items() if at > since]
+        return names, self.now
+
+    def get_all_tools_with_structure(self, use_cache=True, tool_names=None):
+        if tool_names is None:
+            self.full_loads += 1
+            return list(self.tools.values())
+        self.loaded_names.append(list(tool_names))
+        wanted = {n.lower() for n in tool_names}
+        return [t for n, t in self.tools.items() if n.lower() in wanted]
+
+    def _clear_cache(self, pattern=None):
+        pass
+
+
+def _loader(service):
+    loader = ProfileLoader()
+    loader._catalog_service = service
+    return loader
+
+
+def _changed(tool, description):
+    tool = copy.deepcopy(tool)
+    tool["description"] = description
+    return tool
+
+
+# ============================================================================
+# DELTA TESTS
+# ============================================================================
+
+def test_single_tool_update_patches_and_swaps():
+    service = FakeCatalogService(_synthetic_tools(50))
+    loader = _loader(service)
+    before = loader.load()
+
+    service.update(_changed(service.tools["tool_000007"], "updated"))
+    after = loader.reload(tool_name="tool_000007")
+
+    assert service.full_loads == 1
+    assert service.loaded_names == [["tool_000007"]]
+    assert after.tools["tool_000007"].description == "updated"
+    # Untouched profiles are shared, the swapped-out map is left intact
+    assert after.tools["tool_000008"] is before.tools["tool_000008"]
+    assert before.tools["tool_000007"].description == "synthetic tool"
+    assert after is not before and len(after.tools) == len(before.tools) == 50
+
+
+def test_delta_picks_up_changes_from_other_writers():
+    service = FakeCatalogService(_synthetic_tools(20))
+    loader = _loader(service)
+    loader.load()
+
+    # Written elsewhere; the reload is triggered for a different tool
+    service.update(_changed(service.tools["tool_000003"], "from another replica"))
+    profiles = loader.reload(tool_name="tool_000011")
+
+    assert sorted(service.loaded_names[0]) == ["tool_000003", "tool_000011"]
+    assert profiles.tools["tool_000003"].description == "from another replica"
+
+
+def test_tombstones_and_patternless_tools_are_removed():
+    service = FakeCatalogService(_synthetic_tools(20))
+    loader = _loader(service)
+    loader.load()
+
+    service.delete("tool_000004")
+    stripped = copy.deepcopy(service.tools["tool_000005"])
+    for capability in stripped["capabilities"].values():
+        capability["patterns"] = []
+    service.update(stripped)
+
+    profiles = loader.reload(tool_name="tool_000005")
+    assert "tool_000004" not in profiles.tools
+    assert "tool_000005" not in profiles.tools
+    assert len(profiles.tools) == 18
+    assert service.full_loads == 1
+
+
+def test_overlap_window_catches_late_commits():
+    service = FakeCatalogService(_synthetic_tools(10))
+    loader = _loader(service)
+    loader.load()
+
+    # Transaction started 10s before the watermark but committed after it
+    late = _changed(service.tools["tool_000002"], "late commit")
+    service.tools["tool_000002"] = late
+    service.updated_at["tool_000002"] = service.now - timedelta(seconds=10)
+    service.tick()
+
+    assert loader.reload(tool_name="tool_000009").tools["tool_000002"].description == "late commit"
+
+
+def test_invalidate_tool_defers_delta_to_next_read():
+    service = FakeCatalogService(_synthetic_tools(10))
+    loader = _loader(service)
+    loader.load()
+
+    service.update(_changed(service.tools["tool_000001"], "v2"))
+    loader.invalidate_cache("tool_000001")
+    assert service.loaded_names == []
+
+    assert loader.get_tool_profile("tool_000001").description == "v2"
+    assert service.loaded_names == [["tool_000001"]]
+    assert service.full_loads == 1
+
+    # Invalidating everything still forces a full load
+    loader.invalidate_cache()
+    loader.get_all_tools()
+    assert service.full_loads == 2
+
+
+def test_falls_back_to_full_reload_without_change_tracking():
+    service = FakeCatalogService(_synthetic_tools(10))
+    service.tracking_available = False
+    loader = _loader(service)
+    loader.load()
+
+    service.update(_changed(service.tools["tool_000001"], "v2"))
+    profiles = loader.reload(tool_name="tool_000001")
+
+    assert profiles.tools["tool_000001"].description == "v2"
+    assert service.full_loads == 2
+    assert service.loaded_names == []
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_single_tool_reload_benchmark():
+    """One tool updated in a 10k-tool catalog: full reload vs delta"""
+    service = FakeCatalogService(_synthetic_tools(10000))
+    loader = _loader(service)
+
+    started = time.perf_counter()
+    loader.load()
+    full_ms = (time.perf_counter() - started) * 1000
+
+    service.update(_changed(service.tools["tool_004321"], "updated"))
+    started = time.perf_counter()
+    profiles = loader.reload(tool_name="tool_004321")
+    delta_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n10000 tools: full reload={full_ms:.0f}ms, single-tool delta reload={delta_ms:.1f}ms")
+
+    assert profiles.tools["tool_004321"].description == "updated"
+    assert len(profiles.tools) == 10000
+    assert delta_ms < full_ms / 20
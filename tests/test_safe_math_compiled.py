@@ -0,0 +1,208 @@
+"""
+Compiled Safe Math Expression Tests
+Compile-once caching, parity and error messages against per-call parsing,
+NumPy batch evaluation, enumerator precompilation and a 1k expressions x
+100 contexts benchmark
+"""
+
+import math
+import time
+
+import numpy as np
+import pytest
+
+from pipeline.stages.stage_b.candidate_enumerator import CandidateEnumerator, CapabilityIndex
+from pipeline.stages.stage_b.safe_math_eval import CompiledExpression, SafeMathEvaluator, _compile_cached
+from tests.test_candidate_index import FakeLoader, _profiles
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+PROFILE_EXPRESSIONS = [
+    "120 + 0.02 * N",
+    "200 + 2 * N + 500 * pages",
+    "3000 + 400 * log(N) + p95_latency * 1.2",
+    "min(1000, N * 2)",
+    "max(N, pages, 3) - abs(-N) // 7",
+    "1 / (1 + time_ms / 1000)",
+    "sqrt(N) * 10 + ceil(N / 3) - floor(pages / 2)",
+    "log(N, 2) + log10(N) + log2(pages) + exp(cost / 100)",
+    "N % 7 + 2 ** pages - -N + +cost",
+    "pi * e * N",
+]
+
+
+def _expressions(count):
+    return [
+        f"{i} + {(i % 13) / 10} * N + {i % 5} * log(N + 1) + p95_latency * {(i % 7) / 3:.3f} + "
+        f"min({1000 + i}, N * pages) / max(1, cost)"
+        for i in range(count)
+    ]
+
+
+def _contexts(count):
+    return [
+        {"N": float(10 + 37 * i), "pages": float(1 + i % 9), "p95_latency": float(50 + i), "cost": float(1 + i % 4)}
+        for i in range(count)
+    ]
+
+
+def _uncompiled(expression, context):
+    """Parse, validate and evaluate from scratch, as every call did before"""
+    return _compile_cached.__wrapped__(SafeMathEvaluator, expression, 20).evaluate(context)
+
+
+def _columns(contexts):
+    return {name: np.array([c[name] for c in contexts]) for name in contexts[0]}
+
+
+# ============================================================================
+# COMPILE TESTS
+# ============================================================================
+
+def test_compile_is_cached_across_evaluators():
+    compiled = SafeMathEvaluator().compile("120 + 0.02 * N")
+    assert isinstance(compiled, CompiledExpression)
+    assert SafeMathEvaluator().compile("120 + 0.02 * N") is compiled
+    # Depth limits are part of the cache key
+    assert SafeMathEvaluator(max_depth=5).compile("120 + 0.02 * N") is not compiled
+    assert compiled.evaluate({"N": 1000}) == 140.0
+
+
+def test_compiled_matches_parsing_each_call():
+    evaluator = SafeMathEvaluator()
+    for expression in PROFILE_EXPRESSIONS:
+        for context in _contexts(25):
+            assert evaluator.evaluate(expression, context) == _uncompiled(expression, context)
+
+
+def test_error_messages_unchanged():
+    evaluator = SafeMathEvaluator()
+    cases = [
+        ("10 / 0", {}, ValueError, "Error evaluating expression '10 / 0': Division by zero"),
+        ("10 // (N - N)", {"N": 3}, ValueError, r"Error evaluating expression '10 // \(N - N\)': Division by zero"),
+        ("N % 0", {}, ValueError, "Modulo by zero"),
+        ("2 ** 1000", {}, ValueError, "Exponent too large"),
+        ("undefined_var + 10", {}, ValueError, "Variable 'undefined_var' not defined in context"),
+        ("log(0)", {}, ValueError, "Error evaluating expression 'log\\(0\\)': math domain error"),
+        ("1 +", {}, SyntaxError, "Invalid expression syntax: 1 \\+"),
+        ("__import__('os')", {}, ValueError, "Function __import__ not allowed"),
+        ("N.real", {}, ValueError, "AST node type Attribute not allowed"),
+        ("N < 3", {}, ValueError, "AST node type Compare not allowed"),
+    ]
+    for expression, context, error, message in cases:
+        with pytest.raises(error, match=message):
+            evaluator.evaluate(expression, context)
+
+    with pytest.raises(ValueError, match=r"too deeply nested \(max depth: 5\)"):
+        SafeMathEvaluator(max_depth=5).compile("1+(2+(3+(4+(5+(6+(7+8))))))")
+
+
+def test_user_context_still_overrides_functions():
+    # Context values shadow whitelisted names exactly as before
+    with pytest.raises(ValueError, match="'int' object is not callable"):
+        SafeMathEvaluator().evaluate("log(N)", {"N": 10, "log": 3})
+
+
+# ============================================================================
+# BATCH TESTS
+# ============================================================================
+
+def test_batch_matches_row_by_row():
+    evaluator = SafeMathEvaluator()
+    contexts = _contexts(100)
+    columns = _columns(contexts)
+
+    for expression in PROFILE_EXPRESSIONS + _expressions(20):
+        batch = evaluator.evaluate_batch(expression, columns)
+        rows = np.array([evaluator.evaluate(expression, c) for c in contexts])
+        assert batch.dtype == np.float64 and batch.shape == (100,)
+        np.testing.assert_allclose(batch, rows, rtol=1e-12)
+
+
+def test_batch_broadcasts_scalars_and_numbers():
+    evaluator = SafeMathEvaluator()
+    result = evaluator.evaluate_batch("200 + 2 * N + 500 * pages", {"N": [1, 2, 3], "pages": 2})
+    assert result.tolist() == [1202.0, 1204.0, 1206.0]
+    assert evaluator.evaluate_batch("pages * 3", {"N": np.arange(4)}).tolist() == [3.0] * 4
+    assert evaluator.evaluate_batch(42, {"N": np.arange(2)}).tolist() == [42.0, 42.0]
+
+    with pytest.raises(ValueError, match="has 2 rows, expected 3"):
+        evaluator.evaluate_batch("N + pages", {"N": [1, 2, 3], "pages": [1, 2]})
+
+
+def test_batch_errors_match_first_failing_row():
+    evaluator = SafeMathEvaluator()
+    columns = {"N": np.array([4.0, 2.0, 0.0, -1.0])}
+
+    with pytest.raises(ValueError, match="Error evaluating expression '100 / N': Division by zero"):
+        evaluator.evaluate_batch("100 / N", columns)
+    with pytest.raises(ValueError, match="math domain error"):
+        evaluator.evaluate_batch("log(N)", columns)
+    with pytest.raises(ValueError, match="Exponent too large"):
+        evaluator.evaluate_batch("2 ** (N * 100)", columns)
+
+    # NumPy would warn and return inf/NaN where math raises or differs;
+    # those batches fall back to the scalar semantics
+    with pytest.raises(ValueError, match="cannot convert float infinity to integer"):
+        evaluator.evaluate_batch("ceil(N * 1.5)", {"N": [1.0, float("inf")]})
+    assert evaluator.evaluate_batch("min(N, 5)", {"N": [float("nan"), 1.0]})[1] == 1.0
+    assert evaluator.evaluate_batch("N * N", {"N": [1e200]}).tolist() == [math.inf]
+
+
+# ============================================================================
+# ENUMERATOR TESTS
+# ============================================================================
+
+def test_index_precompiles_pattern_expressions():
+    profiles = _profiles(20)
+    index = CapabilityIndex(profiles)
+    entry = index.lookup(["capability_0"])[0]
+    assert isinstance(entry.time_estimate_ms, CompiledExpression)
+    assert entry.time_estimate_ms.expression == entry.pattern.time_estimate_ms
+
+    candidates = CandidateEnumerator(FakeLoader(profiles)).enumerate_candidates(["capability_0"], {"N": 100})
+    expected = SafeMathEvaluator().evaluate(entry.pattern.time_estimate_ms, {"N": 100})
+    assert candidates[0].estimated_time_ms == expected
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_compiled_evaluation_benchmark():
+    """1000 expressions x 100 contexts: parse per call vs compiled vs batch"""
+    evaluator = SafeMathEvaluator()
+    expressions = _expressions(1000)
+    contexts = _contexts(100)
+    columns = _columns(contexts)
+
+    # Parsing on every call is slow; time a 10% sample and scale up
+    started = time.perf_counter()
+    for expression in expressions[:100]:
+        for context in contexts:
+            _uncompiled(expression, context)
+    parse_ms = (time.perf_counter() - started) * 1000 * 10
+
+    started = time.perf_counter()
+    compiled = [evaluator.compile(expression) for expression in expressions]
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    scalar = [[c.evaluate(context) for context in contexts] for c in compiled]
+    scalar_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    batch = [c.evaluate_batch(columns) for c in compiled]
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    print(
+        f"\n1000 expressions x 100 contexts: parse per call={parse_ms:.0f}ms, "
+        f"compile={compile_ms:.0f}ms, compiled={scalar_ms:.0f}ms, batch={batch_ms:.0f}ms"
+    )
+
+    np.testing.assert_allclose(np.array(batch), np.array(scalar), rtol=1e-12)
+    assert scalar_ms < parse_ms / 2
+    assert batch_ms < scalar_ms / 2
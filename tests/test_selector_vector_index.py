@@ -0,0 +1,294 @@
+"""
+Selector Vector Index Tests
+In-process NumPy index behind selector.dao.select_topk: parity with the
+SQL ordering (ties, NULL and zero embeddings, platform overlap), reload on
+tool_version_seq change, pgvector fallback, and p50/p99 + memory against
+the DB path at 1k, 10k and 100k vectors
+
+There is no Postgres here: FakeToolConnection answers the selector's SQL
+with an exact scan on its "server" side, behind a modelled round trip.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import shared.vector_index as vector_index
+from selector.dao import select_topk
+from shared.embeddings import embed_128
+from shared.vector_index import SelectorVectorIndex, build_tool_matrix
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+PLATFORMS = ["linux", "windows", "macos", "network"]
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _tools(n, distinct=None, nulls=0, zeros=0, seed=0):
+    """n tools; with `distinct`, embeddings repeat so ties need the usage/updated_at order"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((distinct or n, 128)).astype(np.float32)
+    tools = []
+    for i in range(n):
+        embedding = vectors[i % len(vectors)]
+        if i < nulls:
+            embedding = None
+        elif i < nulls + zeros:
+            embedding = np.zeros(128, dtype=np.float32)
+        tools.append({
+            "key": f"tool_{i:06d}",
+            "name": f"Tool {i}",
+            "short_desc": f"Does thing {i}",
+            "platform": [p for j, p in enumerate(PLATFORMS) if (i >> j) % 3 == 0],
+            "tags": [],
+            "embedding": embedding,
+            "usage_count": int(rng.integers(0, 4)),
+            "updated_at": EPOCH + timedelta(hours=int(rng.integers(0, 3))),
+        })
+    return tools
+
+
+class UndefinedTableError(Exception):
+    sqlstate = "42P01"
+
+
+class FakeToolConnection:
+    """
+    asyncpg-style connection over an in-memory `tool` table
+
+    The pgvector query is answered with an exact float64 scan ordered like
+    `embedding <=> q NULLS LAST, usage_count DESC, updated_at DESC`, after
+    one modelled round trip per statement.
+    """
+
+    def __init__(self, tools, rtt_ms=0.0, has_sequence=True):
+        self.tools = tools
+        self.rtt_ms = rtt_ms
+        self.has_sequence = has_sequence
+        self.version = 1
+        self.broken = False
+        self.statements = []
+        self._scan_state = None
+
+    def write(self, tool):
+        """INSERT ... ; the trigger from migration 0014 bumps the version"""
+        self.tools.append(tool)
+        self.version += 1
+        self._scan_state = None
+
+    async def _round_trip(self, query):
+        self.statements.append(query)
+        if self.broken:
+            raise ConnectionError("connection is closed")
+        if self.rtt_ms:
+            await asyncio.sleep(self.rtt_ms / 1000)
+
+    async def fetchrow(self, query, *args):
+        await self._round_trip(query)
+        if "tool_version_seq" in query:
+            if not self.has_sequence:
+                raise UndefinedTableError('relation "tool_version_seq" does not exist')
+            return {"last_value": self.version, "is_called": True}
+        return (len(self.tools), max(t["updated_at"] for t in self.tools),
+                sum(t["usage_count"] for t in self.tools))
+
+    async def fetch(self, query, *args):
+        await self._round_trip(query)
+        if "vector(128)" in query:
+            vec_lit, plat, k = args
+            query_vec = np.array(vec_lit[1:-1].split(","), dtype=np.float64)
+            return [{c: self.tools[i][c] for c in ("key", "name", "short_desc", "platform", "tags")}
+                    for i in self.scan(query_vec, plat, k)]
+        return [dict(t, embedding=None if t["embedding"] is None else list(t["embedding"]))
+                for t in self.tools]
+
+    def scan(self, query_vec, plat, k):
+        """Exact server-side ordering; returns tool indices"""
+        if self._scan_state is None:
+            embeddings = np.array([np.zeros(128) if t["embedding"] is None else t["embedding"]
+                                   for t in self.tools], dtype=np.float64)
+            self._scan_state = (
+                embeddings,
+                np.linalg.norm(embeddings, axis=1),
+                np.array([t["embedding"] is None for t in self.tools]),
+                {p: np.array([p in t["platform"] for t in self.tools]) for p in PLATFORMS},
+                np.array([t["usage_count"] for t in self.tools]),
+                np.array([t["updated_at"].timestamp() for t in self.tools]),
+            )
+        embeddings, norms, null, platform_masks, usage, updated = self._scan_state
+
+        # Row-wise sums so identical embeddings get identical distances
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance = 1 - (embeddings * query_vec).sum(axis=1) / (norms * np.linalg.norm(query_vec))
+        rank_class = np.where(null, 2, np.where(np.isnan(distance), 1, 0))
+        order = np.lexsort((-updated, -usage, np.nan_to_num(distance), rank_class))
+        if plat:
+            keep = np.logical_or.reduce([platform_masks.get(p, np.zeros(len(null), bool)) for p in plat])
+            order = order[keep[order]]
+        return order[:k].tolist()
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """Fresh process-wide index (select_topk only uses it once loaded)"""
+    index = SelectorVectorIndex(refresh_interval_seconds=0)
+    monkeypatch.setattr(vector_index, "_selector_index", index)
+    monkeypatch.delenv("SELECTOR_VECTOR_INDEX", raising=False)
+    return index
+
+
+def _keys(rows):
+    return [r["key"] for r in rows]
+
+
+def _pgvector_calls(conn):
+    return sum("vector(128)" in q for q in conn.statements)
+
+
+# ============================================================================
+# PARITY
+# ============================================================================
+
+def test_search_matches_sql_ordering():
+    tools = _tools(3000, distinct=700, nulls=15, zeros=5)
+    conn = FakeToolConnection(tools)
+    matrix = build_tool_matrix(asyncio.run(conn.fetch("SELECT ... FROM tool")), version=1)
+    assert matrix.matrix.dtype == np.float32 and matrix.matrix.flags.c_contiguous
+    assert len(matrix.duplicate_rows) == 3000 - 700 - 1  # zero rows share one vector
+    assert set(matrix.sentinel_rows) == set(range(20))
+
+    rng = np.random.default_rng(1)
+    filters = [[], ["linux"], ["windows", "macos"], ["network", "linux", "macos"], ["solaris"]]
+    for trial in range(60):
+        query = rng.standard_normal(128)
+        plat = filters[trial % len(filters)]
+        for k in (1, 8, 50, 5000):
+            expected = [tools[i]["key"] for i in conn.scan(query, plat, k)]
+            assert _keys(matrix.search(query, plat, k)) == expected, (trial, plat, k)
+
+    # NULL embeddings come last, after zero vectors, but are still returned
+    everything = _keys(matrix.search(rng.standard_normal(128), [], 3000))
+    assert set(everything[-15:]) == {f"tool_{i:06d}" for i in range(15)}
+    assert set(everything[-20:-15]) == {f"tool_{i:06d}" for i in range(15, 20)}
+
+
+def test_select_topk_serves_from_index_once_loaded(index):
+    conn = FakeToolConnection(_tools(500))
+
+    before = asyncio.run(select_topk(conn, "restart nginx", ["linux"], k=5))
+    assert _pgvector_calls(conn) == 1
+
+    asyncio.run(index.load(conn))
+    after = asyncio.run(select_topk(conn, "restart nginx", ["linux"], k=5))
+    assert _pgvector_calls(conn) == 1
+    assert after == before
+    assert set(after[0]) == {"key", "name", "short_desc", "platform", "tags"}
+
+    stats = index.get_statistics()
+    assert stats["loaded"] and stats["tools"] == 500 and stats["searches"] == 1
+
+
+# ============================================================================
+# REFRESH AND FALLBACK
+# ============================================================================
+
+def test_reloads_when_tool_version_moves(index):
+    conn = FakeToolConnection(_tools(200))
+    asyncio.run(index.load(conn))
+    new_tool = dict(_tools(1)[0], key="nginx_restart", embedding=np.array(embed_128("restart nginx")))
+
+    # Unchanged version: no reload
+    asyncio.run(select_topk(conn, "restart nginx", k=3))
+    assert index.get_statistics()["loads"] == 1
+
+    conn.write(new_tool)
+    rows = asyncio.run(select_topk(conn, "restart nginx", k=3))
+    assert rows[0]["key"] == "nginx_restart"
+    assert index.get_statistics()["loads"] == 2 and index.matrix.version == (2, True)
+
+    # Version checks are rate limited to one per refresh interval
+    index.refresh_interval_seconds = 60
+    asyncio.run(index.refresh_if_changed(conn))
+    checks = len(conn.statements)
+    for _ in range(10):
+        asyncio.run(select_topk(conn, "restart nginx", k=3))
+    assert len(conn.statements) == checks
+
+
+def test_falls_back_to_fingerprint_without_version_sequence(index):
+    conn = FakeToolConnection(_tools(100), has_sequence=False)
+    asyncio.run(index.load(conn))
+    assert index.matrix.version[0] == 100
+
+    conn.write(dict(_tools(1)[0], key="late", updated_at=EPOCH + timedelta(days=1)))
+    assert asyncio.run(index.refresh_if_changed(conn)) is True
+    assert len(index.matrix) == 101
+    assert asyncio.run(index.refresh_if_changed(conn)) is False
+
+
+def test_falls_back_to_pgvector_when_index_fails(index, monkeypatch):
+    conn = FakeToolConnection(_tools(100))
+    asyncio.run(index.load(conn))
+    expected = asyncio.run(select_topk(conn, "disk usage", k=4))
+
+    # The version check fails: this search goes to pgvector
+    conn.broken = True
+    with pytest.raises(ConnectionError):
+        asyncio.run(select_topk(conn, "disk usage", k=4))
+    assert index.get_statistics()["errors"] == 1
+
+    conn.broken = False
+    index._next_check = 0
+    monkeypatch.setattr(index.matrix.__class__, "search", lambda *a, **kw: 1 / 0)
+    assert asyncio.run(select_topk(conn, "disk usage", k=4)) == expected
+    assert _pgvector_calls(conn) == 2
+    assert index.matrix.version == (1, True)  # still on the sequence after the outage
+    assert index.get_statistics()["fallbacks"] == 2
+
+    monkeypatch.setenv("SELECTOR_VECTOR_INDEX", "false")
+    assert vector_index.get_selector_vector_index() is None
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.parametrize("n", [1000, 10000, 100000])
+def test_latency_and_memory_vs_pgvector(n, monkeypatch):
+    """select_topk end to end: modelled pgvector path vs in-process index"""
+    conn = FakeToolConnection(_tools(n, seed=n), rtt_ms=0.3)
+    queries = [f"check service {i} on host web{i % 7:02d}" for i in range(100 if n > 10000 else 300)]
+    filters = [[], ["linux"], ["windows", "macos"]]
+
+    async def run():
+        latencies = []
+        for i, query in enumerate(queries):
+            started = time.perf_counter()
+            rows = await select_topk(conn, query, filters[i % 3], k=8)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert len(rows) == 8
+        return latencies
+
+    results = {}
+    for name, index in (("pgvector", None), ("index", SelectorVectorIndex(refresh_interval_seconds=1))):
+        monkeypatch.setattr(vector_index, "_selector_index", index)
+        monkeypatch.setenv("SELECTOR_VECTOR_INDEX", "true" if index else "false")
+        if index:
+            asyncio.run(index.load(conn))
+        results[name] = np.percentile(asyncio.run(run()), [50, 99])
+
+    matrix = vector_index._selector_index.matrix
+    print(
+        f"\nn={n:6d}: pgvector p50 {results['pgvector'][0]:6.2f}ms p99 {results['pgvector'][1]:6.2f}ms"
+        f" | index p50 {results['index'][0]:6.2f}ms p99 {results['index'][1]:6.2f}ms"
+        f" | matrix {matrix.matrix.nbytes / 2**20:.1f} MiB, total {matrix.nbytes / 2**20:.1f} MiB,"
+        f" build {matrix.build_ms:.0f}ms"
+    )
+    assert matrix.matrix.nbytes == n * 128 * 4
+    assert results["index"][0] < results["pgvector"][0]
@@ -0,0 +1,303 @@
+"""
+Semantic Selection Cache Tests
+Entity signatures, nearest-neighbour lookup gated by threshold, entities
+and scope, TTL / capacity / clear, false-reuse verification, the offline
+threshold replay, and Stage AB reuse of selections for paraphrased requests
+"""
+
+import asyncio
+import json
+import re
+import time
+import zlib
+
+import numpy as np
+import pytest
+
+import pipeline.cache.semantic_cache as semantic_cache_module
+import pipeline.stages.stage_ab.combined_selector as combined_selector_module
+from llm.client import LLMResponse
+from pipeline.cache.semantic_cache import (
+    SemanticSelectionCache, entity_signature, evaluate_thresholds, get_semantic_cache, selection_signature,
+)
+from pipeline.services.tool_index_service import ToolIndexService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+FILLER = {"please", "can", "you", "could", "now", "for", "me", "the", "on", "i", "need", "to"}
+
+
+def encode(text, dim=256):
+    """Bag of content words: paraphrases that only add filler map together"""
+    vec = np.zeros(dim, dtype=np.float32)
+    for word in re.findall(r"[\w.-]+", text.lower()):
+        if word not in FILLER:
+            vec[zlib.crc32(word.encode()) % dim] += 1.0
+    return vec / max(np.linalg.norm(vec), 1e-12)
+
+
+def _vec(*components, dim=8):
+    vec = np.zeros(dim, dtype=np.float32)
+    for i, value in enumerate(components):
+        vec[i] = value
+    return vec
+
+
+class Selection:
+    """Minimal stand-in with the fields selection_signature reads"""
+
+    def __init__(self, *tools):
+        self.selected_tools = [type("T", (), {"tool_name": t, "execution_order": i + 1})() for i, t in enumerate(tools)]
+        self.next_stage = "stage_c"
+        self.policy = type("P", (), {"risk_level": "low"})()
+        self.additional_inputs_needed = []
+
+
+# ============================================================================
+# SIGNATURES
+# ============================================================================
+
+def test_entity_signature_matches_targets_not_phrasing():
+    nginx = [{"type": "service", "value": "nginx"}, {"type": "hostname", "value": "web01"}]
+    assert entity_signature(nginx, "restart nginx on web01") == \
+        entity_signature([{"type": "Service", "value": "NGINX "}, {"type": "hostname", "value": "web01"}],
+                         "please restart nginx on web01.")
+    assert entity_signature([], "restart nginx on web01") != entity_signature([], "restart nginx on web02")
+    # Identifier-like tokens count even when the extractor missed them
+    assert entity_signature([], "check 10.0.0.5 port 8080") == ("token:10.0.0.5", "token:8080")
+    assert entity_signature([], "tail /var/log/syslog on db-prod") == ("token:/var/log/syslog", "token:db-prod")
+    assert entity_signature([], "deploy the app, then check.") == ()
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def test_lookup_requires_threshold_signature_and_scope():
+    cache = SemanticSelectionCache(threshold=0.9)
+    sig = ("token:web01",)
+    cache.store(_vec(1, 0), sig, "linux", "sel-restart", [{"type": "hostname", "value": "web01"}], "restart web01")
+
+    hit = cache.lookup(_vec(1, 0.2), sig, "linux")  # cos 0.98
+    assert hit.selection == "sel-restart" and hit.similarity > 0.97
+    assert hit.entities == [{"type": "hostname", "value": "web01"}]
+
+    assert cache.lookup(_vec(1, 1), sig, "linux") is None  # cos 0.71
+    assert cache.lookup(_vec(1, 0.2), ("token:web02",), "linux") is None
+    assert cache.lookup(_vec(1, 0.2), sig, "windows") is None
+    assert cache.lookup(_vec(0, 0), sig, "linux") is None
+    assert cache.lookup(np.ones(16), sig, "linux") is None  # other dimension
+
+    stats = cache.get_statistics()
+    assert (stats["lookups"], stats["hits"], stats["entity_rejects"]) == (6, 1, 2)
+    assert stats["hit_rate_percent"] == pytest.approx(16.7)
+
+
+def test_nearest_entry_with_the_same_signature_wins():
+    cache = SemanticSelectionCache(threshold=0.8)
+    cache.store(_vec(1, 0.3), ("a",), "", "far", [], "far")
+    cache.store(_vec(1, 0.05), ("b",), "", "other-target", [], "other")
+    cache.store(_vec(1, 0.1), ("a",), "", "near", [], "near")
+    assert cache.lookup(_vec(1, 0), ("a",), "").selection == "near"
+
+
+def test_ttl_capacity_and_clear():
+    cache = SemanticSelectionCache(threshold=0.9, capacity=2, ttl_seconds=60)
+    for i, name in enumerate(["first", "second", "third"]):
+        cache.store(np.eye(8)[i], ("k",), "", name, [], name)
+
+    assert cache.lookup(np.eye(8)[0], ("k",), "") is None  # replaced by "third"
+    assert cache.lookup(np.eye(8)[2], ("k",), "").selection == "third"
+    assert cache.get_statistics()["entries"] == 2
+
+    cache._expires[:] = time.monotonic() - 1
+    assert cache.lookup(np.eye(8)[2], ("k",), "") is None
+    assert cache.get_statistics()["entries"] == 0
+
+    cache.store(np.eye(8)[1], ("k",), "", "again", [], "again")
+    cache.clear()
+    assert cache.lookup(np.eye(8)[1], ("k",), "") is None
+    assert cache.get_statistics()["clears"] == 1
+
+
+def test_false_reuse_is_counted_and_evicted():
+    cache = SemanticSelectionCache(threshold=0.9, verify_rate=1.0)
+    cache.store(_vec(1), ("k",), "", Selection("systemctl"), [], "restart nginx")
+    assert cache.should_verify()
+
+    hit = cache.lookup(_vec(1), ("k",), "")
+    assert cache.record_verification(hit, Selection("systemctl")) is True
+    hit = cache.lookup(_vec(1), ("k",), "")
+    assert cache.record_verification(hit, Selection("service-status")) is False
+    assert cache.lookup(_vec(1), ("k",), "") is None
+
+    stats = cache.get_statistics()
+    assert (stats["verified"], stats["false_reuses"], stats["false_reuse_rate_percent"]) == (2, 1, 50.0)
+    assert selection_signature(Selection("a", "b")) != selection_signature(Selection("b", "a"))
+
+
+def test_cache_is_off_until_enabled(monkeypatch):
+    monkeypatch.setattr(semantic_cache_module, "_semantic_cache", None)
+    monkeypatch.delenv("SEMANTIC_CACHE_ENABLED", raising=False)
+    assert get_semantic_cache() is None
+
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "true")
+    monkeypatch.setenv("SEMANTIC_CACHE_THRESHOLD", "0.97")
+    cache = get_semantic_cache()
+    assert cache is get_semantic_cache() and cache.threshold == 0.97
+
+
+def test_offline_threshold_replay():
+    embeddings = np.stack([_vec(1, 0), _vec(1, 0.1), _vec(1, 0.5), _vec(1, 0), _vec(0, 1)])
+    signatures = [("a",), ("a",), ("a",), ("b",), ("a",)]
+    labels = ["x", "x", "y", "x", "z"]
+    requests = ["q", "q please", "other", "q", "unrelated"]
+
+    strict, loose = evaluate_thresholds(embeddings, signatures, labels, [0.999, 0.85], requests=requests)
+    # Row 3 has another signature, row 4 is orthogonal; at 0.85 rows 1 (cos 0.995, same
+    # label) and 2 (cos 0.89, other label) reuse row 0
+    assert (strict["hits"], strict["false_reuses"]) == (0, 0)
+    assert (loose["hits"], loose["false_reuses"]) == (2, 1)
+    assert loose["hit_rate"] == pytest.approx(0.4) and loose["false_reuse_rate"] == pytest.approx(0.5)
+    assert loose["exact_key_hit_rate"] == pytest.approx(0.2)
+
+
+# ============================================================================
+# STAGE AB
+# ============================================================================
+
+class FakeLLM:
+    """Entity extraction (5ms) and tool selection (40ms) calls"""
+
+    def __init__(self):
+        self.selection_calls = 0
+        self.tool = "systemctl"
+
+    async def generate(self, request):
+        if request.prompt.startswith("Extract entities"):
+            await asyncio.sleep(0.005)
+            hosts = re.findall(r"web\d+", request.prompt)
+            return LLMResponse(model="fake", content=json.dumps(
+                [{"type": "service", "value": "nginx"}] + [{"type": "hostname", "value": h} for h in hosts]
+            ))
+        self.selection_calls += 1
+        await asyncio.sleep(0.04)
+        return LLMResponse(model="fake", content=json.dumps({
+            "intent": {"category": "system", "action": "execute"},
+            "entities": [{"type": "service", "value": "nginx"}],
+            "select": [{"id": self.tool, "why": "restart the service"}],
+            "confidence": 0.9,
+            "risk_level": "medium",
+        }))
+
+
+class FakeEmbeddings:
+    async def embed_text_async(self, text):
+        return encode(text).tolist()
+
+
+class FakeCatalog:
+    async def get_tool_by_name_async(self, name):
+        return {"tool_name": name}
+
+
+@pytest.fixture
+def selector(monkeypatch):
+    monkeypatch.setenv("TELEMETRY_BUFFER_ENABLED", "false")
+    monkeypatch.setattr(combined_selector_module, "get_embedding_service", lambda: FakeEmbeddings())
+    monkeypatch.setattr(combined_selector_module, "AssetServiceClient", lambda: None)
+    telemetry = []
+    monkeypatch.setattr(ToolIndexService, "log_telemetry", lambda self, **kwargs: telemetry.append(kwargs) or True)
+    selector = combined_selector_module.CombinedSelector(FakeLLM(), tool_catalog=FakeCatalog())
+    selector.telemetry = telemetry
+    selector.semantic_cache = SemanticSelectionCache(threshold=0.95, verify_rate=0.0)
+
+    async def no_assets(entities, context):
+        return None, None, False
+
+    selector._enrich_with_asset_metadata = no_assets
+    selector.tool_index.retrieve_candidates = lambda **kwargs: [{"id": "systemctl", "name": "systemctl"}]
+    return selector
+
+
+def test_paraphrase_reuses_selection_for_the_same_target(selector):
+    async def scenario():
+        first_context = {}
+        first = await selector.process("restart nginx on web01", first_context)
+        context = {}
+        started = time.perf_counter()
+        reused = await selector.process("please restart nginx on web01 now", context)
+        hit_ms = (time.perf_counter() - started) * 1000
+        other = await selector.process("restart nginx on web02", {})
+        return first, reused, context, hit_ms, other
+
+    first, reused, context, hit_ms, other = asyncio.run(scenario())
+
+    assert selector.llm_client.selection_calls == 2  # web01 once, web02 once
+    assert [t.tool_name for t in reused.selected_tools] == ["systemctl"]
+    assert reused.selection_id != first.selection_id and reused.decision_id != first.decision_id
+    assert context["entities"] == [{"type": "service", "value": "nginx"}]
+    assert hit_ms < 30
+    assert [t.tool_name for t in other.selected_tools] == ["systemctl"]
+
+    stats = selector.semantic_cache.get_statistics()
+    assert (stats["hits"], stats["stores"], stats["entries"]) == (1, 2, 2)
+
+    # Every request is logged; the hit is marked and sent no candidates to the LLM
+    assert [row.get("cache_hit", False) for row in selector.telemetry] == [False, True, False]
+    hit_row = selector.telemetry[1]
+    assert hit_row["user_intent"] == "please restart nginx on web01 now"
+    assert (hit_row["rows_sent"], hit_row["llm_time_ms"]) == (0, 0)
+    assert hit_row["selected_tool_ids"] == ["systemctl"]
+    assert len({row["request_id"] for row in selector.telemetry}) == 3
+
+
+def test_sampled_hits_are_recomputed_and_false_reuse_recorded(selector):
+    selector.semantic_cache.verify_rate = 1.0
+
+    async def scenario():
+        await selector.process("restart nginx on web01", {})
+        selector.llm_client.tool = "nginx-reload"  # the fresh answer now differs
+        return await selector.process("please restart nginx on web01", {})
+
+    fresh = asyncio.run(scenario())
+    assert [t.tool_name for t in fresh.selected_tools] == ["nginx-reload"]
+    stats = selector.semantic_cache.get_statistics()
+    assert (stats["verified"], stats["false_reuses"]) == (1, 1)
+    assert selector.llm_client.selection_calls == 2
+
+
+def test_stage_ab_latency_on_repeated_paraphrases(selector):
+    """100 requests over 10 targets, each phrased several ways"""
+    phrasings = ["restart nginx on {h}", "please restart nginx on {h}", "can you restart nginx on {h} now",
+                 "restart nginx on {h} for me"]
+    requests = [phrasings[(i // 10) % 4].format(h=f"web{i % 10:02d}") for i in range(100)]
+
+    def run(cache):
+        selector.semantic_cache = cache
+        selector.llm_client.selection_calls = 0
+
+        async def serve():
+            latencies = []
+            for request in requests:
+                started = time.perf_counter()
+                await selector.process(request, {})
+                latencies.append((time.perf_counter() - started) * 1000)
+            return np.percentile(latencies, [50, 99]), selector.llm_client.selection_calls
+        return asyncio.run(serve())
+
+    (off_p50, off_p99), off_calls = run(None)
+    (on_p50, on_p99), on_calls = run(SemanticSelectionCache(threshold=0.95, verify_rate=0.0))
+    exact_hits = len(requests) - len({r.strip().lower() for r in requests})
+
+    print(
+        f"\nStage AB, 100 requests (10 targets x 4 phrasings), LLM selection 40ms:"
+        f"\n  no semantic cache  p50 {off_p50:6.1f}ms  p99 {off_p99:6.1f}ms  selection calls {off_calls}"
+        f"\n  semantic cache     p50 {on_p50:6.1f}ms  p99 {on_p99:6.1f}ms  selection calls {on_calls}"
+        f"\n  (an exact-key cache would hit {exact_hits} of 100)"
+    )
+    assert off_calls == 100 and on_calls == 10
+    assert on_p50 < off_p50 / 3
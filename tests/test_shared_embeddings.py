@@ -0,0 +1,197 @@
+"""
+Shared Embeddings Tests
+embed_128 / embed_128_batch are bit-identical to the original pure-Python
+hashing (sum() is plain before Python 3.12 and compensated after, checked
+against both and against the interpreter the service image ships with),
+the memo returns independent lists, to_vec_literal formats the same, and
+the speed-up on 100k strings
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import shutil
+import string
+import subprocess
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from shared import embeddings
+from shared.embeddings import (
+    embed_128, embed_128_batch, embed_128_cache_info, to_vec_literal,
+)
+
+
+# ============================================================================
+# LEGACY IMPLEMENTATION (reference)
+# ============================================================================
+
+def legacy_embed_128(text):
+    vec = []
+    for i in range(4):
+        hash_bytes = hashlib.sha256(f"{text}::{i}".encode('utf-8')).digest()
+        for byte in hash_bytes:
+            vec.append((byte / 127.5) - 1.0)
+    vec = vec[:128]
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm < 1e-10:
+        norm = 1.0
+    return [x / norm for x in vec]
+
+
+def sequential_sum(values):
+    """sum() before Python 3.12"""
+    total = 0.0
+    for x in values:
+        total += x
+    return total
+
+
+def neumaier_sum(values):
+    """sum() from Python 3.12 (Objects/bltinmodule.c)"""
+    total, compensation = 0.0, 0.0
+    for x in values:
+        step = total + x
+        if abs(total) >= abs(x):
+            compensation += (total - step) + x
+        else:
+            compensation += (x - step) + total
+        total = step
+    if compensation and math.isfinite(compensation):
+        total += compensation
+    return total
+
+
+def legacy_to_vec_literal(vec):
+    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+
+
+def _texts(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.printable + "äöüßñ日本語🙂"
+    return [''.join(rng.choices(alphabet, k=rng.randint(0, 120))) for _ in range(n)]
+
+
+# ============================================================================
+# EXACTNESS
+# ============================================================================
+
+def test_bit_identical_to_legacy():
+    texts = ["", "hello world", "scan network for open ports", "a" * 10000] + _texts(5000)
+    batch = embed_128_batch(texts)
+    assert batch.shape == (len(texts), 128) and batch.dtype == np.float64
+
+    for text, row in zip(texts, batch):
+        expected = legacy_embed_128(text)
+        assert row.tolist() == expected
+        assert embed_128(text) == expected
+        assert to_vec_literal(expected) == legacy_to_vec_literal(expected)
+
+    assert embed_128_batch([]).shape == (0, 128)
+    assert to_vec_literal([0.1, 0.2, 0.3]) == "[0.100000,0.200000,0.300000]"
+
+
+def test_both_summation_orders_match_python():
+    texts = _texts(2000, seed=2)
+    digests = b"".join(hashlib.sha256(f"{t}::{i}".encode("utf-8")).digest() for t in texts for i in range(4))
+    squares = (np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), 128) / 127.5 - 1.0) ** 2
+
+    plain = embeddings._sum_of_squares(squares, compensated=False)
+    compensated = embeddings._sum_of_squares(squares, compensated=True)
+    assert plain.tolist() == [sequential_sum(row) for row in squares.tolist()]
+    assert compensated.tolist() == [neumaier_sum(row) for row in squares.tolist()]
+    assert (plain != compensated).mean() > 0.5  # the two really differ in the last bit
+
+
+def _shipped_interpreter():
+    dockerfile = Path(__file__).resolve().parent.parent / "automation-service" / "Dockerfile.clean"
+    version = re.search(r"^FROM python:(\d+\.\d+)", dockerfile.read_text(), re.MULTILINE).group(1)
+    python = shutil.which(f"python{version}")
+    if python is None or subprocess.run([python, "-c", ""], capture_output=True).returncode != 0:
+        pytest.skip(f"python{version} (automation-service image) not available")
+    return python, tuple(int(part) for part in version.split("."))
+
+
+def test_bit_identical_on_the_shipped_interpreter(monkeypatch):
+    python, version = _shipped_interpreter()
+    texts = ["", "hello world", "scan network for open ports"] + _texts(300, seed=3)
+    script = (
+        "import hashlib, json, math, sys\n"
+        "out = []\n"
+        "for text in json.load(sys.stdin):\n"
+        "    vec = [b / 127.5 - 1.0 for i in range(4)"
+        " for b in hashlib.sha256(f'{text}::{i}'.encode('utf-8')).digest()]\n"
+        "    norm = math.sqrt(sum(x * x for x in vec)) or 1.0\n"
+        "    out.append([x / norm for x in vec])\n"
+        "json.dump(out, sys.stdout)\n"
+    )
+    result = subprocess.run([python, "-c", script], input=json.dumps(texts), capture_output=True, text=True, check=True)
+
+    monkeypatch.setattr(embeddings, "_COMPENSATED_SUM", version >= (3, 12))
+    assert embed_128_batch(texts).tolist() == json.loads(result.stdout)
+
+
+def test_memo_returns_independent_lists():
+    text = "restart nginx on web01 (memo test)"
+    before = embed_128_cache_info()
+    first = embed_128(text)
+    first[0] = 42.0
+    second = embed_128(text)
+    after = embed_128_cache_info()
+
+    assert second == legacy_embed_128(text)
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+    assert after["max_size"] > 0
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_speedup_on_100k_strings():
+    texts = _texts(100_000, seed=1)
+    queries = [f"check disk usage on web{i % 50:02d}" for i in range(100_000)]  # 50 distinct
+
+    started = time.perf_counter()
+    legacy = [legacy_embed_128(t) for t in texts]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = embed_128_batch(texts)
+    batch_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for text in texts[:20_000]:
+        embed_128(text)
+    single_s = (time.perf_counter() - started) * 5
+
+    started = time.perf_counter()
+    for query in queries:
+        embed_128(query)
+    memo_s = time.perf_counter() - started
+
+    vecs = legacy[:20_000]
+    started = time.perf_counter()
+    for vec in vecs:
+        legacy_to_vec_literal(vec)
+    legacy_literal_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for vec in vecs:
+        to_vec_literal(vec)
+    literal_s = time.perf_counter() - started
+
+    assert batch[::997].tolist() == legacy[::997]
+    print(
+        f"\n100k strings: legacy {legacy_s:.2f}s | batch {batch_s:.2f}s ({legacy_s / batch_s:.1f}x)"
+        f" | embed_128 uncached {single_s:.2f}s ({legacy_s / single_s:.1f}x)"
+        f" | repeated queries memoised {memo_s:.2f}s ({legacy_s / memo_s:.0f}x)"
+        f"\nto_vec_literal x20k: legacy {legacy_literal_s * 1000:.0f}ms | {literal_s * 1000:.0f}ms"
+    )
+    assert batch_s * 3 < legacy_s
+    assert memo_s * 10 < legacy_s
+    assert literal_s < legacy_literal_s
@@ -0,0 +1,430 @@
+"""
+Telemetry Buffer Tests
+Text COPY encoding, size- and interval-triggered flushes, retry after a
+failed flush, row-by-row isolation of rejected rows, drop accounting when full, flush on shutdown, the
+log_telemetry / record_telemetry integration, and Stage AB request latency
+with telemetry disabled, synchronous INSERT and buffered
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import numpy as np
+import psycopg2.errors
+import pytest
+
+import pipeline.stages.stage_ab.combined_selector as combined_selector_module
+from llm.client import LLMResponse
+from pipeline.services import telemetry_buffer
+from pipeline.services.telemetry_buffer import TelemetryBuffer, encode_copy_text
+from pipeline.services.tool_catalog_service import ToolCatalogService
+from pipeline.services.tool_index_service import ToolIndexService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+CONNECT_COST = 0.002  # new connection (TCP + auth)
+ROUND_TRIP = 0.0005
+
+_UNESCAPES = {"\\\\": "\\", "\\t": "\t", "\\n": "\n", "\\r": "\r"}
+
+
+def decode_copy_text(data):
+    """Independent parser for COPY text format"""
+    rows = []
+    for line in data.decode("utf-8").split("\n")[:-1]:
+        row = []
+        for field in line.split("\t"):
+            if field == "\\N":
+                row.append(None)
+                continue
+            out, i = [], 0
+            while i < len(field):
+                pair = field[i:i + 2]
+                if pair in _UNESCAPES:
+                    out.append(_UNESCAPES[pair])
+                    i += 2
+                else:
+                    out.append(field[i])
+                    i += 1
+            row.append("".join(out))
+        rows.append(tuple(row))
+    return rows
+
+
+class FakeDatabase:
+    """Connections with modelled connect and round-trip cost"""
+
+    def __init__(self, fail_connects=0, not_null=(), missing_columns=(), missing_table=False):
+        self.not_null = not_null  # column positions that reject NULL, like a NOT NULL constraint
+        self.missing_columns = set(missing_columns)  # columns the table lacks (older schema)
+        self.missing_table = missing_table
+        self.schema_checks = 0
+        self.rows = []
+        self.copies = 0
+        self.inserts = 0
+        self.connects = 0
+        self.fail_connects = fail_connects
+        self.lock = threading.Lock()
+
+    def connect(self):
+        time.sleep(CONNECT_COST)
+        with self.lock:
+            self.connects += 1
+            if self.fail_connects:
+                self.fail_connects -= 1
+                raise ConnectionError("connection refused")
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.pending = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        time.sleep(ROUND_TRIP)
+        with self.db.lock:
+            self.db.rows.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        time.sleep(ROUND_TRIP)
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, file):
+        time.sleep(ROUND_TRIP)
+        assert sql.startswith("COPY ") and sql.endswith(" FROM STDIN")
+        rows = decode_copy_text(file.read())
+        self.conn.db.copies += 1
+        if self.conn.db.missing_table:
+            raise psycopg2.errors.UndefinedTable("relation does not exist")
+        for row in rows:
+            if any(row[i] is None for i in self.conn.db.not_null):
+                raise psycopg2.errors.NotNullViolation("null value violates not-null constraint")
+        self.conn.pending.extend(rows)
+
+    def execute(self, query, params):
+        time.sleep(ROUND_TRIP)
+        if "information_schema.columns" in query:
+            self.conn.db.schema_checks += 1
+            self.result = [(c,) for c in params[2] if c not in self.conn.db.missing_columns]
+            return
+        assert query.count("%s") == len(params)
+        self.conn.pending.append(tuple(params))
+        self.conn.db.inserts += 1
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.002)
+
+
+@pytest.fixture(autouse=True)
+def isolated_buffers(monkeypatch):
+    monkeypatch.setattr(telemetry_buffer, "_buffers", {})
+    yield
+    telemetry_buffer.shutdown_telemetry_buffers()
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def test_copy_text_encoding():
+    rows = [
+        ("req-1", "restart\tnginx\non web01 \\ now", 3, 0.25, True, ["a", 'b"c', "d\\e"], None, {"N": 1}),
+        ("req-2", "", 0, float(1e-05), False, [], None, {}),
+    ]
+    data = encode_copy_text(rows)
+
+    assert data.split(b"\n")[0] == (
+        b'req-1\trestart\\tnginx\\non web01 \\\\ now\t3\t0.25\tt\t'
+        b'{"a","b\\\\"c","d\\\\\\\\e"}\t\\N\t{"N": 1}'
+    )
+    decoded = decode_copy_text(data)
+    assert decoded[0][1] == "restart\tnginx\non web01 \\ now"
+    assert decoded[0][5] == '{"a","b\\"c","d\\\\e"}'  # text[] literal
+    assert decoded[1] == ("req-2", "", "0", "1e-05", "f", "{}", None, "{}")
+    assert encode_copy_text([]) == b""
+
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+def test_full_batches_flush_without_waiting_for_the_interval():
+    db = FakeDatabase()
+    buffer = TelemetryBuffer("t", ("a", "b"), db.connect, batch_size=250, flush_interval_seconds=60)
+    for i in range(1000):
+        assert buffer.add((i, f"row {i}"))
+
+    _wait_for(lambda: len(db.rows) == 1000)
+    assert db.copies == 4 and db.connects == 1
+    assert [int(r[0]) for r in db.rows] == list(range(1000))
+
+    stats = buffer.get_statistics()
+    assert (stats["written"], stats["flushes"], stats["dropped"], stats["buffered"]) == (1000, 4, 0, 0)
+    assert 0 < stats["max_lag_seconds"] < 1
+    buffer.close()
+
+
+def test_partial_batch_flushes_on_the_interval():
+    db = FakeDatabase()
+    buffer = TelemetryBuffer("t", ("a",), db.connect, batch_size=500, flush_interval_seconds=0.05)
+    for i in range(3):
+        buffer.add((i,))
+    assert db.rows == []
+    _wait_for(lambda: len(db.rows) == 3, timeout=1)
+    assert buffer.get_statistics()["lag_seconds"] >= 0.04
+    buffer.close()
+
+
+def test_failed_flush_keeps_rows_and_retries():
+    db = FakeDatabase(fail_connects=2)
+    buffer = TelemetryBuffer("t", ("a",), db.connect, batch_size=10, flush_interval_seconds=0.01)
+    for i in range(25):
+        buffer.add((i,))
+
+    _wait_for(lambda: len(db.rows) == 25)
+    stats = buffer.get_statistics()
+    assert stats["failed_flushes"] == 2 and stats["dropped"] == 0
+    assert [int(r[0]) for r in db.rows] == list(range(25))  # order kept
+    buffer.close()
+
+
+def test_poison_row_is_dropped_without_blocking_the_batch():
+    db = FakeDatabase(not_null=(1,))
+    buffer = TelemetryBuffer("t", ("a", "b"), db.connect, batch_size=25, flush_interval_seconds=60)
+    for i in range(25):
+        buffer.add((i, None if i == 13 else "ok"))  # the 25th row wakes the flusher
+
+    buffer.close()
+
+    assert [int(r[0]) for r in db.rows] == [i for i in range(25) if i != 13]
+    stats = buffer.get_statistics()
+    assert (stats["written"], stats["rejected"], stats["failed_flushes"], stats["buffered"]) == (24, 1, 0, 0)
+    assert db.connects == 1  # data errors keep the connection
+    assert db.copies == 1 + 25  # the batch, then row by row
+
+
+def test_schema_errors_drop_the_batch_without_retrying(caplog):
+    db = FakeDatabase(missing_table=True)
+    buffer = TelemetryBuffer("t", ("a",), db.connect, batch_size=10, flush_interval_seconds=0.01)
+    for i in range(30):
+        buffer.add((i,))
+
+    _wait_for(lambda: buffer.get_statistics()["discarded"] == 30)
+    stats = buffer.get_statistics()
+    assert (stats["failed_flushes"], stats["rejected"], stats["buffered"]) == (0, 0, 0)
+    assert db.connects == 1 and db.copies == 3  # one COPY per batch, no reconnect or row-by-row retry
+    assert sum("UndefinedTable" in r.message or "does not exist" in r.message for r in caplog.records) == 1
+    buffer.close()
+
+
+def test_rows_beyond_the_bound_are_dropped_and_counted():
+    db = FakeDatabase(fail_connects=10**6)  # database down
+    buffer = TelemetryBuffer("t", ("a",), db.connect, max_rows=50, batch_size=10,
+                             flush_interval_seconds=0.01, max_backoff_seconds=0.05)
+    accepted = sum(buffer.add((i,)) for i in range(200))
+    time.sleep(0.05)
+    buffer.close(flush=False)  # joins the flusher: no batch in flight
+
+    stats = buffer.get_statistics()
+    assert accepted <= 60  # up to one batch was in flight while adding
+    assert stats["dropped"] == 200 - stats["buffered"] and stats["buffered"] == 50
+    assert stats["failed_flushes"] >= 1 and stats["oldest_buffered_seconds"] > 0
+
+
+def test_shutdown_flushes_buffered_rows():
+    db = FakeDatabase()
+    buffer = telemetry_buffer.get_telemetry_buffer("t", ("a",), db.connect)
+    buffer.flush_interval_seconds = 60
+    for i in range(120):
+        buffer.add((i,))
+    time.sleep(0.01)
+    assert len(db.rows) < 120
+
+    telemetry_buffer.shutdown_telemetry_buffers()
+    assert len(db.rows) == 120
+    assert telemetry_buffer.get_telemetry_statistics() == {}
+
+
+# ============================================================================
+# SERVICES
+# ============================================================================
+
+def _log(service, request_id="req-1", **overrides):
+    kwargs = dict(
+        request_id=request_id, user_intent="check disk on web01", catalog_size=40,
+        candidates_before_budget=40, rows_sent=12, budget_used=1140, headroom_left=61,
+        selected_tool_ids=["df", "du"], retrieval_time_ms=8, llm_time_ms=420, total_time_ms=450,
+    )
+    kwargs.update(overrides)
+    return service.log_telemetry(**kwargs)
+
+
+def test_log_telemetry_buffers_and_copies(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(ToolIndexService, "_get_connection", lambda self: db.connect())
+    service = ToolIndexService()
+
+    started = time.perf_counter()
+    assert _log(service) is True
+    elapsed = time.perf_counter() - started
+    assert elapsed < CONNECT_COST  # no database work on the caller's thread
+
+    telemetry_buffer.shutdown_telemetry_buffers()
+    assert db.inserts == 0 and db.copies == 1
+    assert db.rows == [(
+        "req-1", "check disk on web01", "40", "40", "12", "1140", "61", '{"df","du"}',
+        None, None, "0", "8", "420", "450", "f",
+    )]
+
+
+def test_log_telemetry_synchronous_when_buffer_disabled(monkeypatch):
+    monkeypatch.setenv("TELEMETRY_BUFFER_ENABLED", "false")
+    db = FakeDatabase()
+    monkeypatch.setattr(ToolIndexService, "_get_connection", lambda self: db.connect())
+    service = ToolIndexService()
+
+    assert service.telemetry is None
+    assert _log(service) is True
+    assert db.inserts == 1 and db.copies == 0 and len(db.rows) == 1
+
+
+@pytest.mark.parametrize("buffered", [True, False])
+def test_log_telemetry_without_cache_hit_column(monkeypatch, buffered):
+    """Before migration 0015 the row is written without cache_hit, checked once"""
+    monkeypatch.setenv("TELEMETRY_BUFFER_ENABLED", str(buffered).lower())
+    db = FakeDatabase(missing_columns=("cache_hit",))
+    monkeypatch.setattr(ToolIndexService, "_get_connection", lambda self: db.connect())
+    service = ToolIndexService()
+
+    for i in range(3):
+        assert _log(service, request_id=f"req-{i}", cache_hit=i == 1) is True
+    telemetry_buffer.shutdown_telemetry_buffers()
+
+    assert db.schema_checks == 1
+    assert [len(row) for row in db.rows] == [14, 14, 14]
+    assert db.rows[0][-1] in ("450", 450)  # ends at total_time_ms
+    if buffered:
+        assert "cache_hit" not in service.telemetry.copy_sql
+        assert service.telemetry.get_statistics()["written"] == 3
+
+
+def test_record_telemetry_returns_id_and_buffers(monkeypatch):
+    db = FakeDatabase(not_null=(1,))  # tool_id is NOT NULL
+    service = ToolCatalogService("postgresql://unused")
+    service.telemetry.connect = db.connect
+    owners = []
+    monkeypatch.setattr(service, "_get_pattern_owner", lambda pattern_id: owners.append(pattern_id) or (3, 5))
+
+    execution_id = service.record_telemetry(7, 1200, 0.5, False, {"N": 100}, "timeout")
+    uuid.UUID(execution_id)
+    assert owners == [7]
+
+    telemetry_buffer.shutdown_telemetry_buffers()
+    assert db.rows == [(execution_id, "3", "5", "7", "1200", "0.5", "f", '{"N": 100}', "timeout")]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+class FakeLLM:
+    async def generate(self, request):
+        return LLMResponse(model="fake", content=json.dumps({
+            "intent": {"category": "monitoring", "action": "check_disk", "confidence": 0.9},
+            "select": [{"id": "df", "why": "disk usage"}],
+            "confidence": 0.9,
+            "risk_level": "low",
+        }))
+
+
+class FakeCatalog:
+    async def get_tool_by_name_async(self, name):
+        return {"tool_name": name}
+
+
+def _selector(monkeypatch, db):
+    monkeypatch.setattr(combined_selector_module, "get_embedding_service", lambda: None)
+    monkeypatch.setattr(combined_selector_module, "AssetServiceClient", lambda: None)
+    monkeypatch.setattr(ToolIndexService, "_get_connection", lambda self: db.connect())
+    selector = combined_selector_module.CombinedSelector(FakeLLM(), tool_catalog=FakeCatalog())
+    selector.config.update(enable_asset_enrichment=False, use_semantic_retrieval=False)
+    candidates = [{"id": f"tool-{i}", "name": f"tool-{i}", "desc": "", "tags": [], "platform": "linux",
+                   "cost_hint": "low"} for i in range(12)]
+    selector.tool_index.retrieve_candidates = lambda **kwargs: candidates
+    return selector
+
+
+def test_stage_ab_latency_with_and_without_telemetry(monkeypatch, caplog):
+    """200 sequential Stage AB requests (LLM and retrieval faked) per mode"""
+    caplog.set_level("WARNING")
+    requests = 200
+
+    def run(selector):
+        async def serve():
+            latencies = []
+            for i in range(requests):
+                started = time.perf_counter()
+                await selector.process(f"check disk on web{i:02d}")
+                latencies.append((time.perf_counter() - started) * 1000)
+            return np.percentile(latencies, [50, 99])
+        return asyncio.run(serve())
+
+    results = {}
+    for mode in ("disabled", "synchronous", "buffered"):
+        monkeypatch.setenv("TELEMETRY_BUFFER_ENABLED", "false" if mode == "synchronous" else "true")
+        db = FakeDatabase()
+        selector = _selector(monkeypatch, db)
+        if mode == "disabled":
+            selector.tool_index.log_telemetry = lambda **kwargs: True
+        results[mode] = (run(selector), db)
+        telemetry_buffer.shutdown_telemetry_buffers()
+
+    print("\nStage AB latency, 200 requests (connect 2ms, round trip 0.5ms):")
+    for mode, ((p50, p99), db) in results.items():
+        print(f"  {mode:12s} p50 {p50:6.2f}ms  p99 {p99:6.2f}ms  "
+              f"rows {len(db.rows)}  connects {db.connects}  statements {db.inserts + db.copies}")
+
+    (disabled, _), (sync, sync_db), (buffered, buffered_db) = (
+        results["disabled"], results["synchronous"], results["buffered"]
+    )
+    assert len(sync_db.rows) == len(buffered_db.rows) == requests
+    assert sync_db.connects == requests and buffered_db.connects == 1
+    assert buffered_db.copies <= 2  # one batch, unless the 1s interval fired mid-run
+    assert sync[0] - disabled[0] > CONNECT_COST * 1000
+    assert buffered[0] < disabled[0] + 0.5
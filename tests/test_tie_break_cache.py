@@ -0,0 +1,265 @@
+"""
+Tie-Break Cache Tests
+Normalized keys, confidence-weighted TTL, hit/miss metrics, sampled replay
+and drift, orchestrator wiring and LLM calls avoided on recurring pairs
+"""
+
+import json
+import random
+from datetime import timedelta
+
+import pytest
+
+from pipeline.stages.stage_b.deterministic_scorer import PreferenceMode
+from pipeline.stages.stage_b.hybrid_orchestrator import HybridOrchestrator
+from pipeline.stages.stage_b.llm_tie_breaker import LLMTieBreaker
+from pipeline.stages.stage_b.tie_break_cache import TieBreakCache, TieBreakKey
+from tests.test_candidate_index import FakeLoader, _profiles
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class FakeLLMClient:
+    """chat() client that prefers a fixed tool, else the alphabetically first"""
+
+    def __init__(self, preferred_tool, confidence=0.9):
+        self.preferred_tool = preferred_tool
+        self.confidence = confidence
+        self.calls = 0
+
+    async def chat(self, messages, timeout):
+        self.calls += 1
+        prompt = messages[0]["content"]
+        option_a = prompt.split("OPTION A: ")[1].split(".")[0]
+        option_b = prompt.split("OPTION B: ")[1].split(".")[0]
+        if self.preferred_tool in (option_a, option_b):
+            choice = "A" if option_a == self.preferred_tool else "B"
+        else:
+            choice = "A" if option_a < option_b else "B"
+        return {"content": json.dumps({
+            "choice": choice,
+            "justification": f"{self.preferred_tool} fits better",
+            "confidence": self.confidence,
+        })}
+
+
+def _candidate(tool_name, pattern_name="default"):
+    return {"tool_name": tool_name, "pattern_name": pattern_name, "raw_features": {}}
+
+
+def _tie_breaker(preferred="systemctl", confidence=0.9, sample_rate=0.0):
+    client = FakeLLMClient(preferred, confidence)
+    cache = TieBreakCache(replay_sample_rate=sample_rate, rng=random.Random(3))
+    return LLMTieBreaker(client, cache=cache), client, cache
+
+
+# ============================================================================
+# KEY AND TTL TESTS
+# ============================================================================
+
+def test_key_ignores_order_and_normalizes_intent():
+    a, b = _candidate("systemctl", "status"), _candidate("service_check", "status")
+    key = TieBreakKey.build(a, b, PreferenceMode.FAST, " Monitoring ")
+
+    assert key == TieBreakKey.build(b, a, PreferenceMode.FAST, "monitoring")
+    assert key.candidates == ("service_check.status", "systemctl.status")
+    assert key != TieBreakKey.build(a, b, PreferenceMode.ACCURATE, "monitoring")
+    assert key != TieBreakKey.build(a, b, PreferenceMode.FAST, "automation")
+    assert TieBreakKey.build(a, b).intent == "unknown"
+    assert TieBreakKey.build(a, b).preference == TieBreakKey.build(a, b, PreferenceMode.BALANCED).preference
+
+
+def test_ttl_scales_with_confidence():
+    cache = TieBreakCache(min_ttl_seconds=60, max_ttl_seconds=3660)
+    assert cache.ttl_for(0.0) == 60
+    assert cache.ttl_for(0.5) == 1860
+    assert cache.ttl_for(1.0) == 3660
+    assert cache.ttl_for(7.0) == 3660
+
+    key = TieBreakKey.build(_candidate("a"), _candidate("b"))
+    assert cache.put(key, "a.default", "because", confidence=0.25).ttl_seconds == 960
+
+
+def test_low_confidence_entries_expire_first():
+    cache = TieBreakCache(min_ttl_seconds=0, max_ttl_seconds=100)
+    sure = TieBreakKey.build(_candidate("a"), _candidate("b"))
+    unsure = TieBreakKey.build(_candidate("c"), _candidate("d"))
+    cache.put(sure, "a.default", "clear", confidence=1.0)
+    # Never 0: LRUCache treats a TTL of 0 as no expiration
+    assert cache.put(unsure, "c.default", "coin flip", confidence=0.0).ttl_seconds == 1
+
+    timestamps = cache._cache._timestamps
+    for key in timestamps:
+        timestamps[key] -= timedelta(seconds=2)
+
+    assert cache.get(sure) is not None
+    assert cache.get(unsure) is None
+    stats = cache.get_statistics()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 2)
+
+
+# ============================================================================
+# TIE-BREAKER TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_repeated_pair_skips_llm_and_maps_choice():
+    tie_breaker, client, cache = _tie_breaker(preferred="systemctl")
+    a, b = _candidate("systemctl", "status"), _candidate("service_check", "status")
+
+    first = await tie_breaker.break_tie("is nginx up?", a, b, preference_mode=PreferenceMode.FAST,
+                                        intent="monitoring")
+    assert (first.llm_choice, first.cached, first.confidence) == ("A", False, 0.9)
+
+    # Rephrased and swapped: same decision, no LLM call
+    second = await tie_breaker.break_tie("check whether nginx is running", b, a,
+                                         preference_mode=PreferenceMode.FAST, intent="monitoring")
+    assert client.calls == 1
+    assert second.cached and second.llm_choice == "B"
+    assert second.chosen_candidate is a
+    assert second.justification == first.justification
+
+    # A different preference is a different decision
+    await tie_breaker.break_tie("is nginx up?", a, b, preference_mode=PreferenceMode.THOROUGH,
+                                intent="monitoring")
+    assert client.calls == 2
+    assert cache.get_statistics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_without_cache_every_tie_calls_llm():
+    client = FakeLLMClient("systemctl")
+    tie_breaker = LLMTieBreaker(client)
+    for _ in range(3):
+        result = await tie_breaker.break_tie("q", _candidate("systemctl"), _candidate("other"))
+        assert not result.cached
+    assert client.calls == 3
+
+
+def test_confidence_parsing_is_optional_and_clamped():
+    tie_breaker = LLMTieBreaker(FakeLLMClient("x"))
+    parse = tie_breaker._parse_decision
+    assert parse('{"choice": "a", "justification": "j"}') == ("A", "j", 0.5)
+    assert parse('{"choice": "B", "justification": "j", "confidence": 3}')[2] == 1.0
+    assert parse('{"choice": "B", "justification": "j", "confidence": "high"}')[2] == 0.5
+    assert parse('{"choice": "B", "justification": "j", "confidence": NaN}')[2] == 0.5
+    assert parse('{"choice": "B", "justification": "j", "confidence": "nan"}')[2] == 0.5
+    assert tie_breaker._parse_response('{"choice": "B", "justification": "j", "confidence": 0.2}') == ("B", "j")
+
+
+# ============================================================================
+# REPLAY TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_sampled_hits_replay_and_record_agreement():
+    tie_breaker, client, cache = _tie_breaker(sample_rate=1.0)
+    a, b = _candidate("systemctl"), _candidate("other")
+
+    await tie_breaker.break_tie("q", a, b)
+    await tie_breaker.break_tie("q", b, a)
+    await tie_breaker._replay_task
+
+    stats = cache.get_statistics()
+    assert (stats["replay_sampled"], stats["replayed"], stats["agreements"]) == (1, 1, 1)
+    assert stats["agreement_rate"] == 1.0
+    assert client.calls == 2
+    assert cache.get(TieBreakKey.build(a, b)) is not None
+
+
+@pytest.mark.asyncio
+async def test_replay_disagreement_drops_entry():
+    tie_breaker, client, cache = _tie_breaker(preferred="systemctl", sample_rate=1.0)
+    tie_breaker._schedule_replay = lambda: None  # replay explicitly below
+    a, b = _candidate("systemctl"), _candidate("other")
+
+    await tie_breaker.break_tie("q", a, b)
+    await tie_breaker.break_tie("q", a, b)
+    assert cache.pending_replays == 1
+
+    # The model changed its mind since the decision was cached
+    client.preferred_tool = "other"
+    assert await tie_breaker.replay_samples() == 1
+
+    stats = cache.get_statistics()
+    assert (stats["disagreements"], stats["agreement_rate"]) == (1, 0.0)
+    result = await tie_breaker.break_tie("q", a, b)
+    assert not result.cached and result.chosen_candidate is b
+
+
+@pytest.mark.asyncio
+async def test_replay_failures_are_skipped():
+    tie_breaker, client, cache = _tie_breaker(sample_rate=1.0)
+    tie_breaker._schedule_replay = lambda: None
+    a, b = _candidate("systemctl"), _candidate("other")
+    await tie_breaker.break_tie("q", a, b)
+    await tie_breaker.break_tie("q", a, b)
+
+    async def broken(messages, timeout):
+        raise RuntimeError("LLM down")
+    client.chat = broken
+
+    assert await tie_breaker.replay_samples() == 0
+    assert cache.pending_replays == 0
+    assert cache.get_statistics()["replayed"] == 0
+
+
+# ============================================================================
+# ORCHESTRATOR TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_orchestrator_passes_preference_and_intent(monkeypatch):
+    orchestrator = HybridOrchestrator(profile_loader=FakeLoader(_profiles(40, capabilities_per_tool=3)),
+                                      llm_client=FakeLLMClient("x"))
+    seen = {}
+
+    async def fake_break_tie(query, candidate1, candidate2, preference_mode=None, intent=None):
+        seen.update(preference_mode=preference_mode, intent=intent)
+        from pipeline.stages.stage_b.llm_tie_breaker import TieBreakerResult
+        return TieBreakerResult(candidate2, "cached", "B", cached=True)
+
+    monkeypatch.setattr(orchestrator.llm_tie_breaker, "break_tie", fake_break_tie)
+    monkeypatch.setattr(orchestrator.ambiguity_detector, "detect_ambiguity",
+                        lambda scored: type("R", (), {"is_ambiguous": True, "clarifying_question": None})())
+
+    result = await orchestrator.select_tool("list services quickly", ["capability_1"],
+                                            {"N": 100, "cost_limit": 1000, "intent_category": "monitoring"})
+
+    assert orchestrator.llm_tie_breaker.cache is not None
+    assert seen == {"preference_mode": PreferenceMode.FAST, "intent": "monitoring"}
+    assert result.selection_method == "llm_tiebreaker"
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_llm_calls_avoided_on_recurring_pairs():
+    """1000 ties drawn from 20 recurring pairs with varied phrasing"""
+    tie_breaker, client, cache = _tie_breaker(sample_rate=0.02)
+    rng = random.Random(5)
+    pairs = [(_candidate(f"tool_{i}", "status"), _candidate(f"tool_{i + 100}", "status")) for i in range(20)]
+    phrasings = ["is {} up", "check {} status", "{} running?", "status of {} please"]
+
+    for i in range(1000):
+        a, b = rng.choice(pairs)
+        if rng.random() < 0.5:
+            a, b = b, a
+        await tie_breaker.break_tie(rng.choice(phrasings).format(f"svc{i}"), a, b,
+                                    preference_mode=PreferenceMode.BALANCED, intent="monitoring")
+    if tie_breaker._replay_task is not None:
+        await tie_breaker._replay_task
+
+    stats = cache.get_statistics()
+    print(
+        f"\n1000 ties / 20 pairs: llm calls={client.calls} (incl. {stats['replayed']} replays), "
+        f"hit rate={stats['hit_rate']:.1%}, agreement={stats['agreement_rate']}"
+    )
+
+    assert stats["misses"] == 20
+    assert client.calls == 20 + stats["replayed"]
+    assert stats["disagreements"] == 0
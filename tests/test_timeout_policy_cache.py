@@ -0,0 +1,262 @@
+"""
+Phase 7: Timeout Policy Cache Tests
+Versioned in-process cache for the SLA class × action class timeout matrix
+"""
+
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+
+from execution.models import (
+    ActionClass,
+    ExecutionMode,
+    ExecutionModel,
+    ExecutionStatus,
+    SLAClass,
+    TimeoutPolicyModel,
+)
+from execution.policy_cache import TimeoutPolicyCache, get_timeout_policy_cache
+from pipeline.stages.stage_e.executor import StageEExecutor
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class FakeRepository:
+    """In-memory stand-in for ExecutionRepository with per-query latency"""
+
+    def __init__(self, query_latency_seconds: float = 0.0):
+        self.query_latency_seconds = query_latency_seconds
+        self.version = 1
+        self.queries = 0
+        self.policies = [
+            TimeoutPolicyModel(
+                sla_class=sla_class,
+                action_class=action_class,
+                step_timeout_seconds=10,
+                execution_timeout_seconds=30,
+                lease_timeout_seconds=45,
+                max_attempts=3,
+            )
+            for sla_class in SLAClass
+            for action_class in ActionClass
+        ]
+
+    def _query(self):
+        self.queries += 1
+        if self.query_latency_seconds:
+            time.sleep(self.query_latency_seconds)
+
+    def get_timeout_policy(self, sla_class, action_class):
+        self._query()
+        for policy in self.policies:
+            if policy.sla_class == sla_class and policy.action_class.value == action_class:
+                return policy
+        return None
+
+    def list_timeout_policies(self):
+        self._query()
+        return list(self.policies)
+
+    def get_timeout_policy_version(self):
+        self._query()
+        return self.version
+
+    def enqueue_execution(self, queue_entry):
+        return queue_entry
+
+    def update_execution_status(self, *args, **kwargs):
+        return None
+
+
+@pytest.fixture
+def repository():
+    return FakeRepository()
+
+
+@pytest.fixture
+def cache(repository):
+    return TimeoutPolicyCache(repository, enable_background_refresh=False)
+
+
+def _execution(sla_class: SLAClass = SLAClass.MEDIUM) -> ExecutionModel:
+    return ExecutionModel(
+        execution_id=uuid4(),
+        tenant_id="tenant-1",
+        actor_id=1,
+        idempotency_key="key",
+        plan_snapshot={"type": "read", "steps": [{"tool": "ping"}]},
+        execution_mode=ExecutionMode.BACKGROUND,
+        sla_class=sla_class,
+        approval_level=0,
+        status=ExecutionStatus.APPROVED,
+    )
+
+
+# ============================================================================
+# CACHE TESTS
+# ============================================================================
+
+def test_lookup_never_queries_after_load(cache, repository):
+    """Hot-path lookups are dictionary reads"""
+    cache.load()
+    queries_after_load = repository.queries
+
+    for _ in range(100):
+        policy = cache.get(SLAClass.FAST, "read")
+        assert policy is not None
+        assert policy.sla_class == SLAClass.FAST
+
+    assert repository.queries == queries_after_load
+
+
+def test_lazy_load_on_first_lookup(cache, repository):
+    """First lookup loads the whole matrix once"""
+    assert cache.get(SLAClass.LONG, "deploy") is not None
+    assert cache.get(SLAClass.MEDIUM, "modify") is not None
+    assert cache.get_statistics()["loads"] == 1
+    assert cache.get_statistics()["policies"] == 9
+
+
+def test_unknown_policy_returns_none(cache):
+    assert cache.get(SLAClass.FAST, "unknown") is None
+    assert cache.get_statistics()["misses"] == 1
+
+
+def test_miss_is_cached_per_version_without_queries(cache, repository):
+    """Unknown keys never reach the database; the version reload fills in new rows"""
+    added = repository.policies.pop()
+    cache.load()
+    repository.policies.append(added)  # version poll has not run yet
+    queries = repository.queries
+
+    action_class = added.action_class.value
+    for _ in range(100):
+        assert cache.get(added.sla_class, action_class) is None
+        assert cache.get(SLAClass.FAST, "never-configured") is None
+    assert repository.queries == queries
+    stats = cache.get_statistics()
+    assert (stats["misses"], stats["missing_keys"], stats["loads"]) == (200, 2, 1)
+
+    repository.version = 2
+    assert cache.refresh_if_changed() is True
+    assert cache.get(added.sla_class, action_class) == added
+    assert cache.get(SLAClass.FAST, "never-configured") is None
+    assert cache.get_statistics()["missing_keys"] == 1
+
+
+def test_warmup_loads_once_and_tolerates_failure(cache, repository):
+    assert cache.warmup() is True
+    queries = repository.queries
+    assert cache.get(SLAClass.FAST, "read") is not None
+    assert repository.queries == queries
+
+    def unavailable():
+        raise ConnectionError("database unavailable")
+
+    cold = TimeoutPolicyCache(repository, enable_background_refresh=False)
+    repository.list_timeout_policies = unavailable
+    assert cold.warmup() is False
+    del repository.list_timeout_policies
+    assert cold.get(SLAClass.FAST, "read") is not None  # first lookup retries
+
+
+def test_executor_shares_the_warmed_cache():
+    executor = StageEExecutor("postgresql://shared-cache-test")
+    assert executor.policy_cache is get_timeout_policy_cache("postgresql://shared-cache-test")
+    assert get_timeout_policy_cache("postgresql://other") is not executor.policy_cache
+
+
+def test_get_for_sla(cache):
+    policies = cache.get_for_sla(SLAClass.MEDIUM)
+    assert set(policies) == {"read", "modify", "deploy"}
+
+
+def test_priority_for_sla(cache):
+    assert cache.priority_for(SLAClass.FAST) == 1
+    assert cache.priority_for(SLAClass.MEDIUM) == 5
+    assert cache.priority_for(SLAClass.LONG) == 10
+
+
+def test_refresh_only_on_version_change(cache, repository):
+    cache.load()
+    assert cache.refresh_if_changed() is False
+
+    repository.policies = [
+        p.model_copy(update={"max_attempts": 7}) for p in repository.policies
+    ]
+    repository.version = 2
+
+    assert cache.refresh_if_changed() is True
+    assert cache.version == 2
+    assert cache.get(SLAClass.FAST, "read").max_attempts == 7
+
+
+def test_invalidate_reloads(cache, repository):
+    cache.load()
+    cache.invalidate()
+    assert cache.get_statistics()["loads"] == 2
+
+
+def test_background_refresh_picks_up_new_version(repository):
+    cache = TimeoutPolicyCache(repository, refresh_interval_seconds=0.01)
+    try:
+        cache.load()
+        repository.version = 5
+        deadline = time.time() + 2
+        while cache.version != 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert cache.version == 5
+    finally:
+        cache.stop()
+
+
+# ============================================================================
+# ENQUEUE BENCHMARK
+# ============================================================================
+
+class UncachedPolicies:
+    """Pre-cache behaviour: one policy query per lookup"""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def get(self, sla_class, action_class):
+        return self.repository.get_timeout_policy(sla_class, action_class)
+
+    def priority_for(self, sla_class):
+        return {SLAClass.FAST: 1, SLAClass.MEDIUM: 5}.get(sla_class, 10)
+
+
+def test_enqueue_latency_with_policy_cache():
+    """Enqueue no longer pays a policy query per request"""
+    iterations = 50
+    repository = FakeRepository(query_latency_seconds=0.002)
+
+    executor = StageEExecutor("postgresql://unused")
+    executor.repository = repository
+
+    async def enqueue_all():
+        for _ in range(iterations):
+            await executor._enqueue_execution(_execution())
+
+    executor.policy_cache = UncachedPolicies(repository)
+    start = time.perf_counter()
+    asyncio.run(enqueue_all())
+    uncached_ms = (time.perf_counter() - start) * 1000
+    assert repository.queries == iterations
+
+    executor.policy_cache = TimeoutPolicyCache(repository, enable_background_refresh=False)
+    executor.policy_cache.load()
+    queries_before = repository.queries
+    start = time.perf_counter()
+    asyncio.run(enqueue_all())
+    cached_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nenqueue x{iterations}: uncached={uncached_ms:.1f}ms cached={cached_ms:.1f}ms")
+
+    assert repository.queries == queries_before
+    assert cached_ms < uncached_ms
@@ -0,0 +1,316 @@
+"""
+Tool Index Retrieval Tests
+Single-statement candidate retrieval (vector / keyword / always-include
+merged, de-duplicated and ranked in SQL) over a pooled connection, parity
+with the previous three-query union, and a latency benchmark at 1k and 50k
+tool_index rows
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from pipeline.services.catalog_pool import CatalogConnectionPool
+from pipeline.services.tool_index_service import ToolIndexService
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+DIM = 64
+PLATFORMS = ["linux", "windows", "multi-platform", "network"]
+WORDS = ["disk", "service", "network", "process", "memory", "user", "log", "cert"]
+
+CONNECT_COST = 0.003  # new TCP connection + auth
+ROUND_TRIP = 0.0003
+
+
+class FakeToolIndex:
+    """In-memory tool_catalog.tool_index evaluating the service's queries"""
+
+    def __init__(self, rows, seed=0):
+        rng = np.random.default_rng(seed)
+        self.ids = ["asset-query"] + [f"tool-{i:05d}" for i in range(rows - 1)]
+        self.ids.sort()
+        self.names = [f"{i.replace('-', ' ')} {WORDS[n % len(WORDS)]}" for n, i in enumerate(self.ids)]
+        self.descs = [f"manage {WORDS[(n * 3) % len(WORDS)]} on hosts" for n in range(rows)]
+        self.platforms = np.array([PLATFORMS[n % len(PLATFORMS)] for n in range(rows)])
+        self.tags = [[WORDS[n % len(WORDS)], WORDS[(n + 1) % len(WORDS)]] for n in range(rows)]
+        # Clustered embeddings: a query near a centre has many neighbours
+        # around the similarity threshold
+        self.centres = rng.standard_normal((20, DIM)).astype(np.float32)
+        self.centres /= np.linalg.norm(self.centres, axis=1, keepdims=True)
+        spread = rng.uniform(0.05, 0.3, size=(rows, 1)).astype(np.float32)
+        emb = self.centres[np.arange(rows) % 20] + spread * rng.standard_normal((rows, DIM)).astype(np.float32)
+        self.emb = emb / np.linalg.norm(emb, axis=1, keepdims=True)
+        self.position = {tool_id: n for n, tool_id in enumerate(self.ids)}
+
+    def query_embedding(self, n, noise=0.05, seed=1):
+        rng = np.random.default_rng(seed + n)
+        q = self.centres[n % 20] + noise * rng.standard_normal(DIM).astype(np.float32)
+        return (q / np.linalg.norm(q)).tolist()
+
+    def row(self, n, similarity=None):
+        row = {
+            "id": self.ids[n], "name": self.names[n], "desc_short": self.descs[n],
+            "platform": str(self.platforms[n]), "tags": self.tags[n], "cost_hint": "low",
+        }
+        if similarity is not None:
+            row["similarity"] = float(similarity)
+        return row
+
+    def _platform_mask(self, platform):
+        if platform is None:
+            return np.ones(len(self.ids), dtype=bool)
+        return (self.platforms == platform) | (self.platforms == "multi-platform")
+
+    def vector(self, emb, platform, top_k, threshold, threshold_first):
+        sims = self.emb @ np.asarray(emb, dtype=np.float32)
+        mask = self._platform_mask(platform)
+        if threshold_first:
+            mask &= sims >= threshold
+        candidates = np.flatnonzero(mask)
+        order = candidates[np.argsort(-sims[candidates], kind="stable")][:top_k]
+        if not threshold_first:
+            order = order[sims[order] >= threshold]
+        return [(n, sims[n]) for n in order]
+
+    def keyword(self, keywords, platform, top_k):
+        mask = self._platform_mask(platform)
+        hits = []
+        for n in np.flatnonzero(mask):
+            name, desc = self.names[n].lower(), self.descs[n].lower()
+            if any(kw in name or kw in desc or kw in self.tags[n] for kw in keywords):
+                hits.append(n)
+                if len(hits) == top_k:
+                    break
+        return hits
+
+    def always(self, ids):
+        return [self.position[i] for i in ids if i in self.position]
+
+    def execute(self, sql, params):
+        if sql.lstrip().startswith("WITH"):
+            return self._retrieval(params)
+        if "<=>" in sql:
+            if len(params) == 6:
+                emb, platform, _, threshold, _, top_k = params
+            else:
+                (emb, _, threshold, _, top_k), platform = params, None
+            return [self.row(n, s) for n, s in self.vector(emb, platform, top_k, threshold, True)]
+        if "ILIKE" in sql:
+            keywords = params[2:-1:3] if len(params) % 3 == 1 else params[2:-2:3]
+            platform = None if len(params) % 3 == 1 else params[-2]
+            return [self.row(n) for n in self.keyword(keywords, platform, params[-1])]
+        return [self.row(n) for n in self.always(params[0])]
+
+    def _retrieval(self, params):
+        platform = params.get("platform")
+        hits = []
+        if "emb" in params:
+            hits += [(n, s, 0) for n, s in self.vector(
+                params["emb"], platform, params["vector_k"], params["threshold"], False)]
+        if "keywords" in params:
+            hits += [(n, None, 1) for n in self.keyword(params["keywords"], platform, params["keyword_k"])]
+        hits += [(n, None, 2) for n in self.always(params["always"])]
+
+        ranked = {}
+        for n, similarity, source in sorted(hits, key=lambda h: (self.ids[h[0]], h[2])):
+            ranked.setdefault(n, similarity)  # DISTINCT ON (id) ... ORDER BY id, source
+        rows = sorted(ranked.items(), key=lambda h: (h[1] is None, -(h[1] or 0), self.names[h[0]]))
+        return [{**self.row(n), "similarity": None if s is None else float(s)} for n, s in rows[:params["max_rows"]]]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def execute(self, sql, params=None):
+        time.sleep(ROUND_TRIP)
+        self.conn.queries.append(sql)
+        self.rows = self.conn.table.execute(sql, params)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, table, log):
+        time.sleep(CONNECT_COST)
+        self.table = table
+        self.queries = log
+        self.closed = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return 0
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def _service(table):
+    service = ToolIndexService()
+    service.retrieval_mode = "vector"  # hybrid retrieval: tests/test_hybrid_retrieval.py
+    service.queries, service.connects = [], 0
+
+    def connect():
+        service.connects += 1
+        return FakeConnection(table, service.queries)
+
+    service._pool = CatalogConnectionPool("", service._pool_config, connect=connect)
+    return service
+
+
+class LegacyToolIndexService(ToolIndexService):
+    """Previous retrieval: three queries, each on a new connection, union in Python"""
+
+    def __init__(self, table):
+        super().__init__()
+        self.retrieval_mode = "vector"
+        self.queries, self.connects = [], 0
+        self._table = table
+
+    def _get_connection(self):
+        self.connects += 1
+        return FakeConnection(self._table, self.queries)
+
+    def _connection(self):
+        from contextlib import closing
+        return closing(self._get_connection())
+
+    def retrieve_candidates(self, query_text, query_embedding=None, platform_filter=None, max_rows=None):
+        if max_rows is None:
+            _, max_rows = self.calculate_token_budget()
+        candidates_dict = {}
+        if query_embedding:
+            for result in self.vector_search(query_embedding, platform_filter=platform_filter,
+                                             top_k=self.VECTOR_TOP_K):
+                candidates_dict[result["id"]] = result
+        if not query_embedding:
+            for result in self.keyword_search(query_text, platform_filter=platform_filter,
+                                              top_k=self.KEYWORD_TOP_K):
+                candidates_dict.setdefault(result["id"], result)
+        for result in self.get_always_include_tools():
+            candidates_dict.setdefault(result["id"], result)
+        candidates = list(candidates_dict.values())
+        if query_embedding and candidates and "similarity" in candidates[0]:
+            candidates.sort(key=lambda x: x.get("similarity", 0), reverse=True)
+        else:
+            candidates.sort(key=lambda x: x["name"])
+        return candidates[:max_rows]
+
+
+# ============================================================================
+# QUERY TESTS
+# ============================================================================
+
+def test_retrieval_is_one_statement():
+    service = ToolIndexService()
+    service.retrieval_mode = "vector"
+    sql, params = service.build_retrieval_query("check disk usage", [0.1] * DIM, "linux", 20)
+
+    assert sql.count("tool_catalog.tool_index") == 3  # vector CTE, always-include, final join
+    assert "DISTINCT ON (id)" in sql and "keyword_hits" not in sql
+    assert "ORDER BY r.similarity DESC NULLS LAST, t.name" in sql
+    assert (params["platform"], params["max_rows"], params["always"]) == ("linux", 20, ["asset-query"])
+
+    sql, params = service.build_retrieval_query("check disk usage on web01", None, None, 20)
+    assert "vector_hits" not in sql and "keyword_hits" in sql
+    assert params["keywords"] == ["check", "disk", "usage", "web01"]
+    assert params["patterns"][0] == "%check%"
+
+    sql, params = service.build_retrieval_query("ok", None, None, 20)
+    assert "keyword_hits" not in sql and "ANY(%(always)s)" in sql
+
+
+@pytest.mark.parametrize("platform", [None, "linux"])
+def test_vector_retrieval_matches_three_query_union(platform):
+    table = FakeToolIndex(1000)
+    service, legacy = _service(table), LegacyToolIndexService(table)
+
+    for n in range(0, 1000, 97):
+        emb = table.query_embedding(n)
+        expected = legacy.retrieve_candidates("anything", emb, platform, max_rows=15)
+        assert service.retrieve_candidates("anything", emb, platform, max_rows=15) == expected
+    assert "asset-query" in [c["id"] for c in expected]
+    assert "similarity" not in next(c for c in expected if c["id"] == "asset-query")
+
+
+@pytest.mark.parametrize("platform", [None, "windows"])
+def test_keyword_retrieval_matches_three_query_union(platform):
+    table = FakeToolIndex(1000)
+    service, legacy = _service(table), LegacyToolIndexService(table)
+
+    for query in ["restart the service", "disk and memory usage", "cert expiry", "hi"]:
+        assert service.retrieve_candidates(query, None, platform, max_rows=8) == \
+            legacy.retrieve_candidates(query, None, platform, max_rows=8)
+
+
+def test_one_pooled_connection_and_query_per_retrieval():
+    table = FakeToolIndex(1000)
+    service, legacy = _service(table), LegacyToolIndexService(table)
+    emb = table.query_embedding(5)
+
+    for _ in range(10):
+        service.retrieve_candidates("x", emb)
+        legacy.retrieve_candidates("x", emb)
+
+    assert (len(service.queries), service.connects) == (10, 2)  # pool min_size
+    assert (len(legacy.queries), legacy.connects) == (20, 20)
+    assert service.pool.get_statistics()["in_use"] == 0
+
+
+def test_database_errors_return_no_candidates():
+    service = _service(FakeToolIndex(10))
+
+    def broken(sql, params):
+        raise RuntimeError("relation does not exist")
+
+    service.pool._idle[-1].conn.table = type("Broken", (), {"execute": staticmethod(broken)})()
+    assert service.retrieve_candidates("x", [0.0] * DIM) == []
+    assert service.pool.get_statistics()["in_use"] == 0
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def test_retrieval_latency_benchmark():
+    """Vector retrieval at 1k and 50k rows: 3 connections + queries vs 1 pooled statement"""
+    lines = []
+    for rows in (1000, 50_000):
+        table = FakeToolIndex(rows)
+        service, legacy = _service(table), LegacyToolIndexService(table)
+        queries = [table.query_embedding(n) for n in range(0, rows, rows // 25)]
+
+        def timed(svc):
+            started = time.perf_counter()
+            for emb in queries:
+                svc.retrieve_candidates("check disk usage", emb, "linux")
+            return (time.perf_counter() - started) / len(queries) * 1000
+
+        legacy_ms, single_ms = timed(legacy), timed(service)
+        lines.append(f"{rows} rows: 3 queries={legacy_ms:.2f}ms, single statement={single_ms:.2f}ms")
+        assert single_ms < legacy_ms
+
+    print(f"\nms/retrieval ({CONNECT_COST * 1000:.0f} ms connect, {ROUND_TRIP * 1000:.1f} ms RTT): "
+          + "; ".join(lines))
@@ -0,0 +1,248 @@
+"""
+Vectorized Deterministic Scorer Tests
+Feature-matrix normalization and scoring against the per-candidate path,
+argpartition top-k, policy masks, orchestrator wiring and throughput at
+10 / 100 / 10k candidates
+"""
+
+import random
+import time
+
+import numpy as np
+import pytest
+
+from pipeline.stages.stage_b.deterministic_scorer import (
+    DeterministicScorer, FeatureWeights, PreferenceMode, ScoredCandidate,
+)
+from pipeline.stages.stage_b.feature_normalizer import FEATURE_NAMES, FeatureNormalizer
+from pipeline.stages.stage_b.hybrid_orchestrator import HybridOrchestrator
+from pipeline.stages.stage_b.policy_enforcer import PolicyConfig, PolicyEnforcer
+from tests.test_candidate_index import FakeLoader, _profiles
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _raw_features(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            'time_ms': rng.choice([10.0, 50.0, 51.0, 800.0, 60000.0, 90000.0, rng.uniform(1, 100000)]),
+            'cost': rng.choice([0.0, 10.0, 12.5, rng.uniform(0, 15)]),
+            'complexity': rng.uniform(-0.2, 1.2),
+            'accuracy': rng.uniform(0, 1),
+            'completeness': rng.choice([0.5, rng.uniform(0, 1.1)]),
+        }
+        for _ in range(count)
+    ]
+
+
+def _candidates(count, seed=7):
+    normalizer = FeatureNormalizer()
+    return [
+        {'tool_name': f'tool_{i}', 'pattern': 'default', 'features': normalizer.normalize_features(raw)}
+        for i, raw in enumerate(_raw_features(count, seed))
+    ]
+
+
+def _loop_score(candidates, weights):
+    """Per-candidate weighted sum and stable sort, as scored before the matrix"""
+    scored = []
+    for candidate in candidates:
+        features = candidate['features']
+        total = (
+            weights.time * features.get('time_ms', 0.5)
+            + weights.cost * features.get('cost', 0.5)
+            + weights.complexity * features.get('complexity', 0.5)
+            + weights.accuracy * features.get('accuracy', 0.5)
+            + weights.completeness * features.get('completeness', 0.5)
+        )
+        scored.append((candidate['tool_name'], total))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored
+
+
+def _legacy_score_candidates(scorer, candidates, weights):
+    """The scorer's previous implementation: one candidate at a time"""
+    scored_candidates = []
+    for candidate in candidates:
+        features = candidate.get('features', {})
+        contributions = {
+            'time': weights.time * features.get('time_ms', 0.5),
+            'cost': weights.cost * features.get('cost', 0.5),
+            'complexity': weights.complexity * features.get('complexity', 0.5),
+            'accuracy': weights.accuracy * features.get('accuracy', 0.5),
+            'completeness': weights.completeness * features.get('completeness', 0.5),
+        }
+        total_score = sum(contributions.values())
+        justification = scorer._generate_justification(
+            candidate.get('tool_name', 'unknown'), candidate.get('pattern', 'default'),
+            total_score, features, contributions, weights,
+        )
+        scored_candidates.append(ScoredCandidate(
+            tool_name=candidate.get('tool_name', 'unknown'), pattern_name=candidate.get('pattern', 'default'),
+            total_score=total_score, feature_scores=features, weighted_contributions=contributions,
+            justification=justification, raw_features=candidate.get('raw_features', {}),
+        ))
+    scored_candidates.sort(key=lambda x: x.total_score, reverse=True)
+    return scored_candidates
+
+
+# ============================================================================
+# NORMALIZATION AND SCORING PARITY
+# ============================================================================
+
+def test_normalize_matrix_matches_normalize_features():
+    normalizer = FeatureNormalizer()
+    raw = _raw_features(500) + [{'time_ms': float('nan'), 'cost': float('nan'), 'complexity': 0.5,
+                                 'accuracy': 2.0, 'completeness': -1.0}]
+
+    matrix = normalizer.normalize_matrix([[r[name] for name in FEATURE_NAMES] for r in raw])
+    expected = np.array([[normalizer.normalize_features(r)[name] for name in FEATURE_NAMES] for r in raw])
+
+    assert matrix.dtype == np.float32 and matrix.shape == (501, 5)
+    np.testing.assert_allclose(matrix, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("mode", list(PreferenceMode))
+def test_scores_match_per_candidate_loop(mode):
+    candidates = _candidates(300)
+    weights = FeatureWeights.from_mode(mode)
+
+    scored = DeterministicScorer().score_candidates(candidates, mode)
+    expected = _loop_score(candidates, weights)
+
+    assert [s.total_score for s in scored] == pytest.approx([t for _, t in expected], abs=1e-6)
+    assert {s.tool_name for s in scored} == {name for name, _ in expected}
+    for candidate in scored:
+        assert sum(candidate.weighted_contributions.values()) == pytest.approx(candidate.total_score, abs=1e-6)
+
+
+def test_breakdown_matches_previous_scorer():
+    scorer = DeterministicScorer()
+    candidates = _candidates(200, seed=11)
+    weights = FeatureWeights.from_mode(PreferenceMode.ACCURATE)
+
+    scored = scorer.score_candidates(candidates, PreferenceMode.ACCURATE)
+    legacy = _legacy_score_candidates(scorer, candidates, weights)
+
+    assert [s.tool_name for s in scored] == [s.tool_name for s in legacy]
+    for new, old in zip(scored, legacy):
+        assert new.weighted_contributions == pytest.approx(old.weighted_contributions, abs=1e-6)
+        assert new.feature_scores is old.feature_scores
+        assert new.justification.split(" | ")[1:] == old.justification.split(" | ")[1:]
+
+
+def test_missing_features_default_and_ties_keep_input_order():
+    candidates = [
+        {'tool_name': 'a', 'features': {}},
+        {'tool_name': 'b', 'features': {'accuracy': 0.9}},
+        {'tool_name': 'c', 'features': {}},
+        {'tool_name': 'd', 'features': {}},
+    ]
+    scored = DeterministicScorer().score_candidates(candidates)
+    assert [s.tool_name for s in scored] == ['b', 'a', 'c', 'd']
+    assert scored[1].total_score == pytest.approx(0.5)
+    assert scored[1].pattern_name == 'default'
+
+
+# ============================================================================
+# TOP-K AND MASKS
+# ============================================================================
+
+def test_top_k_is_prefix_of_full_ranking():
+    scorer = DeterministicScorer()
+    # Quantized features: plenty of ties, including at the cut-off
+    candidates = [
+        {'tool_name': f'tool_{i}', 'features': {name: (i * (j + 3)) % 4 / 4 for j, name in enumerate(FEATURE_NAMES)}}
+        for i in range(200)
+    ]
+    full = [s.tool_name for s in scorer.score_candidates(candidates, PreferenceMode.FAST)]
+
+    for k in (1, 2, 5, 17, 199, 200, 500):
+        top = scorer.score_candidates(candidates, PreferenceMode.FAST, top_k=k)
+        assert [s.tool_name for s in top] == full[:k]
+    assert scorer.score_candidates(candidates, top_k=0) == []
+
+
+def test_policy_mask_matches_enforce_policies():
+    enforcer = PolicyEnforcer(PolicyConfig(max_cost=1.0, available_permissions={'read'}))
+    profiles = [
+        {'cost': 0.5, 'production_safe': True},
+        {'cost': 2.0, 'production_safe': True},
+        {'cost': 0.1},
+        {'cost': 0.2, 'production_safe': True, 'required_permissions': ['admin']},
+        {'cost': 0.3, 'production_safe': True, 'allowed_environments': ['staging']},
+        {'cost': 1.0, 'production_safe': True, 'required_permissions': ['read']},
+    ]
+    candidates = [{'tool_name': f'tool_{i}', 'profile': p} for i, p in enumerate(profiles)]
+
+    mask = enforcer.allowed_mask(candidates)
+    assert mask.tolist() == [enforcer.enforce_policies(c).allowed for c in candidates]
+    assert mask.tolist() == [True, False, False, False, False, True]
+
+
+def test_mask_excludes_candidates_from_ranking():
+    candidates = _candidates(50)
+    mask = np.arange(50) % 3 == 0
+
+    scored = DeterministicScorer().score_candidates(candidates, mask=mask)
+    expected = _loop_score([c for c, ok in zip(candidates, mask) if ok], FeatureWeights())
+    assert [s.tool_name for s in scored] == [name for name, _ in expected]
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_ranks_from_feature_matrix():
+    orchestrator = HybridOrchestrator(profile_loader=FakeLoader(_profiles(40)))
+    context = {'N': 100, 'cost_limit': 1000}
+
+    result = await orchestrator.select_tool("list services", ["capability_1"], context)
+
+    candidates = orchestrator.candidate_enumerator.enumerate_candidates(["capability_1"], context)
+    normalizer = FeatureNormalizer()
+    expected = _loop_score([
+        {'tool_name': c.tool_name, 'features': normalizer.normalize_features({
+            'time_ms': c.estimated_time_ms, 'cost': c.estimated_cost, 'complexity': c.complexity,
+            'accuracy': c.accuracy, 'completeness': c.completeness,
+        })}
+        for c in candidates
+    ], FeatureWeights.from_mode(orchestrator.preference_detector.detect_preference("list services")))
+
+    assert result.num_candidates == len(candidates)
+    assert result.final_score == pytest.approx(expected[0][1], abs=1e-6)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+@pytest.mark.parametrize("candidate_count", [10, 100, 10000])
+def test_scoring_throughput_benchmark(candidate_count):
+    """Per-candidate loop vs matrix scoring (full ranking and top 4)"""
+    candidates = _candidates(candidate_count)
+    scorer = DeterministicScorer()
+    weights = FeatureWeights.from_mode(PreferenceMode.FAST)
+    repeats = max(1, 2000 // candidate_count)
+
+    def timed(fn):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - started) / repeats
+
+    loop_s = timed(lambda: _legacy_score_candidates(scorer, candidates, weights))
+    full_s = timed(lambda: scorer.score_candidates(candidates, PreferenceMode.FAST))
+
+    features = scorer.build_feature_matrix(candidates)
+    top_s = timed(lambda: scorer.score_candidates(candidates, PreferenceMode.FAST, features=features, top_k=4))
+    rank_s = timed(lambda: scorer.rank(scorer.score_matrix(features, weights.as_array()), top_k=4))
+
+    print(
+        f"\n{candidate_count} candidates: loop={candidate_count / loop_s:,.0f}/s, "
+        f"matrix full={candidate_count / full_s:,.0f}/s, matrix top-4={candidate_count / top_s:,.0f}/s, "
+        f"rank only={candidate_count / rank_s:,.0f}/s"
+    )
+
+    if candidate_count >= 10000:
+        assert top_s < loop_s / 10